@@ -23,7 +23,7 @@ try:
     from source.components.game_customizer import GameCustomizer
     from source.ui.sidebar import render_sidebar
     from source.ui.story_selector import render_story_selector
-    from source.ui.chat_interface import render_chat_interface
+    from source.ui.chat_interface import render_chat_interface, get_chat_history
     from source.ui.story_viewer import render_story_viewer
     from source.ui.info_tabs import render_info_tabs
     from source.ui.system_management import render_system_management
@@ -39,7 +39,7 @@ except ImportError as e:
 def initialize_session_state():
     """세션 상태 초기화"""
     defaults = {
-        'chat_history': [],
+        'chat_history': None,
         'current_game_data': None,
         'current_story_name': None,
         'customizer': None,
@@ -51,6 +51,12 @@ def initialize_session_state():
     for key, default_value in defaults.items():
         if key not in st.session_state:
             st.session_state[key] = default_value
+    
+    # 채팅 기록은 최근 메시지만 보관하는 제한된 기록으로 유지
+    get_chat_history()
+    
+    # 세션별 커스터마이저는 가볍게 유지 (LLM/스레드 풀은 프로세스 전역 공유)
+    if st.session_state.customizer is None:
         st.session_state.customizer = GameCustomizer()
         
     # 편집 모드로 고정
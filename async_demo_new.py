@@ -13,10 +13,11 @@ import json
 # 로컬 모듈 임포트
 from source.components.game_customizer import GameCustomizer
 from source.utils.async_handler import AsyncTaskManager, run_async_in_streamlit
-from source.models.llm_handler import (
-    initialize_llm_async, 
-    generate_game_data_async,
-    generate_multiple_scenarios_async
+from source.models.llm_handler import initialize_llm_async
+from source.ui.demo_llm import (
+    generate_story_with_metadata,
+    generate_stories_with_metadata,
+    stream_story_to_container
 )
 
 
@@ -110,7 +111,7 @@ def demo_async_generation(prompt: str):
             status_text.info("🎯 스토리를 생성하는 중...")
             progress_bar.progress(0.5)
             
-            result, metadata = await generate_game_data_async(prompt, llm)
+            result, metadata = await generate_story_with_metadata(prompt, llm)
             
             # 완료
             status_text.success("✅ 생성 완료!")
@@ -202,7 +203,7 @@ def demo_batch_execution(prompts: List[str], max_concurrent: int):
             # 배치 처리
             status_text.info(f"🎯 {len(prompts)}개 프롬프트를 병렬 처리 중...")
             
-            results = await generate_multiple_scenarios_async(
+            results = await generate_stories_with_metadata(
                 prompts, 
                 llm, 
                 max_concurrent=max_concurrent
@@ -289,9 +290,8 @@ def demo_streaming_execution(prompt: str):
         
         # 스트리밍 실행 
         async def streaming_task():
-            from source.models.llm_handler import generate_game_data_stream
             llm = await initialize_llm_async()
-            return await generate_game_data_stream(prompt, streaming_container, llm)
+            return await stream_story_to_container(prompt, streaming_container, llm)
         
         result, metadata = run_async_in_streamlit(streaming_task())
         
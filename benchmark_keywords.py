@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+키워드 검사 성능 벤치마킹 스크립트
+
+기존 방식(모듈마다 키워드 목록을 따로 순회)과 통합 키워드 엔진(한 번 스캔 후 결과 공유)을
+짧은 채팅 메시지와 긴 생성 스토리(약 65,000자)에 대해 비교하고, 결과가 같은지 확인합니다.
+"""
+
+import re
+import sys
+import time
+import json
+import statistics
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from source.utils.keyword_engine import keyword_engine, KEYWORD_CATEGORIES, CHAPTER_ID_KEYWORDS
+from source.utils.security import SecurityValidator
+from source.utils.chatbot_helper import ChatbotHelper
+from source.components.story_editor import StoryEditor
+
+
+class LegacyKeywordChecks:
+    """통합 엔진 도입 전의 키워드 검사 방식 (비교 기준)"""
+
+    banned_patterns = SecurityValidator().banned_patterns
+
+    def security(self, content: str) -> List[str]:
+        for pattern in self.banned_patterns:
+            if re.search(pattern, content, re.IGNORECASE):
+                break
+        content_lower = content.lower()
+        return [word for word in KEYWORD_CATEGORIES["security.inappropriate"] if word in content_lower]
+
+    def intent(self, user_input: str) -> Dict:
+        user_input_lower = user_input.lower()
+        intent = {"type": "general", "keywords": [], "scope": "specific"}
+        for category, intent_type in (
+            ("intent.character", "character_modification"), ("intent.setting", "setting_modification"),
+            ("intent.event", "event_modification"), ("intent.dialogue", "dialogue_modification")
+        ):
+            keywords = KEYWORD_CATEGORIES[category]
+            if any(keyword in user_input_lower for keyword in keywords):
+                intent["type"] = intent_type
+                intent["keywords"].extend([kw for kw in keywords if kw in user_input_lower])
+        if any(word in user_input_lower for word in KEYWORD_CATEGORIES["scope.all"]):
+            intent["scope"] = "all"
+        for i in range(1, 11):
+            if f"{i}턴" in user_input_lower or f"{i}일" in user_input_lower:
+                intent["target_turn"] = i
+                break
+        difficulty = KEYWORD_CATEGORIES["difficulty"]
+        if any(keyword in user_input_lower for keyword in difficulty):
+            intent["keywords"].extend([kw for kw in difficulty if kw in user_input_lower])
+        any(word in user_input_lower for word in KEYWORD_CATEGORIES["sentiment.positive"])
+        any(word in user_input_lower for word in KEYWORD_CATEGORIES["sentiment.negative"])
+        return intent
+
+    def request_scope(self, user_input: str) -> tuple:
+        user_input_lower = user_input.lower()
+        valid_score = sum(1 for keyword in KEYWORD_CATEGORIES["request.valid"] if keyword in user_input_lower)
+        invalid_score = sum(1 for keyword in KEYWORD_CATEGORIES["request.invalid"] if keyword in user_input_lower)
+        return valid_score, invalid_score
+
+    def modification_type(self, user_request: str) -> str:
+        request_lower = user_request.lower()
+        for category in ("edit.character", "edit.setting", "edit.events", "edit.dialogue"):
+            if any(word in request_lower for word in KEYWORD_CATEGORIES[category]):
+                return category.split(".")[1]
+        return "general"
+
+    def content(self, content: str) -> List[str]:
+        content_lower = content.lower()
+        return [word for word in KEYWORD_CATEGORIES["content.inappropriate"] if word in content_lower]
+
+    def chapter(self, story_content: str) -> str:
+        story_lower = story_content.lower()
+        for keyword, chapter_id in CHAPTER_ID_KEYWORDS.items():
+            if keyword.lower() in story_lower:
+                return chapter_id
+        return "4444"
+
+
+SAMPLE_MESSAGES = [
+    "주인공 이름을 민수로 바꿔줘",
+    "3턴 이벤트를 더 재미있게 만들어줘",
+    "마법 왕국 배경을 더 신비롭게 수정해줘",
+    "모든 대사를 더 친근하게 해주세요",
+    "파이썬 코드 좀 알려줘",
+    "10턴 뉴스를 쉽게 바꿔줘, 주식 추천은 빼고",
+    "캐릭터 성격이 별로예요. 더 좋게 바꿔 주세요!",
+    "전쟁이나 폭력 장면은 없애줘",
+]
+
+
+def build_large_story(target_chars: int = 65000) -> str:
+    """약 target_chars 길이의 생성 스토리 JSON"""
+    turns = []
+    turn_number = 1
+    while len(json.dumps(turns, ensure_ascii=False)) < target_chars:
+        turns.append({
+            "turn_number": turn_number,
+            "result": "달빛 도둑이 마을 시장에 나타났어요. 상인들은 가게 문을 일찍 닫았고 아이들은 이야기를 나누었습니다. " * 3,
+            "news": "시장에 새로운 소식이 전해졌습니다. 빵집과 장난감 가게의 손님이 늘었다고 해요.",
+            "news_tag": "all",
+            "stocks": [{
+                "name": f"가게{index}",
+                "risk_level": "중위험",
+                "description": "마을 사람들이 자주 찾는 가게입니다.",
+                "before_value": 100,
+                "current_value": 110,
+                "expectation": "손님이 늘어 가치가 오를 것 같아요."
+            } for index in range(3)]
+        })
+        turn_number += 1
+    return json.dumps(turns, ensure_ascii=False)
+
+
+def measure(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """반복 실행 시간 (마이크로초)"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    return {"mean": statistics.mean(samples), "p50": statistics.median(samples), "min": min(samples)}
+
+
+def check_equivalence(legacy: LegacyKeywordChecks, messages: List[str], large_story: str) -> List[str]:
+    """통합 엔진 결과가 기존 방식과 같은지 확인"""
+    security = SecurityValidator()
+    chatbot = ChatbotHelper()
+    editor = StoryEditor()
+    mismatches = []
+
+    for message in messages:
+        scan = keyword_engine.scan(message)
+        if scan.get("security.inappropriate") != legacy.security(message):
+            mismatches.append(f"security: {message}")
+        intent = chatbot.analyze_user_intent(message, scan)
+        legacy_intent = legacy.intent(message)
+        if intent["type"] != legacy_intent["type"] or intent["keywords"] != legacy_intent["keywords"] \
+                or intent.get("target_turn") != legacy_intent.get("target_turn"):
+            mismatches.append(f"intent: {message}")
+        if (scan.count("request.valid"), scan.count("request.invalid")) != legacy.request_scope(message):
+            mismatches.append(f"request_scope: {message}")
+        if editor.analyze_modification_request(message, scan)["type"] != legacy.modification_type(message):
+            mismatches.append(f"modification_type: {message}")
+        security.validate_content_security(message, scan)
+
+    story_scan = keyword_engine.scan(large_story)
+    if story_scan.get("content.inappropriate") != legacy.content(large_story):
+        mismatches.append("content: large story")
+    chapter = next(
+        (chapter_id for keyword, chapter_id in CHAPTER_ID_KEYWORDS.items() if story_scan.contains(keyword.lower())),
+        "4444"
+    )
+    if chapter != legacy.chapter(large_story):
+        mismatches.append("chapter: large story")
+    return mismatches
+
+
+def main():
+    print("🚀 키워드 검사 성능 벤치마킹 시작")
+    print("=" * 50)
+
+    legacy = LegacyKeywordChecks()
+    large_story = build_large_story()
+    # 메모이즈 효과를 빼고 순수 스캔 비용만 비교
+    raw_scan = keyword_engine._scan
+
+    print(f"키워드 수: {len(keyword_engine.keywords)}개 / 범주 수: {len(KEYWORD_CATEGORIES)}개")
+    print(f"긴 스토리 길이: {len(large_story):,}자")
+
+    # 1. 결과 일치 확인
+    mismatches = check_equivalence(legacy, SAMPLE_MESSAGES, large_story)
+    print("\n📊 결과 일치 확인")
+    print("-" * 30)
+    print("✅ 기존 방식과 결과 동일" if not mismatches else f"❌ 불일치: {mismatches}")
+
+    # 2. 채팅 메시지 1건당 검사 비용 (보안 + 의도 + 범위 + 수정 유형)
+    def legacy_message_checks():
+        for message in SAMPLE_MESSAGES:
+            legacy.security(message)
+            legacy.intent(message)
+            legacy.request_scope(message)
+            legacy.modification_type(message)
+
+    def engine_message_checks():
+        for message in SAMPLE_MESSAGES:
+            scan = raw_scan(message)
+            scan.get("security.inappropriate")
+            scan.get("intent.character"), scan.get("intent.setting")
+            scan.get("intent.event"), scan.get("intent.dialogue")
+            scan.has("scope.all"), scan.count("request.valid"), scan.count("request.invalid")
+            scan.has("edit.character")
+
+    legacy_result = measure(legacy_message_checks, 2000)
+    engine_result = measure(engine_message_checks, 2000)
+    per_message = len(SAMPLE_MESSAGES)
+    print("\n📊 채팅 메시지 검사 (메시지당)")
+    print("-" * 30)
+    print(f"기존 방식:   {legacy_result['mean'] / per_message:.1f}µs")
+    print(f"통합 엔진:   {engine_result['mean'] / per_message:.1f}µs")
+    print(f"속도 향상:   {legacy_result['mean'] / engine_result['mean']:.1f}배")
+
+    # 3. 긴 생성 스토리 검사 (보안 + 콘텐츠 적절성 + chapterId)
+    def legacy_story_checks():
+        legacy.security(large_story)
+        legacy.content(large_story)
+        legacy.chapter(large_story)
+
+    def engine_story_checks():
+        scan = raw_scan(large_story)
+        scan.get("security.inappropriate"), scan.get("content.inappropriate"), scan.contains("달빛 도둑")
+
+    legacy_result = measure(legacy_story_checks, 50)
+    engine_result = measure(engine_story_checks, 50)
+    print("\n📊 긴 생성 스토리 검사")
+    print("-" * 30)
+    print(f"기존 방식:   {legacy_result['mean'] / 1000:.2f}ms (p50 {legacy_result['p50'] / 1000:.2f}ms)")
+    print(f"통합 엔진:   {engine_result['mean'] / 1000:.2f}ms (p50 {engine_result['p50'] / 1000:.2f}ms)")
+    print(f"속도 향상:   {legacy_result['mean'] / engine_result['mean']:.1f}배")
+
+    print("\n✅ 벤치마킹 완료")
+    print(f"테스트 시간: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+API 서버 시작(import) 성능 벤치마킹 스크립트
+
+새 인터프리터에서 `python -X importtime`으로 모듈을 불러와
+import 소요 시간, 가장 오래 걸린 최상위 패키지, import 직후 워커 RSS를 측정합니다.
+API 경로(main)가 Streamlit/LangChain을 불러오면 실패 코드로 종료하므로 CI 검사로도 사용할 수 있습니다.
+
+사용 예:
+    python benchmark_startup.py
+    python benchmark_startup.py --module main --module app --repeat 5 --json startup.json
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from datetime import datetime
+from typing import Dict, List
+
+# API 경로에서 불러오면 안 되는 패키지 (첫 LLM 호출 시점에 지연 로드됨)
+FORBIDDEN_PACKAGES = {
+    "main": ("streamlit", "langchain", "langchain_google_genai"),
+}
+
+_IMPORTTIME_PATTERN = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+# import 후 RSS(KB)를 표준 출력 마지막 줄로 출력
+_RSS_SNIPPET = """
+import importlib, sys
+importlib.import_module(sys.argv[1])
+rss_kb = 0
+try:
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                rss_kb = int(line.split()[1])
+except OSError:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(f'RSS_KB={rss_kb}')
+"""
+
+
+def measure_import(module: str) -> Dict:
+    """새 인터프리터에서 모듈 하나를 불러오고 import 통계를 수집합니다."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _RSS_SNIPPET, module],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)), env=env
+    )
+    if process.returncode != 0:
+        error_lines = [line for line in process.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError(f"{module} import 실패:\n" + "\n".join(error_lines[-10:]))
+
+    total_us = 0
+    top_level: Dict[str, int] = {}
+    loaded = set()
+    for line in process.stderr.splitlines():
+        match = _IMPORTTIME_PATTERN.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = int(match.group(1)), int(match.group(2)), match.group(3), match.group(4)
+        total_us += self_us
+        loaded.add(name)
+        # 들여쓰기 1칸 = 최상위에서 직접 불러온 패키지
+        if len(indent) <= 1:
+            package = name.split(".")[0]
+            top_level[package] = top_level.get(package, 0) + cumulative_us
+
+    rss_match = re.search(r'RSS_KB=(\d+)', process.stdout)
+    return {
+        "total_ms": total_us / 1000,
+        "rss_mb": int(rss_match.group(1)) / 1024 if rss_match else None,
+        "top_level_ms": {name: us / 1000 for name, us in top_level.items()},
+        "loaded": loaded
+    }
+
+
+def summarize(module: str, runs: List[Dict], top: int) -> Dict:
+    """반복 측정 결과 요약"""
+    totals = [run["total_ms"] for run in runs]
+    rss_values = [run["rss_mb"] for run in runs if run["rss_mb"] is not None]
+    packages: Dict[str, List[float]] = {}
+    for run in runs:
+        for name, ms in run["top_level_ms"].items():
+            packages.setdefault(name, []).append(ms)
+    slowest = sorted(
+        ((name, statistics.median(values)) for name, values in packages.items()),
+        key=lambda item: item[1], reverse=True
+    )[:top]
+    forbidden = sorted({
+        name for run in runs for name in run["loaded"]
+        for package in FORBIDDEN_PACKAGES.get(module, ())
+        if name == package or name.startswith(package + ".")
+    })
+    return {
+        "module": module,
+        "runs": len(runs),
+        "import_ms_p50": round(statistics.median(totals), 1),
+        "import_ms_min": round(min(totals), 1),
+        "rss_mb_p50": round(statistics.median(rss_values), 1) if rss_values else None,
+        "module_count": round(statistics.median(len(run["loaded"]) for run in runs)),
+        "slowest_packages": [{"package": name, "ms": round(ms, 1)} for name, ms in slowest],
+        "forbidden_imports": forbidden
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="import 시간/RSS 벤치마크")
+    parser.add_argument("--module", action="append", help="측정할 모듈 (기본값: main)")
+    parser.add_argument("--repeat", type=int, default=3, help="모듈별 반복 횟수")
+    parser.add_argument("--top", type=int, default=10, help="표시할 느린 패키지 수")
+    parser.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    args = parser.parse_args()
+    modules = args.module or ["main"]
+
+    print("🚀 시작 성능 벤치마킹 시작")
+    print("=" * 50)
+
+    summaries = []
+    for module in modules:
+        try:
+            runs = [measure_import(module) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return 2
+        summary = summarize(module, runs, args.top)
+        summaries.append(summary)
+
+        print(f"\n📊 {module}")
+        print("-" * 30)
+        print(f"import 시간:  {summary['import_ms_p50']:.1f}ms (최소 {summary['import_ms_min']:.1f}ms)")
+        if summary["rss_mb_p50"] is not None:
+            print(f"워커 RSS:     {summary['rss_mb_p50']:.1f}MB")
+        print(f"불러온 모듈:  {summary['module_count']}개")
+        print("느린 최상위 패키지:")
+        for item in summary["slowest_packages"]:
+            print(f"  {item['package']:<30} {item['ms']:>8.1f}ms")
+        if summary["forbidden_imports"]:
+            print(f"❌ API 경로에서 불러오면 안 되는 모듈: {', '.join(summary['forbidden_imports'][:10])}")
+        elif module in FORBIDDEN_PACKAGES:
+            print("✅ Streamlit/LangChain 미로드")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"measured_at": datetime.now().isoformat(), "results": summaries}, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.json}")
+
+    print("\n✅ 벤치마킹 완료")
+    print(f"테스트 시간: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    return 1 if any(summary["forbidden_imports"] for summary in summaries) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
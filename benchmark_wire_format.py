@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+스토리 편집 API 본문 형식 벤치마킹 스크립트
+
+저장된 스토리로 /edit-scenario 요청 본문을 형식별로 만들어
+전송 크기와 서버 쪽 복원(압축 해제 + 파싱) 시간을 비교합니다.
+
+- string: 기존 형식 (스토리를 JSON 문자열로 한 번 더 인코딩, 한글은 \\uXXXX 이스케이프)
+- array: 스토리를 배열 그대로 전송
+- array+gzip / array+zstd: 배열 형식 압축 (zstd는 zstandard 설치 시)
+- msgpack / msgpack+gzip: MessagePack (msgpack 설치 시)
+
+사용 예:
+    python benchmark_wire_format.py
+    python benchmark_wire_format.py --story saved_stories/game_scenario_magic_kingdom_20250609_181352.json --repeat 500
+"""
+
+import os
+import sys
+import glob
+import gzip
+import json
+import time
+import argparse
+import statistics
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+EDIT_REQUEST = "주인공 이름을 민수로 바꿔줘"
+
+
+def load_story(path: str) -> List[Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        story = json.load(f)
+    # 메타데이터와 함께 저장된 형식
+    if isinstance(story, dict) and "story_data" in story:
+        story = story["story_data"]
+        if isinstance(story, str):
+            story = json.loads(story)
+    return story
+
+
+def build_formats(story: List[Any]) -> Dict[str, Tuple[bytes, Callable[[bytes], List[Any]]]]:
+    """형식별 (요청 본문, 서버 쪽 복원 함수)"""
+    string_body = json.dumps({
+        "chapterId": "1111", "story": json.dumps(story), "editRequest": EDIT_REQUEST
+    }).encode("utf-8")
+    array_body = json.dumps({
+        "chapterId": "1111", "story": story, "editRequest": EDIT_REQUEST
+    }, ensure_ascii=False, separators=(',', ':')).encode("utf-8")
+
+    formats = {
+        "string": (string_body, lambda body: json.loads(json.loads(body)["story"])),
+        "array": (array_body, lambda body: json.loads(body)["story"]),
+        "array+gzip": (gzip.compress(array_body, 6), lambda body: json.loads(gzip.decompress(body))["story"])
+    }
+    if zstandard:
+        decompressor = zstandard.ZstdDecompressor()
+        formats["array+zstd"] = (
+            zstandard.ZstdCompressor(level=3).compress(array_body),
+            lambda body: json.loads(decompressor.decompress(body))["story"]
+        )
+    if msgpack:
+        packed = msgpack.packb({"chapterId": "1111", "story": story, "editRequest": EDIT_REQUEST}, use_bin_type=True)
+        formats["msgpack"] = (packed, lambda body: msgpack.unpackb(body, raw=False)["story"])
+        formats["msgpack+gzip"] = (
+            gzip.compress(packed, 6), lambda body: msgpack.unpackb(gzip.decompress(body), raw=False)["story"]
+        )
+    return formats
+
+
+def measure(body: bytes, decode: Callable[[bytes], List[Any]], repeat: int) -> float:
+    """복원 시간 중앙값(µs)"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        decode(body)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API 본문 형식별 크기/복원 시간 벤치마크")
+    parser.add_argument("--story", action="append", help="측정할 스토리 파일 (기본값: saved_stories/*.json)")
+    parser.add_argument("--repeat", type=int, default=200, help="형식별 복원 반복 횟수")
+    parser.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    args = parser.parse_args()
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    paths = args.story or sorted(glob.glob(os.path.join(base_dir, "saved_stories", "*.json")))
+    if not paths:
+        print("❌ 측정할 스토리 파일이 없습니다.")
+        return 2
+
+    print("🚀 본문 형식 벤치마킹 시작")
+    print("=" * 50)
+    if not zstandard:
+        print("ℹ️ zstandard 미설치 - zstd 생략")
+    if not msgpack:
+        print("ℹ️ msgpack 미설치 - MessagePack 생략")
+
+    results = []
+    for path in paths:
+        story = load_story(path)
+        formats = build_formats(story)
+        baseline_bytes = len(formats["string"][0])
+        baseline_us = None
+
+        print(f"\n📊 {os.path.basename(path)} ({len(story)}턴)")
+        print("-" * 30)
+        print(f"{'형식':<14} {'크기':>10} {'비율':>7} {'복원 시간':>12}")
+        for name, (body, decode) in formats.items():
+            if decode(body) != story:
+                print(f"❌ {name}: 복원 결과가 원본과 다릅니다.")
+                return 1
+            decode_us = measure(body, decode, args.repeat)
+            baseline_us = baseline_us or decode_us
+            results.append({
+                "story": os.path.basename(path),
+                "format": name,
+                "bytes": len(body),
+                "size_ratio": round(len(body) / baseline_bytes, 3),
+                "decode_us_p50": round(decode_us, 1),
+                "decode_ratio": round(decode_us / baseline_us, 3)
+            })
+            print(f"{name:<14} {len(body):>8,}B {len(body) / baseline_bytes:>6.0%} {decode_us:>9.1f}µs")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"measured_at": datetime.now().isoformat(), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.json}")
+
+    print("\n✅ 벤치마킹 완료")
+    print(f"테스트 시간: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,18 @@
 """
 FastAPI 기반 스토리 편집 API 서버
 """
+import copy
 import json
 import logging
 import sys
 import os
-from typing import Dict, Any
+import time
+from typing import Dict, Any, List, Optional, Tuple, Union
 
 # FastAPI 관련 import
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse, JSONResponse
+from pydantic import BaseModel, ValidationError
 import uvicorn
 
 # 현재 디렉토리를 Python 경로에 추가
@@ -20,11 +23,36 @@ sys.path.insert(0, current_dir)
 try:
     from source.models.llm_handler import (
         initialize_llm, initialize_llm_async, 
-        create_prompt_template, generate_game_data, generate_game_data_async
+        create_prompt_template, generate_game_data, generate_game_data_async, generate_game_data_stream,
+        connection_config
+    )
+    from source.utils.prompts import get_system_prompt, get_modification_instruction
+    from source.utils.story_chunker import (
+        should_chunk, edit_story_in_chunks, edit_story_per_turn
+    )
+    from source.utils.similarity_cache import similarity_cache, get_similarity_settings
+    from source.utils.request_analysis import analyze_request
+    from source.utils.keyword_engine import keyword_engine, CHAPTER_ID_KEYWORDS
+    from source.utils.model_router import model_router, story_result_is_valid, ROUTE_TIERS
+    from source.utils.config import (
+        load_api_key, get_model_settings, get_settings, settings_manager,
+        add_settings_listener, llm_settings_changed
+    )
+    from source.utils.async_handler import AsyncTaskManager, run_blocking
+    from source.utils.system_sampler import system_sampler
+    from source.utils.upstream_probe import upstream_probe
+    from source.utils.edit_sessions import edit_session_store
+    from source.utils.edit_channel import EditChannel, get_edit_channel_settings
+    from source.utils.stream_guard import make_guard_factory
+    from source.utils.wire_format import WireFormatMiddleware
+    from source.components.story_editor import StoryEditor
+    from source.utils.metrics import (
+        metrics_registry, http_request_duration, task_queue_depth
+    )
+    from source.utils.tracing import start_trace, finish_trace, span
+    from source.utils.token_budget import (
+        fit_prompt_to_budget, PromptBudgetExceeded, token_accountant, estimate_tokens
     )
-    from source.utils.prompts import get_system_prompt
-    from source.utils.config import load_api_key
-    from source.utils.async_handler import AsyncTaskManager
 except ImportError as e:
     print(f"모듈 로드 실패: {e}")
     sys.exit(1)
@@ -43,44 +71,137 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# 요청/응답 본문 압축(gzip/zstd)과 MessagePack 협상 (엔드포인트는 JSON만 다룸)
+app.add_middleware(WireFormatMiddleware)
+
 # 전역 변수
 llm_model = None
 prompt_template = None
 task_manager = None
 
 # 요청 모델 정의
+# 스토리는 턴 배열 그대로 또는 (기존 호환) JSON 문자열로 주고받음
+StoryPayload = Union[str, List[Any]]
+STORY_FORMATS = ("string", "array")
+
 class StoryEditRequest(BaseModel):
     chapterId: str
-    story: str
+    story: StoryPayload
     editRequest: str
+    latencyTier: Optional[str] = None  # fast | balanced | quality (없으면 요청 분석으로 자동 선택)
+    storyFormat: Optional[str] = None  # 응답 스토리 형식 string | array (없으면 요청과 같은 형식)
 
 class ScenarioResponse(BaseModel):
     chapterId: str
-    story: str
+    story: StoryPayload
+    isCustom: bool
+
+class CreateSessionRequest(BaseModel):
+    # story(원본 스토리), storyName(서버에 저장된 스토리), baseSessionId(기존 세션 복제) 중 하나
+    chapterId: Optional[str] = None
+    story: Optional[StoryPayload] = None
+    storyName: Optional[str] = None
+    baseSessionId: Optional[str] = None
+
+class SessionEditRequest(BaseModel):
+    editRequest: str
+    latencyTier: Optional[str] = None
+    baseVersion: Optional[int] = None  # 지정하면 세션 버전이 다를 때 409
+    includeStory: bool = True  # False면 버전/메타데이터만 응답 (스토리는 GET /sessions/{id}로 조회)
+    storyFormat: str = "string"  # 응답 스토리 형식 string | array
+
+class SessionEditResponse(BaseModel):
+    sessionId: str
+    chapterId: str
+    version: int
+    story: Optional[StoryPayload] = None
     isCustom: bool
 
 # 외부 백엔드 전송 기능 제거됨 - 클라이언트에게만 응답
 
 
-def run_llm_for_edit(original_story: str, edit_request: str) -> str:
+def on_settings_reload(previous, settings):
+    """설정 재로드 시 모델/API 키가 바뀌었으면 LLM 클라이언트를 교체합니다."""
+    global llm_model
+    if llm_model is not None and llm_settings_changed(previous, settings):
+        llm_model = initialize_llm()
+        logger.info(f"설정 변경으로 LLM 클라이언트 교체 (model={settings.model_name})")
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """엔드포인트별 처리 시간 기록 및 요청 단계 추적"""
+    start_time = time.perf_counter()
+    trace = start_trace(f"{request.method} {request.url.path}", request.headers.get("x-request-id"))
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        response.headers["Server-Timing"] = trace.server_timing_header()
+        response.headers["X-Request-ID"] = trace.request_id
+        return response
+    finally:
+        # 경로 파라미터별로 시계열이 늘어나지 않도록 라우트 템플릿 사용
+        route = request.scope.get("route")
+        endpoint = getattr(route, "path", "unmatched")
+        http_request_duration.observe(
+            time.perf_counter() - start_time,
+            endpoint=endpoint, method=request.method, status=str(status_code)
+        )
+        finish_trace(trace, endpoint=endpoint, status=status_code)
+
+
+def parse_story_payload(story: StoryPayload) -> Tuple[str, List[Any]]:
     """
-    기존 스토리를 편집하여 새로운 시나리오 데이터를 생성합니다.
+    요청 스토리를 (JSON 문자열, 턴 목록)으로 변환합니다.
+    배열로 받은 스토리는 이미 파싱된 상태이므로 다시 파싱하지 않고 압축 직렬화만 하며,
+    문자열로 받은 스토리는 받은 문자열을 그대로 사용합니다.
+    """
+    if isinstance(story, list):
+        if not story:
+            raise HTTPException(status_code=400, detail="원본 스토리는 비어있을 수 없습니다.")
+        return json.dumps(story, ensure_ascii=False, separators=(',', ':')), story
+    
+    if not story or not story.strip():
+        raise HTTPException(status_code=400, detail="원본 스토리는 비어있을 수 없습니다.")
+    try:
+        with span("parse_input"):
+            story_data = json.loads(story)
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="원본 스토리가 유효한 JSON 형식이 아닙니다.")
+    if not isinstance(story_data, list):
+        raise HTTPException(status_code=400, detail="원본 스토리 데이터는 배열 형태여야 합니다.")
+    return story, story_data
+
+
+def resolve_story_format(story_format: Optional[str], story: Any = None) -> str:
+    """응답 스토리 형식 (지정하지 않으면 요청 스토리와 같은 형식)"""
+    if story_format is None:
+        return "array" if isinstance(story, list) else "string"
+    if story_format not in STORY_FORMATS:
+        raise HTTPException(status_code=400, detail=f"storyFormat은 {', '.join(STORY_FORMATS)} 중 하나여야 합니다.")
+    return story_format
+
+
+def story_response_payload(story_data: List[Any], story_format: str) -> StoryPayload:
+    """응답 스토리 (array면 배열 그대로, string이면 한글을 보존한 압축 JSON 문자열)"""
+    if story_format == "array":
+        return story_data
+    return json.dumps(story_data, ensure_ascii=False, separators=(',', ':'))
+
+
+def build_story_edit_prompt(original_story: str, edit_request: str) -> str:
+    """
+    스토리 편집용 프롬프트를 생성합니다.
     
     Args:
         original_story (str): 편집할 원본 스토리 JSON 문자열
         edit_request (str): 편집 요청 사항
         
     Returns:
-        str: 편집된 시나리오 JSON 문자열
+        str: LLM에 전달할 편집 프롬프트
     """
-    global llm_model, prompt_template
-    
-    try:
-        if not llm_model or not prompt_template:
-            raise ValueError("LLM 모델이 초기화되지 않았습니다.")
-        
-        # 스토리 편집을 위한 시스템 프롬프트 생성
-        story_edit_prompt = f"""당신은 10세 아동을 위한 투자 교육 스토리 편집 전문가입니다.
+    return f"""당신은 10세 아동을 위한 투자 교육 스토리 편집 전문가입니다.
 
 주요 역할:
 1. 기존 스토리 데이터 분석 및 수정
@@ -131,9 +252,60 @@ def run_llm_for_edit(original_story: str, edit_request: str) -> str:
     ]
   }}
 ]"""
+
+
+def run_llm_for_edit(original_story: str, edit_request: str, story_data=None,
+                     chapter_id: str = None, endpoint: str = "edit-scenario",
+                     latency_tier: str = None) -> str:
+    """
+    기존 스토리를 편집하여 새로운 시나리오 데이터를 생성합니다.
+    
+    Args:
+        original_story (str): 편집할 원본 스토리 JSON 문자열
+        edit_request (str): 편집 요청 사항
+        story_data (list, optional): 파싱된 원본 스토리 (예산 초과 시 축소 직렬화용)
+        chapter_id (str, optional): 토큰 사용량 집계용 chapterId
+        endpoint (str): 토큰 사용량 집계용 엔드포인트 이름
+        latency_tier (str, optional): 클라이언트가 요청한 지연시간 등급
+        
+    Returns:
+        str: 편집된 시나리오 JSON 문자열
+    """
+    global llm_model, prompt_template
+    
+    try:
+        if not llm_model or not prompt_template:
+            raise ValueError("LLM 모델이 초기화되지 않았습니다.")
+        
+        # 요청 유형/스토리 크기/요청 등급으로 모델 라우트 선택
+        route = model_router.select(
+            analyze_request(edit_request), estimate_tokens(original_story), latency_tier
+        )
         
-        # LLM을 통해 스토리 편집
-        result = generate_game_data(llm_model, prompt_template, story_edit_prompt)
+        def call(route):
+            # 스토리 편집 프롬프트 생성 (Gemini 호출 전 예산 검사, 초과 시 축소 또는 거부)
+            with span("prompt_build"):
+                story_edit_prompt, budget = fit_prompt_to_budget(
+                    lambda story: build_story_edit_prompt(story, edit_request),
+                    original_story,
+                    story_data,
+                    route.max_output_tokens
+                )
+            
+            # LLM을 통해 스토리 편집
+            return generate_game_data(
+                model_router.bind_model(llm_model, route), prompt_template, story_edit_prompt,
+                max_output_tokens=budget["max_output_tokens"],
+                endpoint=endpoint, chapter_id=chapter_id,
+                thinking_budget=route.thinking_budget
+            )
+        
+        # 결과 검증 실패 시 상위 등급으로 다시 호출
+        result, route = model_router.run(
+            route, call,
+            lambda result: story_result_is_valid(result, len(story_data) if story_data else None)
+        )
+        logger.info(f"모델 라우트: {route.to_dict()}")
         
         if not result:
             raise ValueError("LLM에서 유효한 응답을 생성하지 못했습니다.")
@@ -145,13 +317,61 @@ def run_llm_for_edit(original_story: str, edit_request: str) -> str:
         raise
 
 
-async def run_llm_for_edit_async(original_story: str, edit_request: str) -> str:
+async def run_llm_for_edit_async(original_story: str, edit_request: str, story_data=None,
+                                 chapter_id: str = None, endpoint: str = "edit-scenario",
+                                 latency_tier: str = None) -> str:
     """
     기존 스토리를 편집하여 새로운 시나리오 데이터를 생성합니다. (비동기 버전)
+    유사 요청 캐시가 켜져 있으면 같은 스토리에 대한 같은(또는 비슷한) 요청 결과를 재사용합니다.
+    
+    Args:
+        original_story (str): 편집할 원본 스토리 JSON 문자열
+        edit_request (str): 편집 요청 사항
+        story_data (list, optional): 파싱된 원본 스토리 (예산 초과 시 축소 직렬화용)
+        chapter_id (str, optional): 토큰 사용량 집계용 chapterId
+        endpoint (str): 토큰 사용량 집계용 엔드포인트 이름
+        latency_tier (str, optional): 클라이언트가 요청한 지연시간 등급
+        
+    Returns:
+        str: 편집된 시나리오 JSON 문자열
+    """
+    if not get_similarity_settings()["enabled"]:
+        return await generate_edit_async(
+            original_story, edit_request, story_data, chapter_id, endpoint, latency_tier
+        )
+    
+    analysis = analyze_request(edit_request)
+    cache_args = (analysis.intent_type, analysis.target_turn)
+    with span("similarity_cache"):
+        cache_tier, cached_result = similarity_cache.get(original_story, edit_request, *cache_args)
+    if cache_tier:
+        logger.info(f"유사 요청 캐시 적중 ({cache_tier}) - chapterId: {chapter_id}")
+        return cached_result
+    
+    result = await generate_edit_async(
+        original_story, edit_request, story_data, chapter_id, endpoint, latency_tier
+    )
+    try:
+        if isinstance(json.loads(result), list):
+            similarity_cache.set(original_story, edit_request, result, *cache_args)
+    except (TypeError, json.JSONDecodeError):
+        pass
+    return result
+
+
+async def generate_edit_async(original_story: str, edit_request: str, story_data=None,
+                              chapter_id: str = None, endpoint: str = "edit-scenario",
+                              latency_tier: str = None) -> str:
+    """
+    LLM으로 스토리를 편집합니다. (분할/턴 단위 병렬/단일 호출 중 선택)
     
     Args:
         original_story (str): 편집할 원본 스토리 JSON 문자열
         edit_request (str): 편집 요청 사항
+        story_data (list, optional): 파싱된 원본 스토리 (예산 초과 시 축소 직렬화용)
+        chapter_id (str, optional): 토큰 사용량 집계용 chapterId
+        endpoint (str): 토큰 사용량 집계용 엔드포인트 이름
+        latency_tier (str, optional): 클라이언트가 요청한 지연시간 등급
         
     Returns:
         str: 편집된 시나리오 JSON 문자열
@@ -162,61 +382,62 @@ async def run_llm_for_edit_async(original_story: str, edit_request: str) -> str:
         if not llm_model or not prompt_template:
             raise ValueError("LLM 모델이 초기화되지 않았습니다.")
         
-        # 스토리 편집을 위한 시스템 프롬프트 생성
-        story_edit_prompt = f"""당신은 10세 아동을 위한 투자 교육 스토리 편집 전문가입니다.
-
-주요 역할:
-1. 기존 스토리 데이터 분석 및 수정
-2. 사용자 요청에 따른 특정 부분 편집 (캐릭터 이름, 이벤트, 대화)
-3. 아동 친화적 언어 유지
-4. 투자 교육 목적 보존
-5. JSON 구조 일관성 유지
-
-처리 범위:
-✅ 스토리 내용 편집 (캐릭터, 이벤트, 대화)
-✅ 난이도 조절 (쉽게/어렵게)
-✅ 교육적 가치 강화
-✅ 특정 턴의 상황, 뉴스 수정
-✅ 캐릭터 이름 변경
-❌ JSON 구조 변경 (7턴 유지 필수)
-❌ 실제 투자 조언
-❌ 기술적/프로그래밍 질문
-
-편집 지침:
-- 원본 스토리의 투자 교육 목적과 구조를 유지하세요
-- 7턴의 게임 흐름을 그대로 유지하세요
-- 각 턴의 turn_number, result, news, news_tag, stocks 구조를 유지하세요
-- 요청된 부분만 수정하고 나머지는 최대한 원본을 유지하세요
-
-원본 스토리:
-{original_story}
-
-편집 요청:
-{edit_request}
-
-위 편집 요청에 따라 원본 스토리를 수정하여 완전한 JSON 배열로 반환하세요.
-반드시 다음과 같은 JSON 배열 형식으로 응답하세요:
-[
-  {{
-    "turn_number": 1,
-    "result": "게임 상황 설명",
-    "news": "관련 뉴스나 이벤트",
-    "news_tag": "all",
-    "stocks": [
-      {{
-        "name": "상점/캐릭터 이름",
-        "risk_level": "위험도 설명",
-        "description": "상점 설명",
-        "before_value": 100,
-        "current_value": 100,
-        "expectation": "기대/전망"
-      }}
-    ]
-  }}
-]"""
+        # 대용량 스토리는 턴 단위 조각으로 나누어 병렬 편집
+        if story_data is not None and should_chunk(story_data):
+            with span("chunked_edit"):
+                result, merge_issues = await edit_story_in_chunks(
+                    llm_model, prompt_template, story_data, edit_request,
+                    get_modification_instruction("general"),
+                    max_output_tokens=get_model_settings()["max_tokens"],
+                    endpoint=endpoint, chapter_id=chapter_id
+                )
+            if not result:
+                raise ValueError(f"분할 편집에 실패했습니다: {', '.join(merge_issues)}")
+            return result
         
-        # LLM을 통해 스토리 편집 (비동기)
-        result = await generate_game_data_async(llm_model, prompt_template, story_edit_prompt)
+        # 전역 편집(전체 말투/스타일 변경 등)은 턴마다 병렬 호출 후 재조립
+        analysis = analyze_request(edit_request)
+        if story_data is not None and len(story_data) > 1 and analysis.is_global and not analysis.target_turn:
+            with span("fanout_edit"):
+                result, merge_issues, fanout_stats = await edit_story_per_turn(
+                    llm_model, prompt_template, story_data, edit_request,
+                    get_modification_instruction("general"),
+                    max_output_tokens=get_model_settings()["max_tokens"],
+                    endpoint=endpoint, chapter_id=chapter_id
+                )
+            if result:
+                logger.info(f"턴 단위 병렬 편집 결과: {fanout_stats}")
+                return result
+            # 턴 단위 편집 실패 시 단일 호출로 재시도
+            logger.warning(f"턴 단위 병렬 편집 실패, 단일 호출로 재시도: {', '.join(merge_issues)}")
+        
+        # 요청 유형/스토리 크기/요청 등급으로 모델 라우트 선택
+        route = model_router.select(analysis, estimate_tokens(original_story), latency_tier)
+        
+        async def call(route):
+            # 스토리 편집 프롬프트 생성 (Gemini 호출 전 예산 검사, 초과 시 축소 또는 거부)
+            with span("prompt_build"):
+                story_edit_prompt, budget = fit_prompt_to_budget(
+                    lambda story: build_story_edit_prompt(story, edit_request),
+                    original_story,
+                    story_data,
+                    route.max_output_tokens
+                )
+            
+            # LLM을 통해 스토리 편집 (비동기)
+            return await generate_game_data_async(
+                model_router.bind_model(llm_model, route), prompt_template, story_edit_prompt,
+                max_output_tokens=budget["max_output_tokens"],
+                endpoint=endpoint, chapter_id=chapter_id,
+                thinking_budget=route.thinking_budget
+            )
+        
+        # 결과 검증 실패 시 상위 등급으로 다시 호출
+        result, route = await model_router.run_async(
+            route, call,
+            lambda result: story_result_is_valid(result, len(story_data) if story_data else None)
+        )
+        logger.info(f"모델 라우트: {route.to_dict()}")
         
         if not result:
             raise ValueError("LLM에서 유효한 응답을 생성하지 못했습니다.")
@@ -228,6 +449,79 @@ async def run_llm_for_edit_async(original_story: str, edit_request: str) -> str:
         raise
 
 
+async def stream_edit_async(original_story: str, edit_request: str, story_data=None,
+                            chapter_id: str = None, latency_tier: str = None,
+                            on_token=None, on_retry=None, endpoint: str = "ws-edit") -> str:
+    """
+    스토리를 단일 스트림으로 편집하며 생성된 토큰을 on_token으로 넘깁니다.
+    분할/턴 단위 병렬 편집 대상이거나 유사 요청 캐시가 적중하면 완성된 결과를 on_token으로 한 번에 넘기고
+    반환합니다. (받는 쪽은 스트리밍과 같은 방식으로 턴 단위 메시지를 보냄)
+    (스트리밍은 검사기가 재생성을 담당하므로 등급 상향 없이 선택된 라우트만 사용)
+    
+    Args:
+        original_story (str): 편집할 원본 스토리 JSON 문자열
+        edit_request (str): 편집 요청 사항
+        story_data (list, optional): 파싱된 원본 스토리
+        chapter_id (str, optional): 토큰 사용량 집계용 chapterId
+        latency_tier (str, optional): 클라이언트가 요청한 지연시간 등급
+        on_token (callable, optional): 토큰 청크를 받는 코루틴 함수
+        on_retry (callable, optional): 검사 실패로 다시 생성하기 직전에 호출되는 코루틴 함수
+        
+    Returns:
+        str: 편집된 시나리오 JSON 문자열
+    """
+    if not llm_model or not prompt_template:
+        raise ValueError("LLM 모델이 초기화되지 않았습니다.")
+    
+    analysis = analyze_request(edit_request)
+    if story_data is not None and (
+        should_chunk(story_data)
+        or (len(story_data) > 1 and analysis.is_global and not analysis.target_turn)
+    ):
+        result = await run_llm_for_edit_async(
+            original_story, edit_request, story_data, chapter_id, endpoint, latency_tier
+        )
+        if result and on_token:
+            await on_token(result)
+        return result
+    
+    cache_enabled = get_similarity_settings()["enabled"]
+    cache_args = (analysis.intent_type, analysis.target_turn)
+    if cache_enabled:
+        with span("similarity_cache"):
+            cache_tier, cached_result = similarity_cache.get(original_story, edit_request, *cache_args)
+        if cache_tier:
+            logger.info(f"유사 요청 캐시 적중 ({cache_tier}) - chapterId: {chapter_id}")
+            if on_token:
+                await on_token(cached_result)
+            return cached_result
+    
+    route = model_router.select(analysis, estimate_tokens(original_story), latency_tier)
+    with span("prompt_build"):
+        story_edit_prompt, budget = fit_prompt_to_budget(
+            lambda story: build_story_edit_prompt(story, edit_request),
+            original_story,
+            story_data,
+            route.max_output_tokens
+        )
+    
+    with span("edit_stream"):
+        result = await generate_game_data_stream(
+            model_router.bind_model(llm_model, route), prompt_template, story_edit_prompt, on_token,
+            max_output_tokens=budget["max_output_tokens"],
+            endpoint=endpoint, chapter_id=chapter_id,
+            guard_factory=make_guard_factory(story_data),
+            thinking_budget=route.thinking_budget,
+            on_retry=on_retry
+        )
+    if not result:
+        raise ValueError("LLM에서 유효한 응답을 생성하지 못했습니다.")
+    
+    if cache_enabled and story_result_is_valid(result, len(story_data) if story_data else None):
+        similarity_cache.set(original_story, edit_request, result, *cache_args)
+    return result
+
+
 def determine_chapter_id(story_content: str) -> str:
     """
     스토리 내용을 분석하여 적절한 chapterId를 결정합니다.
@@ -238,27 +532,10 @@ def determine_chapter_id(story_content: str) -> str:
     Returns:
         str: 해당하는 chapterId
     """
-    # 시나리오 타입별 chapterId 매핑
-    CHAPTER_ID_MAPPING = {
-        "three_little_pigs": "1111",
-        "아기돼지": "1111",
-        "아기 돼지": "1111",
-        "돼지": "1111",
-        "foodtruck": "2222",
-        "푸드트럭": "2222",
-        "magic_kingdom": "3333",
-        "마법왕국": "3333",
-        "마법 왕국": "3333",
-        "moonlight_thief": "4444",
-        "달빛도둑": "4444",
-        "달빛 도둑": "4444"
-    }
-    
-    story_lower = story_content.lower()
-    
-    # 키워드 기반으로 chapterId 결정
-    for keyword, chapter_id in CHAPTER_ID_MAPPING.items():
-        if keyword.lower() in story_lower:
+    # 시나리오 키워드는 키워드 엔진에서 한 번에 검사 (매핑 순서대로 우선)
+    scan = keyword_engine.scan(story_content)
+    for keyword, chapter_id in CHAPTER_ID_KEYWORDS.items():
+        if scan.contains(keyword.lower()):
             return chapter_id
     
     # 기본값: 달빛 도둑 (4444)
@@ -273,7 +550,17 @@ async def startup_event():
     """앱 시작시 초기화 (비동기 지원)"""
     global llm_model, prompt_template, task_manager
     
+    # 시스템 상태 백그라운드 샘플링 (/performance는 버퍼 값만 읽음, 초기화 실패와 무관하게 동작)
+    system_sampler.start(
+        task_count_fn=lambda: task_manager.get_active_task_count() if task_manager else 0
+    )
+    
     try:
+        # 설정 재로드 연결 (SIGHUP 또는 .env 파일 변경 시 재시작 없이 반영)
+        if settings_manager.install_signal_handler():
+            logger.info("SIGHUP 설정 재로드 활성화")
+        add_settings_listener(on_settings_reload)
+        
         # API 키 확인
         api_key = load_api_key()
         if not api_key:
@@ -282,6 +569,7 @@ async def startup_event():
         
         # 비동기 작업 관리자 초기화
         task_manager = AsyncTaskManager()
+        task_queue_depth.set_function(task_manager.get_active_task_count, manager="api")
         
         # LLM 모델 초기화 (비동기)
         logger.info("LLM 모델 비동기 초기화 중...")
@@ -299,10 +587,19 @@ async def startup_event():
         try:
             logger.info("동기 방식으로 LLM 초기화 재시도...")
             llm_model = initialize_llm()
+            # 준비 상태 검사 항목도 모두 갖추도록 나머지 초기화를 마저 수행
+            prompt_template = prompt_template or create_prompt_template(get_system_prompt())
+            if task_manager is None:
+                task_manager = AsyncTaskManager()
+                task_queue_depth.set_function(task_manager.get_active_task_count, manager="api")
             logger.info("동기 방식 LLM 초기화 완료")
         except Exception as fallback_error:
             logger.error(f"동기 방식 초기화도 실패: {fallback_error}")
             raise e
+    
+    # 업스트림 연결 워밍업 (끝나야 준비 상태 보고) 후 주기적 카나리 시작
+    await upstream_probe.warm_up(llm_model)
+    upstream_probe.start(lambda: llm_model)
 
 
 @app.on_event("shutdown")
@@ -311,6 +608,9 @@ async def shutdown_event():
     global task_manager
     
     try:
+        await system_sampler.stop()
+        await upstream_probe.stop()
+        
         if task_manager:
             logger.info("비동기 작업 관리자 종료 중...")
             await task_manager.cleanup()
@@ -330,20 +630,61 @@ async def root():
     }
 
 
-@app.get("/health")
-async def health_check():
-    """헬스 체크 엔드포인트"""
-    global llm_model, prompt_template, task_manager
-    
+def readiness_checks() -> Dict[str, bool]:
+    """요청을 처리할 준비가 되었는지 항목별 확인 (워밍업 완료, 카나리 정상 포함)"""
     return {
-        "status": "healthy",
         "llm_initialized": llm_model is not None,
         "prompt_template_ready": prompt_template is not None,
         "task_manager_ready": task_manager is not None,
-        "async_support": True
+        "upstream_ready": upstream_probe.is_ready()
     }
 
 
+@app.get("/health")
+async def health_check():
+    """헬스 체크 엔드포인트 (liveness: 프로세스 응답 여부, readiness: 요청 처리 가능 여부)"""
+    checks = readiness_checks()
+    ready = all(checks.values())
+    settings = get_settings()
+    
+    return {
+        "status": "healthy" if ready else "degraded",
+        "live": True,
+        "ready": ready,
+        **checks,
+        "async_support": True,
+        "upstream": upstream_probe.status(settings.llm_timeout),
+        "llm_connection": connection_config(),
+        "settings_version": settings.version
+    }
+
+
+@app.get("/health/live")
+async def liveness_check():
+    """liveness 프로브 (이벤트 루프가 응답하면 항상 200)"""
+    return {"live": True}
+
+
+@app.get("/health/ready")
+async def readiness_check():
+    """readiness 프로브 (준비되지 않았으면 503)"""
+    checks = readiness_checks()
+    ready = all(checks.values())
+    return JSONResponse(
+        {"ready": ready, **checks, "upstream_warmup": upstream_probe.warmup_state},
+        status_code=200 if ready else 503
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus 메트릭 엔드포인트"""
+    return PlainTextResponse(
+        metrics_registry.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.get("/async-status")
 async def async_status():
     """비동기 작업 상태 확인 엔드포인트"""
@@ -364,48 +705,61 @@ async def async_status():
 
 
 @app.get("/performance")
-async def performance_metrics():
-    """시스템 성능 메트릭 엔드포인트"""
+async def performance_metrics(points: int = 60, aggregates: bool = False):
+    """
+    시스템 성능 메트릭 엔드포인트
+    
+    백그라운드 샘플러가 모아 둔 값만 읽으므로 즉시 응답합니다.
+    
+    Args:
+        points: 함께 반환할 최근 시계열 샘플 수 (0이면 생략)
+        aggregates: 1분/5분 구간 평균/최댓값 포함 여부
+    """
     try:
-        import psutil
-        import os
-        
-        # 시스템 정보
-        cpu_percent = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
-        
-        # 프로세스 정보
-        process = psutil.Process(os.getpid())
-        process_memory = process.memory_info()
-        
-        return {
+        sample = system_sampler.latest() or {}
+        result = {
             "system": {
-                "cpu_percent": cpu_percent,
-                "memory_total": memory.total,
-                "memory_available": memory.available,
-                "memory_percent": memory.percent
+                "cpu_percent": sample.get("cpu_percent"),
+                "memory_total": sample.get("memory_total"),
+                "memory_available": sample.get("memory_available"),
+                "memory_percent": sample.get("memory_percent")
             },
             "process": {
                 "pid": os.getpid(),
-                "memory_rss": process_memory.rss,
-                "memory_vms": process_memory.vms,
-                "cpu_percent": process.cpu_percent()
+                "memory_rss": sample.get("rss_bytes"),
+                "memory_vms": sample.get("vms_bytes"),
+                "cpu_percent": sample.get("process_cpu_percent"),
+                "open_fds": sample.get("open_fds"),
+                "thread_count": sample.get("thread_count")
+            },
+            "event_loop": {
+                "lag_ms": sample.get("loop_lag_ms"),
+                "asyncio_tasks": sample.get("asyncio_tasks")
+            },
+            "sampler": {
+                "running": system_sampler.running,
+                "interval": system_sampler.interval,
+                "sampled_at": sample.get("timestamp"),
+                "samples": len(system_sampler.samples)
             },
             "async_status": {
                 "task_manager_available": task_manager is not None,
                 "active_tasks": task_manager.get_active_task_count() if task_manager else 0,
                 "completed_tasks": task_manager.get_completed_task_count() if task_manager else 0
-            }
+            },
+            "token_usage": token_accountant.get_summary(),
+            "similarity_cache": similarity_cache.get_stats(),
+            "model_routes": model_router.get_stats(),
+            "edit_sessions": edit_session_store.get_stats()
         }
-    except ImportError:
-        return {
-            "error": "psutil not installed",
-            "async_status": {
-                "task_manager_available": task_manager is not None,
-                "active_tasks": task_manager.get_active_task_count() if task_manager else 0,
-                "completed_tasks": task_manager.get_completed_task_count() if task_manager else 0
+        if points > 0:
+            result["series"] = system_sampler.series(min(points, system_sampler.samples.maxlen))
+        if aggregates:
+            result["aggregates"] = {
+                "1m": system_sampler.aggregate(60),
+                "5m": system_sampler.aggregate(300)
             }
-        }
+        return result
     except Exception as e:
         return {"error": f"Performance metrics error: {str(e)}"}
 
@@ -425,48 +779,63 @@ async def edit_scenario(request: StoryEditRequest):
         logger.info(f"스토리 편집 요청 받음 - chapterId: {request.chapterId}, 편집 요청: {request.editRequest[:100]}...")
         
         # 입력 검증
-        if not request.chapterId or not request.chapterId.strip():
-            raise HTTPException(status_code=400, detail="chapterId는 비어있을 수 없습니다.")
-        
-        if not request.story or not request.story.strip():
-            raise HTTPException(status_code=400, detail="원본 스토리는 비어있을 수 없습니다.")
+        with span("validate"):
+            if not request.chapterId or not request.chapterId.strip():
+                raise HTTPException(status_code=400, detail="chapterId는 비어있을 수 없습니다.")
             
-        if not request.editRequest or not request.editRequest.strip():
-            raise HTTPException(status_code=400, detail="편집 요청은 비어있을 수 없습니다.")
+            if not request.editRequest or not request.editRequest.strip():
+                raise HTTPException(status_code=400, detail="편집 요청은 비어있을 수 없습니다.")
+            
+            if request.latencyTier and request.latencyTier not in ROUTE_TIERS:
+                raise HTTPException(
+                    status_code=400, detail=f"latencyTier는 {', '.join(ROUTE_TIERS)} 중 하나여야 합니다."
+                )
+            story_format = resolve_story_format(request.storyFormat, request.story)
         
-        # 원본 스토리 JSON 유효성 검증
-        try:
-            original_story_data = json.loads(request.story)
-            if not isinstance(original_story_data, list):
-                raise ValueError("원본 스토리 데이터는 배열 형태여야 합니다.")
-        except json.JSONDecodeError:
-            raise HTTPException(status_code=400, detail="원본 스토리가 유효한 JSON 형식이 아닙니다.")
+        # 원본 스토리 (배열로 받았으면 파싱 없이 사용, 문자열이면 JSON 유효성 검증)
+        original_story, original_story_data = parse_story_payload(request.story)
         
         # LLM을 통해 스토리 편집 (비동기 우선, 실패시 동기 방식)
         logger.info("LLM을 통한 비동기 스토리 편집 시작...")
-        try:
-            edited_story_json = await run_llm_for_edit_async(request.story, request.editRequest.strip())
-        except Exception as async_error:
-            logger.warning(f"비동기 처리 실패, 동기 방식으로 재시도: {async_error}")
-            edited_story_json = run_llm_for_edit(request.story, request.editRequest.strip())
+        edit_kwargs = {
+            "story_data": original_story_data,
+            "chapter_id": request.chapterId.strip(),
+            "endpoint": "edit-scenario",
+            "latency_tier": request.latencyTier
+        }
+        with span("edit"):
+            try:
+                edited_story_json = await run_llm_for_edit_async(
+                    original_story, request.editRequest.strip(), **edit_kwargs
+                )
+            except PromptBudgetExceeded:
+                raise
+            except Exception as async_error:
+                logger.warning(f"비동기 처리 실패, 동기 방식으로 재시도: {async_error}")
+                # 동기 호출은 이벤트 루프를 막지 않도록 실행기 스레드에서 실행
+                edited_story_json = await run_blocking(
+                    run_llm_for_edit, original_story, request.editRequest.strip(), **edit_kwargs
+                )
         
         if not edited_story_json:
             raise HTTPException(status_code=500, detail="스토리 편집에 실패했습니다.")
         
         # 편집된 스토리 JSON 유효성 검증
         try:
-            edited_story_data = json.loads(edited_story_json)
+            with span("revalidate"):
+                edited_story_data = json.loads(edited_story_json)
             if not isinstance(edited_story_data, list):
                 raise ValueError("편집된 스토리 데이터는 배열 형태여야 합니다.")
         except json.JSONDecodeError:
             raise HTTPException(status_code=500, detail="편집된 시나리오가 유효한 JSON 형식이 아닙니다.")
         
-        # 응답 데이터 구성 (한글 보존, 기존 chapterId 유지)
-        scenario_response_data = {
-            "chapterId": request.chapterId.strip(),
-            "story": json.dumps(edited_story_data, ensure_ascii=False, separators=(',', ':')),
-            "isCustom": True
-        }
+        # 응답 데이터 구성 (요청 형식 유지, 기존 chapterId 유지)
+        with span("serialize"):
+            scenario_response_data = {
+                "chapterId": request.chapterId.strip(),
+                "story": story_response_payload(edited_story_data, story_format),
+                "isCustom": True
+            }
         
         logger.info(f"스토리 편집 완료 - chapterId: {request.chapterId}")
         
@@ -475,6 +844,9 @@ async def edit_scenario(request: StoryEditRequest):
         
     except HTTPException:
         raise
+    except PromptBudgetExceeded as e:
+        logger.warning(f"프롬프트 예산 초과로 요청 거부: {e}")
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error(f"스토리 편집 중 오류: {e}")
         raise HTTPException(status_code=500, detail=f"내부 서버 오류: {str(e)}")
@@ -495,44 +867,52 @@ async def edit_scenario_async(request: StoryEditRequest):
         logger.info(f"비동기 스토리 편집 요청 받음 - chapterId: {request.chapterId}, 편집 요청: {request.editRequest[:100]}...")
         
         # 입력 검증
-        if not request.chapterId or not request.chapterId.strip():
-            raise HTTPException(status_code=400, detail="chapterId는 비어있을 수 없습니다.")
-        
-        if not request.story or not request.story.strip():
-            raise HTTPException(status_code=400, detail="원본 스토리는 비어있을 수 없습니다.")
+        with span("validate"):
+            if not request.chapterId or not request.chapterId.strip():
+                raise HTTPException(status_code=400, detail="chapterId는 비어있을 수 없습니다.")
             
-        if not request.editRequest or not request.editRequest.strip():
-            raise HTTPException(status_code=400, detail="편집 요청은 비어있을 수 없습니다.")
+            if not request.editRequest or not request.editRequest.strip():
+                raise HTTPException(status_code=400, detail="편집 요청은 비어있을 수 없습니다.")
+            
+            if request.latencyTier and request.latencyTier not in ROUTE_TIERS:
+                raise HTTPException(
+                    status_code=400, detail=f"latencyTier는 {', '.join(ROUTE_TIERS)} 중 하나여야 합니다."
+                )
+            story_format = resolve_story_format(request.storyFormat, request.story)
         
-        # 원본 스토리 JSON 유효성 검증
-        try:
-            original_story_data = json.loads(request.story)
-            if not isinstance(original_story_data, list):
-                raise ValueError("원본 스토리 데이터는 배열 형태여야 합니다.")
-        except json.JSONDecodeError:
-            raise HTTPException(status_code=400, detail="원본 스토리가 유효한 JSON 형식이 아닙니다.")
+        # 원본 스토리 (배열로 받았으면 파싱 없이 사용, 문자열이면 JSON 유효성 검증)
+        original_story, original_story_data = parse_story_payload(request.story)
         
         # LLM을 통해 스토리 편집 (완전 비동기)
         logger.info("LLM을 통한 완전 비동기 스토리 편집 시작...")
-        edited_story_json = await run_llm_for_edit_async(request.story, request.editRequest.strip())
+        with span("edit"):
+            edited_story_json = await run_llm_for_edit_async(
+                original_story, request.editRequest.strip(),
+                story_data=original_story_data,
+                chapter_id=request.chapterId.strip(),
+                endpoint="edit-scenario-async",
+                latency_tier=request.latencyTier
+            )
         
         if not edited_story_json:
             raise HTTPException(status_code=500, detail="스토리 편집에 실패했습니다.")
         
         # 편집된 스토리 JSON 유효성 검증
         try:
-            edited_story_data = json.loads(edited_story_json)
+            with span("revalidate"):
+                edited_story_data = json.loads(edited_story_json)
             if not isinstance(edited_story_data, list):
                 raise ValueError("편집된 스토리 데이터는 배열 형태여야 합니다.")
         except json.JSONDecodeError:
             raise HTTPException(status_code=500, detail="편집된 시나리오가 유효한 JSON 형식이 아닙니다.")
         
-        # 응답 데이터 구성 (한글 보존, 기존 chapterId 유지)
-        scenario_response_data = {
-            "chapterId": request.chapterId.strip(),
-            "story": json.dumps(edited_story_data, ensure_ascii=False, separators=(',', ':')),
-            "isCustom": True
-        }
+        # 응답 데이터 구성 (요청 형식 유지, 기존 chapterId 유지)
+        with span("serialize"):
+            scenario_response_data = {
+                "chapterId": request.chapterId.strip(),
+                "story": story_response_payload(edited_story_data, story_format),
+                "isCustom": True
+            }
         
         logger.info(f"비동기 스토리 편집 완료 - chapterId: {request.chapterId}")
         
@@ -541,11 +921,286 @@ async def edit_scenario_async(request: StoryEditRequest):
         
     except HTTPException:
         raise
+    except PromptBudgetExceeded as e:
+        logger.warning(f"프롬프트 예산 초과로 요청 거부: {e}")
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         logger.error(f"비동기 스토리 편집 중 오류: {e}")
         raise HTTPException(status_code=500, detail=f"내부 서버 오류: {str(e)}")
 
 
+def load_session_base_story(request: CreateSessionRequest):
+    """
+    세션 생성 요청에서 기준 스토리를 찾습니다.
+
+    Returns:
+        tuple: (chapterId, 스토리 턴 목록)
+    """
+    sources = [value for value in (request.story, request.storyName, request.baseSessionId) if value]
+    if len(sources) != 1:
+        raise HTTPException(status_code=400, detail="story, storyName, baseSessionId 중 하나만 지정해야 합니다.")
+    
+    if request.baseSessionId:
+        base_session = edit_session_store.get(request.baseSessionId)
+        if base_session is None:
+            raise HTTPException(status_code=404, detail="기준 세션을 찾을 수 없거나 만료되었습니다.")
+        # 기준 세션의 이후 편집이 새 세션에 번지지 않도록 복사
+        return request.chapterId or base_session.chapter_id, copy.deepcopy(base_session.story_data)
+    
+    if request.storyName:
+        story_name = request.storyName.strip()
+        # 저장 디렉터리 밖의 파일은 참조할 수 없음
+        if os.path.basename(story_name) != story_name or story_name in ("", ".", ".."):
+            raise HTTPException(status_code=400, detail="storyName이 올바르지 않습니다.")
+        story_data = StoryEditor().load_story(story_name)
+        if story_data is None:
+            raise HTTPException(status_code=404, detail=f"스토리 '{request.storyName}'를 찾을 수 없습니다.")
+        # 메타데이터와 함께 저장된 형식 ({"metadata": ..., "story_data": ...})
+        if isinstance(story_data, dict) and "story_data" in story_data:
+            story_data = story_data["story_data"]
+        if isinstance(story_data, str):
+            try:
+                story_data = json.loads(story_data)
+            except json.JSONDecodeError:
+                raise HTTPException(status_code=500, detail="저장된 스토리가 유효한 JSON 형식이 아닙니다.")
+    else:
+        _, story_data = parse_story_payload(request.story)
+    
+    if not isinstance(story_data, list):
+        raise HTTPException(status_code=400, detail="원본 스토리 데이터는 배열 형태여야 합니다.")
+    
+    chapter_id = (request.chapterId or "").strip()
+    if not chapter_id:
+        chapter_id = determine_chapter_id(json.dumps(story_data, ensure_ascii=False))
+    return chapter_id, story_data
+
+
+def get_session_or_404(session_id: str):
+    session = edit_session_store.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="편집 세션을 찾을 수 없거나 만료되었습니다.")
+    return session
+
+
+@app.post("/sessions")
+async def create_edit_session(request: CreateSessionRequest):
+    """
+    편집 세션 생성 엔드포인트
+    
+    스토리를 한 번만 올리면(또는 저장된 스토리/기존 세션을 지정하면) 이후 편집 요청에는
+    편집 내용만 보내면 됩니다.
+    
+    Returns:
+        dict: 세션 정보 (sessionId, chapterId, version, turns 등)
+    """
+    chapter_id, story_data = load_session_base_story(request)
+    try:
+        session = edit_session_store.create(
+            chapter_id, json.dumps(story_data, ensure_ascii=False, separators=(',', ':')), story_data
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    logger.info(f"편집 세션 생성 - sessionId: {session.session_id}, chapterId: {chapter_id}")
+    return session.to_dict(edit_session_store.ttl)
+
+
+@app.get("/sessions/{session_id}")
+async def get_edit_session(session_id: str, includeStory: bool = True, storyFormat: str = "string"):
+    """편집 세션 조회 (includeStory=false면 스토리 본문 제외, storyFormat=array면 배열로 반환)"""
+    story_format = resolve_story_format(storyFormat)
+    session = get_session_or_404(session_id)
+    result = session.to_dict(edit_session_store.ttl)
+    if includeStory:
+        result["story"] = session.story_data if story_format == "array" else session.story
+    return result
+
+
+@app.delete("/sessions/{session_id}")
+async def delete_edit_session(session_id: str):
+    """편집 세션 삭제"""
+    if not edit_session_store.delete(session_id):
+        raise HTTPException(status_code=404, detail="편집 세션을 찾을 수 없거나 만료되었습니다.")
+    return {"sessionId": session_id, "deleted": True}
+
+
+@app.post("/sessions/{session_id}/edits", response_model=SessionEditResponse)
+async def edit_session_story(session_id: str, request: SessionEditRequest):
+    """
+    세션 스토리 편집 엔드포인트
+    
+    서버에 보관된 스토리를 편집 요청대로 수정하고 세션 버전을 올립니다.
+    원본 스토리는 세션에 파싱된 상태로 있으므로 다시 받거나 파싱하지 않습니다.
+    
+    Args:
+        session_id: POST /sessions로 받은 세션 ID
+        request: 편집 요청 (editRequest, latencyTier, baseVersion, includeStory, storyFormat)
+        
+    Returns:
+        SessionEditResponse: 편집 후 세션 버전과 (includeStory면) 편집된 스토리
+    """
+    with span("validate"):
+        if not request.editRequest or not request.editRequest.strip():
+            raise HTTPException(status_code=400, detail="편집 요청은 비어있을 수 없습니다.")
+        if request.latencyTier and request.latencyTier not in ROUTE_TIERS:
+            raise HTTPException(
+                status_code=400, detail=f"latencyTier는 {', '.join(ROUTE_TIERS)} 중 하나여야 합니다."
+            )
+        story_format = resolve_story_format(request.storyFormat)
+        session = get_session_or_404(session_id)
+    
+    edit_request = request.editRequest.strip()
+    # 같은 세션의 편집은 순서대로 처리 (이전 편집 결과 위에 다음 편집 적용)
+    async with session.lock:
+        if request.baseVersion is not None and request.baseVersion != session.version:
+            raise HTTPException(
+                status_code=409, detail=f"세션 버전이 다릅니다. (현재 {session.version}, 요청 {request.baseVersion})"
+            )
+        
+        logger.info(f"세션 편집 요청 - sessionId: {session_id}, version: {session.version}, 편집 요청: {edit_request[:100]}...")
+        try:
+            with span("edit"):
+                edited_story_json = await run_llm_for_edit_async(
+                    session.story, edit_request,
+                    story_data=session.story_data,
+                    chapter_id=session.chapter_id,
+                    endpoint="sessions-edit",
+                    latency_tier=request.latencyTier
+                )
+        except PromptBudgetExceeded as e:
+            logger.warning(f"프롬프트 예산 초과로 요청 거부: {e}")
+            raise HTTPException(status_code=413, detail=str(e))
+        except Exception as e:
+            logger.error(f"세션 스토리 편집 중 오류: {e}")
+            raise HTTPException(status_code=500, detail=f"내부 서버 오류: {str(e)}")
+        
+        if not edited_story_json:
+            raise HTTPException(status_code=500, detail="스토리 편집에 실패했습니다.")
+        
+        # 편집된 스토리 JSON 유효성 검증 (파싱 결과는 다음 편집에 그대로 사용)
+        try:
+            with span("revalidate"):
+                edited_story_data = json.loads(edited_story_json)
+            if not isinstance(edited_story_data, list):
+                raise ValueError("편집된 스토리 데이터는 배열 형태여야 합니다.")
+        except (json.JSONDecodeError, ValueError):
+            raise HTTPException(status_code=500, detail="편집된 시나리오가 유효한 JSON 형식이 아닙니다.")
+        
+        with span("serialize"):
+            edited_story = json.dumps(edited_story_data, ensure_ascii=False, separators=(',', ':'))
+        if not edit_session_store.update(session, edited_story, edited_story_data, edit_request):
+            raise HTTPException(status_code=410, detail="편집 중 세션이 만료되어 결과를 보관하지 못했습니다.")
+        version = session.version
+    
+    logger.info(f"세션 편집 완료 - sessionId: {session_id}, version: {version}")
+    return SessionEditResponse(
+        sessionId=session_id,
+        chapterId=session.chapter_id,
+        version=version,
+        story=(edited_story_data if story_format == "array" else edited_story) if request.includeStory else None,
+        isCustom=True
+    )
+
+
+async def edit_channel_edit(story, story_data, chapter_id, edit_request, latency_tier, on_token, on_retry):
+    """대화형 편집 채널의 편집 함수 (프롬프트 예산 초과는 413으로 전달)"""
+    try:
+        return await stream_edit_async(
+            story, edit_request, story_data, chapter_id, latency_tier,
+            on_token=on_token, on_retry=on_retry
+        )
+    except PromptBudgetExceeded as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+async def handle_edit_channel_message(channel: EditChannel, message: Dict[str, Any]):
+    """
+    /ws/edit 클라이언트 메시지 하나를 처리합니다.
+    
+    메시지 유형:
+        load: story | storyName | baseSessionId (+ chapterId) 로 작업 스토리 불러오기
+        edit: editRequest (+ id, latencyTier) 편집 요청 (처리 중인 편집이 있으면 대기열에 추가)
+        cancel: id가 있으면 해당 편집, 없으면 처리 중인 편집 취소 (all=true면 대기 중인 편집까지)
+        state: 현재 버전과 스토리 조회
+        ping: 연결 확인
+    """
+    message_type = message.get("type")
+    job_id = message.get("id")
+    if job_id is not None:
+        job_id = str(job_id)
+    
+    if message_type == "load":
+        try:
+            chapter_id, story_data = load_session_base_story(CreateSessionRequest(
+                chapterId=message.get("chapterId"), story=message.get("story"),
+                storyName=message.get("storyName"), baseSessionId=message.get("baseSessionId")
+            ))
+        except HTTPException as e:
+            await channel.emit({"type": "error", "status": e.status_code, "detail": e.detail})
+            return
+        except (ValidationError, KeyError, TypeError) as e:
+            # 잘못된 필드 타입이나 스토리 구조는 연결을 끊지 않고 오류 메시지로 응답
+            await channel.emit({"type": "error", "status": 400, "detail": f"load 메시지가 유효하지 않습니다: {e}"})
+            return
+        await channel.load(chapter_id, story_data)
+    elif message_type == "edit":
+        edit_request = str(message.get("editRequest") or "").strip()
+        latency_tier = message.get("latencyTier")
+        if not edit_request:
+            await channel.emit({"type": "error", "id": job_id, "status": 400, "detail": "편집 요청은 비어있을 수 없습니다."})
+        elif latency_tier and latency_tier not in ROUTE_TIERS:
+            await channel.emit({"type": "error", "id": job_id, "status": 400,
+                                "detail": f"latencyTier는 {', '.join(ROUTE_TIERS)} 중 하나여야 합니다."})
+        else:
+            await channel.submit(edit_request, latency_tier, job_id)
+    elif message_type == "cancel":
+        await channel.cancel(job_id, cancel_all=bool(message.get("all")))
+    elif message_type == "state":
+        await channel.emit(channel.get_state())
+    elif message_type == "ping":
+        await channel.emit({"type": "pong"})
+    else:
+        await channel.emit({"type": "error", "status": 400, "detail": f"알 수 없는 메시지 유형입니다: {message_type}"})
+
+
+@app.websocket("/ws/edit")
+async def edit_websocket(websocket: WebSocket):
+    """
+    대화형 편집 WebSocket 엔드포인트
+    
+    연결마다 작업 스토리를 보관하므로 스토리는 처음 한 번만 보내고 이후에는 편집 요청만 보냅니다.
+    편집 중에는 완성된 턴을 turn 메시지로 먼저 보내고, 끝나면 result 메시지로 편집된 스토리와 버전을 보냅니다.
+    """
+    await websocket.accept()
+    channel = EditChannel(
+        websocket.send_json, edit_channel_edit, max_queue=get_edit_channel_settings()["max_queue"]
+    )
+    channel.start()
+    try:
+        while True:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            text = frame.get("text")
+            if text is None:
+                # 바이너리 프레임은 지원하지 않음 (receive_text는 KeyError로 연결을 종료시킴)
+                await channel.emit({"type": "error", "status": 400, "detail": "텍스트(JSON) 메시지만 지원합니다."})
+                continue
+            try:
+                message = json.loads(text)
+            except json.JSONDecodeError:
+                await channel.emit({"type": "error", "status": 400, "detail": "메시지가 유효한 JSON 형식이 아닙니다."})
+                continue
+            if not isinstance(message, dict):
+                await channel.emit({"type": "error", "status": 400, "detail": "메시지는 객체여야 합니다."})
+                continue
+            await handle_edit_channel_message(channel, message)
+    except WebSocketDisconnect:
+        logger.info("편집 채널 연결 종료")
+    finally:
+        await channel.close()
+
+
 if __name__ == "__main__":
     # 개발용 서버 실행
     uvicorn.run(
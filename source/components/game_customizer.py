@@ -4,10 +4,11 @@
 import streamlit as st
 import json
 import os
+import time
 import asyncio
+import itertools
 from typing import List, Dict, Tuple, Optional
 from source.models.llm_handler import (
-    initialize_llm, 
     initialize_llm_async,
     create_prompt_template, 
     generate_game_data,
@@ -15,15 +16,27 @@ from source.models.llm_handler import (
     generate_game_data_stream,
     generate_multiple_scenarios_async
 )
-from source.utils.prompts import get_system_prompt, get_story_modification_prompt
-from source.components.story_editor import StoryEditor
-from source.utils.chatbot_helper import ChatbotHelper
-from source.utils.security import security_validator
+from source.utils.prompts import (
+    get_system_prompt, get_story_modification_prompt, get_modification_instruction
+)
+from source.utils.request_analysis import analyze_request, RequestAnalysis
 from source.utils.performance import performance_monitor
 from source.utils.async_handler import (
     AsyncTaskManager,
-    run_async_in_streamlit
+    run_async_in_streamlit,
+    run_blocking
+)
+from source.utils.stream_guard import StreamViolation, make_guard_factory
+from source.utils.stream_bridge import StreamBridge
+from source.ui.stream_view import render_stream
+from source.utils.resources import get_shared_resources
+from source.utils.config import get_model_settings
+from source.utils.token_budget import fit_prompt_to_budget, PromptBudgetExceeded, estimate_tokens
+from source.utils.model_router import model_router, story_result_is_valid
+from source.utils.story_chunker import (
+    should_chunk, edit_story_in_chunks, edit_story_per_turn
 )
+from source.utils.similarity_cache import similarity_cache, get_similarity_settings
 import logging
 
 # 로깅 설정
@@ -31,21 +44,28 @@ logger = logging.getLogger(__name__)
 
 class GameCustomizer:
     def __init__(self):
-        """스토리 편집기 초기화"""
-        self.llm = None
-        self.story_editor = StoryEditor()
-        self.chatbot_helper = ChatbotHelper()
+        """스토리 편집기 초기화 (LLM, 실행기, 헬퍼는 프로세스 전역 공유)"""
+        self.resources = get_shared_resources()
+        self.story_editor = self.resources.story_editor
+        self.chatbot_helper = self.resources.chatbot_helper
         self.max_retries = 3
+        # 작업 상태는 세션별로 관리하고 실행은 프로세스 전역 백그라운드 이벤트 루프 사용
         self.async_manager = AsyncTaskManager()
-        self.initialize_llm_model()
+        self._stream_seq = itertools.count()
+    
+    @property
+    def llm(self):
+        """공유 LLM 모델 (최초 접근 시 지연 초기화)"""
+        if not self.resources.llm_initialized:
+            self.initialize_llm_model()
+        return self.resources.get_llm() if self.resources.llm_initialized else None
         
     def initialize_llm_model(self) -> bool:
         """LLM 모델 초기화"""
         try:
-            performance_monitor.start_timer("llm_initialization")
-            self.llm = initialize_llm()
-            duration = performance_monitor.end_timer("llm_initialization")
-            logger.info(f"LLM 초기화 완료 ({duration:.2f}초)")
+            with performance_monitor.timer("llm_initialization") as timing:
+                self.resources.get_llm()
+            logger.info(f"LLM 초기화 완료 ({timing['duration']:.2f}초)")
             return True
         except Exception as e:
             logger.error(f"LLM 초기화 실패: {str(e)}")
@@ -55,145 +75,438 @@ class GameCustomizer:
     async def initialize_llm_async(self):
         """비동기 LLM 모델 초기화"""
         try:
-            self.llm = await initialize_llm_async()
+            if not self.resources.llm_initialized:
+                self.resources.set_llm(await initialize_llm_async())
             logger.info("비동기 LLM 초기화 완료")
             return True
         except Exception as e:
             logger.error(f"비동기 LLM 초기화 실패: {str(e)}")
             raise Exception(f"비동기 LLM 모델 초기화에 실패했습니다: {str(e)}")
 
-    def modify_existing_story(self, story_name: str, user_request: str, chat_history=None) -> Tuple[Optional[str], Dict]:
-        """기존 스토리를 사용자 요청에 따라 수정"""
-        performance_monitor.start_timer("story_modification")
+    def modify_existing_story(self, story_name: str, user_request: str, chat_history=None,
+                              request_analysis: Optional[RequestAnalysis] = None) -> Tuple[Optional[str], Dict]:
+        """기존 스토리를 사용자 요청에 따라 수정 (request_analysis: UI에서 이미 분석한 결과)"""
+        with performance_monitor.timer("story_modification"):
+            return self._modify_existing_story(story_name, user_request, chat_history, request_analysis)
+    
+    def _modify_existing_story(self, story_name: str, user_request: str, chat_history=None,
+                               request_analysis: Optional[RequestAnalysis] = None) -> Tuple[Optional[str], Dict]:
+        request_analysis = request_analysis or analyze_request(user_request)
         
         # 보안 검증
-        security_result = security_validator.validate_content_security(user_request)
-        if not security_result["is_safe"]:
-            logger.warning(f"보안 검증 실패: {security_result['issues']}")
-            return None, {"error": f"보안 검증 실패: {', '.join(security_result['issues'])}"}
+        if not request_analysis.is_safe:
+            logger.warning(f"보안 검증 실패: {list(request_analysis.security_issues)}")
+            return None, {"error": f"보안 검증 실패: {', '.join(request_analysis.security_issues)}"}
         
         # 입력 정화
-        user_request = security_validator.sanitize_input(user_request)
+        user_request = request_analysis.sanitized
         
         if not self.llm:
             error_msg = "LLM 모델이 초기화되지 않았습니다. 설정을 확인해주세요."
             logger.error(error_msg)
             return None, {"error": error_msg}
         
-        # 현재 세션에 로드된 스토리 데이터 사용
-        original_story = st.session_state.get('current_game_data')
-        
-        # 세션 데이터가 없으면 파일에서 로드 시도
-        if not original_story:
-            try:
-                original_story = self.story_editor.load_story(story_name)
-                if not original_story:
-                    error_msg = f"'{story_name}' 스토리를 찾을 수 없습니다. 파일이 존재하는지 확인해주세요."
-                    logger.error(error_msg)
-                    return None, {"error": error_msg}
-            except Exception as e:
-                error_msg = f"스토리 로드 중 오류: {str(e)}"
-                logger.error(error_msg)
-                return None, {"error": error_msg}
+        original_story, error_msg = self._load_original_story(story_name)
+        if error_msg:
+            return None, {"error": error_msg}
         
         try:
             # 수정 요청 분석
-            modification_analysis = self.story_editor.analyze_modification_request(user_request)
+            modification_analysis = request_analysis.modification_analysis()
             
             # 대화 컨텍스트 포함
             conversation_summary = self.chatbot_helper.create_conversation_summary(chat_history or [])
             
-            # 스토리 수정을 위한 프롬프트 생성
-            story_json = json.dumps(original_story, ensure_ascii=False, indent=2)
-            modification_prompt = get_story_modification_prompt(
-                story_json, user_request, modification_analysis['type']
-            )
-            
             # 프롬프트 템플릿 생성
             prompt_template = create_prompt_template(get_system_prompt())
+            chunk_issues = []
+            cache_tier = None
+            route = None
+            cache_enabled = get_similarity_settings()["enabled"]
             
-            # 수정된 스토리 생성
-            modified_story_data = generate_game_data(self.llm, prompt_template, modification_prompt)
-            
-            # 수정된 스토리 검증
-            analysis_result = {
-                "intent": {
-                    "type": modification_analysis['type'],
-                    "target_turn": modification_analysis.get('target_turn'),
-                    "confidence": 0.9
-                },
-                "validation": None,
-                "suggestions": []
-            }
+            if cache_enabled:
+                # 같은 스토리에 대한 같은(또는 비슷한) 요청 결과 재사용
+                cache_tier, modified_story_data = similarity_cache.get(
+                    original_story, user_request,
+                    modification_analysis['type'], modification_analysis.get('target_turn')
+                )
             
-            if modified_story_data:
-                try:
-                    # JSON 파싱 시도
-                    if isinstance(modified_story_data, str):
-                        parsed_data = json.loads(modified_story_data)
-                    else:
-                        parsed_data = modified_story_data
-                    
-                    # 데이터 타입 확인 및 보정
-                    if not isinstance(parsed_data, list):
-                        # 만약 딕셔너리에서 'story_data' 키가 있다면 추출
-                        if isinstance(parsed_data, dict) and 'story_data' in parsed_data:
-                            parsed_data = parsed_data['story_data']
-                        else:
-                            analysis_result["validation"] = {
-                                "is_valid": False,
-                                "issues": ["스토리 데이터는 리스트 형태여야 합니다."]
-                            }
-                            return modified_story_data, analysis_result
-                    
-                    is_valid, errors = self.story_editor.validate_story_structure(parsed_data)
-                    analysis_result["validation"] = {
-                        "is_valid": is_valid,
-                        "issues": errors if not is_valid else []
-                    }
-                    
-                    if is_valid:
-                        # 수정된 스토리 저장
-                        self.story_editor.save_modified_story(parsed_data, story_name)
-                        analysis_result["suggestions"] = [
-                            "스토리가 성공적으로 수정되었습니다.",
-                            "다른 부분도 수정하고 싶으시면 말씀해주세요."
-                        ]
+            if cache_tier:
+                logger.info(f"유사 요청 캐시 적중 ({cache_tier}): {user_request[:50]}")
+            elif should_chunk(original_story):
+                # 대용량 스토리: 턴 단위 조각으로 나누어 병렬 편집 후 병합
+                modified_story_data, chunk_issues = run_async_in_streamlit(edit_story_in_chunks(
+                    self.llm, prompt_template, original_story, user_request,
+                    get_modification_instruction(modification_analysis['type']),
+                    target_turn=modification_analysis.get('target_turn'),
+                    max_output_tokens=get_model_settings()["max_tokens"],
+                    endpoint="streamlit"
+                ))
+            elif self._should_fan_out(original_story, request_analysis):
+                # 전역 편집: 턴마다 병렬 호출 후 재조립 (턴 단위 결과 캐시 사용)
+                modified_story_data, chunk_issues, fanout_stats = run_async_in_streamlit(edit_story_per_turn(
+                    self.llm, prompt_template, original_story, user_request,
+                    get_modification_instruction(modification_analysis['type']),
+                    max_output_tokens=get_model_settings()["max_tokens"],
+                    endpoint="streamlit"
+                ))
+                logger.info(f"턴 단위 병렬 편집 결과: {fanout_stats}")
+                if not modified_story_data:
+                    return None, {"error": f"턴 단위 편집에 실패했습니다: {', '.join(chunk_issues)}"}
+            else:
+                story_json = json.dumps(original_story, ensure_ascii=False, indent=2)
+                # 수정 유형/스토리 크기로 모델 라우트 선택
+                route = model_router.select(request_analysis, estimate_tokens(story_json))
+                
+                def call(route):
+                    # 스토리 수정을 위한 프롬프트 생성 (예산 초과 시 축소 또는 거부)
+                    modification_prompt, budget = fit_prompt_to_budget(
+                        lambda story: get_story_modification_prompt(
+                            story, user_request, modification_analysis['type'], conversation_summary
+                        ),
+                        story_json,
+                        original_story,
+                        route.max_output_tokens
+                    )
                     
-                except json.JSONDecodeError:
-                    analysis_result["validation"] = {
-                        "is_valid": False,
-                        "issues": ["생성된 데이터가 유효한 JSON 형식이 아닙니다."]
-                    }
+                    # 수정된 스토리 생성
+                    return generate_game_data(
+                        model_router.bind_model(self.llm, route), prompt_template, modification_prompt,
+                        max_output_tokens=budget["max_output_tokens"],
+                        endpoint="streamlit",
+                        thinking_budget=route.thinking_budget
+                    )
+                
+                # 결과 검증 실패 시 상위 등급으로 다시 호출
+                modified_story_data, route = model_router.run(
+                    route, call, lambda result: story_result_is_valid(result, len(original_story))
+                )
+                logger.info(f"모델 라우트: {route.to_dict()}")
             
-            return modified_story_data, analysis_result
+            analysis_result = self._new_analysis_result(modification_analysis, cache_tier, route)
+            return self._finalize_modification(
+                story_name, user_request, original_story, modified_story_data, modification_analysis,
+                analysis_result, chunk_issues, store_in_cache=cache_enabled and not cache_tier
+            )
             
+        except PromptBudgetExceeded as e:
+            logger.warning(f"프롬프트 예산 초과: {e}")
+            return None, {"error": str(e)}
         except Exception as e:
             return None, {"error": f"스토리 수정 중 오류가 발생했습니다: {str(e)}"}
     
+    def modify_existing_story_streaming(self, story_name: str, user_request: str, container, chat_history=None,
+                                        request_analysis: Optional[RequestAnalysis] = None,
+                                        render_turn=None) -> Tuple[Optional[str], Dict]:
+        """
+        기존 스토리를 스트리밍으로 수정하며 턴이 완성될 때마다 화면에 표시합니다.
+        검증/캐시/저장은 스트림이 끝난 뒤 modify_existing_story와 같은 방식으로 수행합니다.
+        대용량 분할 편집과 전역 편집은 조각(턴)이 끝날 때마다 해당 턴들을 표시합니다.
+        
+        Args:
+            container: 스트리밍 표시용 Streamlit 컨테이너
+            render_turn: 완성된 턴을 (턴, 순번)으로 그리는 함수
+        """
+        request_analysis = request_analysis or analyze_request(user_request)
+        
+        # 보안 검증
+        if not request_analysis.is_safe:
+            logger.warning(f"보안 검증 실패: {list(request_analysis.security_issues)}")
+            return None, {"error": f"보안 검증 실패: {', '.join(request_analysis.security_issues)}"}
+        
+        if not self.llm:
+            error_msg = "LLM 모델이 초기화되지 않았습니다. 설정을 확인해주세요."
+            logger.error(error_msg)
+            return None, {"error": error_msg}
+        
+        original_story, error_msg = self._load_original_story(story_name)
+        if error_msg:
+            return None, {"error": error_msg}
+        
+        start_time = time.perf_counter()
+        user_request = request_analysis.sanitized
+        modification_analysis = request_analysis.modification_analysis()
+        cache_enabled = get_similarity_settings()["enabled"]
+        
+        if cache_enabled:
+            # 같은 스토리에 대한 같은(또는 비슷한) 요청 결과 재사용 (스트리밍 없이 바로 표시)
+            cache_tier, cached_story_data = similarity_cache.get(
+                original_story, user_request,
+                modification_analysis['type'], modification_analysis.get('target_turn')
+            )
+            if cache_tier:
+                logger.info(f"유사 요청 캐시 적중 ({cache_tier}): {user_request[:50]}")
+                return self._finalize_modification(
+                    story_name, user_request, original_story, cached_story_data, modification_analysis,
+                    self._new_analysis_result(modification_analysis, cache_tier)
+                )
+        
+        if should_chunk(original_story) or self._should_fan_out(original_story, request_analysis):
+            return self._modify_in_parts_streaming(
+                story_name, user_request, original_story, modification_analysis, container,
+                render_turn, chunked=should_chunk(original_story), store_in_cache=cache_enabled
+            )
+        
+        story_json = json.dumps(original_story, ensure_ascii=False, indent=2)
+        # 대화 컨텍스트 포함 (접힌 오래된 대화 요약 포함)
+        conversation_summary = self.chatbot_helper.create_conversation_summary(chat_history or [])
+        # 스트리밍은 검사기가 재생성을 담당하므로 등급 상향 없이 선택된 라우트만 사용
+        route = model_router.select(request_analysis, estimate_tokens(story_json))
+        try:
+            modification_prompt, budget = fit_prompt_to_budget(
+                lambda story: get_story_modification_prompt(
+                    story, user_request, modification_analysis['type'], conversation_summary
+                ),
+                story_json,
+                original_story,
+                route.max_output_tokens
+            )
+        except PromptBudgetExceeded as e:
+            logger.warning(f"프롬프트 예산 초과: {e}")
+            return None, {"error": str(e)}
+        
+        bridge = StreamBridge()
+        prompt_template = create_prompt_template(get_system_prompt())
+        llm = model_router.bind_model(self.llm, route)
+        
+        async def stream_task():
+            try:
+                return await generate_game_data_stream(
+                    llm, prompt_template, modification_prompt, bridge.push,
+                    max_output_tokens=budget["max_output_tokens"],
+                    endpoint="streamlit",
+                    guard_factory=make_guard_factory(original_story),
+                    thinking_budget=route.thinking_budget,
+                    on_retry=bridge.reset
+                )
+            finally:
+                bridge.close()
+        
+        try:
+            modified_story_data, stream_stats = self._run_and_render(
+                f"stream_edit_{story_name}", stream_task, bridge, container, render_turn
+            )
+        except StreamViolation as e:
+            return None, {"error": str(e), "aborted": e.kind}
+        except Exception as e:
+            return None, {"error": f"스토리 수정 중 오류가 발생했습니다: {str(e)}"}
+        
+        duration = time.perf_counter() - start_time
+        logger.info(f"스트리밍 스토리 수정 완료 ({duration:.2f}초, 첫 턴 {stream_stats['first_turn_seconds']}초)")
+        
+        analysis_result = self._new_analysis_result(modification_analysis, route=route)
+        analysis_result["streaming"] = stream_stats
+        return self._finalize_modification(
+            story_name, user_request, original_story, modified_story_data, modification_analysis,
+            analysis_result, store_in_cache=cache_enabled
+        )
+    
+    def _modify_in_parts_streaming(self, story_name: str, user_request: str, original_story,
+                                   modification_analysis: Dict, container, render_turn=None,
+                                   chunked: bool = True, store_in_cache: bool = False) -> Tuple[Optional[str], Dict]:
+        """분할 편집(chunked) 또는 턴 단위 전역 편집을 하며 조각이 끝날 때마다 해당 턴들을 표시합니다."""
+        start_time = time.perf_counter()
+        bridge = StreamBridge()
+        llm = self.llm
+        prompt_template = create_prompt_template(get_system_prompt())
+        instruction = get_modification_instruction(modification_analysis['type'])
+        max_output_tokens = get_model_settings()["max_tokens"]
+        
+        async def parts_task():
+            try:
+                if chunked:
+                    merged, issues = await edit_story_in_chunks(
+                        llm, prompt_template, original_story, user_request, instruction,
+                        target_turn=modification_analysis.get('target_turn'),
+                        max_output_tokens=max_output_tokens,
+                        endpoint="streamlit",
+                        on_turns=bridge.push_turns
+                    )
+                    return merged, issues, None
+                return await edit_story_per_turn(
+                    llm, prompt_template, original_story, user_request, instruction,
+                    max_output_tokens=max_output_tokens,
+                    endpoint="streamlit",
+                    on_turns=bridge.push_turns
+                )
+            finally:
+                bridge.close()
+        
+        try:
+            (modified_story_data, chunk_issues, fanout_stats), stream_stats = self._run_and_render(
+                f"parts_edit_{story_name}", parts_task, bridge, container, render_turn
+            )
+        except Exception as e:
+            return None, {"error": f"스토리 수정 중 오류가 발생했습니다: {str(e)}"}
+        
+        if fanout_stats:
+            logger.info(f"턴 단위 병렬 편집 결과: {fanout_stats}")
+        if not modified_story_data:
+            kind = "분할" if chunked else "턴 단위"
+            return None, {"error": f"{kind} 편집에 실패했습니다: {', '.join(chunk_issues)}"}
+        
+        duration = time.perf_counter() - start_time
+        logger.info(f"조각 단위 스토리 수정 완료 ({duration:.2f}초, 첫 턴 {stream_stats['first_turn_seconds']}초)")
+        
+        analysis_result = self._new_analysis_result(modification_analysis)
+        analysis_result["streaming"] = stream_stats
+        return self._finalize_modification(
+            story_name, user_request, original_story, modified_story_data, modification_analysis,
+            analysis_result, chunk_issues, store_in_cache=store_in_cache
+        )
+    
+    def _run_and_render(self, task_name: str, stream_task, bridge: StreamBridge, container, render_turn=None):
+        """
+        stream_task를 백그라운드 이벤트 루프에서 실행하고 이 스레드에서 브리지 프레임을 표시합니다.
+        결과는 ASYNC_CALL_TIMEOUT까지 기다리며, 끝나면 세션의 작업 기록(future, 결과)을 정리합니다.
+        
+        Returns:
+            tuple: (stream_task 결과, 스트리밍 통계)
+        """
+        task_id = self.async_manager.run_async_task(f"{task_name}_{next(self._stream_seq)}", stream_task)
+        try:
+            stream_stats = render_stream(bridge, container, render_turn)
+            return self.async_manager.wait_task(task_id), stream_stats
+        finally:
+            # 진행 중이면 (화면 쪽 오류, 시간 초과) 취소
+            self.async_manager.forget_task(task_id)
+    
+    @staticmethod
+    def _should_fan_out(original_story, request_analysis: RequestAnalysis) -> bool:
+        """턴 단위 병렬 편집 대상인지 (여러 턴으로 된 스토리의 전역 편집)"""
+        return (
+            isinstance(original_story, list) and len(original_story) > 1
+            and not request_analysis.target_turn and request_analysis.is_global
+        )
+    
+    def _load_original_story(self, story_name: str) -> Tuple[Optional[list], Optional[str]]:
+        """
+        현재 세션에 로드된 스토리 (없으면 파일에서 로드), 실패 시 (None, 오류 메시지)
+        
+        편집 결과는 LLM이 만든 JSON 문자열로 세션에 저장되므로 턴 목록으로 파싱해서 반환합니다.
+        """
+        original_story = st.session_state.get('current_game_data')
+        if not original_story:
+            try:
+                original_story = self.story_editor.load_story(story_name)
+            except Exception as e:
+                error_msg = f"스토리 로드 중 오류: {str(e)}"
+                logger.error(error_msg)
+                return None, error_msg
+            if not original_story:
+                error_msg = f"'{story_name}' 스토리를 찾을 수 없습니다. 파일이 존재하는지 확인해주세요."
+                logger.error(error_msg)
+                return None, error_msg
+        
+        if isinstance(original_story, str):
+            try:
+                original_story = json.loads(original_story)
+            except json.JSONDecodeError:
+                return None, "현재 스토리가 유효한 JSON 형식이 아닙니다. 스토리를 다시 불러와주세요."
+        if isinstance(original_story, dict) and 'story_data' in original_story:
+            original_story = original_story['story_data']
+        if not isinstance(original_story, list):
+            return None, "스토리 데이터는 리스트 형태여야 합니다. 스토리를 다시 불러와주세요."
+        return original_story, None
+    
+    def _new_analysis_result(self, modification_analysis: Dict, cache_tier=None, route=None) -> Dict:
+        """UI에 표시할 수정 분석 결과 기본값"""
+        return {
+            "intent": {
+                "type": modification_analysis['type'],
+                "target_turn": modification_analysis.get('target_turn'),
+                "confidence": 0.9
+            },
+            "validation": None,
+            "suggestions": [],
+            "cache_tier": cache_tier,
+            "route": route.to_dict() if route else None
+        }
+    
+    def _finalize_modification(self, story_name: str, user_request: str, original_story, modified_story_data,
+                               modification_analysis: Dict, analysis_result: Dict, chunk_issues=None,
+                               store_in_cache: bool = False) -> Tuple[Optional[str], Dict]:
+        """수정된 스토리를 검증하고, 유효하면 캐시에 넣고 저장합니다."""
+        if modified_story_data:
+            try:
+                # JSON 파싱 시도
+                if isinstance(modified_story_data, str):
+                    parsed_data = json.loads(modified_story_data)
+                else:
+                    parsed_data = modified_story_data
+                
+                # 데이터 타입 확인 및 보정
+                if not isinstance(parsed_data, list):
+                    # 만약 딕셔너리에서 'story_data' 키가 있다면 추출
+                    if isinstance(parsed_data, dict) and 'story_data' in parsed_data:
+                        parsed_data = parsed_data['story_data']
+                    else:
+                        analysis_result["validation"] = {
+                            "is_valid": False,
+                            "issues": ["스토리 데이터는 리스트 형태여야 합니다."]
+                        }
+                        return modified_story_data, analysis_result
+                
+                is_valid, errors = self.story_editor.validate_story_structure(parsed_data)
+                analysis_result["validation"] = {
+                    "is_valid": is_valid,
+                    "issues": errors if not is_valid else []
+                }
+                
+                if chunk_issues:
+                    analysis_result["validation"]["chunk_merge_notes"] = chunk_issues
+                
+                if is_valid:
+                    if store_in_cache:
+                        similarity_cache.set(
+                            original_story, user_request, modified_story_data,
+                            modification_analysis['type'], modification_analysis.get('target_turn')
+                        )
+                    
+                    # 수정된 스토리 저장
+                    self.story_editor.save_modified_story(parsed_data, story_name)
+                    analysis_result["suggestions"] = [
+                        "스토리가 성공적으로 수정되었습니다.",
+                        "다른 부분도 수정하고 싶으시면 말씀해주세요."
+                    ]
+                
+            except json.JSONDecodeError:
+                analysis_result["validation"] = {
+                    "is_valid": False,
+                    "issues": ["생성된 데이터가 유효한 JSON 형식이 아닙니다."]
+                }
+        
+        return modified_story_data, analysis_result
     
     async def modify_existing_story_async(self, story_name: str, user_request: str, chat_history=None) -> Tuple[Optional[str], Dict]:
         """기존 스토리를 비동기로 수정"""
-        performance_monitor.start_timer("story_modification_async")
-        
+        with performance_monitor.timer("story_modification_async") as timing:
+            result, metadata = await self._modify_existing_story_async(story_name, user_request, chat_history)
+        if result:
+            logger.info(f"비동기 스토리 수정 완료 ({timing['duration']:.2f}초)")
+            metadata["duration"] = timing["duration"]
+        return result, metadata
+    
+    async def _modify_existing_story_async(self, story_name: str, user_request: str, chat_history=None) -> Tuple[Optional[str], Dict]:
         # 보안 검증
-        security_result = security_validator.validate_content_security(user_request)
-        if not security_result["is_safe"]:
-            logger.warning(f"보안 검증 실패: {security_result['issues']}")
-            return None, {"error": f"보안 검증 실패: {', '.join(security_result['issues'])}"}
+        request_analysis = analyze_request(user_request)
+        if not request_analysis.is_safe:
+            logger.warning(f"보안 검증 실패: {list(request_analysis.security_issues)}")
+            return None, {"error": f"보안 검증 실패: {', '.join(request_analysis.security_issues)}"}
         
         try:
-            # 기존 스토리 로드
-            original_story = self.story_editor.load_story(story_name)
+            # 기존 스토리 로드 (파일 I/O는 공유 스레드 풀에서)
+            original_story = await run_blocking(self.story_editor.load_story, story_name)
             if not original_story:
                 return None, {"error": f"스토리 '{story_name}'를 찾을 수 없습니다."}
             
             # 프롬프트 생성
             system_prompt = get_system_prompt()
             modification_prompt = get_story_modification_prompt(
-                original_story, 
-                user_request, 
-                chat_history or []
+                json.dumps(original_story, ensure_ascii=False, indent=2),
+                request_analysis.sanitized,
+                request_analysis.intent_type,
+                self.chatbot_helper.create_conversation_summary(chat_history or [])
             )
             
             prompt_template = create_prompt_template(system_prompt)
@@ -202,9 +515,7 @@ class GameCustomizer:
             result = await generate_game_data_async(self.llm, prompt_template, modification_prompt)
             
             if result:
-                duration = performance_monitor.end_timer("story_modification_async")
-                logger.info(f"비동기 스토리 수정 완료 ({duration:.2f}초)")
-                return result, {"success": True, "duration": duration}
+                return result, {"success": True}
             else:
                 return None, {"error": "LLM이 유효한 응답을 생성하지 못했습니다."}
                 
@@ -214,64 +525,73 @@ class GameCustomizer:
     
     def modify_story_with_streaming(self, story_name: str, user_request: str, 
                                   container, chat_history=None) -> Tuple[Optional[str], Dict]:
-        """스트리밍으로 스토리 수정"""
-        async def stream_callback(token):
-            await self.streaming_handler.stream_callback(token)
+        """
+        스트리밍으로 스토리 수정 (생성 중 부적절한 표현이 나오면 즉시 중단 후 재생성)
+        
+        토큰은 브리지 큐로 넘기고, 이 스레드는 큐를 기다리며 프레임 단위로 화면을 갱신합니다.
+        """
+        bridge = StreamBridge()
+        request_analysis = analyze_request(user_request)
         
         async def modify_with_stream():
-            # 기존 스토리 로드
-            original_story = self.story_editor.load_story(story_name)
+            if not request_analysis.is_safe:
+                return None, {"error": f"보안 검증 실패: {', '.join(request_analysis.security_issues)}"}
+            
+            # 기존 스토리 로드 (파일 I/O는 공유 스레드 풀에서)
+            original_story = await run_blocking(self.story_editor.load_story, story_name)
             if not original_story:
                 return None, {"error": f"스토리 '{story_name}'를 찾을 수 없습니다."}
             
             # 프롬프트 생성
             system_prompt = get_system_prompt()
+            story_json = json.dumps(original_story, ensure_ascii=False, indent=2)
             modification_prompt = get_story_modification_prompt(
-                original_story, 
-                user_request, 
-                chat_history or []
+                story_json,
+                request_analysis.sanitized,
+                request_analysis.intent_type,
+                self.chatbot_helper.create_conversation_summary(chat_history or [])
             )
             
             prompt_template = create_prompt_template(system_prompt)
             
-            # 스트리밍으로 생성
-            result = await generate_game_data_stream(
-                self.llm, 
-                prompt_template, 
-                modification_prompt,
-                stream_callback
-            )
+            # 스트리밍은 검사기가 재생성을 담당하므로 등급 상향 없이 선택된 라우트만 사용
+            route = model_router.select(request_analysis, estimate_tokens(story_json))
+            
+            # 스트리밍으로 생성 (청크마다 안전 검사)
+            try:
+                result = await generate_game_data_stream(
+                    model_router.bind_model(self.llm, route), 
+                    prompt_template, 
+                    modification_prompt,
+                    bridge.push,
+                    max_output_tokens=route.max_output_tokens,
+                    endpoint="streamlit",
+                    guard_factory=make_guard_factory(original_story),
+                    thinking_budget=route.thinking_budget,
+                    on_retry=bridge.reset
+                )
+            except StreamViolation as e:
+                return None, {"error": str(e), "aborted": e.kind}
             
             return result, {"success": True}
         
-        # 스트리밍 시작
-        import threading
-        streaming_thread = threading.Thread(
-            target=self.streaming_handler.start_streaming,
-            args=(container,)
-        )
-        streaming_thread.start()
-        
-        # 비동기 작업 실행
-        task_id = self.async_manager.run_async_task(
-            f"stream_modify_{story_name}",
-            modify_with_stream
-        )
-        
-        # 작업 완료 대기
-        while not self.async_manager.is_task_completed(task_id):
-            import time
-            time.sleep(0.5)
-        
-        # 스트리밍 중지
-        self.streaming_handler.stop_streaming()
-        streaming_thread.join()
+        async def stream_task():
+            try:
+                return await modify_with_stream()
+            finally:
+                # 성공/실패와 무관하게 화면 쪽 대기를 끝냄
+                bridge.close()
         
-        # 결과 반환
+        # 백그라운드 이벤트 루프에서 생성하고 이 스레드에서 프레임 단위로 표시
         try:
-            return self.async_manager.get_task_result(task_id)
+            (result, metadata), stream_stats = self._run_and_render(
+                f"stream_modify_{story_name}", stream_task, bridge, container
+            )
         except Exception as e:
             return None, {"error": str(e)}
+        
+        metadata["streaming"] = stream_stats
+        return result, metadata
     
     async def modify_multiple_stories_async(self, story_modifications: List[Dict]) -> List[Dict]:
         """여러 스토리를 병렬로 수정"""
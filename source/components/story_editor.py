@@ -6,6 +6,8 @@ import os
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 
+from source.utils.keyword_engine import keyword_engine, KeywordScan
+
 
 class StoryEditor:
     def __init__(self, stories_dir="saved_stories"):
@@ -120,30 +122,30 @@ class StoryEditor:
             print(f"스토리 요약 생성 실패: {e}")
             return {}
     
-    def analyze_modification_request(self, user_request: str) -> Dict:
-        """사용자의 수정 요청을 분석합니다."""
-        request_lower = user_request.lower()
+    def analyze_modification_request(self, user_request: str, scan: Optional[KeywordScan] = None) -> Dict:
+        """사용자의 수정 요청을 분석합니다. (scan: 같은 요청의 키워드 스캔 결과가 있으면 재사용)"""
+        scan = scan or keyword_engine.scan(user_request)
         
         modification_type = "general"
         target_elements = []
         
         # 수정 유형 분석
-        if any(word in request_lower for word in ['캐릭터', '인물', '이름', '성격']):
+        if scan.has("edit.character"):
             modification_type = "character"
             
-        elif any(word in request_lower for word in ['배경', '장소', '환경', '설정']):
+        elif scan.has("edit.setting"):
             modification_type = "setting" 
             
-        elif any(word in request_lower for word in ['이벤트', '사건', '뉴스', '주식']):
+        elif scan.has("edit.events"):
             modification_type = "events"
             
-        elif any(word in request_lower for word in ['대화', '대사', '말', '텍스트']):
+        elif scan.has("edit.dialogue"):
             modification_type = "dialogue"
         
         # 특정 턴 지정 확인
         target_turn = None
         for i in range(1, 11):  # 1-10턴 확인
-            if f"{i}턴" in request_lower or f"{i}일" in request_lower:
+            if scan.contains(f"{i}턴") or scan.contains(f"{i}일"):
                 target_turn = i
                 break
                 
@@ -1,226 +1,233 @@
 """
 LLM 모델 관리 모듈 - LangChain with Google Gemini
+
+API 서버 경로에서도 사용하므로 Streamlit을 불러오지 않으며,
+LangChain/Gemini 모듈은 처음 필요할 때 불러와 서버 시작(import) 시간을 줄입니다.
 """
 import os
 import json
 import re
 import asyncio
-from typing import Optional, Dict, Any, List, AsyncGenerator
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.prompts import PromptTemplate
-from langchain.schema import HumanMessage, SystemMessage
-from langchain.callbacks.base import BaseCallbackHandler
+import time
+from typing import Any, Callable, Dict, Optional
 from source.utils.config import load_api_key, get_model_settings
-import streamlit as st
+from source.utils.metrics import llm_call_duration, llm_calls_total
+from source.utils.tracing import span
+from source.utils.token_budget import extract_usage, token_accountant
+from source.utils.stream_guard import StreamViolation, stream_aborts_total, get_stream_guard_settings
 
 
-class StreamingCallbackHandler(BaseCallbackHandler):
-    """스트리밍을 위한 콜백 핸들러"""
-    
-    def __init__(self, container=None):
-        self.container = container or st.empty()
-        self.text = ""
-    
-    def on_llm_new_token(self, token: str, **kwargs) -> None:
-        """새로운 토큰이 생성될 때 호출됩니다"""
-        self.text += token
-        self.container.markdown(self.text)
+def _human_messages(prompt: str) -> list:
+    """프롬프트를 LangChain 메시지 목록으로 변환 (LangChain은 이때 처음 불러옴)"""
+    from langchain.schema import HumanMessage
+    return [HumanMessage(content=prompt)]
 
 
-def initialize_llm():
-    """
-    LLM 모델을 초기화합니다.
-    
-    Returns:
-        ChatGoogleGenerativeAI: 초기화된 LangChain Gemini 모델
-    """
+def _create_llm():
+    """설정으로 LangChain Gemini 모델을 만들고 전송 방식별 연결 설정을 적용합니다."""
     api_key = load_api_key()
     if not api_key:
         raise ValueError("API 키를 불러올 수 없습니다.")
     
     settings = get_model_settings()
+    from langchain_google_genai import ChatGoogleGenerativeAI
     
-    # LangChain GoogleGenerativeAI 모델 초기화
+    # LangChain GoogleGenerativeAI 모델 초기화 (동기/비동기 호출 모두 지원)
     llm = ChatGoogleGenerativeAI(
         model=settings["model_name"],
         google_api_key=api_key,
         temperature=settings.get("temperature", 0.7),
         max_output_tokens=settings.get("max_tokens", 4096),
-        top_p=settings.get("top_p", 0.9)
+        top_p=settings.get("top_p", 0.9),
+        timeout=settings.get("timeout"),
+        max_retries=settings.get("max_retries", 2),
+        transport=settings.get("transport")
     )
+    global _connection_config
+    _connection_config = _configure_connection(llm, settings, api_key)
+    print(f"LLM 연결 설정: {_connection_config}")
     
     return llm
 
 
-async def initialize_llm_async():
+# 마지막으로 만든 클라이언트에 적용된 연결 설정 (/health 보고, 비동기 클라이언트 생성용)
+_connection_config: Dict[str, Any] = {"transport": None, "applied": "none"}
+
+
+def connection_config() -> Dict[str, Any]:
+    """마지막으로 만든 LLM 클라이언트에 적용된 연결 설정 (gRPC 채널 옵션은 제외)"""
+    return {key: value for key, value in _connection_config.items() if key != "grpc_options"}
+
+
+def _grpc_transport(transport_class, options: list):
+    """채널 옵션을 더해 채널을 만드는 gRPC 전송 생성 함수 (클라이언트의 transport 인자로 전달)"""
+    def create_channel(host, **kwargs):
+        kwargs["options"] = list(kwargs.get("options") or []) + options
+        return transport_class.create_channel(host, **kwargs)
+    
+    def build(**kwargs):
+        return transport_class(channel=create_channel, **kwargs)
+    return build
+
+
+def _configure_connection(llm, settings: Dict[str, Any], api_key: str) -> Dict[str, Any]:
     """
-    비동기 LLM 모델을 초기화합니다.
+    전송 방식별 연결 설정을 적용하고 실제로 적용된 내용을 반환합니다.
     
-    Returns:
-        ChatGoogleGenerativeAI: 초기화된 LangChain Gemini 모델
+    gRPC(라이브러리 기본값): 동시 호출은 HTTP/2 채널 하나에서 다중화되므로(동시 스트림 수는 서버가 제한)
+    풀 크기 대신 keep-alive ping 채널 옵션으로 유휴 연결이 끊기지 않게 합니다.
+    동기 클라이언트는 여기서, 비동기 클라이언트는 호출하는 이벤트 루프에서 처음 쓸 때 같은 옵션으로 만듭니다.
+    REST: 동기 호출에 쓰는 requests 세션의 연결 풀 크기를 동시 호출 제한에 맞춥니다.
     """
-    api_key = load_api_key()
-    if not api_key:
-        raise ValueError("API 키를 불러올 수 없습니다.")
-    
-    settings = get_model_settings()
-    
-    # LangChain GoogleGenerativeAI 모델 초기화 (비동기 지원)
-    llm = ChatGoogleGenerativeAI(
-        model=settings["model_name"],
-        google_api_key=api_key,
-        temperature=settings.get("temperature", 0.7),
-        max_output_tokens=settings.get("max_tokens", 4096),
-        top_p=settings.get("top_p", 0.9)
-    )
-    
-    return llm
+    transport = settings.get("transport") or "grpc"
+    pool_size = settings.get("pool_size")
+    result = {"transport": transport, "applied": "library_default"}
+    
+    if transport == "rest":
+        # 생성된 REST 전송의 세션에 어댑터를 붙이는 것 외에 풀 크기를 넘길 공개 인자가 없음
+        session = getattr(getattr(getattr(llm, "client", None), "_transport", None), "_session", None)
+        if pool_size and session is not None and hasattr(session, "mount"):
+            try:
+                from requests.adapters import HTTPAdapter
+                session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=int(pool_size)))
+                result.update(applied="rest_pool", pool_size=int(pool_size))
+            except Exception as e:
+                print(f"REST 연결 풀 설정 실패 (기본값 사용): {e}")
+        return result
+    
+    keepalive_seconds = settings.get("keepalive_seconds")
+    if transport != "grpc" or not keepalive_seconds:
+        return result
+    try:
+        from google.ai.generativelanguage_v1beta import GenerativeServiceClient
+        from google.ai.generativelanguage_v1beta.services.generative_service.transports import (
+            GenerativeServiceGrpcTransport
+        )
+    except ImportError:
+        return result
+    # 클라이언트 구조가 다른 버전(google-genai 기반 등)은 라이브러리 기본값 사용
+    if not isinstance(getattr(llm, "client", None), GenerativeServiceClient) \
+            or not hasattr(llm, "async_client_running"):
+        return result
+    
+    options = [
+        ("grpc.keepalive_time_ms", int(keepalive_seconds * 1000)),
+        ("grpc.keepalive_timeout_ms", 20000),
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.max_pings_without_data", 0)
+    ]
+    try:
+        llm.client = GenerativeServiceClient(
+            client_options={"api_key": api_key},
+            transport=_grpc_transport(GenerativeServiceGrpcTransport, options)
+        )
+        llm.async_client_running = None
+    except Exception as e:
+        print(f"gRPC 채널 옵션 적용 실패 (기본값 사용): {e}")
+        return result
+    result.update(applied="grpc_keepalive", keepalive_seconds=keepalive_seconds, grpc_options=options)
+    return result
+
+
+# 기본 타임아웃(GOOGLE_TIMEOUT)을 받아 이번 호출에 쓸 타임아웃을 돌려주는 함수 (upstream_probe가 등록)
+_timeout_policy: Optional[Callable[[Optional[float]], Optional[float]]] = None
+
 
+def set_timeout_policy(policy: Optional[Callable[[Optional[float]], Optional[float]]]):
+    """LLM 호출 타임아웃 조정 함수 등록 (예: 카나리 지연에 따라 늘린 추천 타임아웃)"""
+    global _timeout_policy
+    _timeout_policy = policy
 
-async def generate_game_data_async(prompt: str, llm: Optional[ChatGoogleGenerativeAI] = None) -> tuple:
+
+def llm_call_timeout() -> Optional[float]:
     """
-    비동기적으로 게임 스토리 데이터를 생성합니다.
-    
-    Args:
-        prompt (str): 생성할 프롬프트
-        llm (Optional[ChatGoogleGenerativeAI]): LLM 모델 인스턴스
-        
-    Returns:
-        tuple: (생성된 스토리 데이터, 메타데이터)
+    비동기 LLM 호출 1회의 최대 대기 시간(초), None이면 제한 없음
+    (스트리밍은 청크 사이 최대 대기 시간으로 사용, 동기 호출은 취소할 수 없어 적용하지 않음)
     """
-    if llm is None:
-        llm = await initialize_llm_async()
-    
+    base_timeout = get_model_settings().get("timeout")
+    if _timeout_policy is None:
+        return base_timeout
     try:
-        # 비동기 호출
-        messages = [HumanMessage(content=prompt)]
-        response = await llm.ainvoke(messages)
-        
-        # 응답 파싱
-        content = response.content
-        
-        # JSON 추출 시도
+        return _timeout_policy(base_timeout)
+    except Exception:
+        return base_timeout
+
+
+async def _iterate_with_timeout(stream, timeout: Optional[float]):
+    """다음 청크를 timeout초 넘게 기다리면 asyncio.TimeoutError 발생"""
+    iterator = stream.__aiter__()
+    while True:
         try:
-            json_match = re.search(r'```json\s*(.*?)\s*```', content, re.DOTALL)
-            if json_match:
-                json_content = json_match.group(1)
-                story_data = json.loads(json_content)
-            else:
-                # JSON 블록이 없다면 전체 내용에서 JSON 찾기
-                story_data = json.loads(content)
-        except json.JSONDecodeError:
-            # JSON 파싱 실패시 텍스트 그대로 반환
-            story_data = {"content": content, "type": "text"}
-        
-        metadata = {
-            "model": llm.model_name,
-            "tokens_used": len(content.split()),
-            "async": True
-        }
-        
-        return story_data, metadata
-        
+            chunk = await asyncio.wait_for(iterator.__anext__(), timeout)
+        except StopAsyncIteration:
+            return
+        yield chunk
+
+
+def _prepare_async_client(llm):
+    """
+    gRPC 채널 옵션을 적용한 비동기 클라이언트를 현재 이벤트 루프에서 만듭니다. (클라이언트마다 처음 한 번)
+    grpc.aio 채널은 만든 루프에 묶이므로 생성 시점이 아니라 첫 비동기 호출 때 만듭니다.
+    """
+    options = _connection_config.get("grpc_options")
+    if not options or getattr(llm, "async_client_running", True) is not None:
+        return
+    try:
+        from google.ai.generativelanguage_v1beta import GenerativeServiceAsyncClient
+        from google.ai.generativelanguage_v1beta.services.generative_service.transports import (
+            GenerativeServiceGrpcAsyncIOTransport
+        )
+        llm.async_client_running = GenerativeServiceAsyncClient(
+            client_options={"api_key": load_api_key()},
+            transport=_grpc_transport(GenerativeServiceGrpcAsyncIOTransport, options)
+        )
     except Exception as e:
-        raise Exception(f"비동기 LLM 생성 중 오류 발생: {str(e)}")
+        # 실패하면 라이브러리가 기본 옵션으로 만듦
+        print(f"비동기 gRPC 클라이언트 생성 실패 (기본값 사용): {e}")
 
 
-async def generate_multiple_scenarios_async(
-    prompts: List[str], 
-    llm: Optional[ChatGoogleGenerativeAI] = None,
-    max_concurrent: int = 3
-) -> List[tuple]:
+def initialize_llm():
     """
-    여러 시나리오를 병렬로 비동기 생성합니다.
+    LLM 모델을 초기화합니다.
     
-    Args:
-        prompts (List[str]): 프롬프트 리스트
-        llm (Optional[ChatGoogleGenerativeAI]): LLM 모델 인스턴스
-        max_concurrent (int): 최대 동시 실행 수
-        
     Returns:
-        List[tuple]: [(스토리 데이터, 메타데이터), ...]
+        ChatGoogleGenerativeAI: 초기화된 LangChain Gemini 모델
     """
-    if llm is None:
-        llm = await initialize_llm_async()
-    
-    # 세마포어로 동시 실행 수 제한
-    semaphore = asyncio.Semaphore(max_concurrent)
-    
-    async def generate_single(prompt: str):
-        async with semaphore:
-            return await generate_game_data_async(prompt, llm)
-    
-    # 모든 프롬프트를 병렬로 처리
-    tasks = [generate_single(prompt) for prompt in prompts]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    
-    # 예외 처리
-    processed_results = []
-    for i, result in enumerate(results):
-        if isinstance(result, Exception):
-            processed_results.append((
-                {"error": str(result), "prompt_index": i}, 
-                {"error": True, "async": True}
-            ))
-        else:
-            processed_results.append(result)
+    return _create_llm()
+
+
+async def initialize_llm_async():
+    """
+    비동기 LLM 모델을 초기화합니다.
     
-    return processed_results
+    Returns:
+        ChatGoogleGenerativeAI: 초기화된 LangChain Gemini 모델
+    """
+    return _create_llm()
 
 
-async def generate_game_data_stream(
-    prompt: str, 
-    container, 
-    llm: Optional[ChatGoogleGenerativeAI] = None
-) -> tuple:
+async def probe_llm(llm, timeout: float, endpoint: str = "canary", thinking_budget: Optional[int] = None) -> float:
     """
-    스트리밍 방식으로 게임 데이터를 생성합니다.
+    출력 1토큰짜리 최소 호출로 업스트림 연결을 열고 왕복 지연을 측정합니다. (워밍업/카나리용)
     
     Args:
-        prompt (str): 생성할 프롬프트
-        container: Streamlit 컨테이너
-        llm (Optional[ChatGoogleGenerativeAI]): LLM 모델 인스턴스
+        llm: LLM 모델
+        timeout (float): 최대 대기 시간(초)
+        endpoint (str): 토큰 사용량 집계용 엔드포인트 이름
+        thinking_budget (int, optional): 사고 토큰 예산 (None이면 모델 기본값)
         
     Returns:
-        tuple: (생성된 스토리 데이터, 메타데이터)
+        float: 응답까지 걸린 시간(초)
     """
-    if llm is None:
-        llm = await initialize_llm_async()
-    
-    try:
-        # 스트리밍 콜백 핸들러 생성
-        callback_handler = StreamingCallbackHandler(container)
-        
-        # 스트리밍 설정으로 LLM 호출
-        messages = [HumanMessage(content=prompt)]
-        
-        # 스트리밍 호출 (동기 방식이지만 UI 업데이트는 실시간)
-        response = llm.invoke(messages, callbacks=[callback_handler])
-        
-        # 최종 결과 파싱
-        content = response.content
-        
-        try:
-            json_match = re.search(r'```json\s*(.*?)\s*```', content, re.DOTALL)
-            if json_match:
-                json_content = json_match.group(1)
-                story_data = json.loads(json_content)
-            else:
-                story_data = json.loads(content)
-        except json.JSONDecodeError:
-            story_data = {"content": content, "type": "text"}
-        
-        metadata = {
-            "model": llm.model_name,
-            "tokens_used": len(content.split()),
-            "streaming": True
-        }
-        
-        return story_data, metadata
-        
-    except Exception as e:
-        container.error(f"스트리밍 생성 중 오류 발생: {str(e)}")
-        raise Exception(f"스트리밍 LLM 생성 중 오류 발생: {str(e)}")
+    start_time = time.perf_counter()
+    prompt = "ping"
+    _prepare_async_client(llm)
+    response = await asyncio.wait_for(
+        llm.ainvoke(_human_messages(prompt), **_generation_kwargs(1, thinking_budget)), timeout
+    )
+    duration = time.perf_counter() - start_time
+    _record_usage(response, prompt, start_time, endpoint)
+    return duration
 
 
 def create_prompt_template(system_message, user_template="{question}"):
@@ -234,6 +241,8 @@ def create_prompt_template(system_message, user_template="{question}"):
     Returns:
         PromptTemplate: LangChain 프롬프트 템플릿
     """
+    from langchain.prompts import PromptTemplate
+    
     template = f"""{system_message}
 
 사용자 요청: {user_template}"""
@@ -243,7 +252,8 @@ def create_prompt_template(system_message, user_template="{question}"):
         template=template
     )
 
-def generate_game_data(llm, prompt_template, prompt_content):
+def generate_game_data(llm, prompt_template, prompt_content, max_output_tokens=None,
+                       endpoint="default", chapter_id=None, thinking_budget=None):
     """
     게임 데이터를 생성합니다.
     
@@ -251,26 +261,34 @@ def generate_game_data(llm, prompt_template, prompt_content):
         llm (ChatGoogleGenerativeAI): 초기화된 LangChain LLM 모델
         prompt_template (PromptTemplate): LangChain 프롬프트 템플릿
         prompt_content (str): 프롬프트 내용
+        max_output_tokens (int, optional): 이번 호출의 최대 출력 토큰
+        endpoint (str): 토큰 사용량 집계용 엔드포인트 이름
+        chapter_id (str, optional): 토큰 사용량 집계용 chapterId
+        thinking_budget (int, optional): 이번 호출의 사고 토큰 예산
         
     Returns:
         str: 생성된 게임 데이터 (JSON 문자열)
     """
     print("게임 시나리오 데이터 생성 중...")
+    start_time = time.perf_counter()
     
     try:
         # LangChain을 사용한 프롬프트 생성 및 모델 호출
         formatted_prompt = prompt_template.format(question=prompt_content)
         
         # LangChain 메시지 체인 생성
-        messages = [HumanMessage(content=formatted_prompt)]
+        messages = _human_messages(formatted_prompt)
         
         # 모델 호출
-        response = llm.invoke(messages)
+        with span("llm_wait"):
+            response = llm.invoke(messages, **_generation_kwargs(max_output_tokens, thinking_budget))
+        _record_usage(response, formatted_prompt, start_time, endpoint, chapter_id)
         
         # 응답 내용 확인
         content = response.content
         if not content or not content.strip():
             print("경고: LLM이 빈 응답을 반환했습니다.")
+            _record_llm_call("sync", "empty", start_time)
             return None
         
         # 응답 출력 (디버깅용)
@@ -278,13 +296,18 @@ def generate_game_data(llm, prompt_template, prompt_content):
         print(content)
         
         # JSON 처리 로직은 기존과 동일
-        return _process_llm_response(content)
+        with span("process_response"):
+            result = _process_llm_response(content)
+        _record_llm_call("sync", "success" if result else "invalid_json", start_time)
+        return result
         
     except Exception as e:
         print(f"LLM 데이터 생성 중 오류 발생: {e}")
+        _record_llm_call("sync", "error", start_time)
         return None
 
-async def generate_game_data_async(llm, prompt_template, prompt_content):
+async def generate_game_data_async(llm, prompt_template, prompt_content, max_output_tokens=None,
+                                   endpoint="default", chapter_id=None, thinking_budget=None):
     """
     게임 데이터를 비동기로 생성합니다.
     
@@ -292,26 +315,38 @@ async def generate_game_data_async(llm, prompt_template, prompt_content):
         llm (ChatGoogleGenerativeAI): 초기화된 LangChain LLM 모델
         prompt_template (PromptTemplate): LangChain 프롬프트 템플릿
         prompt_content (str): 프롬프트 내용
+        max_output_tokens (int, optional): 이번 호출의 최대 출력 토큰
+        endpoint (str): 토큰 사용량 집계용 엔드포인트 이름
+        chapter_id (str, optional): 토큰 사용량 집계용 chapterId
+        thinking_budget (int, optional): 이번 호출의 사고 토큰 예산
         
     Returns:
         str: 생성된 게임 데이터 (JSON 문자열)
     """
     print("게임 시나리오 데이터 생성 중... (비동기)")
+    start_time = time.perf_counter()
     
     try:
         # LangChain을 사용한 프롬프트 생성 및 모델 호출
         formatted_prompt = prompt_template.format(question=prompt_content)
         
         # LangChain 메시지 체인 생성
-        messages = [HumanMessage(content=formatted_prompt)]
+        messages = _human_messages(formatted_prompt)
         
         # 비동기 모델 호출
-        response = await llm.ainvoke(messages)
+        _prepare_async_client(llm)
+        with span("llm_wait"):
+            response = await asyncio.wait_for(
+                llm.ainvoke(messages, **_generation_kwargs(max_output_tokens, thinking_budget)),
+                llm_call_timeout()
+            )
+        _record_usage(response, formatted_prompt, start_time, endpoint, chapter_id)
         
         # 응답 내용 확인
         content = response.content
         if not content or not content.strip():
             print("경고: LLM이 빈 응답을 반환했습니다.")
+            _record_llm_call("async", "empty", start_time)
             return None
         
         # 응답 출력 (디버깅용)
@@ -319,12 +354,60 @@ async def generate_game_data_async(llm, prompt_template, prompt_content):
         print(content)
         
         # JSON 처리 로직은 기존과 동일
-        return _process_llm_response(content)
+        with span("process_response"):
+            result = _process_llm_response(content)
+        _record_llm_call("async", "success" if result else "invalid_json", start_time)
+        return result
         
     except Exception as e:
         print(f"LLM 데이터 생성 중 오류 발생: {e}")
+        _record_llm_call("async", "error", start_time)
         return None
 
+_thinking_config_supported = None
+
+
+def thinking_config_supported() -> bool:
+    """
+    설치된 Gemini 클라이언트의 GenerationConfig에 thinking_config 필드가 있는지 확인합니다.
+    없는 버전(google-ai-generativelanguage 0.6.x 등)에 넘기면 요청 전에 ValueError가 발생합니다.
+    """
+    global _thinking_config_supported
+    if _thinking_config_supported is None:
+        try:
+            from google.ai.generativelanguage_v1beta.types import GenerationConfig
+            _thinking_config_supported = "thinking_config" in GenerationConfig.meta.fields
+        except Exception:
+            _thinking_config_supported = False
+        if not _thinking_config_supported:
+            print("설치된 Gemini 클라이언트가 thinking_config를 지원하지 않아 사고 토큰 예산은 적용하지 않습니다.")
+    return _thinking_config_supported
+
+def _generation_kwargs(max_output_tokens=None, thinking_budget=None) -> Dict[str, Any]:
+    """호출별 생성 설정 (지정된 값만 모델 기본 설정을 덮어씀)"""
+    config = {}
+    if max_output_tokens:
+        config["max_output_tokens"] = int(max_output_tokens)
+    if thinking_budget is not None and thinking_config_supported():
+        # 0: 사고 비활성화, -1: 모델이 분량 결정
+        config["thinking_config"] = {"thinking_budget": int(thinking_budget)}
+    return {"generation_config": config} if config else {}
+
+def _record_usage(response, prompt: str, start_time: float, endpoint: str, chapter_id=None, content=None):
+    """응답 메타데이터(없으면 추정치)로 토큰 사용량과 비용을 집계합니다."""
+    try:
+        if content is None:
+            content = getattr(response, "content", "") or ""
+        usage = extract_usage(response, prompt, content)
+        token_accountant.record(usage, time.perf_counter() - start_time, endpoint, chapter_id)
+    except Exception as e:
+        print(f"토큰 사용량 기록 실패: {e}")
+
+def _record_llm_call(mode: str, outcome: str, start_time: float):
+    """LLM 호출 결과와 소요 시간을 메트릭에 기록합니다."""
+    llm_call_duration.observe(time.perf_counter() - start_time, mode=mode)
+    llm_calls_total.inc(mode=mode, outcome=outcome)
+
 def _process_llm_response(content):
     """
     LLM 응답을 처리하여 JSON 형식으로 변환합니다.
@@ -389,7 +472,7 @@ def _process_llm_response(content):
         return None
 
 # 병렬 처리를 위한 함수들
-async def generate_multiple_scenarios_async(llm, prompt_template, prompt_contents):
+async def generate_multiple_scenarios_async(llm, prompt_template, prompt_contents, max_concurrent=None):
     """
     여러 시나리오를 병렬로 생성합니다.
     
@@ -397,14 +480,20 @@ async def generate_multiple_scenarios_async(llm, prompt_template, prompt_content
         llm: LLM 모델
         prompt_template: 프롬프트 템플릿
         prompt_contents (list): 프롬프트 내용 리스트
+        max_concurrent (int, optional): 최대 동시 실행 수 (없으면 제한 없음)
         
     Returns:
         list: 생성된 시나리오 데이터 리스트
     """
-    tasks = []
-    for content in prompt_contents:
-        task = generate_game_data_async(llm, prompt_template, content)
-        tasks.append(task)
+    semaphore = asyncio.Semaphore(max_concurrent) if max_concurrent else None
+    
+    async def generate_single(content):
+        if semaphore is None:
+            return await generate_game_data_async(llm, prompt_template, content)
+        async with semaphore:
+            return await generate_game_data_async(llm, prompt_template, content)
+    
+    tasks = [generate_single(content) for content in prompt_contents]
     
     # 병렬 실행
     results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -421,36 +510,101 @@ async def generate_multiple_scenarios_async(llm, prompt_template, prompt_content
     return processed_results
 
 # 스트리밍 처리를 위한 함수
-async def generate_game_data_stream(llm, prompt_template, prompt_content, callback=None):
+async def generate_game_data_stream(llm, prompt_template, prompt_content, callback=None,
+                                    max_output_tokens=None, endpoint="default", chapter_id=None,
+                                    guard_factory=None, thinking_budget=None, on_retry=None):
     """
     게임 데이터를 스트리밍으로 생성합니다.
+    검사기(guard)가 문제를 발견하면 즉시 스트림을 닫고, 추가 지침을 붙여 다시 생성합니다.
     
     Args:
         llm: LLM 모델
         prompt_template: 프롬프트 템플릿
         prompt_content: 프롬프트 내용
         callback: 토큰별 콜백 함수
+        max_output_tokens (int, optional): 이번 호출의 최대 출력 토큰
+        endpoint (str): 토큰 사용량 집계용 엔드포인트 이름
+        chapter_id (str, optional): 토큰 사용량 집계용 chapterId
+        guard_factory (callable, optional): 시도마다 새 StreamGuard 목록을 만드는 함수
+        thinking_budget (int, optional): 이번 호출의 사고 토큰 예산
+        on_retry (callable, optional): 재생성 직전에 위반 내용과 함께 호출 (없으면 callback으로 안내 문구 전송)
         
     Returns:
         str: 최종 생성된 게임 데이터
+        
+    Raises:
+        StreamViolation: 재시도 후에도 검사에 실패한 경우
     """
     print("게임 시나리오 데이터 스트리밍 생성 중...")
+    max_retries = get_stream_guard_settings()["max_retries"] if guard_factory else 0
+    
+    for attempt in range(max_retries + 1):
+        try:
+            return await _stream_once(
+                llm, prompt_template, prompt_content, callback, max_output_tokens,
+                endpoint, chapter_id, guard_factory() if guard_factory else [], thinking_budget
+            )
+        except StreamViolation as violation:
+            stream_aborts_total.inc(kind=violation.kind)
+            print(f"스트리밍 조기 중단 ({attempt + 1}/{max_retries + 1}): {violation}")
+            if attempt >= max_retries:
+                raise
+            # 문제 부분을 피하도록 지침을 추가하여 다시 생성
+            prompt_content = f"{prompt_content}\n\n추가 지침: {violation.retry_hint}"
+            if on_retry:
+                await on_retry(violation)
+            elif callback:
+                await callback("\n\n🔄 문제가 발견되어 다시 생성합니다...\n\n")
+        except Exception as e:
+            print(f"스트리밍 생성 중 오류 발생: {e}")
+            return None
+    return None
+
+
+async def _stream_once(llm, prompt_template, prompt_content, callback, max_output_tokens,
+                       endpoint, chapter_id, guards, thinking_budget=None):
+    """스트리밍 1회 시도 (검사 실패 시 업스트림 스트림을 닫고 StreamViolation 발생)"""
+    start_time = time.perf_counter()
+    formatted_prompt = prompt_template.format(question=prompt_content)
+    messages = _human_messages(formatted_prompt)
+    
+    full_response = ""
+    usage_total = None
+    outcome = "error"
+    _prepare_async_client(llm)
+    stream = llm.astream(messages, **_generation_kwargs(max_output_tokens, thinking_budget))
     
     try:
-        formatted_prompt = prompt_template.format(question=prompt_content)
-        messages = [HumanMessage(content=formatted_prompt)]
-        
-        full_response = ""
-        
         # 스트리밍 처리
-        async for chunk in llm.astream(messages):
-            if chunk.content:
-                full_response += chunk.content
-                if callback:
-                    await callback(chunk.content)
-        
-        return _process_llm_response(full_response)
-        
-    except Exception as e:
-        print(f"스트리밍 생성 중 오류 발생: {e}")
-        return None
+        with span("llm_wait"):
+            async for chunk in _iterate_with_timeout(stream, llm_call_timeout()):
+                if getattr(chunk, "usage_metadata", None):
+                    # 스트리밍 사용량은 청크별 증분이므로 합산 (AIMessageChunk 덧셈이 usage_metadata를 더함)
+                    usage_total = chunk if usage_total is None else usage_total + chunk
+                if chunk.content:
+                    full_response += chunk.content
+                    for guard in guards:
+                        guard.feed(chunk.content, full_response)
+                    if callback:
+                        await callback(chunk.content)
+            for guard in guards:
+                guard.finish(full_response)
+        
+        with span("process_response"):
+            result = _process_llm_response(full_response)
+        outcome = "success" if result else "invalid_json"
+        return result
+    except StreamViolation:
+        outcome = "aborted"
+        raise
+    finally:
+        # 중단된 경우에도 업스트림 연결을 즉시 닫아 남은 출력 토큰 생성을 멈춤
+        close = getattr(stream, "aclose", None)
+        if close:
+            try:
+                await close()
+            except Exception:
+                pass
+        # 중단 전까지 생성된 분량도 과금되므로 사용량 기록
+        _record_usage(usage_total, formatted_prompt, start_time, endpoint, chapter_id, full_response)
+        _record_llm_call("stream", outcome, start_time)
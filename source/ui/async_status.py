@@ -0,0 +1,190 @@
+"""
+비동기 작업 진행 상태 표시 위젯 (Streamlit 전용)
+"""
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from source.utils.async_handler import AsyncTaskManager, caller_script_context
+
+
+@contextmanager
+def caller_script_run_ctx():
+    """
+    백그라운드 이벤트 루프에서 실행 중인 코루틴이 요청한 세션의 화면을 갱신할 수 있도록
+    제출한 쪽의 스크립트 실행 컨텍스트를 잠시 현재 스레드에 연결합니다.
+    (루프 스레드는 여러 세션이 공유하므로 await 없이 화면 갱신만 감쌀 것)
+    """
+    script_context = caller_script_context.get()
+    if script_context is None:
+        yield
+        return
+    thread = threading.current_thread()
+    previous = get_script_run_ctx(suppress_warning=True)
+    add_script_run_ctx(thread, script_context)
+    try:
+        yield
+    finally:
+        add_script_run_ctx(thread, previous)
+
+
+def run_with_progress(task_func: Callable, task_args: tuple = (), 
+                     task_kwargs: dict = None, 
+                     progress_text: str = "처리 중...",
+                     success_text: str = "완료!") -> Any:
+    """
+    진행률 표시와 함께 작업을 실행합니다.
+    
+    Args:
+        task_func: 실행할 함수
+        task_args: 함수 인자
+        task_kwargs: 함수 키워드 인자
+        progress_text: 진행 중 표시할 텍스트
+        success_text: 완료 시 표시할 텍스트
+    
+    Returns:
+        함수 실행 결과
+    """
+    if task_kwargs is None:
+        task_kwargs = {}
+    
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+    
+    try:
+        status_text.text(progress_text)
+        progress_bar.progress(30)
+        
+        # 작업 실행
+        result = task_func(*task_args, **task_kwargs)
+        
+        progress_bar.progress(100)
+        status_text.success(success_text)
+        
+        # 2초 후 진행률 표시 제거
+        time.sleep(2)
+        progress_bar.empty()
+        status_text.empty()
+        
+        return result
+        
+    except Exception as e:
+        progress_bar.empty()
+        status_text.error(f"오류 발생: {str(e)}")
+        raise
+
+
+def create_async_ui_handler():
+    """비동기 UI 핸들러 생성"""
+    if 'async_manager' not in st.session_state:
+        st.session_state.async_manager = AsyncTaskManager()
+    
+    return st.session_state.async_manager
+
+
+@st.experimental_fragment(run_every=1.0)
+def display_async_status(task_id: str, container):
+    """비동기 작업 상태를 주기적으로 업데이트"""
+    if 'async_manager' in st.session_state:
+        manager = st.session_state.async_manager
+        status = manager.get_task_status(task_id)
+        
+        if status['status'] == 'running':
+            container.info("🔄 처리 중...")
+        elif status['status'] == 'completed':
+            container.success("✅ 완료!")
+            return True
+        elif status['status'] == 'error':
+            container.error(f"❌ 오류: {status.get('error', '알 수 없는 오류')}")
+            return True
+    
+    return False
+
+
+# 데코레이터
+def async_streamlit_task(task_name: str = None):
+    """
+    Streamlit에서 비동기 작업을 실행하기 위한 데코레이터
+    """
+    def decorator(func):
+        def wrapper(*args, **kwargs):
+            manager = create_async_ui_handler()
+            task_id = task_name or f"task_{int(time.time())}"
+            
+            # 비동기 작업 시작
+            manager.run_async_task(task_id, func, *args, **kwargs)
+            
+            # 상태 표시 컨테이너
+            status_container = st.empty()
+            
+            # 작업 완료까지 대기
+            while not manager.is_task_completed(task_id):
+                status_container.info("🔄 처리 중...")
+                time.sleep(1)
+            
+            # 결과 반환
+            try:
+                result = manager.get_task_result(task_id)
+                status_container.success("✅ 완료!")
+                time.sleep(1)
+                status_container.empty()
+                return result
+            except Exception as e:
+                status_container.error(f"❌ 오류: {str(e)}")
+                raise
+        
+        return wrapper
+    return decorator
+
+
+# 사용 예시
+async def example_async_function(prompt: str, delay: int = 3):
+    """예시 비동기 함수"""
+    await asyncio.sleep(delay)  # 실제 LLM 호출 시뮬레이션
+    return f"처리 완료: {prompt}"
+
+
+def demo_async_usage():
+    """비동기 처리 데모"""
+    st.title("비동기 처리 데모")
+    
+    if st.button("비동기 작업 시작"):
+        manager = create_async_ui_handler()
+        task_id = manager.run_async_task(
+            "demo_task",
+            example_async_function,
+            "테스트 프롬프트",
+            delay=5
+        )
+        
+        st.session_state.current_task = task_id
+    
+    # 진행 상황 표시
+    if hasattr(st.session_state, 'current_task'):
+        task_id = st.session_state.current_task
+        manager = st.session_state.async_manager
+        
+        col1, col2 = st.columns([3, 1])
+        
+        with col1:
+            status_container = st.empty()
+        
+        with col2:
+            if st.button("취소"):
+                manager.cancel_task(task_id)
+                del st.session_state.current_task
+        
+        if display_async_status(task_id, status_container):
+            # 작업 완료
+            try:
+                result = manager.get_task_result(task_id)
+                st.success(f"결과: {result}")
+            except Exception as e:
+                st.error(f"오류: {e}")
+            finally:
+                del st.session_state.current_task
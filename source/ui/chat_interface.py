@@ -2,11 +2,23 @@
 채팅 인터페이스 UI 컴포넌트 - 스토리 편집 전용
 """
 import streamlit as st
-import json
+from source.utils.request_analysis import analyze_request
+from source.ui.story_viewer import render_turn_card, get_story_view_model
+from source.ui.fragments import fragment
+from source.utils.chat_history import ChatHistory, get_chat_history_settings
 
+INTENT_DISPLAY = {
+    "character": "🧙‍♀️ 캐릭터 수정",
+    "setting": "🌍 배경 수정", 
+    "events": "📊 이벤트 수정",
+    "dialogue": "📖 대화 수정",
+    "general": "💬 일반 수정"
+}
 
+
+@fragment
 def render_chat_interface(customizer):
-    """채팅 인터페이스 렌더링 - 스토리 편집 전용"""
+    """채팅 인터페이스 렌더링 - 스토리 편집 전용 (프래그먼트: 입력/저장 조작은 이 영역만 다시 실행)"""
     
     # 스토리가 선택되었는지 확인
     if not st.session_state.get('current_game_data'):
@@ -45,30 +57,29 @@ def render_chat_interface(customizer):
     """)
     
     # 채팅 히스토리 초기화
-    if 'chat_history' not in st.session_state:
-        st.session_state.chat_history = []
+    chat_history = get_chat_history()
     
     # 채팅 인터페이스
     with st.container():
-        # 채팅 히스토리 표시
-        for i, (role, message) in enumerate(st.session_state.chat_history):
-            if role == "user":
-                st.chat_message("user").write(message)
-            else:
-                st.chat_message("assistant").write(message)
+        # 채팅 히스토리 표시 (최근 메시지만, 나머지는 "이전 메시지 더 보기"로 펼침)
+        render_chat_messages(chat_history)
+        
+        # 마지막 수정 결과 (수정 직후 앱 전체를 다시 실행하므로 세션 상태에서 그림)
+        if st.session_state.get('last_edit_result'):
+            render_edit_result(st.session_state.last_edit_result)
         
         # 사용자 입력
         user_input = st.chat_input("스토리를 어떻게 수정하고 싶나요?")
         
         if user_input:
-            # 사용자 메시지 추가
+            # 사용자 메시지 추가 (이전 수정 결과 패널은 새 요청부터 표시하지 않음)
+            st.session_state.last_edit_result = None
             st.session_state.chat_history.append(("user", user_input))
             st.chat_message("user").write(user_input)
             
-            # 사용자 질문 검증
-            from source.utils.chatbot_helper import ChatbotHelper
-            chatbot_helper = ChatbotHelper()
-            validation_result = chatbot_helper.validate_user_request(user_input)
+            # 사용자 질문 검증 (요청 분석은 입력당 한 번만 수행되어 캐시됨)
+            request_analysis = analyze_request(user_input)
+            validation_result = request_analysis.scope_result()
             
             # AI 응답 생성
             with st.chat_message("assistant"):
@@ -89,169 +100,206 @@ def render_chat_interface(customizer):
                     st.session_state.chat_history.append(("assistant", guide_response))
                     return
                 
-                with st.spinner("스토리를 수정하고 있습니다..."):
-                    try:
-                        # 현재 스토리 이름 확인
-                        current_story_name = st.session_state.get('current_story_name')
-                        
-                        # current_story_name이 없으면 current_game_data에서 추출 시도
-                        if not current_story_name and st.session_state.get('current_game_data'):
-                            # 사용 가능한 스토리 목록에서 매칭 시도
-                            customizer_stories = customizer.get_available_stories()
-                            if customizer_stories:
-                                # 첫 번째 스토리를 기본값으로 사용 (임시 해결책)
-                                current_story_name = customizer_stories[0]
-                                st.session_state.current_story_name = current_story_name
+                try:
+                    # 현재 스토리 이름 확인
+                    current_story_name = st.session_state.get('current_story_name')
+                    
+                    # current_story_name이 없으면 current_game_data에서 추출 시도
+                    if not current_story_name and st.session_state.get('current_game_data'):
+                        # 사용 가능한 스토리 목록에서 매칭 시도
+                        customizer_stories = customizer.get_available_stories()
+                        if customizer_stories:
+                            # 첫 번째 스토리를 기본값으로 사용 (임시 해결책)
+                            current_story_name = customizer_stories[0]
+                            st.session_state.current_story_name = current_story_name
+                    
+                    if not current_story_name:
+                        error_msg = "스토리 이름을 찾을 수 없습니다. 스토리를 다시 불러와주세요."
+                        st.error(error_msg)
+                        st.session_state.chat_history.append(("assistant", error_msg))
                         
-                        if not current_story_name:
-                            error_msg = "스토리 이름을 찾을 수 없습니다. 스토리를 다시 불러와주세요."
-                            st.error(error_msg)
-                            st.session_state.chat_history.append(("assistant", error_msg))
-                            
-                            # 디버깅 정보 표시
-                            debug_info = customizer.debug_story_info("")
-                            with st.expander("🔧 디버깅 정보"):
-                                st.json(debug_info)
-                            return
+                        # 디버깅 정보 표시
+                        debug_info = customizer.debug_story_info("")
+                        with st.expander("🔧 디버깅 정보"):
+                            st.json(debug_info)
+                        return
+                    
+                    # 스토리 수정 요청 (완성된 턴부터 카드로 표시, 검증/저장은 스트림이 끝난 뒤 수행)
+                    status = st.empty()
+                    status.caption("✍️ 스토리를 수정하고 있습니다... 완성된 턴부터 바로 표시됩니다.")
+                    game_data, analysis = customizer.modify_existing_story_streaming(
+                        current_story_name, user_input, st.empty(), st.session_state.chat_history,
+                        request_analysis=request_analysis, render_turn=render_turn_card
+                    )
+                    status.empty()
+                    
+                    if game_data and analysis:
+                        st.session_state.current_game_data = game_data
                         
-                        # 스토리 수정 요청
-                        game_data, analysis = customizer.modify_existing_story(
-                            current_story_name, user_input, st.session_state.chat_history
-                        )
+                        # 의도 분석 결과
+                        intent_type = analysis["intent"]["type"]
+                        response = f"✨ 요청을 분석했습니다: {INTENT_DISPLAY.get(intent_type, intent_type)}"
+                        st.session_state.chat_history.append(("assistant", response))
                         
-                        if game_data and analysis:
-                            st.session_state.current_game_data = game_data
-                            
-                            # 의도 분석 결과 표시
-                            intent_type = analysis["intent"]["type"]
-                            intent_display = {
-                                "character": "🧙‍♀️ 캐릭터 수정",
-                                "setting": "🌍 배경 수정", 
-                                "events": "📊 이벤트 수정",
-                                "dialogue": "📖 대화 수정",
-                                "general": "💬 일반 수정"
-                            }
-                            
-                            response = f"✨ 요청을 분석했습니다: {intent_display.get(intent_type, intent_type)}"
-                            st.write(response)
-                            
-                            # 품질 검증 결과 표시
-                            if analysis.get("validation"):
-                                validation = analysis["validation"]
-                                if validation["is_valid"]:
-                                    st.success("✅ 고품질 스토리가 생성되었습니다!")
-                                else:
-                                    st.warning("⚠️ 일부 품질 이슈가 있습니다:")
-                                    for issue in validation["issues"]:
-                                        st.write(f"• {issue}")
+                        # 결과 패널은 세션 상태에서 다시 그리고, 앱 전체를 다시 실행해 스토리 뷰어도 갱신
+                        st.session_state.last_edit_result = {
+                            "id": st.session_state.chat_history.total_count,
+                            "game_data": game_data,
+                            "analysis": analysis
+                        }
+                        st.rerun()
                             
-                            # 개선 제안 표시
-                            if analysis.get("suggestions"):
-                                st.write("**💡 추가 개선 제안:**")
-                                for suggestion in analysis["suggestions"]:
-                                    st.write(f"• {suggestion}")
-                            
-                            st.session_state.chat_history.append(("assistant", response))
-                            
-                            # 게임 데이터 파싱하여 간단한 요약 표시
-                            try:
-                                parsed_data = json.loads(game_data)
-                                if isinstance(parsed_data, list) and len(parsed_data) > 0:
-                                    st.metric("수정된 게임 턴", len(parsed_data))
-                            except:
-                                pass
-                                
-                            # 저장 기능 추가
-                            st.markdown("---")
-                            st.markdown("**💾 수정된 스토리 저장**")
-                            
-                            # 수정된 스토리 표시용 컨테이너
-                            with st.expander("📖 수정된 스토리 미리보기", expanded=False):
-                                try:
-                                    parsed_data = json.loads(game_data)
-                                    if isinstance(parsed_data, list) and len(parsed_data) > 0:
-                                        for i, turn in enumerate(parsed_data[:3], 1):  # 처음 3턴만 미리보기
-                                            st.markdown(f"**턴 {turn.get('turn_number', i)}**")
-                                            st.write(f"📰 {turn.get('news', '뉴스 없음')}")
-                                        if len(parsed_data) > 3:
-                                            st.write(f"... 및 {len(parsed_data) - 3}개 턴 더")
-                                except:
-                                    st.write("스토리 데이터를 미리보기할 수 없습니다.")
-                            
-                            # 저장 UI
-                            col1, col2 = st.columns([3, 1])
-                            with col1:
-                                save_title = st.text_input(
-                                    "저장할 스토리 제목을 입력하세요",
-                                    placeholder="예: 수정된 마법 왕국 스토리",
-                                    key=f"save_title_{len(st.session_state.chat_history)}"
-                                )
-                            with col2:
-                                save_button = st.button(
-                                    "💾 저장하기",
-                                    type="primary",
-                                    key=f"save_button_{len(st.session_state.chat_history)}"
-                                )
-                            
-                            if save_button and save_title.strip():
-                                try:
-                                    # StoryManager import 추가
-                                    from source.utils.story_manager import StoryManager
-                                    story_manager = StoryManager()
-                                    
-                                    # 현재 스토리 정보 가져오기
-                                    current_story_name = st.session_state.get('current_story_name', 'unknown')
-                                    scenario_type = current_story_name.replace('game_scenario_', '').split('_')[0] if 'game_scenario_' in current_story_name else 'custom'
-                                    
-                                    # 사용자 요청 히스토리 수집
-                                    user_requests = [msg for role, msg in st.session_state.chat_history if role == "user"]
-                                    
-                                    # 스토리 저장
-                                    saved_path = story_manager.save_story(
-                                        story_data=game_data,
-                                        story_name=save_title.strip(),
-                                        scenario_type=scenario_type,
-                                        user_requests=user_requests
-                                    )
-                                    
-                                    st.success(f"✅ 스토리가 성공적으로 저장되었습니다!")
-                                    st.info(f"📁 저장 위치: `{saved_path}`")
-                                    
-                                    # 저장 후 알림 메시지를 채팅에 추가
-                                    save_msg = f"📝 스토리 '{save_title.strip()}'가 저장되었습니다."
-                                    st.session_state.chat_history.append(("assistant", save_msg))
-                                    
-                                except Exception as save_error:
-                                    st.error(f"저장 중 오류가 발생했습니다: {str(save_error)}")
-                            elif save_button and not save_title.strip():
-                                st.warning("저장할 스토리 제목을 입력해주세요.")
-                                
-                        elif analysis and analysis.get("error"):
-                            # 에러 메시지가 있는 경우
-                            error_msg = analysis["error"]
-                            st.error(error_msg)
-                            st.session_state.chat_history.append(("assistant", error_msg))
-                            
-                            # 디버깅 정보 표시
-                            debug_info = customizer.debug_story_info(current_story_name)
-                            with st.expander("🔧 디버깅 정보"):
-                                st.json(debug_info)
-                        else:
-                            error_msg = "죄송해요, 스토리 수정에 실패했습니다. 다시 시도해주세요."
-                            st.error(error_msg)
-                            st.session_state.chat_history.append(("assistant", error_msg))
-                            
-                            # 디버깅 정보 표시
-                            debug_info = customizer.debug_story_info(current_story_name)
-                            with st.expander("🔧 디버깅 정보"):
-                                st.json(debug_info)
-                            
-                    except Exception as e:
-                        error_msg = f"오류가 발생했습니다: {str(e)}"
+                    elif analysis and analysis.get("error"):
+                        # 에러 메시지가 있는 경우
+                        error_msg = analysis["error"]
                         st.error(error_msg)
                         st.session_state.chat_history.append(("assistant", error_msg))
-    
+                        
+                        # 디버깅 정보 표시
+                        debug_info = customizer.debug_story_info(current_story_name)
+                        with st.expander("🔧 디버깅 정보"):
+                            st.json(debug_info)
+                    else:
+                        error_msg = "죄송해요, 스토리 수정에 실패했습니다. 다시 시도해주세요."
+                        st.error(error_msg)
+                        st.session_state.chat_history.append(("assistant", error_msg))
+                        
+                        # 디버깅 정보 표시
+                        debug_info = customizer.debug_story_info(current_story_name)
+                        with st.expander("🔧 디버깅 정보"):
+                            st.json(debug_info)
+                        
+                except Exception as e:
+                    error_msg = f"오류가 발생했습니다: {str(e)}"
+                    st.error(error_msg)
+                    st.session_state.chat_history.append(("assistant", error_msg))
+
     # 채팅 히스토리 클리어 버튼
     if st.button("💬 대화 초기화", type="secondary"):
-        st.session_state.chat_history = []
-        st.rerun()
\ No newline at end of file
+        st.session_state.chat_history = ChatHistory.from_settings()
+        st.session_state.last_edit_result = None
+        st.session_state.chat_window = None
+        st.rerun()
+
+
+def get_chat_history() -> ChatHistory:
+    """세션의 채팅 기록 (없거나 이전 형식의 목록이면 제한된 기록으로 변환)"""
+    chat_history = st.session_state.get('chat_history')
+    if not isinstance(chat_history, ChatHistory):
+        chat_history = ChatHistory.from_settings(chat_history or [])
+        st.session_state.chat_history = chat_history
+    return chat_history
+
+
+def _expand_chat_window(window: int):
+    st.session_state.chat_window = window
+
+
+def render_chat_messages(chat_history: ChatHistory):
+    """최근 메시지만 그리고, 보관 중인 이전 메시지는 요청할 때 한 페이지씩 더 표시"""
+    page_size = get_chat_history_settings()["render_window"]
+    window = st.session_state.get('chat_window') or page_size
+    hidden = len(chat_history) - window
+    
+    if chat_history.archived_count:
+        st.caption(f"🗂️ {chat_history.archived_summary()}")
+    if hidden > 0:
+        # 콜백에서 창을 넓혀 두면 버튼 클릭으로 인한 (프래그먼트) 재실행에 바로 반영됨
+        st.button(
+            f"⬆️ 이전 메시지 더 보기 ({hidden}개)", key="chat_load_older",
+            on_click=_expand_chat_window, args=(window + page_size,)
+        )
+    
+    for role, message in chat_history.window(window):
+        st.chat_message("user" if role == "user" else "assistant").write(message)
+
+
+def render_edit_result(result):
+    """마지막 수정 결과 패널 (품질 검증, 개선 제안, 미리보기, 저장)"""
+    game_data = result["game_data"]
+    analysis = result["analysis"]
+    view = get_story_view_model(game_data)
+    
+    with st.chat_message("assistant"):
+        # 품질 검증 결과 표시
+        if analysis.get("validation"):
+            validation = analysis["validation"]
+            if validation["is_valid"]:
+                st.success("✅ 고품질 스토리가 생성되었습니다!")
+            else:
+                st.warning("⚠️ 일부 품질 이슈가 있습니다:")
+                for issue in validation["issues"]:
+                    st.write(f"• {issue}")
+        
+        # 개선 제안 표시
+        if analysis.get("suggestions"):
+            st.write("**💡 추가 개선 제안:**")
+            for suggestion in analysis["suggestions"]:
+                st.write(f"• {suggestion}")
+        
+        # 간단한 요약 표시 (캐시된 화면용 값 사용)
+        if view["is_list"] and view["total_turns"] > 0:
+            st.metric("수정된 게임 턴", view["total_turns"])
+            
+        # 저장 기능 추가
+        st.markdown("---")
+        st.markdown("**💾 수정된 스토리 저장**")
+        
+        # 수정된 스토리 표시용 컨테이너
+        with st.expander("📖 수정된 스토리 미리보기", expanded=False):
+            if view["is_list"] and view["total_turns"] > 0:
+                for i, card in enumerate(view["cards"][:3], 1):  # 처음 3턴만 미리보기
+                    st.markdown(f"**턴 {i}**")
+                    st.write(f"📰 {card['news'] or '뉴스 없음'}")
+                if view["total_turns"] > 3:
+                    st.write(f"... 및 {view['total_turns'] - 3}개 턴 더")
+            else:
+                st.write("스토리 데이터를 미리보기할 수 없습니다.")
+        
+        # 저장 UI
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            save_title = st.text_input(
+                "저장할 스토리 제목을 입력하세요",
+                placeholder="예: 수정된 마법 왕국 스토리",
+                key=f"save_title_{result['id']}"
+            )
+        with col2:
+            save_button = st.button(
+                "💾 저장하기",
+                type="primary",
+                key=f"save_button_{result['id']}"
+            )
+        
+        if save_button and save_title.strip():
+            try:
+                # StoryManager import 추가
+                from source.utils.story_manager import StoryManager
+                story_manager = StoryManager()
+                
+                # 현재 스토리 정보 가져오기
+                current_story_name = st.session_state.get('current_story_name', 'unknown')
+                scenario_type = current_story_name.replace('game_scenario_', '').split('_')[0] if 'game_scenario_' in current_story_name else 'custom'
+                
+                # 사용자 요청 히스토리 수집
+                user_requests = st.session_state.chat_history.user_requests()
+                
+                # 스토리 저장
+                saved_path = story_manager.save_story(
+                    story_data=game_data,
+                    story_name=save_title.strip(),
+                    scenario_type=scenario_type,
+                    user_requests=user_requests
+                )
+                
+                st.success(f"✅ 스토리가 성공적으로 저장되었습니다!")
+                st.info(f"📁 저장 위치: `{saved_path}`")
+                
+                # 저장 후 알림 메시지를 채팅에 추가
+                save_msg = f"📝 스토리 '{save_title.strip()}'가 저장되었습니다."
+                st.session_state.chat_history.append(("assistant", save_msg))
+                
+            except Exception as save_error:
+                st.error(f"저장 중 오류가 발생했습니다: {str(save_error)}")
+        elif save_button and not save_title.strip():
+            st.warning("저장할 스토리 제목을 입력해주세요.")
\ No newline at end of file
@@ -0,0 +1,160 @@
+"""
+비동기 데모 앱(async_demo.py, async_demo_new.py)용 LLM 호출 헬퍼
+
+자유 형식 프롬프트로 생성하고 (결과, 메타데이터)를 반환합니다.
+Streamlit 컨테이너에 직접 출력하므로 API 서버 경로(llm_handler)와 분리해 둡니다.
+"""
+import re
+import json
+import time
+import asyncio
+from typing import List
+
+import streamlit as st
+from langchain.callbacks.base import BaseCallbackHandler
+
+from source.models.llm_handler import initialize_llm_async, _human_messages
+from source.ui.async_status import caller_script_run_ctx
+from source.utils.stream_bridge import get_stream_bridge_settings
+
+
+class StreamingCallbackHandler(BaseCallbackHandler):
+    """스트리밍을 위한 콜백 핸들러 (토큰마다가 아니라 프레임 간격마다 화면 갱신)"""
+
+    def __init__(self, container=None):
+        self.container = container or st.empty()
+        self.parts: List[str] = []
+        self.frame_interval = get_stream_bridge_settings()["frame_interval_ms"] / 1000
+        self._last_render = 0.0
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    def _render(self):
+        # 백그라운드 이벤트 루프 스레드에서 호출되므로 요청한 세션의 컨텍스트로 갱신
+        with caller_script_run_ctx():
+            self.container.markdown(self.text)
+        self._last_render = time.monotonic()
+
+    def on_llm_new_token(self, token: str, **kwargs) -> None:
+        """새로운 토큰이 생성될 때 호출됩니다"""
+        self.parts.append(token)
+        if time.monotonic() - self._last_render >= self.frame_interval:
+            self._render()
+
+    def on_llm_end(self, response, **kwargs) -> None:
+        """생성이 끝나면 남은 토큰까지 표시합니다"""
+        self._render()
+
+
+def _parse_story(content: str):
+    """응답에서 JSON을 추출합니다. (실패 시 텍스트 그대로 반환)"""
+    try:
+        json_match = re.search(r'```json\s*(.*?)\s*```', content, re.DOTALL)
+        if json_match:
+            return json.loads(json_match.group(1))
+        # JSON 블록이 없다면 전체 내용에서 JSON 찾기
+        return json.loads(content)
+    except json.JSONDecodeError:
+        return {"content": content, "type": "text"}
+
+
+async def generate_story_with_metadata(prompt: str, llm=None) -> tuple:
+    """
+    비동기적으로 게임 스토리 데이터를 생성합니다.
+
+    Args:
+        prompt (str): 생성할 프롬프트
+        llm (ChatGoogleGenerativeAI, optional): LLM 모델 인스턴스
+
+    Returns:
+        tuple: (생성된 스토리 데이터, 메타데이터)
+    """
+    if llm is None:
+        llm = await initialize_llm_async()
+
+    try:
+        response = await llm.ainvoke(_human_messages(prompt))
+        content = response.content
+        metadata = {
+            "model": llm.model,
+            "tokens_used": len(content.split()),
+            "async": True
+        }
+        return _parse_story(content), metadata
+
+    except Exception as e:
+        raise Exception(f"비동기 LLM 생성 중 오류 발생: {str(e)}")
+
+
+async def generate_stories_with_metadata(prompts: List[str], llm=None,
+                                         max_concurrent: int = 3) -> List[tuple]:
+    """
+    여러 시나리오를 병렬로 비동기 생성합니다.
+
+    Args:
+        prompts (List[str]): 프롬프트 리스트
+        llm (ChatGoogleGenerativeAI, optional): LLM 모델 인스턴스
+        max_concurrent (int): 최대 동시 실행 수
+
+    Returns:
+        List[tuple]: [(스토리 데이터, 메타데이터), ...]
+    """
+    if llm is None:
+        llm = await initialize_llm_async()
+
+    # 세마포어로 동시 실행 수 제한
+    semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def generate_single(prompt: str):
+        async with semaphore:
+            return await generate_story_with_metadata(prompt, llm)
+
+    results = await asyncio.gather(*[generate_single(prompt) for prompt in prompts], return_exceptions=True)
+
+    # 예외 처리
+    processed_results = []
+    for i, result in enumerate(results):
+        if isinstance(result, Exception):
+            processed_results.append((
+                {"error": str(result), "prompt_index": i},
+                {"error": True, "async": True}
+            ))
+        else:
+            processed_results.append(result)
+
+    return processed_results
+
+
+async def stream_story_to_container(prompt: str, container, llm=None) -> tuple:
+    """
+    스트리밍 방식으로 게임 데이터를 생성하며 컨테이너에 실시간 출력합니다.
+
+    Args:
+        prompt (str): 생성할 프롬프트
+        container: Streamlit 컨테이너
+        llm (ChatGoogleGenerativeAI, optional): LLM 모델 인스턴스
+
+    Returns:
+        tuple: (생성된 스토리 데이터, 메타데이터)
+    """
+    if llm is None:
+        llm = await initialize_llm_async()
+
+    try:
+        callback_handler = StreamingCallbackHandler(container)
+
+        # 스트리밍 호출 (동기 방식이지만 UI 업데이트는 실시간)
+        response = llm.invoke(_human_messages(prompt), callbacks=[callback_handler])
+        content = response.content
+        metadata = {
+            "model": llm.model,
+            "tokens_used": len(content.split()),
+            "streaming": True
+        }
+        return _parse_story(content), metadata
+
+    except Exception as e:
+        container.error(f"스트리밍 생성 중 오류 발생: {str(e)}")
+        raise Exception(f"스트리밍 LLM 생성 중 오류 발생: {str(e)}")
@@ -0,0 +1,10 @@
+"""
+Streamlit 프래그먼트 헬퍼
+
+프래그먼트 안의 위젯을 조작하면 앱 전체가 아니라 그 프래그먼트만 다시 실행됩니다.
+(예: 채팅 입력 중에 스토리 뷰어를 다시 그리지 않음)
+"""
+import streamlit as st
+
+# Streamlit 1.37부터 st.fragment, 이전 버전은 st.experimental_fragment, 둘 다 없으면 일반 함수로 실행
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
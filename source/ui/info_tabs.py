@@ -4,6 +4,8 @@
 import streamlit as st
 import json
 
+from source.utils.chat_history import ChatHistory
+
 
 def render_info_tabs():
     """정보 탭 렌더링"""
@@ -61,10 +63,12 @@ def render_usage_info():
 def render_statistics():
     """통계 정보 렌더링"""
     # 세션 통계
-    if hasattr(st.session_state, 'chat_history'):
-        total_messages = len(st.session_state.chat_history)
-        user_messages = len([msg for role, msg in st.session_state.chat_history if role == "user"])
-        ai_messages = len([msg for role, msg in st.session_state.chat_history if role == "assistant"])
+    chat_history = st.session_state.get('chat_history')
+    if isinstance(chat_history, ChatHistory):
+        # 추가할 때마다 갱신되는 역할별 개수 사용 (요약으로 접힌 메시지 포함)
+        total_messages = chat_history.total_count
+        user_messages = chat_history.count("user")
+        ai_messages = chat_history.count("assistant")
         
         col_stat1, col_stat2, col_stat3, col_stat4 = st.columns(4)
         
@@ -162,7 +166,7 @@ def render_settings():
     st.subheader("🔍 디버그 정보")
     if st.checkbox("세션 상태 표시"):
         st.write("**세션 상태:**")
-        st.write(f"- 채팅 히스토리: {len(getattr(st.session_state, 'chat_history', []))}개")
+        st.write(f"- 채팅 히스토리: {len(getattr(st.session_state, 'chat_history', None) or [])}개")
         st.write(f"- 현재 게임 데이터: {'있음' if getattr(st.session_state, 'current_game_data', None) else '없음'}")
         st.write(f"- 커스터마이저: {'초기화됨' if getattr(st.session_state, 'customizer', None) else '없음'}")
         
@@ -3,10 +3,12 @@
 """
 import streamlit as st
 from source.utils.story_manager import StoryManager
+from source.ui.fragments import fragment
 
 
+@fragment
 def render_story_selector():
-    """메인페이지용 스토리 선택기"""
+    """메인페이지용 스토리 선택기 (프래그먼트: 목록 선택은 이 영역만 다시 실행, 불러오기/삭제는 앱 전체)"""
     st.header("📚 편집할 스토리를 선택하세요")
     
     # 스토리 매니저 초기화
@@ -1,13 +1,104 @@
 """
 스토리 뷰어 UI 컴포넌트 - 기존 스토리 편집 기능 포함
+
+요약 통계, 턴 카드, 보기 좋게 정리한 JSON은 스토리 내용 해시별로 한 번만 만들어 캐시하므로
+스토리가 바뀌지 않았다면 다시 실행될 때 계산을 반복하지 않습니다.
 """
 import streamlit as st
 import json
+import hashlib
 from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from source.ui.fragments import fragment
+
+
+def story_content_hash(story_data) -> str:
+    """
+    스토리 내용 해시 (문자열은 그대로, 객체는 압축 직렬화 후 해시)
+    같은 객체가 다시 들어오면 직전 결과를 재사용합니다. (세션 상태의 스토리는 재실행 간 같은 객체)
+    """
+    memo = st.session_state.get("_story_hash_memo")
+    if memo is not None and memo[0] is story_data:
+        return memo[1]
+    
+    raw = story_data if isinstance(story_data, str) else json.dumps(
+        story_data, ensure_ascii=False, sort_keys=True, separators=(",", ":")
+    )
+    content_hash = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    st.session_state["_story_hash_memo"] = (story_data, content_hash)
+    return content_hash
+
 
+def build_turn_card(turn_data, index: int) -> Dict[str, Any]:
+    """턴 하나를 화면에 그릴 값으로 변환합니다."""
+    card = {"title": f"📅 Day {index+1} 미리보기", "raw": None, "result": None, "news": None, "stocks": None}
+    if not isinstance(turn_data, dict):
+        card["raw"] = str(turn_data)
+        return card
+    
+    card["result"] = turn_data.get('result')
+    card["news"] = turn_data.get('news')
+    if 'stocks' in turn_data:
+        card["stocks"] = [
+            f"• **{stock.get('name', '알 수 없는 상점')}**: {stock.get('current_value', 0)}원 ({stock.get('risk_level', '위험도 미정')})"
+            for stock in turn_data['stocks']
+        ]
+    return card
 
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def build_story_view_model(content_hash: str, _story_data) -> Dict[str, Any]:
+    """
+    스토리 화면용 값을 만듭니다. (content_hash가 같으면 캐시된 결과 반환)
+    
+    Args:
+        content_hash: story_content_hash 결과 (캐시 키)
+        _story_data: 스토리 (목록 또는 JSON 문자열, 캐시 키에서 제외)
+    """
+    story_data = _story_data
+    if isinstance(story_data, str):
+        try:
+            story_data = json.loads(story_data)
+        except json.JSONDecodeError:
+            return {"is_list": False, "error": "invalid_json", "raw": story_data}
+    
+    if not isinstance(story_data, list):
+        return {"is_list": False, "error": None, "data": story_data}
+    
+    # 등장하는 상점/캐릭터와 평균 상점 가치
+    all_shops = set()
+    total_values: List[float] = []
+    for turn in story_data:
+        if isinstance(turn, dict) and 'stocks' in turn:
+            for stock in turn['stocks']:
+                all_shops.add(stock.get('name', ''))
+                value = stock.get('current_value', 0)
+                if isinstance(value, (int, float)):
+                    total_values.append(value)
+    
+    json_text = json.dumps(story_data, ensure_ascii=False, indent=2)
+    return {
+        "is_list": True,
+        "error": None,
+        "total_turns": len(story_data),
+        "characters": sorted(name for name in all_shops if name),
+        "shop_count": len(all_shops),
+        "avg_value": sum(total_values) / len(total_values) if total_values else 0,
+        "cards": [build_turn_card(turn, i) for i, turn in enumerate(story_data)],
+        "json_text": json_text,
+        "json_bytes": json_text.encode("utf-8")
+    }
+
+
+def get_story_view_model(story_data) -> Dict[str, Any]:
+    """스토리 내용 해시로 캐시된 화면용 값"""
+    return build_story_view_model(story_content_hash(story_data), story_data)
+
+
+@fragment
 def render_story_viewer(customizer):
-    """스토리 뷰어 렌더링 - 편집 전용"""
+    """스토리 뷰어 렌더링 - 편집 전용 (프래그먼트: 채팅 입력으로 다시 그려지지 않음)"""
     # 선택된 스토리가 있는 경우 해당 스토리 표시
     if hasattr(st.session_state, 'selected_story') and st.session_state.selected_story:
         render_selected_story_viewer(customizer)
@@ -27,61 +118,50 @@ def render_selected_story_viewer(customizer):
         return
     
     st.info(f"📚 현재 편집 중인 스토리: **{story_name}**")
+    view = get_story_view_model(story_data)
     
     # 스토리 요약 정보
-    summary = customizer.get_story_summary(story_name)
-    if summary:
+    if view["is_list"]:
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("총 턴 수", summary.get('total_turns', 0))
+            st.metric("총 턴 수", view["total_turns"])
         with col2:
-            st.metric("캐릭터 수", len(summary.get('characters', [])))
+            st.metric("캐릭터 수", len(view["characters"]))
         with col3:
             st.write(f"**최종 수정**")
-            st.write(f"{summary.get('last_modified', 'Unknown')}")
+            st.write("Unknown")
     
     # 탭으로 구분하여 표시
     tab1, tab2, tab3 = st.tabs(["📚 스토리 미리보기", "📊 스토리 구조", "💾 JSON 데이터"])
     
     with tab1:
-        render_story_preview(story_data)
+        render_story_preview(story_data, view)
         
     with tab2:
-        render_story_structure(story_data)
+        render_story_structure(story_data, view)
         
     with tab3:
-        render_json_data(story_data)
+        render_json_data(story_data, view)
 
 
 def render_edited_story_viewer(customizer):
     """수정된 스토리 표시"""
     st.write("수정된 스토리:")
     
-    try:
-        if isinstance(st.session_state.current_game_data, str):
-            game_data = json.loads(st.session_state.current_game_data)
-        else:
-            game_data = st.session_state.current_game_data
-        
-        if isinstance(game_data, list):
-            st.success(f"✏️ 총 {len(game_data)}개의 게임 턴이 수정되었습니다!")
-            
-            # 모든 턴 표시
-            for i, turn_data in enumerate(game_data):
-                with st.expander(f"📅 Day {i+1} 미리보기", expanded=(i==0)):
-                    if 'result' in turn_data:
-                        st.write("**상황:**")
-                        st.write(turn_data['result'])
-                    
-                    if 'news' in turn_data:
-                        st.write("**뉴스:**")
-                        st.write(turn_data['news'])
-        else:
-            st.json(game_data)
-            
-    except json.JSONDecodeError:
+    view = get_story_view_model(st.session_state.current_game_data)
+    if view["error"] == "invalid_json":
         st.error("수정된 데이터가 올바른 JSON 형식이 아닙니다.")
-        st.code(st.session_state.current_game_data)
+        st.code(view["raw"])
+        return
+    
+    if view["is_list"]:
+        st.success(f"✏️ 총 {view['total_turns']}개의 게임 턴이 수정되었습니다!")
+        
+        # 모든 턴 표시
+        for i, card in enumerate(view["cards"]):
+            _render_card(card, expanded=(i==0))
+    else:
+        st.json(view["data"])
 
 
 def render_empty_state():
@@ -125,34 +205,48 @@ def render_empty_state():
             st.warning("저장된 스토리가 없습니다. 스토리 파일을 saved_stories 폴더에 추가해주세요.")
 
 
-def render_story_preview(story_data):
+def render_story_preview(story_data, view: Optional[Dict[str, Any]] = None):
     """스토리 내용 미리보기 - 전체 턴 표시"""
-    if not isinstance(story_data, list):
+    view = view or get_story_view_model(story_data)
+    if not view["is_list"]:
         st.write("스토리 데이터 형식이 올바르지 않습니다.")
         return
     
-    st.success(f"🎮 총 {len(story_data)}개의 게임 턴이 있습니다!")
+    st.success(f"🎮 총 {view['total_turns']}개의 게임 턴이 있습니다!")
     
     # 모든 턴 표시
-    for i, turn_data in enumerate(story_data):
-        with st.expander(f"📅 Day {i+1} 미리보기", expanded=(i==0)):
-            if 'result' in turn_data:
-                st.write("**📰 상황:**")
-                st.write(turn_data['result'])
-            
-            if 'news' in turn_data:
-                st.write("**📢 뉴스:**")
-                st.write(turn_data['news'])
-            
-            if 'stocks' in turn_data:
-                st.write("**🏪 상점 정보:**")
-                for stock in turn_data['stocks']:
-                    st.write(f"• **{stock.get('name', '알 수 없는 상점')}**: {stock.get('current_value', 0)}원 ({stock.get('risk_level', '위험도 미정')})")
-
-
-def render_story_structure(story_data):
+    for i, card in enumerate(view["cards"]):
+        _render_card(card, expanded=(i==0))
+
+
+def render_turn_card(turn_data, index, expanded=False):
+    """턴 하나의 미리보기 카드 (스트리밍 중 턴이 완성될 때마다 호출되기도 함)"""
+    _render_card(build_turn_card(turn_data, index), expanded)
+
+
+def _render_card(card: Dict[str, Any], expanded: bool = False):
+    with st.expander(card["title"], expanded=expanded):
+        if card["raw"] is not None:
+            st.code(card["raw"], language="json")
+            return
+        
+        if card["result"] is not None:
+            st.write("**📰 상황:**")
+            st.write(card["result"])
+        
+        if card["news"] is not None:
+            st.write("**📢 뉴스:**")
+            st.write(card["news"])
+        
+        if card["stocks"] is not None:
+            st.write("**🏪 상점 정보:**")
+            st.markdown("  \n".join(card["stocks"]))
+
+
+def render_story_structure(story_data, view: Optional[Dict[str, Any]] = None):
     """스토리 구조 분석 표시"""
-    if not isinstance(story_data, list):
+    view = view or get_story_view_model(story_data)
+    if not view["is_list"]:
         st.write("스토리 데이터 형식이 올바르지 않습니다.")
         return
     
@@ -160,42 +254,29 @@ def render_story_structure(story_data):
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric("총 턴 수", len(story_data))
+        st.metric("총 턴 수", view["total_turns"])
     
     with col2:
         # 등장하는 상점/캐릭터 수
-        all_shops = set()
-        for turn in story_data:
-            if 'stocks' in turn:
-                for stock in turn['stocks']:
-                    all_shops.add(stock.get('name', ''))
-        st.metric("등장 상점 수", len(all_shops))
+        st.metric("등장 상점 수", view["shop_count"])
     
     with col3:
         # 평균 상점 가치
-        total_values = []
-        for turn in story_data:
-            if 'stocks' in turn:
-                for stock in turn['stocks']:
-                    value = stock.get('current_value', 0)
-                    if isinstance(value, (int, float)):
-                        total_values.append(value)
-        avg_value = sum(total_values) / len(total_values) if total_values else 0
-        st.metric("평균 상점 가치", f"{avg_value:.1f}")
-
-
-def render_json_data(story_data):
+        st.metric("평균 상점 가치", f"{view['avg_value']:.1f}")
+
+
+def render_json_data(story_data, view: Optional[Dict[str, Any]] = None):
     """JSON 데이터 표시"""
+    view = view or get_story_view_model(story_data)
     st.subheader("📊 스토리 JSON 데이터")
     
-    # JSON 형태로 표시
-    st.json(story_data)
+    # JSON 형태로 표시 (처음에는 접어서 표시)
+    st.json(view["json_text"] if view["is_list"] else story_data, expanded=False)
     
-    # 다운로드 버튼
-    json_str = json.dumps(story_data, ensure_ascii=False, indent=2)
+    # 다운로드 버튼 (미리 만들어 둔 바이트 사용)
     st.download_button(
         label="📄 JSON 파일 다운로드",
-        data=json_str,
+        data=view["json_bytes"] if view["is_list"] else json.dumps(story_data, ensure_ascii=False, indent=2),
         file_name=f"story_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
         mime="application/json"
     )
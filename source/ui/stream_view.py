@@ -0,0 +1,87 @@
+"""
+스트리밍 생성 결과 화면 표시 (Streamlit 전용)
+
+StreamBridge 프레임을 받아 닫힌 턴은 미리보기로 한 번만 추가하고,
+진행 중인 턴만 텍스트로 다시 그립니다.
+"""
+import time
+from typing import Any, Callable, Dict, Optional
+
+from source.utils.stream_bridge import StreamBridge
+
+# 진행 중인 턴 표시 길이 상한 (긴 턴도 프레임당 표시 비용이 일정하도록 끝부분만 표시)
+PARTIAL_TAIL_CHARS = 1500
+
+
+def format_turn_preview(turn: Any) -> str:
+    """닫힌 턴 하나의 미리보기 마크다운"""
+    if not isinstance(turn, dict):
+        return f"```\n{str(turn)[:PARTIAL_TAIL_CHARS]}\n```"
+    lines = [f"**📅 Day {turn.get('turn_number', '?')}**"]
+    if turn.get("result"):
+        lines.append(f"📰 {turn['result']}")
+    if turn.get("news"):
+        tag = f" `{turn['news_tag']}`" if turn.get("news_tag") else ""
+        lines.append(f"📢 {turn['news']}{tag}")
+    stocks = turn.get("stocks") or []
+    if stocks:
+        names = ", ".join(str(stock.get("name", "?")) for stock in stocks if isinstance(stock, dict))
+        lines.append(f"🏪 {names}")
+    return "  \n".join(lines)
+
+
+def render_stream(bridge: StreamBridge, container,
+                  render_turn: Optional[Callable[[Any, int], None]] = None) -> Dict[str, Any]:
+    """
+    스트리밍이 끝날 때까지 프레임을 받아 화면에 반영합니다. (스크립트 스레드에서 호출)
+
+    Args:
+        bridge: 생성 측이 토큰을 넣는 브리지
+        container: Streamlit 컨테이너 (st.empty() 등)
+        render_turn: 완성된 턴을 (턴, 순번)으로 그리는 함수 (없으면 한 줄 미리보기)
+
+    Returns:
+        dict: 프레임/턴 수와 화면 갱신에 쓴 시간
+    """
+    start_time = time.perf_counter()
+    render_seconds = 0.0
+    first_turn_seconds = None
+    rendered_turns = 0
+    box = container.container()
+    notice = box.empty()
+    turns_slot = box.empty()
+    turns_area = turns_slot.container()
+    live = box.empty()
+
+    for frame in bridge.frames():
+        render_start = time.perf_counter()
+        if frame.reset:
+            # 다시 생성하면 이전 미리보기를 비우고 새로 그림
+            notice.info(frame.notice)
+            turns_area = turns_slot.container()
+            live.empty()
+            rendered_turns = 0
+        for turn in frame.new_turns:
+            if render_turn is None:
+                turns_area.markdown(format_turn_preview(turn))
+            else:
+                with turns_area:
+                    render_turn(turn, rendered_turns)
+            rendered_turns += 1
+            if first_turn_seconds is None:
+                first_turn_seconds = time.perf_counter() - start_time
+        if frame.done:
+            live.empty()
+        elif frame.partial:
+            live.code(frame.partial[-PARTIAL_TAIL_CHARS:], language="json")
+        elif frame.preamble:
+            live.caption(frame.preamble[-200:])
+        render_seconds += time.perf_counter() - render_start
+
+    stats = bridge.get_stats()
+    stats.update({
+        "render_seconds": round(render_seconds, 3),
+        "first_turn_seconds": round(first_turn_seconds, 3) if first_turn_seconds is not None else None,
+        "stream_seconds": round(time.perf_counter() - start_time, 3)
+    })
+    return stats
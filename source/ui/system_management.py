@@ -4,6 +4,9 @@
 import streamlit as st
 from source.utils.error_handler import error_handler, health_checker, NotificationType
 from source.utils.performance import performance_monitor
+from source.utils.resources import get_shared_resources
+from source.utils.similarity_cache import similarity_cache
+from source.utils.model_router import model_router
 import json
 from datetime import datetime
 
@@ -95,6 +98,7 @@ def render_admin_panel():
             # 커스터마이저 재초기화
             try:
                 from source.components.game_customizer import GameCustomizer
+                get_shared_resources().reset_llm()
                 st.session_state.customizer = GameCustomizer()
                 error_handler.show_notification("시스템이 재초기화되었습니다", NotificationType.SUCCESS)
             except Exception as e:
@@ -111,6 +115,56 @@ def render_admin_panel():
     
     for key, value in system_info.items():
         st.write(f"**{key}**: {value}")
+    
+    # 프로세스 공유 리소스
+    st.subheader("🖥️ 프로세스 리소스")
+    resource_report = get_shared_resources().get_resource_report()
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        memory_rss = resource_report["memory_rss"]
+        st.metric("메모리 (RSS)", f"{memory_rss / (1024 * 1024):.1f} MB" if memory_rss else "N/A")
+    with col2:
+        st.metric("스레드 수", resource_report["thread_count"])
+    with col3:
+        st.metric(
+            "작업 스레드",
+            f"{resource_report['executor_threads']}/{resource_report['executor_max_workers']}"
+        )
+    
+    with st.expander("상세 정보", expanded=False):
+        st.json(resource_report)
+    
+    # 유사 요청 캐시 계층별 적중률
+    st.subheader("🧩 요청 캐시")
+    cache_stats = similarity_cache.get_stats()
+    if not cache_stats["enabled"]:
+        st.caption("유사 요청 캐시가 꺼져 있습니다. (SIMILARITY_CACHE_ENABLED=true로 활성화)")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("정확 일치 적중률", f"{cache_stats['exact_hit_rate'] * 100:.1f}%")
+    with col2:
+        st.metric("유사 요청 적중률", f"{cache_stats['similar_hit_rate'] * 100:.1f}%")
+    with col3:
+        st.metric("저장 항목", f"{cache_stats['entries']:,}")
+    
+    with st.expander("캐시 상세 정보", expanded=False):
+        st.json(cache_stats)
+    
+    # 지연시간 등급별 호출 결과 (라우팅 표 조정용)
+    st.subheader("🚦 모델 라우팅")
+    route_stats = model_router.get_stats()
+    if not route_stats:
+        st.caption("아직 라우팅된 호출이 없습니다.")
+    else:
+        columns = st.columns(len(route_stats))
+        for column, (tier, stats) in zip(columns, route_stats.items()):
+            with column:
+                st.metric(
+                    f"{tier} 성공률", f"{stats['success_rate'] * 100:.1f}%",
+                    help=f"호출 {stats['calls']}회 / 평균 {stats['avg_duration']:.2f}초 / 상향 {stats['escalations']}회"
+                )
 
 def render_debug_info():
     """디버깅 정보"""
@@ -139,6 +193,11 @@ def render_debug_info():
         if api_key:
             st.write(f"**API 키 길이**: {len(api_key)}자")
             st.write(f"**API 키 시작**: {api_key[:10]}...")
+        
+        from source.utils.config import get_settings, reload_settings
+        if st.button("🔄 설정 다시 불러오기"):
+            reload_settings()
+        st.json(get_settings().to_dict())
     
     # 파일 시스템 정보
     with st.expander("📁 파일 시스템", expanded=False):
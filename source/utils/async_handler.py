@@ -1,48 +1,212 @@
 """
 비동기 처리 유틸리티 모듈
+
+API 서버에서도 사용하므로 Streamlit에 의존하지 않습니다.
+동기 코드(Streamlit)의 비동기 호출은 프로세스 전역 백그라운드 이벤트 루프 하나에서 실행합니다.
+(진행률/상태 표시 위젯은 source.ui.async_status)
 """
+import sys
+import atexit
 import asyncio
-import streamlit as st
+import logging
+import functools
+import contextvars
 import threading
-import time
-from typing import Callable, Any, Optional, List, Coroutine
-from concurrent.futures import ThreadPoolExecutor
-from queue import Queue
+import concurrent.futures
+from typing import Callable, Any, Dict, Optional, List, Coroutine
+
+from source.utils.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def get_background_loop_settings() -> dict:
+    """
+    백그라운드 이벤트 루프 설정값을 반환합니다.
+    
+    Returns:
+        dict: 백그라운드 이벤트 루프 설정값
+    """
+    return {
+        # 동기 코드에서 코루틴 결과를 기다리는 최대 시간(초), 0이면 제한 없음
+        "call_timeout": get_settings().async_call_timeout
+    }
+
+
+# 코루틴을 제출한 Streamlit 스크립트 실행 컨텍스트 (루프 스레드에서 화면을 갱신할 때 사용, source.ui.async_status)
+caller_script_context: contextvars.ContextVar = contextvars.ContextVar("caller_script_context", default=None)
 
 
-def run_async_in_streamlit(coroutine: Coroutine) -> Any:
-    """Streamlit에서 비동기 함수를 실행하기 위한 헬퍼 함수"""
+def _current_script_context():
+    """현재 스레드의 Streamlit 스크립트 실행 컨텍스트 (Streamlit 앱이 아니면 None)"""
+    if "streamlit" not in sys.modules:
+        return None
     try:
-        # 기존 이벤트 루프가 있는지 확인
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            # 이미 실행 중인 루프가 있다면 새로운 스레드에서 실행
-            def run_in_thread():
-                new_loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(new_loop)
-                try:
-                    return new_loop.run_until_complete(coroutine)
-                finally:
-                    new_loop.close()
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        return get_script_run_ctx()
+    except Exception:
+        return None
+
+
+async def _with_script_context(coroutine: Coroutine, script_context):
+    caller_script_context.set(script_context)
+    return await coroutine
+
+
+class BackgroundLoop:
+    """
+    프로세스당 하나의 이벤트 루프를 전용 스레드에서 계속 실행합니다.
+    
+    호출마다 새 이벤트 루프를 만들면 루프에 묶인 비동기 LLM 클라이언트의 연결이 매번 버려지므로,
+    코루틴을 이 루프에 제출하여 연결을 편집/세션 간에 재사용합니다.
+    루프의 기본 실행기는 STORY_MAX_WORKERS 크기의 공유 스레드 풀이며,
+    코루틴 안의 블로킹 작업(파일 I/O 등)은 run_blocking으로 이 풀에서 실행합니다.
+    """
+    
+    def __init__(self, name: str = "async-loop"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        """처음 제출될 때 루프 스레드를 시작합니다."""
+        if self.running:
+            return self._loop
+        with self._lock:
+            if not self.running:
+                loop = asyncio.new_event_loop()
+                # 풀 크기는 시작 시점 설정으로 고정 (STORY_MAX_WORKERS 변경은 재시작 후 반영)
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=get_settings().max_workers, thread_name_prefix=f"{self.name}-worker"
+                )
+                loop.set_default_executor(self._executor)
+                ready = threading.Event()
+                
+                def run():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+                
+                self._loop = loop
+                self._thread = threading.Thread(target=run, name=self.name, daemon=True)
+                self._thread.start()
+                ready.wait()
+                logger.info(f"백그라운드 이벤트 루프 시작 ({self.name})")
+        return self._loop
+    
+    def submit(self, coroutine: Coroutine) -> concurrent.futures.Future:
+        """
+        코루틴을 백그라운드 루프에 제출합니다.
+        반환된 Future를 cancel()하면 루프 안의 작업도 취소됩니다.
+        """
+        loop = self._ensure_started()
+        if threading.current_thread() is self._thread:
+            coroutine.close()
+            raise RuntimeError("백그라운드 루프 안에서는 결과를 동기로 기다릴 수 없습니다. await를 사용하세요.")
+        script_context = _current_script_context()
+        if script_context is not None:
+            coroutine = _with_script_context(coroutine, script_context)
+        return asyncio.run_coroutine_threadsafe(coroutine, loop)
+    
+    def run(self, coroutine: Coroutine, timeout: Optional[float] = None) -> Any:
+        """
+        코루틴을 실행하고 결과를 기다립니다.
+        
+        Args:
+            coroutine: 실행할 코루틴
+            timeout: 최대 대기 시간(초), None이면 설정값 사용, 0이면 제한 없음
             
-            with ThreadPoolExecutor() as executor:
-                future = executor.submit(run_in_thread)
-                return future.result()
-        else:
-            # 루프가 실행 중이 아니라면 직접 실행
-            return loop.run_until_complete(coroutine)
-    except RuntimeError:
-        # 이벤트 루프가 없다면 새로 생성
-        return asyncio.run(coroutine)
+        Raises:
+            TimeoutError: 시간 초과 (루프 안의 작업은 취소됨)
+        """
+        if timeout is None:
+            timeout = get_background_loop_settings()["call_timeout"]
+        future = self.submit(coroutine)
+        try:
+            return future.result(timeout=timeout or None)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"비동기 작업이 {timeout}초 안에 끝나지 않아 취소했습니다.")
+        except BaseException:
+            # 호출 측이 중단되면 (예: Streamlit 재실행) 루프 안의 작업도 정리
+            future.cancel()
+            raise
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """루프 실행 여부와 공유 스레드 풀 사용량"""
+        executor = self._executor
+        return {
+            "running": self.running,
+            "executor_max_workers": executor._max_workers if executor else get_settings().max_workers,
+            "executor_threads": len(executor._threads) if executor else 0,
+            "executor_queue_size": executor._work_queue.qsize() if executor else 0
+        }
+    
+    def shutdown(self, timeout: float = 5.0):
+        """남은 작업을 취소하고 루프 스레드를 종료합니다."""
+        with self._lock:
+            loop, thread, executor = self._loop, self._thread, self._executor
+            self._loop = self._thread = self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=False)
+        if loop is None or thread is None or not thread.is_alive():
+            return
+        
+        async def cancel_pending():
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        try:
+            asyncio.run_coroutine_threadsafe(cancel_pending(), loop).result(timeout)
+        except Exception:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not thread.is_alive():
+            loop.close()
+
+
+# 프로세스 전역 백그라운드 루프 (처음 제출될 때 시작)
+background_loop = BackgroundLoop()
+atexit.register(background_loop.shutdown)
+
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """
+    블로킹 함수(파일 I/O, 동기 LLM 호출 등)를 현재 루프의 기본 실행기에서 실행합니다.
+    백그라운드 루프에서는 공유 스레드 풀을 사용하므로 루프가 멈추지 않습니다.
+    """
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+
+def run_async_in_streamlit(coroutine: Coroutine, timeout: Optional[float] = None) -> Any:
+    """
+    Streamlit(동기 코드)에서 비동기 함수를 실행하기 위한 헬퍼 함수
+    
+    매번 새 이벤트 루프를 만들지 않고 프로세스 전역 백그라운드 루프에서 실행합니다.
+    
+    Args:
+        coroutine: 실행할 코루틴
+        timeout: 최대 대기 시간(초), None이면 ASYNC_CALL_TIMEOUT
+    """
+    return background_loop.run(coroutine, timeout)
 
 
 class AsyncTaskManager:
-    """비동기 작업 관리자"""
+    """비동기 작업 관리자 (작업은 백그라운드 이벤트 루프에서 실행)"""
     
-    def __init__(self):
+    def __init__(self, loop: Optional[BackgroundLoop] = None):
         self.tasks = {}
         self.results = {}
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.loop = loop or background_loop
     
     def run_async_task(self, task_id: str, async_func: Callable, *args, **kwargs):
         """
@@ -53,20 +217,21 @@ class AsyncTaskManager:
             async_func (Callable): 비동기 함수
             *args, **kwargs: 함수 인자
         """
-        def run_in_thread():
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                result = loop.run_until_complete(async_func(*args, **kwargs))
-                self.results[task_id] = {'status': 'completed', 'result': result}
-            except Exception as e:
-                self.results[task_id] = {'status': 'error', 'error': str(e)}
-            finally:
-                loop.close()
+        def on_done(future: concurrent.futures.Future):
+            if self.tasks.get(task_id) is not future:
+                # 이미 forget_task로 정리된 작업
+                return
+            if future.cancelled():
+                self.results[task_id] = {'status': 'cancelled'}
+            elif future.exception() is not None:
+                self.results[task_id] = {'status': 'error', 'error': str(future.exception())}
+            else:
+                self.results[task_id] = {'status': 'completed', 'result': future.result()}
         
         self.results[task_id] = {'status': 'running'}
-        future = self.executor.submit(run_in_thread)
+        future = self.loop.submit(async_func(*args, **kwargs))
         self.tasks[task_id] = future
+        future.add_done_callback(on_done)
         
         return task_id
     
@@ -77,7 +242,7 @@ class AsyncTaskManager:
     def is_task_completed(self, task_id: str) -> bool:
         """작업이 완료되었는지 확인합니다."""
         result = self.results.get(task_id)
-        return result and result['status'] in ['completed', 'error']
+        return result and result['status'] in ['completed', 'error', 'cancelled']
     
     def get_task_result(self, task_id: str):
         """작업 결과를 가져옵니다."""
@@ -88,6 +253,32 @@ class AsyncTaskManager:
             raise Exception(result['error'])
         return None
     
+    def wait_task(self, task_id: str, timeout: Optional[float] = None):
+        """
+        작업 결과를 기다립니다. (BackgroundLoop.run과 같은 시간 제한)
+        
+        Args:
+            timeout: 최대 대기 시간(초), None이면 설정값 사용, 0이면 제한 없음
+            
+        Raises:
+            TimeoutError: 시간 초과 (루프 안의 작업은 취소됨)
+        """
+        if timeout is None:
+            timeout = get_background_loop_settings()["call_timeout"]
+        future = self.tasks[task_id]
+        try:
+            return future.result(timeout=timeout or None)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"비동기 작업이 {timeout}초 안에 끝나지 않아 취소했습니다.")
+    
+    def forget_task(self, task_id: str):
+        """끝난 작업의 future와 결과를 정리합니다. (진행 중이면 취소)"""
+        future = self.tasks.pop(task_id, None)
+        if future is not None and not future.done():
+            future.cancel()
+        self.results.pop(task_id, None)
+    
     def cancel_task(self, task_id: str):
         """작업을 취소합니다."""
         if task_id in self.tasks:
@@ -117,195 +308,7 @@ class AsyncTaskManager:
             if not task.done():
                 task.cancel()
         
-        # ThreadPoolExecutor 종료
-        self.executor.shutdown(wait=True)
-        
         # 결과 및 작업 정리
         self.tasks.clear()
         self.results.clear()
 
-
-class StreamingHandler:
-    """스트리밍 처리 핸들러"""
-    
-    def __init__(self):
-        self.queue = Queue()
-        self.is_streaming = False
-    
-    async def stream_callback(self, token: str):
-        """스트리밍 토큰 콜백"""
-        self.queue.put(token)
-    
-    def start_streaming(self, container):
-        """스트리밍 출력 시작"""
-        self.is_streaming = True
-        content = ""
-        
-        while self.is_streaming:
-            try:
-                token = self.queue.get(timeout=0.1)
-                content += token
-                container.text(content)
-            except:
-                time.sleep(0.1)
-    
-    def stop_streaming(self):
-        """스트리밍 중지"""
-        self.is_streaming = False
-
-
-def run_with_progress(task_func: Callable, task_args: tuple = (), 
-                     task_kwargs: dict = None, 
-                     progress_text: str = "처리 중...",
-                     success_text: str = "완료!") -> Any:
-    """
-    진행률 표시와 함께 작업을 실행합니다.
-    
-    Args:
-        task_func: 실행할 함수
-        task_args: 함수 인자
-        task_kwargs: 함수 키워드 인자
-        progress_text: 진행 중 표시할 텍스트
-        success_text: 완료 시 표시할 텍스트
-    
-    Returns:
-        함수 실행 결과
-    """
-    if task_kwargs is None:
-        task_kwargs = {}
-    
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    
-    try:
-        status_text.text(progress_text)
-        progress_bar.progress(30)
-        
-        # 작업 실행
-        result = task_func(*task_args, **task_kwargs)
-        
-        progress_bar.progress(100)
-        status_text.success(success_text)
-        
-        # 2초 후 진행률 표시 제거
-        time.sleep(2)
-        progress_bar.empty()
-        status_text.empty()
-        
-        return result
-        
-    except Exception as e:
-        progress_bar.empty()
-        status_text.error(f"오류 발생: {str(e)}")
-        raise
-
-
-def create_async_ui_handler():
-    """비동기 UI 핸들러 생성"""
-    if 'async_manager' not in st.session_state:
-        st.session_state.async_manager = AsyncTaskManager()
-    
-    return st.session_state.async_manager
-
-
-@st.experimental_fragment(run_every=1.0)
-def display_async_status(task_id: str, container):
-    """비동기 작업 상태를 주기적으로 업데이트"""
-    if 'async_manager' in st.session_state:
-        manager = st.session_state.async_manager
-        status = manager.get_task_status(task_id)
-        
-        if status['status'] == 'running':
-            container.info("🔄 처리 중...")
-        elif status['status'] == 'completed':
-            container.success("✅ 완료!")
-            return True
-        elif status['status'] == 'error':
-            container.error(f"❌ 오류: {status.get('error', '알 수 없는 오류')}")
-            return True
-    
-    return False
-
-
-# 데코레이터
-def async_streamlit_task(task_name: str = None):
-    """
-    Streamlit에서 비동기 작업을 실행하기 위한 데코레이터
-    """
-    def decorator(func):
-        def wrapper(*args, **kwargs):
-            manager = create_async_ui_handler()
-            task_id = task_name or f"task_{int(time.time())}"
-            
-            # 비동기 작업 시작
-            manager.run_async_task(task_id, func, *args, **kwargs)
-            
-            # 상태 표시 컨테이너
-            status_container = st.empty()
-            
-            # 작업 완료까지 대기
-            while not manager.is_task_completed(task_id):
-                status_container.info("🔄 처리 중...")
-                time.sleep(1)
-            
-            # 결과 반환
-            try:
-                result = manager.get_task_result(task_id)
-                status_container.success("✅ 완료!")
-                time.sleep(1)
-                status_container.empty()
-                return result
-            except Exception as e:
-                status_container.error(f"❌ 오류: {str(e)}")
-                raise
-        
-        return wrapper
-    return decorator
-
-
-# 사용 예시
-async def example_async_function(prompt: str, delay: int = 3):
-    """예시 비동기 함수"""
-    await asyncio.sleep(delay)  # 실제 LLM 호출 시뮬레이션
-    return f"처리 완료: {prompt}"
-
-
-def demo_async_usage():
-    """비동기 처리 데모"""
-    st.title("비동기 처리 데모")
-    
-    if st.button("비동기 작업 시작"):
-        manager = create_async_ui_handler()
-        task_id = manager.run_async_task(
-            "demo_task",
-            example_async_function,
-            "테스트 프롬프트",
-            delay=5
-        )
-        
-        st.session_state.current_task = task_id
-    
-    # 진행 상황 표시
-    if hasattr(st.session_state, 'current_task'):
-        task_id = st.session_state.current_task
-        manager = st.session_state.async_manager
-        
-        col1, col2 = st.columns([3, 1])
-        
-        with col1:
-            status_container = st.empty()
-        
-        with col2:
-            if st.button("취소"):
-                manager.cancel_task(task_id)
-                del st.session_state.current_task
-        
-        if display_async_status(task_id, status_container):
-            # 작업 완료
-            try:
-                result = manager.get_task_result(task_id)
-                st.success(f"결과: {result}")
-            except Exception as e:
-                st.error(f"오류: {e}")
-            finally:
-                del st.session_state.current_task
@@ -0,0 +1,136 @@
+"""
+채팅 히스토리 모듈
+
+세션의 채팅 기록을 최근 max_messages개까지만 보관하고, 밀려난 오래된 메시지는
+역할별 개수와 최근 요청 몇 개만 남긴 요약으로 접습니다.
+역할별 개수는 추가할 때마다 갱신하므로 통계 표시를 위해 기록을 다시 훑지 않습니다.
+(role, message) 튜플 목록처럼 순회할 수 있어 기존 호출부와 호환됩니다.
+"""
+import sys
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from source.utils.config import get_settings
+
+
+def get_chat_history_settings() -> Dict[str, int]:
+    """
+    채팅 히스토리 설정값을 반환합니다.
+
+    Returns:
+        dict: 채팅 히스토리 설정값
+    """
+    settings = get_settings()
+    return {
+        # 보관할 최근 메시지 수 (넘치면 오래된 메시지부터 요약으로 접힘)
+        "max_messages": settings.chat_history_max_messages,
+        # 한 번에 화면에 그릴 최근 메시지 수와 "이전 메시지 더 보기" 한 번에 늘릴 수
+        "render_window": settings.chat_render_window,
+        # 요약에 남길 오래된 사용자 요청 수
+        "summary_requests": settings.chat_summary_requests
+    }
+
+
+class ChatHistory:
+    """최근 메시지만 보관하고 오래된 메시지는 요약으로 접는 채팅 기록"""
+
+    __slots__ = ("messages", "counts", "archived_counts", "archived_requests")
+
+    def __init__(self, max_messages: int = 200, summary_requests: int = 5,
+                 messages: Optional[Iterable[Tuple[str, str]]] = None):
+        self.messages: deque = deque(maxlen=max(max_messages, 1))
+        # 전체(접힌 메시지 포함) / 접힌 메시지의 역할별 개수
+        self.counts: Dict[str, int] = {}
+        self.archived_counts: Dict[str, int] = {}
+        self.archived_requests: deque = deque(maxlen=max(summary_requests, 0))
+        for role, message in messages or ():
+            self.append((role, message))
+
+    @classmethod
+    def from_settings(cls, messages: Optional[Iterable[Tuple[str, str]]] = None) -> "ChatHistory":
+        """환경 설정값으로 생성 (messages: 기존 (role, message) 목록 이전용)"""
+        settings = get_chat_history_settings()
+        return cls(settings["max_messages"], settings["summary_requests"], messages)
+
+    def append(self, entry: Tuple[str, str]):
+        """(role, message) 추가 (list.append와 같은 형태)"""
+        role, message = entry
+        # 역할 문자열은 공유 객체로 저장
+        role = sys.intern(role)
+        if len(self.messages) == self.messages.maxlen:
+            self._archive(self.messages[0])
+        self.messages.append((role, message))
+        self.counts[role] = self.counts.get(role, 0) + 1
+
+    def _archive(self, entry: Tuple[str, str]):
+        role, message = entry
+        self.archived_counts[role] = self.archived_counts.get(role, 0) + 1
+        if role == "user" and self.archived_requests.maxlen:
+            self.archived_requests.append(message)
+
+    def clear(self):
+        self.messages.clear()
+        self.counts.clear()
+        self.archived_counts.clear()
+        self.archived_requests.clear()
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        return iter(self.messages)
+
+    def __len__(self) -> int:
+        """보관 중인 메시지 수"""
+        return len(self.messages)
+
+    def __bool__(self) -> bool:
+        return self.total_count > 0
+
+    @property
+    def total_count(self) -> int:
+        """접힌 메시지를 포함한 전체 메시지 수"""
+        return sum(self.counts.values())
+
+    @property
+    def archived_count(self) -> int:
+        return sum(self.archived_counts.values())
+
+    def count(self, role: str) -> int:
+        """역할별 전체 메시지 수"""
+        return self.counts.get(role, 0)
+
+    def window(self, limit: int) -> List[Tuple[str, str]]:
+        """
+        최근 limit개 메시지 (화면 표시용)
+
+        Returns:
+            list: 오래된 순서의 (role, message) 목록
+        """
+        if limit <= 0:
+            return []
+        start = max(len(self.messages) - limit, 0)
+        return [self.messages[i] for i in range(start, len(self.messages))]
+
+    def user_requests(self, limit: Optional[int] = None) -> List[str]:
+        """보관 중인 사용자 요청 (limit: 최근 limit개만)"""
+        requests = [message for role, message in self.messages if role == "user"]
+        return requests[-limit:] if limit else requests
+
+    def archived_summary(self) -> str:
+        """접힌 메시지 요약 (접힌 메시지가 없으면 빈 문자열)"""
+        if not self.archived_count:
+            return ""
+        summary = (
+            f"이전 대화 {self.archived_count}개(사용자 요청 {self.archived_counts.get('user', 0)}개)가 요약되었습니다."
+        )
+        if self.archived_requests:
+            summary += f" 이전 요청: {', '.join(self.archived_requests)}"
+        return summary
+
+    def to_dict(self) -> Dict[str, Any]:
+        """디버그/통계용 요약"""
+        return {
+            "stored": len(self.messages),
+            "max_messages": self.messages.maxlen,
+            "total": self.total_count,
+            "archived": self.archived_count,
+            "counts": dict(self.counts)
+        }
@@ -5,6 +5,9 @@ import json
 import re
 from typing import Dict, List, Optional
 
+from source.utils.keyword_engine import keyword_engine, KeywordScan, KEYWORD_CATEGORIES
+from source.utils.chat_history import ChatHistory
+
 class ChatbotHelper:
     """스토리 편집 챗봇을 위한 대화 컨텍스트 관리 및 요청 분석 헬퍼 클래스"""
     
@@ -24,8 +27,8 @@ class ChatbotHelper:
             "user_preferences": {}
         }
     
-    def analyze_user_intent(self, user_input: str) -> Dict[str, any]:
-        """사용자 입력을 분석하여 스토리 편집 의도를 파악합니다."""
+    def analyze_user_intent(self, user_input: str, scan: Optional[KeywordScan] = None) -> Dict[str, any]:
+        """사용자 입력을 분석하여 스토리 편집 의도를 파악합니다. (scan: 키워드 스캔 결과 재사용)"""
         intent = {
             "type": "general",
             "keywords": [],
@@ -35,65 +38,47 @@ class ChatbotHelper:
             "difficulty_level": "normal"
         }
         
-        user_input_lower = user_input.lower()
-        
-        # 스토리 편집 의도 분석 (투자 교육보다는 스토리 편집에 집중)
-        character_keywords = ["캐릭터", "인물", "이름", "성격", "주인공", "등장인물"]
-        if any(keyword in user_input_lower for keyword in character_keywords):
-            intent["type"] = "character_modification"
-            intent["target_element"] = "character"
-            intent["keywords"].extend([kw for kw in character_keywords if kw in user_input_lower])
-        
-        # 배경/설정 수정
-        setting_keywords = ["배경", "장소", "환경", "설정", "세계관", "왕국", "무대"]
-        if any(keyword in user_input_lower for keyword in setting_keywords):
-            intent["type"] = "setting_modification"
-            intent["target_element"] = "setting"
-            intent["keywords"].extend([kw for kw in setting_keywords if kw in user_input_lower])
-        
-        # 이벤트/사건 수정
-        event_keywords = ["이벤트", "사건", "일어나", "발생", "상황", "뉴스", "턴"]
-        if any(keyword in user_input_lower for keyword in event_keywords):
-            intent["type"] = "event_modification"
-            intent["target_element"] = "event"
-            intent["keywords"].extend([kw for kw in event_keywords if kw in user_input_lower])
-        
-        # 대화/텍스트 수정
-        dialogue_keywords = ["대화", "대사", "말", "텍스트", "설명", "문장", "표현"]
-        if any(keyword in user_input_lower for keyword in dialogue_keywords):
-            intent["type"] = "dialogue_modification"
-            intent["target_element"] = "dialogue"
-            intent["keywords"].extend([kw for kw in dialogue_keywords if kw in user_input_lower])
+        scan = scan or keyword_engine.scan(user_input)
+        
+        # 스토리 편집 의도 분석 (투자 교육보다는 스토리 편집에 집중, 뒤에 나온 유형이 우선)
+        for category, intent_type, target_element in (
+            ("intent.character", "character_modification", "character"),   # 캐릭터
+            ("intent.setting", "setting_modification", "setting"),         # 배경/설정 수정
+            ("intent.event", "event_modification", "event"),               # 이벤트/사건 수정
+            ("intent.dialogue", "dialogue_modification", "dialogue")       # 대화/텍스트 수정
+        ):
+            hits = scan.get(category)
+            if hits:
+                intent["type"] = intent_type
+                intent["target_element"] = target_element
+                intent["keywords"].extend(hits)
         
         # 수정 범위 분석
-        if any(word in user_input_lower for word in ["전체", "모든", "모두", "다"]):
+        if scan.has("scope.all"):
             intent["modification_scope"] = "all"
-        elif any(word in user_input_lower for word in ["특정", "이 부분", "여기", "이것"]):
+        elif scan.has("scope.specific"):
             intent["modification_scope"] = "specific"
         
         # 특정 턴 분석
         for i in range(1, 11):
-            if f"{i}턴" in user_input_lower or f"{i}일" in user_input_lower:
+            if scan.contains(f"{i}턴") or scan.contains(f"{i}일"):
                 intent["target_turn"] = i
                 intent["modification_scope"] = "specific"
                 break
         
         # 난이도 조절 요청 감지
-        difficulty_keywords = ["쉽게", "어렵게", "간단하게", "복잡하게", "기초", "고급", "초급", "상급"]
-        if any(keyword in user_input_lower for keyword in difficulty_keywords):
-            if any(word in user_input_lower for word in ["쉽게", "간단하게", "기초", "초급"]):
+        difficulty_hits = scan.get("difficulty")
+        if difficulty_hits:
+            if scan.has("difficulty.easy"):
                 intent["difficulty_level"] = "easy"
-            elif any(word in user_input_lower for word in ["어렵게", "복잡하게", "고급", "상급"]):
+            elif scan.has("difficulty.hard"):
                 intent["difficulty_level"] = "hard"
-            intent["keywords"].extend([kw for kw in difficulty_keywords if kw in user_input_lower])
+            intent["keywords"].extend(difficulty_hits)
         
         # 감정 분석 (간단한 규칙 기반)
-        positive_words = ["좋아", "재미있", "멋진", "훌륭", "완벽", "사랑", "도움", "유용", "더 좋게", "개선"]
-        negative_words = ["싫어", "지루", "별로", "아쉬", "부족", "어려워", "모르겠", "이상해"]
-        
-        if any(word in user_input_lower for word in positive_words):
+        if scan.has("sentiment.positive"):
             intent["sentiment"] = "positive"
-        elif any(word in user_input_lower for word in negative_words):
+        elif scan.has("sentiment.negative"):
             intent["sentiment"] = "negative"
         
         return intent
@@ -166,15 +151,22 @@ class ChatbotHelper:
         if not chat_history:
             return "새로운 스토리 편집 세션입니다."
         
-        user_requests = [msg for role, msg in chat_history if role == "user"]
+        # 제한된 채팅 기록이면 접힌 오래된 메시지 요약도 포함
+        if isinstance(chat_history, ChatHistory):
+            user_requests = chat_history.user_requests()
+            archived_summary = chat_history.archived_summary()
+        else:
+            user_requests = [msg for role, msg in chat_history if role == "user"]
+            archived_summary = ""
         
-        if len(user_requests) <= 3:
-            return f"사용자가 요청한 스토리 수정 내용: {', '.join(user_requests[-3:])}"
+        if len(user_requests) <= 3 and not archived_summary:
+            summary = f"사용자가 요청한 스토리 수정 내용: {', '.join(user_requests[-3:])}"
         else:
-            return f"최근 스토리 수정 요청사항: {', '.join(user_requests[-3:])}"
+            summary = f"최근 스토리 수정 요청사항: {', '.join(user_requests[-3:])}"
+        return f"{archived_summary}\n{summary}" if archived_summary else summary
     
-    def validate_generated_content(self, content: str) -> Dict[str, any]:
-        """생성된 스토리 콘텐츠의 품질을 검증합니다."""
+    def validate_generated_content(self, content: str, scan: Optional[KeywordScan] = None) -> Dict[str, any]:
+        """생성된 스토리 콘텐츠의 품질을 검증합니다. (scan: 키워드 스캔 결과 재사용)"""
         validation_result = {
             "is_valid": False,
             "is_json": False,
@@ -197,13 +189,10 @@ class ChatbotHelper:
                     validation_result["has_required_fields"] = True
             
             # 스토리 적절성 검증 (아동 친화적 내용)
-            inappropriate_words = ["폭력", "위험한", "무서운", "죽음", "전쟁", "혈액", "살인"]
-            content_lower = content.lower()
-            
-            for word in inappropriate_words:
-                if word in content_lower:
-                    validation_result["is_story_appropriate"] = False
-                    validation_result["issues"].append(f"부적절한 내용 발견: {word}")
+            scan = scan or keyword_engine.scan(content)
+            for word in scan.get("content.inappropriate"):
+                validation_result["is_story_appropriate"] = False
+                validation_result["issues"].append(f"부적절한 내용 발견: {word}")
             
             # 스토리 일관성 검증 (기본적인 체크)
             if validation_result["is_json"] and validation_result["has_required_fields"]:
@@ -320,43 +309,22 @@ class ChatbotHelper:
             "🌟 독창적이고 기억에 남을 만한 요소"
         ])
     
-    def validate_user_request(self, user_input: str) -> Dict[str, any]:
+    def validate_user_request(self, user_input: str, scan: Optional[KeywordScan] = None) -> Dict[str, any]:
         """
         사용자 요청이 프로젝트 범위에 맞는지 검증하고 적절한 가이드를 제공합니다.
         
         Args:
             user_input (str): 사용자 입력
+            scan (KeywordScan, optional): 같은 입력의 키워드 스캔 결과
             
         Returns:
             Dict: 검증 결과와 가이드 메시지
         """
         user_input_lower = user_input.lower()
         
-        # 허용되는 스토리 편집 관련 키워드
-        valid_keywords = [
-            # 캐릭터 관련
-            "캐릭터", "인물", "이름", "성격", "주인공", "등장인물", "대사", "말",
-            # 배경 관련  
-            "배경", "장소", "환경", "설정", "세계관", "왕국", "무대",
-            # 이벤트 관련
-            "이벤트", "사건", "뉴스", "상황", "턴", "게임", "스토리", "내용",
-            # 편집 관련
-            "수정", "변경", "편집", "바꿔", "만들어", "추가", "제거", "개선",
-            # 난이도 관련
-            "쉽게", "어렵게", "재미있게", "흥미롭게", "단순하게"
-        ]
-        
-        # 프로젝트 범위 외 키워드 (차단할 내용)
-        invalid_keywords = [
-            # 기술적 질문
-            "파이썬", "코드", "프로그래밍", "개발", "알고리즘", "데이터베이스",
-            # 일반 질문
-            "날씨", "음식", "여행", "쇼핑", "영화", "음악", "스포츠",
-            # 새로운 게임 생성 (편집만 지원)
-            "새로운 게임", "게임 만들어", "처음부터", "새로 생성",
-            # 투자 조언 (교육 스토리만 편집)
-            "주식 추천", "투자 조언", "실제 투자", "돈 벌기"
-        ]
+        # 허용/차단 키워드 목록은 키워드 엔진의 request.valid / request.invalid 범주
+        invalid_keywords = KEYWORD_CATEGORIES["request.invalid"]
+        scan = scan or keyword_engine.scan(user_input)
         
         validation_result = {
             "is_valid": True,
@@ -367,8 +335,8 @@ class ChatbotHelper:
         }
         
         # 유효한 키워드 점수 계산
-        valid_score = sum(1 for keyword in valid_keywords if keyword in user_input_lower)
-        invalid_score = sum(1 for keyword in invalid_keywords if keyword in user_input_lower)
+        valid_score = scan.count("request.valid")
+        invalid_score = scan.count("request.invalid")
         
         # 검증 로직
         if invalid_score > 0:
@@ -1,54 +1,441 @@
 """
 설정 및 환경 변수 관리 모듈
+
+설정은 한 번만 로드하여 Settings 객체로 캐시합니다. (.env 파일과 Streamlit Secrets를 매번 다시 읽지 않음)
+.env 파일 수정 시각이 바뀌거나 SIGHUP을 받으면 재시작 없이 다시 로드하고,
+등록된 리스너에 이전/새 설정을 전달하여 캐시 크기 등 실행 중인 리소스에 반영합니다.
 """
 import os
-import streamlit as st
-from dotenv import load_dotenv
+import sys
+import time
+import signal
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from dotenv import dotenv_values, find_dotenv
 import logging
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def load_api_key():
+
+def _env_int(name: str, default: int) -> int:
+    """정수 환경변수 (잘못된 값이면 기본값 사용 - 실행 중 재로드가 실패하지 않도록)"""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning(f"{name}={value!r}는 정수가 아니므로 기본값 {default} 사용")
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    """실수 환경변수 (잘못된 값이면 기본값 사용)"""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning(f"{name}={value!r}는 실수가 아니므로 기본값 {default} 사용")
+        return default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """true/false 환경변수"""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() == "true"
+
+
+def _env_optional_int(name: str) -> Optional[int]:
+    """비어 있으면 None인 정수 환경변수"""
+    value = (os.getenv(name) or "").strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning(f"{name}={value!r}는 정수가 아니므로 지정하지 않은 것으로 처리")
+        return None
+
+
+def _env_list(name: str, default: str) -> Tuple[str, ...]:
+    """쉼표로 구분된 환경변수 (빈 항목 제외)"""
+    value = os.getenv(name)
+    if value is None:
+        value = default
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
+class Settings:
     """
-    API 키를 환경변수에서 로드합니다.
-    Streamlit Cloud Secrets 우선, 로컬 .env 대안
-    
-    Returns:
-        str: Google Gemini API 키
+    타입이 지정된 설정 스냅샷 (읽기 전용)
+
+    다시 로드하면 기존 객체를 고치지 않고 새 객체로 교체하므로,
+    한 요청 안에서는 같은 설정 값을 일관되게 사용할 수 있습니다.
     """
+
+    __slots__ = (
+        # API 키
+        "google_api_key", "api_key_source",
+        # 모델
+        "model_name", "temperature", "max_tokens", "top_p",
+        # 타임아웃/재시도/연결
+        "llm_timeout", "llm_max_retries", "llm_transport", "llm_pool_size", "llm_keepalive_seconds",
+        # 동시성 제한
+        "max_workers", "chunk_concurrency", "fanout_concurrency",
+        # 캐시 크기
+        "similarity_cache_max_entries", "similarity_cache_threshold", "similarity_cache_ttl",
+        "turn_cache_max_entries", "analysis_cache_max_entries", "similarity_cache_enabled",
+        # 분할 편집
+        "chunk_threshold_tokens", "chunk_max_tokens",
+        # 토큰 예산/단가
+        "prompt_token_budget", "prompt_budget_policy", "output_token_ratio", "output_token_margin",
+        "input_price_per_million", "output_price_per_million", "thinking_price_per_million",
+        # 스트리밍 검사
+        "stream_guard_enabled", "stream_guard_retries", "stream_max_length_factor",
+        "stream_length_margin_chars", "stream_preamble_limit_chars",
+        # 모델 라우팅
+        "routing_enabled", "route_default_tier", "route_escalation", "route_fast_max_story_tokens",
+        "route_fast_intents", "route_tiers",
+        # 요청 추적
+        "trace_sample_rate", "trace_export_path",
+        # 시스템 샘플러
+        "sampler_interval", "sampler_history",
+        # 업스트림 워밍업/카나리
+        "upstream_warmup_enabled", "upstream_warmup_timeout", "upstream_canary_interval",
+        "upstream_canary_timeout", "upstream_canary_history", "upstream_unhealthy_after",
+        "upstream_max_timeout_factor", "upstream_probe_thinking_budget",
+        # Streamlit 백그라운드 루프/스트리밍 화면/채팅 기록
+        "async_call_timeout", "stream_frame_interval_ms", "stream_frame_max_chunks", "stream_idle_timeout",
+        "chat_history_max_messages", "chat_render_window", "chat_summary_requests",
+        # 편집 세션/편집 채널
+        "edit_session_ttl", "edit_session_max", "edit_session_max_megabytes", "edit_session_history",
+        "ws_edit_max_queue",
+        # API 전송 형식
+        "wire_format_enabled", "wire_compress_min_bytes", "wire_gzip_level", "wire_zstd_level",
+        "wire_max_body_megabytes",
+        # 재로드
+        "reload_check_seconds", "version", "loaded_at"
+    )
+
+    def __init__(self, google_api_key: Optional[str] = None, api_key_source: str = "none", version: int = 1):
+        self.google_api_key = google_api_key
+        self.api_key_source = api_key_source
+
+        self.model_name = os.getenv("GOOGLE_MODEL") or "gemini-2.5-flash-preview-05-20"
+        self.temperature = _env_float("GOOGLE_TEMPERATURE", 1.0)
+        self.max_tokens = _env_int("GOOGLE_MAX_TOKENS", 65000)
+        self.top_p = _env_float("GOOGLE_TOP_P", 0.9)
+
+        self.llm_timeout = _env_float("GOOGLE_TIMEOUT", 120.0)
+        self.llm_max_retries = _env_int("GOOGLE_MAX_RETRIES", 2)
+
+        self.max_workers = _env_int("STORY_MAX_WORKERS", 8)
+        self.chunk_concurrency = _env_int("STORY_CHUNK_CONCURRENCY", 4)
+        self.fanout_concurrency = _env_int("STORY_FANOUT_CONCURRENCY", 7)
+
+        # 업스트림 전송 방식 (grpc / rest, 비우면 라이브러리 기본값)과 연결 풀 크기
+        # 풀 크기를 지정하지 않으면 가장 큰 동시 호출 제한에 맞춤 (동시 호출이 연결을 기다리지 않도록)
+        self.llm_transport = os.getenv("GOOGLE_TRANSPORT") or None
+        self.llm_pool_size = _env_int("GOOGLE_POOL_SIZE", 0) or max(
+            self.max_workers, self.chunk_concurrency, self.fanout_concurrency
+        )
+        # gRPC keep-alive ping 간격(초), 0이면 끔
+        self.llm_keepalive_seconds = _env_int("GOOGLE_KEEPALIVE_SECONDS", 30)
+
+        self.similarity_cache_max_entries = _env_int("SIMILARITY_CACHE_MAX_ENTRIES", 50000)
+        self.similarity_cache_threshold = _env_float("SIMILARITY_CACHE_THRESHOLD", 0.7)
+        self.similarity_cache_ttl = _env_float("SIMILARITY_CACHE_TTL", 3600.0)
+        self.turn_cache_max_entries = _env_int("TURN_CACHE_MAX_ENTRIES", 4096)
+        self.analysis_cache_max_entries = _env_int("ANALYSIS_CACHE_MAX_ENTRIES", 2048)
+        self.similarity_cache_enabled = _env_bool("SIMILARITY_CACHE_ENABLED", False)
+
+        # 스토리 추정 토큰이 threshold를 넘으면 max_tokens 크기 조각으로 나누어 편집
+        self.chunk_threshold_tokens = _env_int("STORY_CHUNK_THRESHOLD_TOKENS", 8000)
+        self.chunk_max_tokens = _env_int("STORY_CHUNK_MAX_TOKENS", 3000)
+
+        self.prompt_token_budget = _env_int("PROMPT_TOKEN_BUDGET", 32000)
+        # reject | downgrade
+        self.prompt_budget_policy = os.getenv("PROMPT_BUDGET_POLICY") or "downgrade"
+        self.output_token_ratio = _env_float("OUTPUT_TOKEN_RATIO", 1.5)
+        # Gemini 2.5는 사고 토큰도 출력 상한에 포함되므로 여유분을 넉넉히 둠
+        self.output_token_margin = _env_int("OUTPUT_TOKEN_MARGIN", 8192)
+        # USD / 1M tokens (사고 토큰은 출력 단가와 별도로 청구)
+        self.input_price_per_million = _env_float("LLM_INPUT_PRICE_PER_1M", 0.15)
+        self.output_price_per_million = _env_float("LLM_OUTPUT_PRICE_PER_1M", 0.60)
+        self.thinking_price_per_million = _env_float("LLM_THINKING_PRICE_PER_1M", 3.50)
+
+        self.stream_guard_enabled = _env_bool("STREAM_GUARD_ENABLED", True)
+        self.stream_guard_retries = _env_int("STREAM_GUARD_RETRIES", 1)
+        self.stream_max_length_factor = _env_float("STREAM_MAX_LENGTH_FACTOR", 2.5)
+        self.stream_length_margin_chars = _env_int("STREAM_LENGTH_MARGIN_CHARS", 4000)
+        self.stream_preamble_limit_chars = _env_int("STREAM_PREAMBLE_LIMIT_CHARS", 200)
+
+        self.routing_enabled = _env_bool("ROUTING_ENABLED", True)
+        self.route_default_tier = os.getenv("ROUTE_DEFAULT_TIER") or "balanced"
+        self.route_escalation = _env_list("ROUTE_ESCALATION", "fast,balanced,quality")
+        self.route_fast_max_story_tokens = _env_int("ROUTE_FAST_MAX_STORY_TOKENS", 6000)
+        self.route_fast_intents = _env_list("ROUTE_FAST_INTENTS", "character,dialogue")
+        # 등급별 모델/출력 상한/사고 예산 (사고 예산은 비우면 모델 기본값)
+        self.route_tiers = {
+            tier: {
+                "model_name": os.getenv(f"ROUTE_{tier.upper()}_MODEL") or self.model_name,
+                "max_output_tokens": _env_int(f"ROUTE_{tier.upper()}_MAX_TOKENS", max_tokens),
+                "thinking_budget": _env_optional_int(f"ROUTE_{tier.upper()}_THINKING_BUDGET")
+            }
+            for tier, max_tokens in (("fast", 16384), ("balanced", 32768), ("quality", self.max_tokens))
+        }
+
+        # 0.0 ~ 1.0, 샘플링된 추적은 OTLP JSON 줄로 내보냄
+        self.trace_sample_rate = _env_float("TRACE_SAMPLE_RATE", 0.0)
+        self.trace_export_path = os.getenv("TRACE_EXPORT_PATH") or "logs/traces.jsonl"
+
+        self.sampler_interval = _env_float("SYSTEM_SAMPLER_INTERVAL", 1.0)
+        self.sampler_history = _env_int("SYSTEM_SAMPLER_HISTORY", 600)
+
+        self.upstream_warmup_enabled = _env_bool("UPSTREAM_WARMUP_ENABLED", True)
+        self.upstream_warmup_timeout = _env_float("UPSTREAM_WARMUP_TIMEOUT", 15.0)
+        self.upstream_canary_interval = _env_float("UPSTREAM_CANARY_INTERVAL", 60.0)
+        self.upstream_canary_timeout = _env_float("UPSTREAM_CANARY_TIMEOUT", 10.0)
+        self.upstream_canary_history = _env_int("UPSTREAM_CANARY_HISTORY", 60)
+        self.upstream_unhealthy_after = _env_int("UPSTREAM_UNHEALTHY_AFTER", 3)
+        self.upstream_max_timeout_factor = _env_float("UPSTREAM_MAX_TIMEOUT_FACTOR", 2.0)
+        self.upstream_probe_thinking_budget = _env_optional_int("UPSTREAM_PROBE_THINKING_BUDGET")
+
+        self.async_call_timeout = _env_float("ASYNC_CALL_TIMEOUT", 600.0)
+        self.stream_frame_interval_ms = _env_int("STREAM_FRAME_INTERVAL_MS", 50)
+        self.stream_frame_max_chunks = _env_int("STREAM_FRAME_MAX_CHUNKS", 64)
+        self.stream_idle_timeout = _env_float("STREAM_IDLE_TIMEOUT", 120.0)
+        self.chat_history_max_messages = _env_int("CHAT_HISTORY_MAX_MESSAGES", 200)
+        self.chat_render_window = _env_int("CHAT_RENDER_WINDOW", 20)
+        self.chat_summary_requests = _env_int("CHAT_SUMMARY_REQUESTS", 5)
+
+        self.edit_session_ttl = _env_float("EDIT_SESSION_TTL", 1800.0)
+        self.edit_session_max = _env_int("EDIT_SESSION_MAX", 500)
+        self.edit_session_max_megabytes = _env_float("EDIT_SESSION_MAX_MB", 64.0)
+        self.edit_session_history = _env_int("EDIT_SESSION_HISTORY", 20)
+        self.ws_edit_max_queue = _env_int("WS_EDIT_MAX_QUEUE", 8)
+
+        self.wire_format_enabled = _env_bool("WIRE_FORMAT_ENABLED", True)
+        self.wire_compress_min_bytes = _env_int("WIRE_COMPRESS_MIN_BYTES", 1024)
+        self.wire_gzip_level = _env_int("WIRE_GZIP_LEVEL", 6)
+        self.wire_zstd_level = _env_int("WIRE_ZSTD_LEVEL", 3)
+        self.wire_max_body_megabytes = _env_float("WIRE_MAX_BODY_MB", 16.0)
+
+        # .env 파일 수정 시각 확인 간격 (0이면 파일 감시 끔, SIGHUP은 계속 동작)
+        self.reload_check_seconds = _env_float("SETTINGS_RELOAD_CHECK_SECONDS", 5.0)
+        self.version = version
+        self.loaded_at = time.time()
+
+    def to_dict(self, redact: bool = True) -> Dict[str, Any]:
+        """관리 화면/디버깅용 (API 키는 길이만 표시)"""
+        values = {name: getattr(self, name) for name in self.__slots__}
+        if redact:
+            api_key = values.pop("google_api_key")
+            values["google_api_key_length"] = len(api_key) if api_key else 0
+        return values
+
+
+# 바뀌면 LLM 클라이언트를 다시 만들어야 하는 설정
+LLM_SETTING_FIELDS = (
+    "google_api_key", "model_name", "temperature", "max_tokens", "top_p", "llm_timeout", "llm_max_retries",
+    "llm_transport", "llm_pool_size", "llm_keepalive_seconds"
+)
+
+
+def llm_settings_changed(previous: Settings, settings: Settings) -> bool:
+    """두 설정 사이에 LLM 클라이언트 관련 값이 바뀌었는지 확인"""
+    return any(getattr(previous, name) != getattr(settings, name) for name in LLM_SETTING_FIELDS)
+
+
+def _load_secret_api_key() -> Optional[str]:
+    """Streamlit Secrets의 API 키 (Streamlit 앱으로 실행 중일 때만 확인)"""
+    # API 서버에서는 streamlit을 불러오지 않음 - 이미 로드된 경우에만 Secrets 확인
+    st = sys.modules.get("streamlit")
+    if st is None:
+        return None
     try:
-        # Streamlit Cloud Secrets 우선
         if hasattr(st, 'secrets') and 'GOOGLE_API_KEY' in st.secrets:
-            logger.info("Streamlit Secrets에서 API 키 로드")
             return st.secrets['GOOGLE_API_KEY']
     except Exception as e:
         logger.warning(f"Streamlit Secrets 로드 실패: {e}")
-    
-    try:
-        # 로컬 환경 대안
-        load_dotenv()
-        api_key = os.getenv("GOOGLE_API_KEY")
-        if api_key:
-            logger.info("로컬 환경변수에서 API 키 로드")
-            return api_key
-        else:
-            logger.error("환경변수에서 GOOGLE_API_KEY를 찾을 수 없습니다")
+    return None
+
+
+class SettingsManager:
+    """설정 로드/캐시/재로드 관리"""
+
+    def __init__(self, env_file: Optional[str] = None):
+        self.env_file = env_file or os.getenv("SETTINGS_ENV_FILE") or find_dotenv(usecwd=True) or ".env"
+        self._lock = threading.RLock()
+        self._settings: Optional[Settings] = None
+        self._file_mtime: Optional[float] = None
+        self._last_check = 0.0
+        # .env 파일에서 설정한 키 (프로세스 환경변수로 직접 지정된 값은 덮어쓰지 않음)
+        self._dotenv_keys: Set[str] = set()
+        self._reload_requested = False
+        self._listeners: List[Callable[[Settings, Settings], None]] = []
+        self.reload_count = 0
+
+    def _current_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.env_file).st_mtime
+        except OSError:
             return None
-    except Exception as e:
-        logger.error(f"API 키 로드 중 오류 발생: {e}")
-        return None
+
+    def _apply_dotenv(self):
+        """.env 파일 값을 환경변수에 반영 (파일에서 지운 키는 환경변수에서도 제거)"""
+        values = dotenv_values(self.env_file) if os.path.exists(self.env_file) else {}
+        for key in self._dotenv_keys - set(values):
+            os.environ.pop(key, None)
+        applied = set()
+        for key, value in values.items():
+            if value is None:
+                continue
+            if key in os.environ and key not in self._dotenv_keys:
+                continue
+            os.environ[key] = value
+            applied.add(key)
+        self._dotenv_keys = applied
+
+    def get(self) -> Settings:
+        """
+        현재 설정을 반환합니다.
+        재로드 요청(SIGHUP)이 있거나 .env 파일이 바뀐 경우에만 다시 로드합니다.
+        """
+        settings = self._settings
+        if settings is None:
+            with self._lock:
+                if self._settings is None:
+                    return self.reload("initial")
+                return self._settings
+        if self._reload_requested:
+            return self.reload("signal")
+        if settings.reload_check_seconds > 0:
+            now = time.monotonic()
+            if now - self._last_check >= settings.reload_check_seconds:
+                self._last_check = now
+                if self._current_mtime() != self._file_mtime:
+                    return self.reload("file_changed")
+        return settings
+
+    def reload(self, reason: str = "manual") -> Settings:
+        """설정을 다시 로드하고 리스너에 알립니다."""
+        with self._lock:
+            self._reload_requested = False
+            self._file_mtime = self._current_mtime()
+            self._last_check = time.monotonic()
+            try:
+                self._apply_dotenv()
+            except Exception as e:
+                logger.error(f".env 파일 로드 중 오류 발생: {e}")
+
+            api_key, source = _load_secret_api_key(), "streamlit_secrets"
+            if not api_key:
+                api_key, source = os.getenv("GOOGLE_API_KEY"), "environment"
+            if not api_key:
+                source = "none"
+                logger.error("환경변수에서 GOOGLE_API_KEY를 찾을 수 없습니다")
+
+            previous = self._settings
+            self.reload_count += 1
+            settings = Settings(api_key, source, version=self.reload_count)
+            self._settings = settings
+            listeners = list(self._listeners)
+
+        logger.info(f"설정 로드 완료 (v{settings.version}, 사유: {reason}, API 키: {source})")
+        if previous is not None:
+            for listener in listeners:
+                try:
+                    listener(previous, settings)
+                except Exception as e:
+                    logger.error(f"설정 변경 리스너 오류: {e}")
+        return settings
+
+    def request_reload(self, *_):
+        """다음 설정 조회 때 다시 로드하도록 표시 (시그널 핸들러에서 안전하게 호출 가능)"""
+        self._reload_requested = True
+
+    def add_listener(self, callback: Callable[[Settings, Settings], None]):
+        """설정이 다시 로드될 때 (이전 설정, 새 설정)으로 호출할 함수 등록"""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def install_signal_handler(self) -> bool:
+        """
+        SIGHUP을 받으면 설정을 다시 로드하도록 등록합니다.
+        메인 스레드가 아니거나 SIGHUP이 없는 플랫폼이면 등록하지 않습니다. (파일 감시는 계속 동작)
+        """
+        if not hasattr(signal, "SIGHUP"):
+            return False
+        try:
+            signal.signal(signal.SIGHUP, self.request_reload)
+            return True
+        except ValueError:
+            return False
+
+
+# 전역 설정 관리자
+settings_manager = SettingsManager()
+
+
+def get_settings() -> Settings:
+    """현재 설정 (캐시된 Settings 객체)"""
+    return settings_manager.get()
+
+
+def reload_settings() -> Settings:
+    """설정을 즉시 다시 로드합니다."""
+    return settings_manager.reload("manual")
+
+
+def add_settings_listener(callback: Callable[[Settings, Settings], None]):
+    """설정 재로드 리스너 등록"""
+    settings_manager.add_listener(callback)
+
+
+def load_api_key():
+    """
+    API 키를 반환합니다. (설정 로드 시 한 번만 확인한 값)
+    Streamlit Cloud Secrets 우선, 로컬 .env 대안
+
+    Returns:
+        str: Google Gemini API 키
+    """
+    return get_settings().google_api_key
 
 def get_model_settings():
     """
     모델 설정값을 반환합니다.
-    
+
     Returns:
         dict: 모델 설정값
     """
+    settings = get_settings()
+    return {
+        "model_name": settings.model_name,
+        "temperature": settings.temperature,
+        "max_tokens": settings.max_tokens,
+        "top_p": settings.top_p,
+        "timeout": settings.llm_timeout,
+        "max_retries": settings.llm_max_retries,
+        "transport": settings.llm_transport,
+        "pool_size": settings.llm_pool_size,
+        "keepalive_seconds": settings.llm_keepalive_seconds
+    }
+
+def get_concurrency_settings():
+    """
+    프로세스 전역 동시성 설정값을 반환합니다.
+
+    Returns:
+        dict: 동시성 설정값
+    """
     return {
-        "model_name": "gemini-2.5-flash-preview-05-20",
-        "temperature": 1,
-        "max_tokens": 65000
+        "max_workers": get_settings().max_workers
     }
@@ -0,0 +1,244 @@
+"""
+대화형 편집 채널 모듈 (WebSocket /ws/edit 연결 하나의 상태)
+
+연결마다 작업 중인 스토리를 보관하고, 편집 요청을 받은 순서대로 하나씩 처리합니다.
+다음 편집은 이전 편집 결과 위에 적용되며, 처리 중인 편집을 기다리는 동안 후속 편집을 미리 보낼 수 있습니다.
+생성 중에는 턴이 완성될 때마다 알리고, 처리 중이거나 대기 중인 편집은 취소할 수 있습니다.
+전송 방식과 무관하게 send(메시지 dict) 코루틴과 편집 함수만 받아 동작합니다.
+"""
+import json
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from source.utils.config import get_settings
+from source.utils.metrics import metrics_registry
+from source.utils.stream_guard import JsonTurnScanner, StreamViolation
+
+logger = logging.getLogger(__name__)
+
+edit_channels_active = metrics_registry.gauge(
+    "edit_channels_active", "열려 있는 대화형 편집 채널 수"
+)
+edit_channel_jobs_total = metrics_registry.counter(
+    "edit_channel_jobs_total", "대화형 편집 채널 편집 결과", ("outcome",)
+)
+
+# edit_fn(story, story_data, chapter_id, edit_request, latency_tier, on_token, on_retry) -> 편집된 스토리 JSON 문자열
+EditFunction = Callable[..., Awaitable[Optional[str]]]
+
+
+def get_edit_channel_settings() -> Dict[str, int]:
+    """
+    대화형 편집 채널 설정값을 반환합니다.
+
+    Returns:
+        dict: 대화형 편집 채널 설정값
+    """
+    return {
+        # 연결별 대기 편집 수 상한 (처리 중인 편집 제외)
+        "max_queue": get_settings().ws_edit_max_queue
+    }
+
+
+class EditJob:
+    """대기 중이거나 처리 중인 편집 요청"""
+
+    __slots__ = ("job_id", "edit_request", "latency_tier", "generation", "task")
+
+    def __init__(self, job_id: str, edit_request: str, latency_tier: Optional[str] = None, generation: int = 0):
+        self.job_id = job_id
+        self.edit_request = edit_request
+        self.latency_tier = latency_tier
+        # 요청 당시 불러온 스토리 (load로 교체되면 결과를 반영하지 않음)
+        self.generation = generation
+        self.task: Optional[asyncio.Task] = None
+
+
+class EditChannel:
+    """연결 하나의 작업 스토리와 편집 대기열"""
+
+    def __init__(self, send: Callable[[Dict[str, Any]], Awaitable[None]], edit_fn: EditFunction,
+                 max_queue: int = 8):
+        self._send = send
+        self._edit_fn = edit_fn
+        self.max_queue = max_queue
+        self.chapter_id: Optional[str] = None
+        self.story: Optional[str] = None
+        self.story_data: Optional[List[Any]] = None
+        self.version = 0
+        self._generation = 0
+        self._queue: deque = deque()
+        self._wakeup = asyncio.Event()
+        self._current: Optional[EditJob] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._job_counter = 0
+
+    async def emit(self, message: Dict[str, Any]):
+        """클라이언트로 메시지 전송 (연결이 끊겼으면 무시, 수신 쪽에서 종료 처리)"""
+        try:
+            await self._send(message)
+        except Exception as e:
+            logger.debug(f"편집 채널 전송 실패: {e}")
+
+    def start(self):
+        """편집 처리 작업 시작 (현재 이벤트 루프)"""
+        if self._worker is None:
+            self._worker = asyncio.get_running_loop().create_task(self._run(), name="edit-channel")
+            edit_channels_active.inc()
+
+    async def close(self):
+        """연결 종료 시 처리 중/대기 중인 편집을 모두 취소"""
+        self._queue.clear()
+        if self._current is not None and self._current.task is not None:
+            self._current.task.cancel()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+            edit_channels_active.dec()
+
+    async def load(self, chapter_id: str, story_data: List[Any]):
+        """작업 스토리 교체 (이전 스토리에 대한 편집은 모두 취소)"""
+        await self.cancel(cancel_all=True)
+        self.chapter_id = chapter_id
+        self.story_data = story_data
+        self.story = json.dumps(story_data, ensure_ascii=False, separators=(',', ':'))
+        self.version = 0
+        self._generation += 1
+        await self.emit({
+            "type": "loaded", "chapterId": chapter_id, "version": self.version, "turns": len(story_data)
+        })
+
+    async def submit(self, edit_request: str, latency_tier: Optional[str] = None,
+                     job_id: Optional[str] = None) -> Optional[EditJob]:
+        """편집 요청을 대기열에 추가 (job_id가 없으면 채널이 부여)"""
+        if self.story_data is None:
+            await self.emit({"type": "error", "id": job_id, "status": 400,
+                             "detail": "먼저 load 메시지로 스토리를 불러와야 합니다."})
+            return None
+        if len(self._queue) >= self.max_queue:
+            await self.emit({"type": "error", "id": job_id, "status": 429,
+                             "detail": f"대기 중인 편집이 너무 많습니다. (최대 {self.max_queue}개)"})
+            return None
+
+        self._job_counter += 1
+        job = EditJob(job_id or str(self._job_counter), edit_request, latency_tier, self._generation)
+        self._queue.append(job)
+        await self.emit({
+            "type": "queued", "id": job.job_id,
+            "position": len(self._queue) + (1 if self._current is not None else 0)
+        })
+        self._wakeup.set()
+        return job
+
+    async def cancel(self, job_id: Optional[str] = None, cancel_all: bool = False):
+        """
+        편집 취소
+
+        Args:
+            job_id: 취소할 편집 (없으면 처리 중인 편집)
+            cancel_all: 처리 중인 편집과 대기 중인 편집 모두 취소
+        """
+        if cancel_all or job_id is not None:
+            for job in list(self._queue):
+                if cancel_all or job.job_id == job_id:
+                    self._queue.remove(job)
+                    edit_channel_jobs_total.inc(outcome="cancelled")
+                    await self.emit({"type": "cancelled", "id": job.job_id, "version": self.version})
+        current = self._current
+        if current is not None and current.task is not None and (
+            cancel_all or job_id is None or current.job_id == job_id
+        ):
+            # 업스트림 스트림은 취소 시 즉시 닫힘, cancelled 메시지는 처리 작업이 보냄
+            current.task.cancel()
+
+    def get_state(self) -> Dict[str, Any]:
+        return {
+            "type": "state",
+            "chapterId": self.chapter_id,
+            "version": self.version,
+            "turns": len(self.story_data) if self.story_data is not None else 0,
+            "story": self.story,
+            "running": self._current.job_id if self._current is not None else None,
+            "queued": [job.job_id for job in self._queue]
+        }
+
+    async def _run(self):
+        while True:
+            while not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            job = self._queue.popleft()
+            # 취소 요청이 처리 중인 편집을 놓치지 않도록 대기 없이 작업까지 만듦
+            self._current = job
+            job.task = asyncio.get_running_loop().create_task(self._execute(job))
+            try:
+                # 편집 작업만 취소된 경우와 채널(처리 작업) 자체가 취소된 경우를 구분
+                await asyncio.wait({job.task})
+            finally:
+                self._current = None
+            await self._finish(job)
+
+    async def _execute(self, job: EditJob):
+        await self.emit({"type": "started", "id": job.job_id, "version": self.version})
+        scanner = JsonTurnScanner()
+        turn_index = 0
+
+        async def on_token(chunk: str):
+            nonlocal turn_index
+            for turn_text in scanner.feed(chunk):
+                try:
+                    turn = json.loads(turn_text)
+                except json.JSONDecodeError:
+                    turn = turn_text
+                await self.emit({"type": "turn", "id": job.job_id, "index": turn_index, "turn": turn})
+                turn_index += 1
+
+        async def on_retry(violation=None):
+            nonlocal scanner, turn_index
+            scanner = JsonTurnScanner()
+            turn_index = 0
+            await self.emit({"type": "retry", "id": job.job_id, "reason": getattr(violation, "kind", None)})
+
+        result = await self._edit_fn(
+            self.story, self.story_data, self.chapter_id, job.edit_request, job.latency_tier,
+            on_token, on_retry
+        )
+        if not result:
+            raise ValueError("스토리 편집에 실패했습니다.")
+        edited_story_data = json.loads(result)
+        if not isinstance(edited_story_data, list):
+            raise ValueError("편집된 스토리 데이터는 배열 형태여야 합니다.")
+        return edited_story_data
+
+    async def _finish(self, job: EditJob):
+        task = job.task
+        if task.cancelled() or job.generation != self._generation:
+            edit_channel_jobs_total.inc(outcome="cancelled")
+            await self.emit({"type": "cancelled", "id": job.job_id, "version": self.version})
+            return
+        error = task.exception()
+        if error is not None:
+            edit_channel_jobs_total.inc(outcome="error")
+            status = 422 if isinstance(error, StreamViolation) else 500
+            if isinstance(error, json.JSONDecodeError):
+                error = ValueError("편집된 시나리오가 유효한 JSON 형식이 아닙니다.")
+            logger.warning(f"편집 채널 편집 실패 ({job.job_id}): {error}")
+            await self.emit({"type": "error", "id": job.job_id, "status": getattr(error, "status_code", status),
+                             "detail": getattr(error, "detail", None) or str(error), "version": self.version})
+            return
+
+        # 다음 편집은 이 결과 위에 적용
+        self.story_data = task.result()
+        self.story = json.dumps(self.story_data, ensure_ascii=False, separators=(',', ':'))
+        self.version += 1
+        edit_channel_jobs_total.inc(outcome="success")
+        await self.emit({
+            "type": "result", "id": job.job_id, "chapterId": self.chapter_id, "version": self.version,
+            "story": self.story, "isCustom": True
+        })
@@ -0,0 +1,236 @@
+"""
+편집 세션 저장소 모듈
+
+여러 단계로 편집할 때 매번 전체 스토리를 주고받지 않도록 스토리를 서버에 보관합니다.
+세션마다 압축 직렬화한 스토리 문자열과 파싱된 객체를 함께 두므로 편집 요청마다
+원본 스토리를 다시 파싱하지 않습니다.
+마지막 사용 후 ttl이 지난 세션은 만료되고, 세션 수나 보관 크기 상한을 넘으면
+가장 오래 사용하지 않은 세션부터 제거합니다. (프로세스 메모리 안에서만 동작)
+"""
+import sys
+import time
+import uuid
+import asyncio
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional
+
+from source.utils.config import get_settings, add_settings_listener
+from source.utils.metrics import metrics_registry
+
+edit_sessions_active = metrics_registry.gauge(
+    "edit_sessions_active", "보관 중인 편집 세션 수"
+)
+edit_sessions_bytes = metrics_registry.gauge(
+    "edit_sessions_bytes", "편집 세션에 보관 중인 스토리 크기 합계 (직렬화 기준)"
+)
+edit_session_evictions_total = metrics_registry.counter(
+    "edit_session_evictions_total", "편집 세션 제거 수", ("reason",)
+)
+
+
+def get_edit_session_settings() -> Dict[str, Any]:
+    """
+    편집 세션 설정값을 반환합니다.
+
+    Returns:
+        dict: 편집 세션 설정값
+    """
+    settings = get_settings()
+    return {
+        # 마지막 사용 후 만료까지 시간(초)
+        "ttl": settings.edit_session_ttl,
+        "max_sessions": settings.edit_session_max,
+        # 보관 스토리 크기 합계 상한 (직렬화 문자열 + 파싱된 객체의 메모리 추정치, MB)
+        "max_megabytes": settings.edit_session_max_megabytes,
+        # 세션별로 기억할 최근 편집 요청 수
+        "history_size": settings.edit_session_history
+    }
+
+
+def estimate_story_bytes(story: str, story_data: Any) -> int:
+    """세션 하나가 차지하는 메모리 추정치 (직렬화 문자열 + 파싱된 객체 트리)"""
+    total = sys.getsizeof(story)
+    seen = set()
+    stack = [story_data]
+    while stack:
+        value = stack.pop()
+        # 파싱 결과 안에서 공유되는 객체(짧은 문자열, 작은 정수 등)는 한 번만 계산
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+        total += sys.getsizeof(value)
+        if isinstance(value, dict):
+            stack.extend(value.keys())
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return total
+
+
+class EditSession:
+    """서버에 보관된 편집 중인 스토리 하나"""
+
+    __slots__ = ("session_id", "chapter_id", "story", "story_data", "size_bytes", "version",
+                 "edits", "created_at", "last_access", "lock")
+
+    def __init__(self, session_id: str, chapter_id: str, story: str, story_data: List[Any],
+                 history_size: int = 20):
+        self.session_id = session_id
+        self.chapter_id = chapter_id
+        self.story = story
+        self.story_data = story_data
+        self.size_bytes = estimate_story_bytes(story, story_data)
+        self.version = 0
+        self.edits: deque = deque(maxlen=max(history_size, 0))
+        self.created_at = time.time()
+        self.last_access = time.monotonic()
+        # 같은 세션의 편집은 순서대로 한 번에 하나씩 (API 이벤트 루프에서만 사용)
+        self.lock = asyncio.Lock()
+
+    def to_dict(self, ttl: float) -> Dict[str, Any]:
+        """응답용 세션 정보 (스토리 본문 제외)"""
+        return {
+            "sessionId": self.session_id,
+            "chapterId": self.chapter_id,
+            "version": self.version,
+            "turns": len(self.story_data),
+            "storyBytes": self.size_bytes,
+            "edits": list(self.edits),
+            "createdAt": round(self.created_at, 3),
+            "expiresIn": round(max(ttl - (time.monotonic() - self.last_access), 0), 1)
+        }
+
+
+class EditSessionStore:
+    """TTL 만료와 LRU 제거를 하는 편집 세션 저장소"""
+
+    def __init__(self, ttl: float = 1800, max_sessions: int = 500, max_bytes: int = 64 * 1024 * 1024,
+                 history_size: int = 20):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.history_size = history_size
+        self._sessions: "OrderedDict[str, EditSession]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        edit_sessions_active.set_function(lambda: len(self._sessions))
+        edit_sessions_bytes.set_function(lambda: self._total_bytes)
+
+    def create(self, chapter_id: str, story: str, story_data: List[Any]) -> EditSession:
+        """
+        새 세션을 만듭니다.
+
+        Args:
+            chapter_id: 응답에 유지할 chapterId
+            story: 압축 직렬화된 스토리 JSON 문자열
+            story_data: 파싱된 스토리 (턴 목록)
+
+        Raises:
+            ValueError: 스토리 하나가 보관 크기 상한보다 큰 경우
+        """
+        session = EditSession(uuid.uuid4().hex, chapter_id, story, story_data, self.history_size)
+        if session.size_bytes > self.max_bytes:
+            raise ValueError(f"스토리 크기({session.size_bytes} bytes)가 세션 보관 상한을 넘습니다.")
+        with self._lock:
+            self._sessions[session.session_id] = session
+            self._total_bytes += session.size_bytes
+            self._evict_locked()
+        return session
+
+    def get(self, session_id: str) -> Optional[EditSession]:
+        """세션 조회 (만료되었거나 없으면 None, 조회하면 만료 시간 연장)"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if time.monotonic() - session.last_access > self.ttl:
+                self._remove_locked(session_id, "expired")
+                return None
+            session.last_access = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def update(self, session: EditSession, story: str, story_data: List[Any], edit_request: str) -> bool:
+        """
+        편집 결과를 반영하고 버전을 올립니다.
+
+        Returns:
+            bool: 반영 여부 (편집 중 세션이 제거되었으면 False)
+        """
+        size_bytes = estimate_story_bytes(story, story_data)
+        with self._lock:
+            if self._sessions.get(session.session_id) is not session:
+                return False
+            self._total_bytes += size_bytes - session.size_bytes
+            session.story = story
+            session.story_data = story_data
+            session.size_bytes = size_bytes
+            session.version += 1
+            session.edits.append(edit_request)
+            session.last_access = time.monotonic()
+            self._sessions.move_to_end(session.session_id)
+            # 편집으로 커진 세션이 상한을 넘겨도 방금 편집한 세션은 마지막에 제거 대상이 됨
+            self._evict_locked()
+        return True
+
+    def configure(self, ttl: float, max_sessions: int, max_bytes: int, history_size: int):
+        """제한 변경 (설정 재로드용, 넘치는 세션은 즉시 제거, 기록 수는 새 세션부터 적용)"""
+        with self._lock:
+            self.ttl = ttl
+            self.max_sessions = max_sessions
+            self.max_bytes = max_bytes
+            self.history_size = history_size
+            self._evict_locked()
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._remove_locked(session_id, "deleted")
+
+    def _remove_locked(self, session_id: str, reason: str) -> bool:
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        self._total_bytes -= session.size_bytes
+        edit_session_evictions_total.inc(reason=reason)
+        return True
+
+    def _evict_locked(self):
+        # 사용 순서대로 정렬되어 있으므로 맨 앞(가장 오래 사용하지 않은 세션)부터 만료/개수/크기 상한 검사
+        now = time.monotonic()
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_access > self.ttl:
+                reason = "expired"
+            elif len(self._sessions) > self.max_sessions:
+                reason = "capacity"
+            elif self._total_bytes > self.max_bytes:
+                reason = "memory"
+            else:
+                break
+            self._remove_locked(session_id, reason)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl
+            }
+
+
+_settings = get_edit_session_settings()
+
+# 전역 편집 세션 저장소 (API 서버 프로세스별)
+edit_session_store = EditSessionStore(
+    ttl=_settings["ttl"],
+    max_sessions=_settings["max_sessions"],
+    max_bytes=int(_settings["max_megabytes"] * 1024 * 1024),
+    history_size=_settings["history_size"]
+)
+add_settings_listener(lambda previous, settings: edit_session_store.configure(
+    settings.edit_session_ttl, settings.edit_session_max,
+    int(settings.edit_session_max_megabytes * 1024 * 1024), settings.edit_session_history
+))
@@ -102,13 +102,15 @@ class HealthChecker:
     
     def _check_api_key(self) -> Dict[str, Any]:
         """API 키 상태 확인"""
-        from source.utils.config import load_api_key
+        from source.utils.config import get_settings
         try:
-            api_key = load_api_key()
+            # 캐시된 설정 사용 (.env/Secrets를 다시 읽지 않음)
+            settings = get_settings()
+            api_key = settings.google_api_key
             return {
                 "status": "healthy" if api_key else "unhealthy",
                 "message": "API 키 로드됨" if api_key else "API 키 없음",
-                "details": {"key_length": len(api_key) if api_key else 0}
+                "details": {"key_length": len(api_key) if api_key else 0, "source": settings.api_key_source}
             }
         except Exception as e:
             return {
@@ -0,0 +1,219 @@
+"""
+통합 키워드 검사 엔진
+
+보안 검사, 의도 분석, 요청 범위 검증, 생성 콘텐츠 검증, chapterId 결정에 쓰이는
+키워드 목록을 모듈 로드 시 하나의 트라이 정규식(다중 패턴 오토마톤)으로 컴파일합니다.
+텍스트를 한 번만 훑어 모든 범주의 적중 키워드를 돌려주고, 각 모듈은 그 결과를 사용합니다.
+"""
+import re
+import functools
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+# 범주별 키워드 (범주 안의 순서는 결과 순서로 유지됨)
+KEYWORD_CATEGORIES: Dict[str, List[str]] = {
+    # SecurityValidator - 부적절한 아동 콘텐츠
+    "security.inappropriate": [
+        "폭력", "살인", "죽음", "혈액", "전쟁", "마약", "술", "담배",
+        "성인", "섹스", "욕설", "비속어", "혐오", "차별", "괴롭히기"
+    ],
+    # ChatbotHelper.validate_generated_content - 생성 스토리 적절성
+    "content.inappropriate": ["폭력", "위험한", "무서운", "죽음", "전쟁", "혈액", "살인"],
+
+    # 스트리밍 출력 안전 검사 - 발견 즉시 생성 중단 (교육 스토리에 흔한 "위험한", "기술"의 "술" 등은 제외)
+    "output.blocked": ["폭력", "살인", "죽음", "혈액", "마약", "섹스", "욕설", "비속어", "혐오", "괴롭히기"],
+
+    # ChatbotHelper.analyze_user_intent
+    "intent.character": ["캐릭터", "인물", "이름", "성격", "주인공", "등장인물"],
+    "intent.setting": ["배경", "장소", "환경", "설정", "세계관", "왕국", "무대"],
+    "intent.event": ["이벤트", "사건", "일어나", "발생", "상황", "뉴스", "턴"],
+    "intent.dialogue": ["대화", "대사", "말", "텍스트", "설명", "문장", "표현"],
+    "scope.all": ["전체", "모든", "모두", "다"],
+    "scope.specific": ["특정", "이 부분", "여기", "이것"],
+    # story_chunker.is_global_edit - 모든 턴에 같은 변경을 적용하는 요청 (턴 단위 병렬 편집 대상)
+    "intent.global": ["모든", "전체", "모두", "전부", "처음부터 끝까지", "매 턴", "모든 턴"],
+    "difficulty": ["쉽게", "어렵게", "간단하게", "복잡하게", "기초", "고급", "초급", "상급"],
+    "difficulty.easy": ["쉽게", "간단하게", "기초", "초급"],
+    "difficulty.hard": ["어렵게", "복잡하게", "고급", "상급"],
+    "sentiment.positive": ["좋아", "재미있", "멋진", "훌륭", "완벽", "사랑", "도움", "유용", "더 좋게", "개선"],
+    "sentiment.negative": ["싫어", "지루", "별로", "아쉬", "부족", "어려워", "모르겠", "이상해"],
+
+    # ChatbotHelper.validate_user_request
+    "request.valid": [
+        # 캐릭터 관련
+        "캐릭터", "인물", "이름", "성격", "주인공", "등장인물", "대사", "말",
+        # 배경 관련
+        "배경", "장소", "환경", "설정", "세계관", "왕국", "무대",
+        # 이벤트 관련
+        "이벤트", "사건", "뉴스", "상황", "턴", "게임", "스토리", "내용",
+        # 편집 관련
+        "수정", "변경", "편집", "바꿔", "만들어", "추가", "제거", "개선",
+        # 난이도 관련
+        "쉽게", "어렵게", "재미있게", "흥미롭게", "단순하게"
+    ],
+    "request.invalid": [
+        # 기술적 질문
+        "파이썬", "코드", "프로그래밍", "개발", "알고리즘", "데이터베이스",
+        # 일반 질문
+        "날씨", "음식", "여행", "쇼핑", "영화", "음악", "스포츠",
+        # 새로운 게임 생성 (편집만 지원)
+        "새로운 게임", "게임 만들어", "처음부터", "새로 생성",
+        # 투자 조언 (교육 스토리만 편집)
+        "주식 추천", "투자 조언", "실제 투자", "돈 벌기"
+    ],
+
+    # StoryEditor.analyze_modification_request
+    "edit.character": ["캐릭터", "인물", "이름", "성격"],
+    "edit.setting": ["배경", "장소", "환경", "설정"],
+    "edit.events": ["이벤트", "사건", "뉴스", "주식"],
+    "edit.dialogue": ["대화", "대사", "말", "텍스트"],
+
+    # 특정 턴 지정 ("3턴", "3일")
+    "turn_reference": [f"{i}{unit}" for i in range(1, 11) for unit in ("턴", "일")]
+}
+
+# 시나리오 키워드 -> chapterId (앞에 있는 키워드가 우선)
+CHAPTER_ID_KEYWORDS: Dict[str, str] = {
+    "three_little_pigs": "1111",
+    "아기돼지": "1111",
+    "아기 돼지": "1111",
+    "돼지": "1111",
+    "foodtruck": "2222",
+    "푸드트럭": "2222",
+    "magic_kingdom": "3333",
+    "마법왕국": "3333",
+    "마법 왕국": "3333",
+    "moonlight_thief": "4444",
+    "달빛도둑": "4444",
+    "달빛 도둑": "4444"
+}
+KEYWORD_CATEGORIES["chapter"] = [keyword.lower() for keyword in CHAPTER_ID_KEYWORDS]
+
+# 이 길이 이하의 텍스트는 스캔 결과를 메모이즈 (같은 메시지를 여러 모듈이 검사하는 경우)
+_MEMO_MAX_LENGTH = 4096
+
+
+class KeywordScan:
+    """한 번의 스캔으로 얻은 범주별 적중 키워드"""
+
+    __slots__ = ("found", "_hits")
+
+    def __init__(self, found: FrozenSet[str], memberships: Dict[str, Tuple[Tuple[str, int], ...]]):
+        self.found = found
+        hits: Dict[str, List[Tuple[int, str]]] = {}
+        for keyword in found:
+            for category, index in memberships.get(keyword, ()):
+                hits.setdefault(category, []).append((index, keyword))
+        self._hits = {
+            category: [keyword for _, keyword in sorted(entries)]
+            for category, entries in hits.items()
+        }
+
+    def contains(self, keyword: str) -> bool:
+        """키워드가 텍스트에 포함되어 있는지 확인"""
+        return keyword in self.found
+
+    def get(self, category: str) -> List[str]:
+        """범주에서 적중한 키워드 (범주 정의 순서)"""
+        return list(self._hits.get(category, ()))
+
+    def has(self, category: str) -> bool:
+        """범주의 키워드가 하나라도 포함되어 있는지 확인"""
+        return category in self._hits
+
+    def count(self, category: str) -> int:
+        """범주에서 적중한 키워드 수"""
+        return len(self._hits.get(category, ()))
+
+    def to_dict(self) -> Dict[str, List[str]]:
+        """적중한 범주만 모은 사전"""
+        return {category: list(hits) for category, hits in self._hits.items()}
+
+
+class KeywordEngine:
+    """
+    다중 패턴 키워드 검사기
+
+    모든 키워드를 문자 트라이로 묶어 정규식 하나로 컴파일합니다. (매칭은 C 정규식 엔진이 수행)
+    겹치는 키워드도 놓치지 않도록 적중 위치 바로 다음 글자부터 다시 검색하고,
+    같은 위치에서 시작하는 더 짧은 키워드는 접두사 목록으로 함께 기록합니다.
+    결과는 대소문자를 무시한 부분 문자열 포함 여부와 같습니다.
+    """
+
+    def __init__(self, categories: Dict[str, List[str]]):
+        self.categories = {name: list(keywords) for name, keywords in categories.items()}
+        keywords = {keyword for values in self.categories.values() for keyword in values if keyword}
+        self.keywords = frozenset(keywords)
+        # 키워드 -> ((범주, 범주 안 순서), ...)
+        memberships: Dict[str, List[Tuple[str, int]]] = {}
+        for name, values in self.categories.items():
+            for index, keyword in enumerate(values):
+                if keyword:
+                    memberships.setdefault(keyword, []).append((name, index))
+        self._memberships = {keyword: tuple(entries) for keyword, entries in memberships.items()}
+        self._pattern = re.compile(self._build_trie_pattern(keywords))
+        self._prefixes: Dict[str, Tuple[str, ...]] = {
+            keyword: tuple(other for other in keywords if other != keyword and keyword.startswith(other))
+            for keyword in keywords
+        }
+        self._memo_scan = functools.lru_cache(maxsize=1024)(self._scan)
+
+    @staticmethod
+    def _build_trie_pattern(keywords: Iterable[str]) -> str:
+        """키워드 트라이를 가장 긴 일치 우선 정규식으로 변환"""
+        trie: Dict = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = True
+
+        def build(node: Dict) -> str:
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ""
+            body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+            # 여기서 끝나는 키워드가 있으면 더 긴 일치는 선택 사항
+            return f"(?:{body})?" if "" in node else body
+
+        return build(trie) or "(?!)"
+
+    def _scan(self, text: str) -> KeywordScan:
+        lowered = text.lower()
+        found = set()
+        search = self._pattern.search
+        position = 0
+        while True:
+            match = search(lowered, position)
+            if match is None:
+                break
+            keyword = match.group()
+            if keyword not in found:
+                found.add(keyword)
+                found.update(self._prefixes[keyword])
+            position = match.start() + 1
+        return KeywordScan(frozenset(found), self._memberships)
+
+    def max_keyword_length(self, category: str) -> int:
+        """범주에서 가장 긴 키워드의 길이 (청크 경계 처리용)"""
+        return max((len(keyword) for keyword in self.categories.get(category, ())), default=0)
+
+    def scan(self, text: str, memoize: bool = True) -> KeywordScan:
+        """
+        텍스트를 한 번 훑어 모든 범주의 적중 키워드를 반환합니다.
+
+        Args:
+            text: 검사할 텍스트
+            memoize: 짧은 텍스트의 결과를 캐시할지 여부 (스트리밍 청크는 False)
+
+        Returns:
+            KeywordScan: 범주별 적중 결과
+        """
+        if not text:
+            return KeywordScan(frozenset(), self._memberships)
+        if memoize and len(text) <= _MEMO_MAX_LENGTH:
+            return self._memo_scan(text)
+        return self._scan(text)
+
+
+# 전역 엔진 (모듈 로드 시 한 번 컴파일)
+keyword_engine = KeywordEngine(KEYWORD_CATEGORIES)
@@ -0,0 +1,339 @@
+"""
+메트릭 수집 모듈 - 카운터, 게이지, 지연시간 히스토그램
+
+Streamlit에 의존하지 않으므로 FastAPI 서버와 Streamlit 앱 모두에서 사용할 수 있습니다.
+수집된 값은 Prometheus 텍스트 형식으로 내보낼 수 있습니다.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(label_names: Tuple[str, ...], label_values: LabelValues, extra: str = "") -> str:
+    """Prometheus 라벨 문자열 생성"""
+    parts = []
+    for name, value in zip(label_names, label_values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{escaped}"')
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    """Prometheus 숫자 표기"""
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """라벨별 값을 보관하는 메트릭 기본 클래스"""
+
+    metric_type = "untyped"
+
+    def __init__(self, name: str, description: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def collect(self) -> List[str]:
+        raise NotImplementedError
+
+    def expose(self) -> str:
+        """Prometheus 텍스트 형식으로 변환"""
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.metric_type}"
+        ]
+        lines.extend(self.collect())
+        return "\n".join(lines)
+
+
+class _ValueMetric(_Metric):
+    """라벨별 단일 값 메트릭 (직접 기록 또는 수집 시점 콜백)"""
+
+    def __init__(self, name: str, description: str, label_names: Tuple[str, ...] = ()):
+        super().__init__(name, description, label_names)
+        self._values: Dict[LabelValues, float] = {}
+        self._functions: Dict[LabelValues, Callable[[], float]] = {}
+
+    def _add(self, amount: float, labels: Dict[str, str]):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set_function(self, func: Callable[[], float], **labels):
+        """수집 시점에 호출되어 값을 제공하는 함수를 등록합니다."""
+        with self._lock:
+            self._functions[self._key(labels)] = func
+
+    def get(self, **labels) -> float:
+        key = self._key(labels)
+        if key in self._functions:
+            return float(self._functions[key]())
+        return self._values.get(key, 0.0)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+            functions = list(self._functions.items())
+        for key, func in functions:
+            try:
+                values[key] = float(func())
+            except Exception:
+                continue
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in values.items()
+        ]
+
+
+class Counter(_ValueMetric):
+    """단조 증가 카운터"""
+
+    metric_type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        """카운터 증가"""
+        self._add(amount, labels)
+
+
+class Gauge(_ValueMetric):
+    """현재 값을 나타내는 게이지"""
+
+    metric_type = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        self._add(amount, labels)
+
+    def dec(self, amount: float = 1.0, **labels):
+        self._add(-amount, labels)
+
+
+class _HistogramSeries:
+    """라벨 조합 하나에 대한 로그-선형(HDR 방식) 버킷 카운트"""
+
+    __slots__ = ("counts", "total", "count", "max", "lock")
+
+    def __init__(self, bucket_count: int):
+        # 마지막 칸은 상한 초과 값 (+Inf)
+        self.counts = [0] * (bucket_count + 1)
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+        self.lock = threading.Lock()
+
+
+class Histogram(_Metric):
+    """
+    HDR 방식 지연시간 히스토그램
+
+    min_value부터 2배 간격(옥타브)마다 sub_buckets개의 로그 균등 버킷을 두어
+    모든 구간에서 상대 오차를 일정하게 유지합니다. 기록은 라벨 조합별 잠금만 사용합니다.
+    """
+
+    metric_type = "histogram"
+
+    def __init__(self, name: str, description: str, label_names: Tuple[str, ...] = (),
+                 min_value: float = 0.001, octaves: int = 20, sub_buckets: int = 4):
+        super().__init__(name, description, label_names)
+        self.min_value = min_value
+        self.sub_buckets = sub_buckets
+        self.bounds = [
+            min_value * 2 ** (i / sub_buckets) for i in range(octaves * sub_buckets + 1)
+        ]
+        self._log_base = math.log(2) / sub_buckets
+        self._series: Dict[LabelValues, _HistogramSeries] = {}
+
+    def _bucket_index(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        index = math.ceil(math.log(value / self.min_value) / self._log_base - 1e-9)
+        return min(index, len(self.bounds))
+
+    def _get_series(self, key: LabelValues) -> _HistogramSeries:
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(key, _HistogramSeries(len(self.bounds)))
+        return series
+
+    def observe(self, value: float, **labels):
+        """값 기록"""
+        series = self._get_series(self._key(labels))
+        index = self._bucket_index(value)
+        with series.lock:
+            series.counts[index] += 1
+            series.total += value
+            series.count += 1
+            if value > series.max:
+                series.max = value
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """버킷 상한 기준 분위수 추정값"""
+        series = self._series.get(self._key(labels))
+        if series is None or series.count == 0:
+            return None
+        with series.lock:
+            counts = list(series.counts)
+            total_count = series.count
+            max_value = series.max
+        rank = q * total_count
+        cumulative = 0
+        for index, bucket_count in enumerate(counts):
+            cumulative += bucket_count
+            if cumulative >= rank and bucket_count:
+                if index >= len(self.bounds):
+                    return max_value
+                return min(self.bounds[index], max_value)
+        return max_value
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """라벨 조합별 요약 (count, mean, p50, p90, p99, max)"""
+        result = {}
+        with self._lock:
+            keys = list(self._series.keys())
+        for key in keys:
+            labels = dict(zip(self.label_names, key))
+            series = self._series[key]
+            if not series.count:
+                continue
+            name = ",".join(key) or "all"
+            result[name] = {
+                "count": series.count,
+                "mean": round(series.total / series.count, 4),
+                "p50": self.quantile(0.5, **labels),
+                "p90": self.quantile(0.9, **labels),
+                "p99": self.quantile(0.99, **labels),
+                "max": round(series.max, 4)
+            }
+        return result
+
+    def collect(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = list(self._series.items())
+        # 내보내기는 옥타브 경계(2배 간격)만 사용해 출력 크기를 줄임
+        export_indices = list(range(0, len(self.bounds), self.sub_buckets))
+        inf_label = 'le="+Inf"'
+        for key, series in items:
+            with series.lock:
+                counts = list(series.counts)
+                total = series.total
+                count = series.count
+            cumulative = 0
+            position = 0
+            for export_index in export_indices:
+                while position <= export_index:
+                    cumulative += counts[position]
+                    position += 1
+                le = f'le="{self.bounds[export_index]:.6g}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}"
+                )
+            lines.append(
+                f"{self.name}_bucket{_format_labels(self.label_names, key, inf_label)} {count}"
+            )
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """메트릭 등록 및 Prometheus 내보내기"""
+
+    def __init__(self, prefix: str = "story_"):
+        self.prefix = prefix
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric_class, name: str, description: str, label_names=(), **kwargs):
+        full_name = self.prefix + name
+        with self._lock:
+            metric = self._metrics.get(full_name)
+            if metric is None:
+                metric = metric_class(full_name, description, tuple(label_names), **kwargs)
+                self._metrics[full_name] = metric
+            elif not isinstance(metric, metric_class):
+                raise ValueError(f"메트릭 '{full_name}'이 다른 타입으로 이미 등록되어 있습니다.")
+        return metric
+
+    def counter(self, name: str, description: str, label_names=()) -> Counter:
+        return self._register(Counter, name, description, label_names)
+
+    def gauge(self, name: str, description: str, label_names=()) -> Gauge:
+        return self._register(Gauge, name, description, label_names)
+
+    def histogram(self, name: str, description: str, label_names=(), **kwargs) -> Histogram:
+        return self._register(Histogram, name, description, label_names, **kwargs)
+
+    def render_prometheus(self) -> str:
+        """등록된 모든 메트릭을 Prometheus 텍스트 형식으로 반환합니다."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.expose() for metric in metrics) + "\n"
+
+    def get_summary(self) -> Dict[str, Dict]:
+        """히스토그램 요약 (대시보드/관리 화면용)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            metric.name: metric.snapshot()
+            for metric in metrics if isinstance(metric, Histogram)
+        }
+
+
+# 전역 레지스트리
+metrics_registry = MetricsRegistry()
+
+# 공통 메트릭
+http_request_duration = metrics_registry.histogram(
+    "http_request_duration_seconds", "HTTP 엔드포인트별 처리 시간", ("endpoint", "method", "status")
+)
+stage_duration = metrics_registry.histogram(
+    "stage_duration_seconds", "요청 처리 단계별 소요 시간", ("stage",)
+)
+operation_duration = metrics_registry.histogram(
+    "operation_duration_seconds", "PerformanceMonitor 작업별 소요 시간", ("operation",)
+)
+llm_call_duration = metrics_registry.histogram(
+    "llm_call_duration_seconds", "LLM 호출 소요 시간", ("mode",)
+)
+llm_calls_total = metrics_registry.counter(
+    "llm_calls_total", "LLM 호출 결과별 횟수", ("mode", "outcome")
+)
+task_queue_depth = metrics_registry.gauge(
+    "task_queue_depth", "실행 중이거나 대기 중인 비동기 작업 수", ("manager",)
+)
+cache_events_total = metrics_registry.counter(
+    "cache_events_total", "캐시 이벤트 누적 횟수", ("cache", "event")
+)
+cache_size = metrics_registry.gauge(
+    "cache_size", "캐시 사용량", ("cache", "unit")
+)
+
+
+@contextmanager
+def time_stage(stage: str):
+    """with 블록의 소요 시간을 단계별 히스토그램에 기록합니다."""
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_duration.observe(time.perf_counter() - start_time, stage=stage)
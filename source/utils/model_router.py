@@ -0,0 +1,291 @@
+"""
+지연시간 등급별 모델 라우팅 모듈
+
+편집 요청 분석 결과(수정 유형, 대상 턴, 전역 편집 여부), 스토리 크기, 클라이언트가 요청한
+지연시간 등급(fast / balanced / quality)으로 모델, 최대 출력 토큰, 사고(thinking) 토큰 예산을 정합니다.
+결과 검증에 실패하면 설정된 순서대로 상위 등급으로 올려 다시 호출하고,
+등급별 지연시간과 성공률을 메트릭으로 기록하여 라우팅 표를 조정할 수 있게 합니다.
+"""
+import json
+import time
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from source.utils.config import get_settings
+from source.utils.metrics import metrics_registry
+
+ROUTE_TIERS = ("fast", "balanced", "quality")
+
+route_requests_total = metrics_registry.counter(
+    "route_requests_total", "라우팅 등급별 LLM 호출 결과", ("tier", "model", "outcome")
+)
+route_latency_seconds = metrics_registry.histogram(
+    "route_latency_seconds", "라우팅 등급별 LLM 호출 소요 시간", ("tier", "model")
+)
+route_escalations_total = metrics_registry.counter(
+    "route_escalations_total", "검증 실패로 인한 등급 상향 횟수", ("from_tier", "to_tier")
+)
+
+# 결과 검증 시 확인하는 턴 필수 키
+_REQUIRED_TURN_KEYS = ("turn_number", "result", "news", "stocks")
+
+
+def get_routing_settings() -> Dict[str, Any]:
+    """
+    모델 라우팅 설정값을 반환합니다.
+
+    Returns:
+        dict: 라우팅 설정값 (등급별 모델/출력 상한/사고 예산 포함)
+        사고 예산은 지정한 경우에만, 설치된 클라이언트가 thinking_config를 지원할 때 전송합니다.
+    """
+    settings = get_settings()
+    return {
+        "enabled": settings.routing_enabled,
+        "default_tier": settings.route_default_tier,
+        # 검증 실패 시 올라가는 순서 (마지막 등급에서 중단)
+        "escalation": [tier for tier in settings.route_escalation if tier in ROUTE_TIERS],
+        # 이 크기(추정 토큰)를 넘는 스토리는 자동 선택 시 fast 등급을 쓰지 않음
+        "fast_max_story_tokens": settings.route_fast_max_story_tokens,
+        # 대상 턴이 없어도 fast 등급으로 처리할 수정 유형
+        "fast_intents": list(settings.route_fast_intents),
+        # -1 사고 예산: 모델이 사고 분량을 스스로 결정
+        "tiers": settings.route_tiers
+    }
+
+
+class ModelRoute:
+    """한 번의 LLM 호출에 적용할 모델/출력 상한/사고 예산"""
+
+    __slots__ = ("tier", "model_name", "max_output_tokens", "thinking_budget", "reason")
+
+    def __init__(self, tier: str, model_name: str, max_output_tokens: int,
+                 thinking_budget: Optional[int], reason: str = ""):
+        self.tier = tier
+        self.model_name = model_name
+        self.max_output_tokens = max_output_tokens
+        self.thinking_budget = thinking_budget
+        self.reason = reason
+
+    def to_dict(self) -> Dict[str, Any]:
+        """로그/응답용 요약"""
+        return {
+            "tier": self.tier,
+            "model": self.model_name,
+            "max_output_tokens": self.max_output_tokens,
+            "thinking_budget": self.thinking_budget,
+            "reason": self.reason
+        }
+
+
+def story_result_is_valid(result: Any, expected_turns: Optional[int] = None) -> bool:
+    """
+    편집 결과가 턴 목록 형태인지 가볍게 확인합니다. (등급 상향 여부 판단용)
+
+    Args:
+        result: LLM 결과 (JSON 문자열 또는 파싱된 목록)
+        expected_turns: 기대 턴 수 (None이면 확인하지 않음)
+    """
+    if isinstance(result, str):
+        try:
+            result = json.loads(result)
+        except json.JSONDecodeError:
+            return False
+    if not isinstance(result, list) or not result:
+        return False
+    if expected_turns and len(result) != expected_turns:
+        return False
+    return all(
+        isinstance(turn, dict) and all(key in turn for key in _REQUIRED_TURN_KEYS)
+        for turn in result
+    )
+
+
+class ModelRouter:
+    """지연시간 등급 선택, 등급 상향, 등급별 통계"""
+
+    def __init__(self):
+        # 복사본 캐시 정리는 GC 중(잠금을 잡은 상태일 수 있음)에도 호출되므로 재진입 가능 잠금 사용
+        self._lock = threading.RLock()
+        # id(원본 클라이언트) -> (원본 약한 참조, 모델명별 복사본), 원본이 사라지면 함께 제거
+        self._bound_models: Dict[int, Tuple[weakref.ref, Dict[str, Any]]] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def make_route(self, tier: str, reason: str = "") -> ModelRoute:
+        """등급 설정으로 라우트 생성 (알 수 없는 등급은 기본 등급 사용)"""
+        settings = get_routing_settings()
+        if tier not in ROUTE_TIERS:
+            tier = settings["default_tier"] if settings["default_tier"] in ROUTE_TIERS else "balanced"
+        config = settings["tiers"][tier]
+        return ModelRoute(
+            tier, config["model_name"], config["max_output_tokens"], config["thinking_budget"], reason
+        )
+
+    def select(self, analysis=None, story_tokens: int = 0,
+               requested_tier: Optional[str] = None) -> ModelRoute:
+        """
+        요청에 맞는 라우트를 선택합니다.
+
+        Args:
+            analysis (RequestAnalysis, optional): 편집 요청 분석 결과
+            story_tokens: 원본 스토리 추정 토큰 수
+            requested_tier: 클라이언트가 요청한 등급 (fast / balanced / quality)
+
+        Returns:
+            ModelRoute: 선택된 라우트
+        """
+        settings = get_routing_settings()
+        if not settings["enabled"]:
+            return self.make_route(settings["default_tier"], "disabled")
+        if requested_tier in ROUTE_TIERS:
+            return self.make_route(requested_tier, "requested")
+        if analysis is None:
+            return self.make_route(settings["default_tier"], "default")
+        if analysis.is_global:
+            return self.make_route("balanced", "global_edit")
+        if story_tokens > settings["fast_max_story_tokens"]:
+            return self.make_route("balanced", "large_story")
+        if analysis.target_turn:
+            return self.make_route("fast", "targeted_edit")
+        if analysis.intent_type in settings["fast_intents"]:
+            return self.make_route("fast", "simple_edit")
+        return self.make_route(settings["default_tier"], "default")
+
+    def escalate(self, route: ModelRoute) -> Optional[ModelRoute]:
+        """상향 순서에서 다음 등급 라우트 (더 올라갈 등급이 없으면 None)"""
+        chain: List[str] = get_routing_settings()["escalation"]
+        if route.tier not in chain:
+            return None
+        position = chain.index(route.tier)
+        if position + 1 >= len(chain):
+            return None
+        return self.make_route(chain[position + 1], f"escalated_from_{route.tier}")
+
+    def bind_model(self, llm, route: ModelRoute):
+        """
+        라우트의 모델을 사용하는 LLM 클라이언트를 반환합니다.
+        모델 이름만 바꾼 복사본을 만들어 재사용하므로 API 연결은 공유됩니다.
+        """
+        current = getattr(llm, "model", None)
+        if current is None or current == route.model_name or current.endswith(f"/{route.model_name}"):
+            return llm
+        key = id(llm)
+        with self._lock:
+            entry = self._bound_models.get(key)
+            # 같은 id라도 이전 클라이언트가 회수된 뒤 재사용된 것이면 새로 만듦
+            if entry is None or entry[0]() is not llm:
+                try:
+                    entry = (weakref.ref(llm), {})
+                except TypeError:
+                    # 약한 참조를 지원하지 않는 클라이언트는 캐시하지 않음
+                    return self._copy_model(llm, route.model_name)
+                self._bound_models[key] = entry
+                weakref.finalize(llm, self._forget_model, key, entry[0])
+            bound = entry[1].get(route.model_name)
+            if bound is None:
+                bound = self._copy_model(llm, route.model_name)
+                entry[1][route.model_name] = bound
+        return bound
+
+    @staticmethod
+    def _copy_model(llm, model_name: str):
+        copy = getattr(llm, "model_copy", None) or llm.copy
+        return copy(update={"model": model_name})
+
+    def _forget_model(self, key: int, ref: weakref.ref):
+        """원본 클라이언트가 회수되면 복사본 캐시 제거 (설정 재로드로 클라이언트가 교체된 경우)"""
+        with self._lock:
+            entry = self._bound_models.get(key)
+            if entry is not None and entry[0] is ref:
+                del self._bound_models[key]
+
+    def record(self, route: ModelRoute, outcome: str, duration: float):
+        """라우트 호출 결과 기록"""
+        route_requests_total.inc(tier=route.tier, model=route.model_name, outcome=outcome)
+        route_latency_seconds.observe(duration, tier=route.tier, model=route.model_name)
+        with self._lock:
+            stats = self._stats.setdefault(route.tier, {
+                "calls": 0, "successes": 0, "escalations": 0, "duration": 0.0
+            })
+            stats["calls"] += 1
+            stats["successes"] += 1 if outcome == "success" else 0
+            stats["duration"] += duration
+
+    def _record_escalation(self, route: ModelRoute, next_route: ModelRoute):
+        route_escalations_total.inc(from_tier=route.tier, to_tier=next_route.tier)
+        with self._lock:
+            self._stats.setdefault(route.tier, {
+                "calls": 0, "successes": 0, "escalations": 0, "duration": 0.0
+            })["escalations"] += 1
+
+    def run(self, route: ModelRoute, call: Callable[[ModelRoute], Any],
+            validate: Optional[Callable[[Any], bool]] = None) -> Tuple[Any, ModelRoute]:
+        """
+        라우트로 호출하고 검증에 실패하면 상위 등급으로 다시 호출합니다.
+
+        Args:
+            route: 시작 라우트
+            call: 라우트를 받아 결과를 반환하는 함수 (실패 시 None)
+            validate: 결과 검증 함수 (없으면 None 여부만 확인)
+
+        Returns:
+            tuple: (마지막 결과, 마지막으로 사용한 라우트)
+        """
+        while True:
+            start_time = time.perf_counter()
+            try:
+                result = call(route)
+            except Exception:
+                self.record(route, "error", time.perf_counter() - start_time)
+                raise
+            next_route = self._finish_attempt(route, result, validate, start_time)
+            if next_route is None:
+                return result, route
+            route = next_route
+
+    async def run_async(self, route: ModelRoute, call: Callable[[ModelRoute], Awaitable[Any]],
+                        validate: Optional[Callable[[Any], bool]] = None) -> Tuple[Any, ModelRoute]:
+        """run의 비동기 버전"""
+        while True:
+            start_time = time.perf_counter()
+            try:
+                result = await call(route)
+            except Exception:
+                self.record(route, "error", time.perf_counter() - start_time)
+                raise
+            next_route = self._finish_attempt(route, result, validate, start_time)
+            if next_route is None:
+                return result, route
+            route = next_route
+
+    def _finish_attempt(self, route: ModelRoute, result: Any,
+                        validate: Optional[Callable[[Any], bool]], start_time: float) -> Optional[ModelRoute]:
+        """시도 결과를 기록하고, 다시 호출할 상위 라우트를 반환 (끝이면 None)"""
+        ok = result is not None and (validate is None or validate(result))
+        self.record(route, "success" if ok else "invalid", time.perf_counter() - start_time)
+        if ok:
+            return None
+        next_route = self.escalate(route)
+        if next_route is not None:
+            print(f"결과 검증 실패, 등급 상향: {route.tier} -> {next_route.tier}")
+            self._record_escalation(route, next_route)
+        return next_route
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """등급별 호출 수, 성공률, 상향 횟수, 평균 소요 시간"""
+        with self._lock:
+            items = [(tier, dict(stats)) for tier, stats in self._stats.items()]
+        summary = {}
+        for tier, stats in items:
+            calls = stats["calls"]
+            summary[tier] = {
+                "calls": calls,
+                "success_rate": round(stats["successes"] / calls, 3) if calls else 0.0,
+                "escalations": stats["escalations"],
+                "avg_duration": round(stats["duration"] / calls, 3) if calls else 0.0
+            }
+        return summary
+
+
+# 전역 라우터
+model_router = ModelRouter()
@@ -2,38 +2,254 @@
 성능 최적화 유틸리티
 """
 import time
+import json
+import pickle
+import hashlib
+import inspect
+import sys
+import threading
 import functools
-from typing import Any, Callable
-import streamlit as st
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+from source.utils.metrics import operation_duration, cache_events_total, cache_size
 
-def cache_result(expire_after: int = 300):
-    """결과 캐싱 데코레이터"""
+
+def _canonicalize(value: Any) -> Any:
+    """
+    캐시 키 생성을 위해 값을 JSON 직렬화 가능한 안정적인 형태로 변환
+    
+    내용으로 구분할 수 없는 객체는 TypeError를 발생시킵니다. (id() 기반 키는 재사용 시 잘못 적중)
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, bytes):
+        return {"__bytes__": hashlib.sha256(value).hexdigest()}
+    if isinstance(value, (list, tuple)):
+        return [type(value).__name__] + [_canonicalize(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return ["set"] + sorted(json.dumps(_canonicalize(v), sort_keys=True) for v in value)
+    if isinstance(value, dict):
+        return {"__dict__": sorted(
+            (json.dumps(_canonicalize(k), sort_keys=True), _canonicalize(v))
+            for k, v in value.items()
+        )}
+    raise TypeError(f"캐시 키로 사용할 수 없는 인자 타입입니다: {type(value).__qualname__}")
+
+
+def make_cache_key(func: Callable, args: tuple, kwargs: dict) -> str:
+    """
+    함수와 인자 내용으로부터 안정적인 캐시 키를 생성합니다.
+    
+    Raises:
+        TypeError: 인자를 내용 기반 키로 바꿀 수 없는 경우
+    """
+    payload = json.dumps(
+        [_canonicalize(list(args)), _canonicalize(kwargs)],
+        sort_keys=True, ensure_ascii=False, separators=(',', ':')
+    )
+    digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    return f"{func.__module__}.{func.__qualname__}:{digest}"
+
+
+def estimate_size(value: Any) -> int:
+    """캐시 항목의 대략적인 바이트 크기"""
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    if isinstance(value, bytes):
+        return len(value)
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class ResultCache:
+    """프로세스 전역 결과 캐시 (LRU + TTL, 항목 수/바이트 제한, 키는 호출부에서 내용으로 생성)"""
+    
+    def __init__(self, max_entries: int = 512, max_bytes: int = 32 * 1024 * 1024,
+                 default_ttl: float = 300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """캐시 조회. (적중 여부, 값)을 반환합니다."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            
+            expires_at, size, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self._total_bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """캐시에 값을 저장하고 제한을 넘으면 오래된 항목부터 제거합니다."""
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.default_ttl)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous[1]
+            
+            self._entries[key] = (expires_at, size, value)
+            self._total_bytes += size
+            
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes
+            ):
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+                self.evictions += 1
+    
+    def clear(self):
+        """캐시 전체 삭제"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+    
+    def resize(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        """제한을 변경하고 넘치는 항목은 오래된 것부터 즉시 제거합니다. (설정 재로드용)"""
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes
+            ):
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+                self.evictions += 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """캐시 통계"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+
+# 전역 결과 캐시
+result_cache = ResultCache()
+
+for _event in ("hits", "misses", "evictions", "expirations"):
+    cache_events_total.set_function(
+        functools.partial(getattr, result_cache, _event), cache="result_cache", event=_event
+    )
+cache_size.set_function(lambda: len(result_cache._entries), cache="result_cache", unit="entries")
+cache_size.set_function(lambda: result_cache._total_bytes, cache="result_cache", unit="bytes")
+
+
+def cache_result(expire_after: int = 300, cache: Optional[ResultCache] = None):
+    """
+    결과 캐싱 데코레이터 (프로세스 전역, 모든 세션 공유, 동기/비동기 함수 모두 지원)
+    
+    인자를 내용 기반 키로 바꿀 수 없는 호출은 캐시하지 않고 그대로 실행합니다.
+    
+    Args:
+        expire_after: 캐시 유지 시간 (초)
+        cache: 사용할 캐시 인스턴스 (기본값: 전역 result_cache)
+    """
     def decorator(func: Callable) -> Callable:
+        target_cache = cache or result_cache
+        
+        def lookup(args: tuple, kwargs: dict) -> Tuple[Optional[str], bool, Any]:
+            try:
+                cache_key = make_cache_key(func, args, kwargs)
+            except TypeError:
+                return None, False, None
+            hit, cached_result = target_cache.get(cache_key)
+            return cache_key, hit, cached_result
+        
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                cache_key, hit, cached_result = lookup(args, kwargs)
+                if hit:
+                    return cached_result
+                
+                result = await func(*args, **kwargs)
+                if cache_key is not None:
+                    target_cache.set(cache_key, result, ttl=expire_after)
+                return result
+            return async_wrapper
+        
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            # 캐시 키 생성
-            cache_key = f"{func.__name__}_{hash(str(args) + str(kwargs))}"
-            
-            # Streamlit 세션 상태에서 캐시 확인
-            if cache_key in st.session_state:
-                cached_time, cached_result = st.session_state[cache_key]
-                if time.time() - cached_time < expire_after:
-                    return cached_result
+            cache_key, hit, cached_result = lookup(args, kwargs)
+            if hit:
+                return cached_result
             
             # 캐시가 없거나 만료된 경우 실행
             result = func(*args, **kwargs)
-            st.session_state[cache_key] = (time.time(), result)
-            
+            if cache_key is not None:
+                target_cache.set(cache_key, result, ttl=expire_after)
             return result
         return wrapper
     return decorator
 
+
 def optimize_large_content(content: str, max_length: int = 10000) -> str:
-    """대용량 콘텐츠 최적화"""
+    """
+    대용량 콘텐츠 최적화
+    
+    JSON 스토리(턴 배열)는 공백 없이 다시 직렬화하고, 그래도 길면 턴 경계에서 잘라
+    항상 유효한 JSON을 반환합니다. 편집용으로는 story_chunker의 분할 편집을 사용하세요.
+    """
     if len(content) <= max_length:
         return content
     
-    # 내용을 요약하거나 제한
+    try:
+        story_data = json.loads(content)
+    except (json.JSONDecodeError, TypeError):
+        story_data = None
+    
+    if isinstance(story_data, list):
+        compact = json.dumps(story_data, ensure_ascii=False, separators=(',', ':'))
+        if len(compact) <= max_length:
+            return compact
+        
+        kept = []
+        length = 2
+        for turn in story_data:
+            turn_json = json.dumps(turn, ensure_ascii=False, separators=(',', ':'))
+            if kept and length + len(turn_json) + 1 > max_length:
+                break
+            kept.append(turn_json)
+            length += len(turn_json) + 1
+        return "[" + ",".join(kept) + "]"
+    
+    # 일반 텍스트는 내용을 제한
     return content[:max_length] + f"\n\n... (총 {len(content):,}자, {max_length:,}자로 제한)"
 
 def batch_process(items: list, batch_size: int = 10):
@@ -42,29 +258,86 @@ def batch_process(items: list, batch_size: int = 10):
         yield items[i:i + batch_size]
 
 class PerformanceMonitor:
-    """성능 모니터링"""
+    """성능 모니터링 (스레드별 타이머, 소요 시간은 히스토그램에 누적)"""
     
     def __init__(self):
-        self.timings = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._active_count = 0
+        self.last_durations = {}
+    
+    @property
+    def timings(self) -> dict:
+        """현재 스레드의 진행 중 타이머 (작업명 -> 시작 시각 스택)"""
+        if not hasattr(self._local, "timings"):
+            self._local.timings = {}
+        return self._local.timings
     
     def start_timer(self, operation: str):
-        """타이머 시작"""
-        self.timings[operation] = time.time()
+        """타이머 시작 (반드시 end_timer로 종료, 가능하면 timer 사용)"""
+        self.timings.setdefault(operation, []).append(time.perf_counter())
+        with self._lock:
+            self._active_count += 1
     
     def end_timer(self, operation: str) -> float:
         """타이머 종료 및 결과 반환"""
-        if operation in self.timings:
-            duration = time.time() - self.timings[operation]
+        starts = self.timings.get(operation)
+        if not starts:
+            return 0.0
+        
+        duration = time.perf_counter() - starts.pop()
+        if not starts:
             del self.timings[operation]
-            return duration
-        return 0.0
+        with self._lock:
+            self._active_count -= 1
+        
+        self._record(operation, duration)
+        return duration
+    
+    @contextmanager
+    def timer(self, operation: str):
+        """
+        with 블록의 소요 시간 측정 (예외나 조기 반환에도 항상 종료)
+        
+        스레드별 스택을 쓰지 않으므로 같은 스레드의 비동기 작업이 겹쳐도 안전합니다.
+        블록이 끝나면 반환된 dict의 "duration"에 소요 시간(초)이 기록됩니다.
+        """
+        timing = {"duration": 0.0}
+        start_time = time.perf_counter()
+        with self._lock:
+            self._active_count += 1
+        try:
+            yield timing
+        finally:
+            timing["duration"] = time.perf_counter() - start_time
+            with self._lock:
+                self._active_count -= 1
+            self._record(operation, timing["duration"])
+    
+    def _record(self, operation: str, duration: float):
+        operation_duration.observe(duration, operation=operation)
+        self.last_durations[operation] = duration
     
     def get_performance_report(self) -> dict:
-        """성능 리포트 생성"""
+        """성능 리포트 생성 (캐시별 통계와 캐시가 차지하는 추정 바이트 포함)"""
+        # 각 캐시 모듈이 이 모듈을 가져가므로 순환 참조를 피해 호출 시점에 가져옴
+        from source.utils.request_analysis import analysis_cache
+        from source.utils.story_chunker import turn_cache
+        from source.utils.similarity_cache import similarity_cache
+        
+        caches = {
+            "result_cache": result_cache.get_stats(),
+            "analysis_cache": analysis_cache.get_stats(),
+            "turn_cache": turn_cache.get_stats(),
+            "similarity_cache": similarity_cache.get_stats()
+        }
         return {
-            "active_timers": len(self.timings),
-            "session_cache_size": len([k for k in st.session_state.keys() if k.startswith("cache_")]),
-            "memory_usage": "추정 불가"  # 더 정확한 메모리 사용량은 psutil 필요
+            "active_timers": self._active_count,
+            "operations": operation_duration.snapshot(),
+            "caches": caches,
+            "memory_usage": {
+                "cache_bytes": sum(stats.get("bytes", 0) for stats in caches.values())
+            }
         }
 
 # 전역 성능 모니터
@@ -23,7 +23,20 @@ def get_system_prompt():
 
 중요: 수정된 전체 스토리를 유효한 JSON 형식으로만 반환하세요."""
 
-def get_story_modification_prompt(original_story_data, user_request, modification_type="general"):
+MODIFICATION_INSTRUCTIONS = {
+    "character": "캐릭터의 이름, 성격, 외모, 대사 등을 수정하세요.",
+    "setting": "배경 설정, 장소, 시간, 환경 등을 수정하세요.",
+    "events": "게임 이벤트, 뉴스, 주식 변동 등을 수정하세요.",
+    "dialogue": "캐릭터의 대화나 설명 텍스트를 수정하세요.",
+    "general": "사용자 요청에 따라 관련 부분을 수정하세요."
+}
+
+def get_modification_instruction(modification_type="general"):
+    """수정 유형별 지침 문장을 반환합니다."""
+    return MODIFICATION_INSTRUCTIONS.get(modification_type, MODIFICATION_INSTRUCTIONS["general"])
+
+def get_story_modification_prompt(original_story_data, user_request, modification_type="general",
+                                  conversation_summary=""):
     """
     기존 스토리 수정을 위한 프롬프트를 반환합니다.
     
@@ -31,25 +44,19 @@ def get_story_modification_prompt(original_story_data, user_request, modificatio
         original_story_data (str): 원본 스토리 데이터 (JSON 문자열)
         user_request (str): 사용자의 수정 요청
         modification_type (str): 수정 유형 ("character", "setting", "events", "dialogue", "general")
+        conversation_summary (str): 이전 대화 요약 (ChatbotHelper.create_conversation_summary, 없으면 생략)
         
     Returns:
         str: 스토리 수정 프롬프트
     """
-    modification_instructions = {
-        "character": "캐릭터의 이름, 성격, 외모, 대사 등을 수정하세요.",
-        "setting": "배경 설정, 장소, 시간, 환경 등을 수정하세요.",
-        "events": "게임 이벤트, 뉴스, 주식 변동 등을 수정하세요.",
-        "dialogue": "캐릭터의 대화나 설명 텍스트를 수정하세요.",
-        "general": "사용자 요청에 따라 관련 부분을 수정하세요."
-    }
-    
-    instruction = modification_instructions.get(modification_type, modification_instructions["general"])
+    instruction = get_modification_instruction(modification_type)
+    context = f"\n대화 맥락:\n{conversation_summary}\n" if conversation_summary else ""
     
     return f"""
 다음은 수정할 기존 스토리 데이터입니다:
 
 {original_story_data}
-
+{context}
 사용자 요청: {user_request}
 
 수정 지침: {instruction}
@@ -0,0 +1,139 @@
+"""
+편집 요청 분석 모듈 - 입력당 한 번만 분석
+
+요청 범위 검증, 보안 검사, 입력 정화, 수정 유형/대상 턴 분석을 한 번에 수행하여
+RequestAnalysis 객체로 묶고, 정규화된 입력 기준으로 LRU 캐시에 보관합니다.
+채팅 UI, GameCustomizer, FastAPI 경로가 같은 결과를 재사용합니다.
+"""
+import re
+import functools
+from typing import Any, Dict
+
+from source.utils.keyword_engine import keyword_engine
+from source.utils.security import security_validator
+from source.utils.chatbot_helper import ChatbotHelper
+from source.utils.config import get_settings, add_settings_listener
+from source.utils.performance import ResultCache
+from source.utils.metrics import cache_events_total, cache_size
+from source.utils.story_chunker import is_global_edit
+from source.components.story_editor import StoryEditor
+
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# 분석에만 사용 (상태를 변경하는 메서드는 호출하지 않음)
+_chatbot_helper = ChatbotHelper()
+_story_editor = StoryEditor()
+
+
+class RequestAnalysis:
+    """편집 요청 하나에 대한 분석 결과 (읽기 전용으로 공유됨)"""
+
+    __slots__ = (
+        "text", "sanitized", "is_valid", "issue_type", "confidence", "guide_message",
+        "suggested_actions", "is_safe", "security_issues", "severity",
+        "intent_type", "target_turn", "is_global", "keywords"
+    )
+
+    def __init__(self, text: str):
+        self.text = text
+        scan = keyword_engine.scan(text)
+
+        # 요청 범위 검증
+        scope = _chatbot_helper.validate_user_request(text, scan)
+        self.is_valid = scope["is_valid"]
+        self.issue_type = scope["issue_type"]
+        self.confidence = scope["confidence"]
+        self.guide_message = scope["guide_message"]
+        self.suggested_actions = tuple(scope["suggested_actions"])
+
+        # 보안 검사 (정화 전 원문 기준)
+        security = security_validator.validate_content_security(text, scan)
+        self.is_safe = security["is_safe"]
+        self.security_issues = tuple(security["issues"])
+        self.severity = security["severity"]
+
+        # 입력 정화 후 수정 유형/대상 턴 분석
+        self.sanitized = security_validator.sanitize_input(text)
+        sanitized_scan = scan if self.sanitized == text else keyword_engine.scan(self.sanitized)
+        modification = _story_editor.analyze_modification_request(self.sanitized, sanitized_scan)
+        self.intent_type = modification["type"]
+        self.target_turn = modification["target_turn"]
+        self.is_global = is_global_edit(self.sanitized, sanitized_scan)
+        self.keywords = sanitized_scan.to_dict()
+
+    def scope_result(self) -> Dict[str, Any]:
+        """ChatbotHelper.validate_user_request와 같은 형식의 결과"""
+        return {
+            "is_valid": self.is_valid,
+            "confidence": self.confidence,
+            "issue_type": self.issue_type,
+            "guide_message": self.guide_message,
+            "suggested_actions": list(self.suggested_actions)
+        }
+
+    def security_result(self) -> Dict[str, Any]:
+        """SecurityValidator.validate_content_security와 같은 형식의 결과"""
+        return {
+            "is_safe": self.is_safe,
+            "issues": list(self.security_issues),
+            "severity": self.severity
+        }
+
+    def modification_analysis(self) -> Dict[str, Any]:
+        """StoryEditor.analyze_modification_request와 같은 형식의 결과"""
+        return {
+            'type': self.intent_type,
+            'target_turn': self.target_turn,
+            'target_elements': [],
+            'original_request': self.sanitized
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """로그/디버깅용 요약"""
+        return {
+            "is_valid": self.is_valid,
+            "issue_type": self.issue_type,
+            "is_safe": self.is_safe,
+            "security_issues": list(self.security_issues),
+            "intent_type": self.intent_type,
+            "target_turn": self.target_turn,
+            "is_global": self.is_global,
+            "keywords": self.keywords
+        }
+
+
+def normalize_request_input(text: str) -> str:
+    """캐시 키용 정규화 (앞뒤 공백 제거, 연속 공백 통일)"""
+    return _WHITESPACE_PATTERN.sub(' ', text or '').strip()
+
+
+# 요청 분석 결과 캐시 (프로세스 전역)
+analysis_cache = ResultCache(
+    max_entries=get_settings().analysis_cache_max_entries, max_bytes=8 * 1024 * 1024, default_ttl=1800
+)
+add_settings_listener(lambda previous, settings: analysis_cache.resize(settings.analysis_cache_max_entries))
+
+for _event in ("hits", "misses", "evictions", "expirations"):
+    cache_events_total.set_function(
+        functools.partial(getattr, analysis_cache, _event), cache="request_analysis", event=_event
+    )
+cache_size.set_function(lambda: len(analysis_cache._entries), cache="request_analysis", unit="entries")
+
+
+def analyze_request(text: str) -> RequestAnalysis:
+    """
+    편집 요청을 분석합니다. 같은 (정규화된) 입력은 캐시된 결과를 반환합니다.
+
+    Args:
+        text: 사용자 편집 요청
+
+    Returns:
+        RequestAnalysis: 분석 결과
+    """
+    normalized = normalize_request_input(text)
+    hit, analysis = analysis_cache.get(normalized)
+    if hit:
+        return analysis
+    analysis = RequestAnalysis(normalized)
+    analysis_cache.set(normalized, analysis)
+    return analysis
@@ -0,0 +1,122 @@
+"""
+프로세스 전역 공유 리소스 관리 모듈
+
+Streamlit 세션마다 LLM 클라이언트와 헬퍼를 새로 만들지 않도록
+프로세스 단위로 한 번만 생성되는 리소스를 보관합니다.
+세션별 상태(채팅 기록, 작업 결과 등)는 각 세션에 그대로 남겨둡니다.
+비동기 작업과 블로킹 작업용 스레드 풀은 프로세스 전역 백그라운드 루프가 관리합니다. (async_handler)
+"""
+import os
+import threading
+import time
+import logging
+from typing import Any, Dict
+import streamlit as st
+
+from source.components.story_editor import StoryEditor
+from source.utils.chatbot_helper import ChatbotHelper
+from source.utils.config import get_concurrency_settings, add_settings_listener, llm_settings_changed
+from source.utils.metrics import task_queue_depth
+from source.utils.async_handler import background_loop
+
+logger = logging.getLogger(__name__)
+
+
+class SharedResources:
+    """프로세스 전역 공유 리소스 (LLM 클라이언트, 헬퍼)"""
+    
+    def __init__(self, max_workers: int = 8):
+        self._llm_lock = threading.Lock()
+        self._llm = None
+        self.max_workers = max_workers
+        self.story_editor = StoryEditor()
+        self.chatbot_helper = ChatbotHelper()
+        self.created_at = time.time()
+        task_queue_depth.set_function(
+            lambda: background_loop.get_stats()["executor_queue_size"], manager="streamlit"
+        )
+    
+    @property
+    def llm_initialized(self) -> bool:
+        """LLM 클라이언트 초기화 여부"""
+        return self._llm is not None
+    
+    def get_llm(self):
+        """
+        공유 LLM 클라이언트를 반환합니다. 최초 호출 시에만 초기화합니다.
+        
+        Returns:
+            ChatGoogleGenerativeAI: 공유 LLM 모델
+        """
+        if self._llm is None:
+            with self._llm_lock:
+                if self._llm is None:
+                    from source.models.llm_handler import initialize_llm
+                    self._llm = initialize_llm()
+                    logger.info("공유 LLM 클라이언트 초기화 완료")
+        return self._llm
+    
+    def set_llm(self, llm):
+        """외부에서 초기화한 LLM 클라이언트를 등록합니다. (이미 있으면 유지)"""
+        with self._llm_lock:
+            if self._llm is None:
+                self._llm = llm
+        return self._llm
+    
+    def reset_llm(self):
+        """공유 LLM 클라이언트를 폐기합니다. 다음 사용 시 다시 초기화됩니다."""
+        with self._llm_lock:
+            self._llm = None
+    
+    def on_settings_reload(self, previous, settings):
+        """설정 재로드 시 모델/API 키가 바뀌었으면 다음 사용 때 LLM 클라이언트를 다시 만듭니다."""
+        if llm_settings_changed(previous, settings):
+            logger.info("모델 설정 변경 감지 - 공유 LLM 클라이언트 재생성 예정")
+            self.reset_llm()
+        if settings.max_workers != self.max_workers:
+            # 실행 중인 스레드 풀은 크기를 바꿀 수 없으므로 재시작 후 반영
+            logger.warning(f"STORY_MAX_WORKERS 변경({self.max_workers} -> {settings.max_workers})은 재시작 후 반영됩니다.")
+    
+    def get_resource_report(self) -> Dict[str, Any]:
+        """프로세스 메모리 및 스레드 사용량 리포트"""
+        loop_stats = background_loop.get_stats()
+        report = {
+            "pid": os.getpid(),
+            "thread_count": threading.active_count(),
+            "background_loop_running": loop_stats["running"],
+            "executor_max_workers": loop_stats["executor_max_workers"],
+            "executor_threads": loop_stats["executor_threads"],
+            "executor_queue_size": loop_stats["executor_queue_size"],
+            "llm_initialized": self.llm_initialized,
+            "uptime_seconds": round(time.time() - self.created_at, 1),
+            "memory_rss": None
+        }
+        
+        try:
+            import psutil
+            report["memory_rss"] = psutil.Process(os.getpid()).memory_info().rss
+        except ImportError:
+            try:
+                import resource
+                # Linux에서 ru_maxrss는 KB 단위 (최대 RSS)
+                report["memory_rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+            except Exception:
+                pass
+        
+        return report
+
+
+@st.cache_resource(show_spinner=False)
+def get_shared_resources() -> SharedResources:
+    """
+    프로세스 전역 공유 리소스를 반환합니다.
+    모든 Streamlit 세션이 같은 인스턴스를 사용합니다.
+    
+    Returns:
+        SharedResources: 공유 리소스
+    """
+    settings = get_concurrency_settings()
+    logger.info(f"공유 리소스 생성 (max_workers={settings['max_workers']})")
+    resources = SharedResources(max_workers=settings["max_workers"])
+    add_settings_listener(resources.on_settings_reload)
+    return resources
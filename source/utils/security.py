@@ -3,7 +3,9 @@
 """
 import re
 import hashlib
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from source.utils.keyword_engine import keyword_engine, KeywordScan, KEYWORD_CATEGORIES
 
 class SecurityValidator:
     """보안 검증 클래스"""
@@ -17,14 +19,16 @@ class SecurityValidator:
             r'token\s*[:=]\s*["\']?[a-zA-Z0-9]+',         # 토큰
         ]
         
-        # 부적절한 아동 콘텐츠
-        self.inappropriate_words = [
-            "폭력", "살인", "죽음", "혈액", "전쟁", "마약", "술", "담배",
-            "성인", "섹스", "욕설", "비속어", "혐오", "차별", "괴롭히기"
-        ]
+        # 민감 정보 패턴은 하나의 정규식으로 묶어 한 번만 검사
+        self._banned_regex = re.compile(
+            "|".join(f"(?:{pattern})" for pattern in self.banned_patterns), re.IGNORECASE
+        )
+        
+        # 부적절한 아동 콘텐츠 (키워드 엔진의 범주)
+        self.inappropriate_words = KEYWORD_CATEGORIES["security.inappropriate"]
     
-    def validate_content_security(self, content: str) -> Dict[str, Any]:
-        """콘텐츠 보안 검증"""
+    def validate_content_security(self, content: str, scan: Optional[KeywordScan] = None) -> Dict[str, Any]:
+        """콘텐츠 보안 검증 (scan: 같은 텍스트의 키워드 스캔 결과가 있으면 재사용)"""
         result = {
             "is_safe": True,
             "issues": [],
@@ -32,19 +36,14 @@ class SecurityValidator:
         }
         
         # API 키 등 민감 정보 검출
-        for pattern in self.banned_patterns:
-            if re.search(pattern, content, re.IGNORECASE):
-                result["is_safe"] = False
-                result["issues"].append("민감한 정보가 포함되어 있습니다")
-                result["severity"] = "high"
-                break
+        if self._banned_regex.search(content):
+            result["is_safe"] = False
+            result["issues"].append("민감한 정보가 포함되어 있습니다")
+            result["severity"] = "high"
         
         # 부적절한 아동 콘텐츠 검출
-        content_lower = content.lower()
-        found_inappropriate = []
-        for word in self.inappropriate_words:
-            if word in content_lower:
-                found_inappropriate.append(word)
+        scan = scan or keyword_engine.scan(content)
+        found_inappropriate = scan.get("security.inappropriate")
         
         if found_inappropriate:
             result["is_safe"] = False
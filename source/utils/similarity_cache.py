@@ -0,0 +1,296 @@
+"""
+유사 요청 캐시 모듈 - 문자 n-gram MinHash/LSH 기반
+
+같은 수정을 다르게 표현한 요청("주인공을 여자로", "주인공을 여성 캐릭터로 바꿔주세요")도
+이전 결과를 재사용할 수 있도록, 기준 스토리별로 정확 일치 계층과 유사도 계층을 둡니다.
+외부 서비스 없이 프로세스 안에서만 동작합니다.
+"""
+import re
+import json
+import time
+import zlib
+import random
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from source.utils.config import get_settings, add_settings_listener
+from source.utils.metrics import metrics_registry, cache_size
+from source.utils.performance import estimate_size
+
+similarity_cache_lookups_total = metrics_registry.counter(
+    "similarity_cache_lookups_total", "유사 요청 캐시 계층별 조회 결과", ("tier",)
+)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# 의미 없는 어미/부사 (정규화 시 제거)
+_STOP_SUFFIXES = (
+    "해주세요", "바꿔주세요", "변경해주세요", "수정해주세요", "만들어주세요", "해줘요", "바꿔줘요",
+    "해줘", "바꿔줘", "만들어줘", "주세요", "해요", "줘"
+)
+_STOP_WORDS = ("좀", "제발", "그냥", "한번", "부탁해요", "부탁합니다")
+# 같은 뜻의 표현을 대표 표현으로 통일 (긴 표현부터 치환)
+_SYNONYMS = (
+    ("여성 캐릭터", "여자"), ("남성 캐릭터", "남자"), ("여자 캐릭터", "여자"), ("남자 캐릭터", "남자"),
+    ("여성", "여자"), ("소녀", "여자"), ("남성", "남자"), ("소년", "남자"),
+    ("모든", "전체"), ("모두", "전체"), ("전부", "전체"),
+    ("등장인물", "인물"), ("캐릭터", "인물")
+)
+_PUNCTUATION_PATTERN = re.compile(r'[\s.,!?~…"\'()\[\]{}:;·\-]+')
+_NUMBER_PATTERN = re.compile(r'\d+')
+
+
+def get_similarity_settings() -> Dict[str, Any]:
+    """
+    유사 요청 캐시 설정값을 반환합니다.
+
+    Returns:
+        dict: 유사 요청 캐시 설정값
+    """
+    settings = get_settings()
+    return {
+        "enabled": settings.similarity_cache_enabled,
+        "threshold": settings.similarity_cache_threshold,
+        "max_entries": settings.similarity_cache_max_entries,
+        "ttl": settings.similarity_cache_ttl
+    }
+
+
+def normalize_request_text(text: str) -> str:
+    """
+    편집 요청을 비교용으로 정규화합니다.
+    (소문자화, 동의어 통일, 공백/문장부호 제거, 공손 어미와 군더더기 단어 제거)
+    """
+    normalized = text.lower()
+    for phrase, canonical in _SYNONYMS:
+        normalized = normalized.replace(phrase, canonical)
+    for word in _STOP_WORDS:
+        normalized = normalized.replace(word, " ")
+    normalized = _PUNCTUATION_PATTERN.sub(" ", normalized).strip()
+    for suffix in _STOP_SUFFIXES:
+        if normalized.endswith(suffix):
+            normalized = normalized[:-len(suffix)]
+            break
+    return normalized.replace(" ", "")
+
+
+def char_ngrams(text: str, n: int = 2) -> Set[str]:
+    """문자 n-gram 집합 (짧은 문자열은 그대로 사용)"""
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class MinHasher:
+    """고정 시드 범용 해시로 MinHash 서명을 계산합니다."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        generator = random.Random(seed)
+        self.num_perm = num_perm
+        self._coefficients = [
+            (generator.randrange(1, _MERSENNE_PRIME), generator.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, shingles: Set[str]) -> Tuple[int, ...]:
+        if not shingles:
+            return tuple([_MAX_HASH] * self.num_perm)
+        hashes = [zlib.crc32(shingle.encode('utf-8')) for shingle in shingles]
+        return tuple(
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._coefficients
+        )
+
+
+def estimate_similarity(left: Tuple[int, ...], right: Tuple[int, ...]) -> float:
+    """두 MinHash 서명의 추정 Jaccard 유사도"""
+    if not left:
+        return 0.0
+    return sum(1 for a, b in zip(left, right) if a == b) / len(left)
+
+
+class _Entry:
+    __slots__ = ("scope", "normalized", "signature", "bands", "value", "expires_at", "size")
+
+    def __init__(self, scope, normalized, signature, bands, value, expires_at, size):
+        self.scope = scope
+        self.normalized = normalized
+        self.signature = signature
+        self.bands = bands
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+
+
+class SimilarityCache:
+    """
+    기준 스토리별 2계층 요청 캐시
+
+    - exact: 정규화된 요청이 완전히 같은 경우
+    - similar: LSH 밴드가 겹치는 후보 중 추정 유사도가 임계값 이상인 경우
+
+    두 계층 모두 수정 유형, 대상 턴, 요청 속 숫자가 같아야 적중으로 봅니다.
+    ("3턴"과 "4턴", "100으로"와 "200으로"는 비슷해 보여도 다른 요청)
+    """
+
+    def __init__(self, max_entries: int = 50000, threshold: float = 0.7,
+                 default_ttl: float = 3600, num_perm: int = 64, bands: int = 16):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.default_ttl = default_ttl
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._hasher = MinHasher(num_perm)
+        self._entries: "OrderedDict[Tuple, _Entry]" = OrderedDict()
+        self._buckets: Dict[Tuple, Set[Tuple]] = {}
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+        self.tier_counts = {"exact": 0, "similar": 0, "miss": 0}
+        self.evictions = 0
+
+    @staticmethod
+    def make_scope(base_story: Any, edit_type: str, target_turn: Optional[int], request: str) -> Tuple:
+        """기준 스토리 해시 + 요청의 구조적 특징으로 비교 범위를 정합니다."""
+        if not isinstance(base_story, str):
+            base_story = json.dumps(base_story, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+        story_hash = hashlib.sha256(base_story.encode('utf-8')).hexdigest()[:32]
+        numbers = tuple(sorted(_NUMBER_PATTERN.findall(request)))
+        return story_hash, edit_type or "general", target_turn or 0, numbers
+
+    def _band_keys(self, scope: Tuple, signature: Tuple[int, ...]) -> List[Tuple]:
+        return [
+            (scope, band, signature[band * self.rows:(band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+
+    def _remove(self, key: Tuple):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._total_bytes -= entry.size
+        for band_key in entry.bands:
+            members = self._buckets.get(band_key)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._buckets[band_key]
+
+    def get(self, base_story: Any, request: str, edit_type: str = "general",
+            target_turn: Optional[int] = None) -> Tuple[Optional[str], Any]:
+        """
+        캐시 조회
+
+        Returns:
+            tuple: (적중 계층 "exact" | "similar" | None, 값)
+        """
+        scope = self.make_scope(base_story, edit_type, target_turn, request)
+        normalized = normalize_request_text(request)
+        now = time.monotonic()
+
+        with self._lock:
+            key = (scope, normalized)
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at >= now:
+                self._entries.move_to_end(key)
+                return self._hit("exact", entry.value)
+
+            signature = self._hasher.signature(char_ngrams(normalized))
+            best_key, best_score = None, 0.0
+            for band_key in self._band_keys(scope, signature):
+                for candidate_key in self._buckets.get(band_key, ()):
+                    candidate = self._entries[candidate_key]
+                    if candidate.expires_at < now:
+                        continue
+                    score = estimate_similarity(signature, candidate.signature)
+                    if score > best_score:
+                        best_key, best_score = candidate_key, score
+
+            if best_key is not None and best_score >= self.threshold:
+                self._entries.move_to_end(best_key)
+                return self._hit("similar", self._entries[best_key].value)
+
+            self.tier_counts["miss"] += 1
+        similarity_cache_lookups_total.inc(tier="miss")
+        return None, None
+
+    def _hit(self, tier: str, value: Any) -> Tuple[str, Any]:
+        # 잠금 안에서 호출됨
+        self.tier_counts[tier] += 1
+        similarity_cache_lookups_total.inc(tier=tier)
+        return tier, value
+
+    def set(self, base_story: Any, request: str, value: Any, edit_type: str = "general",
+            target_turn: Optional[int] = None, ttl: Optional[float] = None):
+        """결과 저장 (항목 수 제한을 넘으면 오래된 항목부터 제거)"""
+        scope = self.make_scope(base_story, edit_type, target_turn, request)
+        normalized = normalize_request_text(request)
+        signature = self._hasher.signature(char_ngrams(normalized))
+        band_keys = self._band_keys(scope, signature)
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.default_ttl)
+        key = (scope, normalized)
+        size = estimate_size(value)
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = _Entry(scope, normalized, signature, band_keys, value, expires_at, size)
+            self._total_bytes += size
+            for band_key in band_keys:
+                self._buckets.setdefault(band_key, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def clear(self):
+        """캐시 전체 삭제"""
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self._total_bytes = 0
+
+    def configure(self, max_entries: int, threshold: float, default_ttl: float):
+        """제한/임계값 변경 (설정 재로드용, 넘치는 항목은 즉시 제거)"""
+        with self._lock:
+            self.max_entries = max_entries
+            self.threshold = threshold
+            self.default_ttl = default_ttl
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """계층별 적중률 등 캐시 통계"""
+        with self._lock:
+            lookups = sum(self.tier_counts.values())
+            return {
+                "enabled": get_similarity_settings()["enabled"],
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "lookups": lookups,
+                "exact_hits": self.tier_counts["exact"],
+                "similar_hits": self.tier_counts["similar"],
+                "misses": self.tier_counts["miss"],
+                "exact_hit_rate": round(self.tier_counts["exact"] / lookups, 3) if lookups else 0.0,
+                "similar_hit_rate": round(self.tier_counts["similar"] / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions
+            }
+
+
+_settings = get_similarity_settings()
+
+# 전역 유사 요청 캐시
+similarity_cache = SimilarityCache(
+    max_entries=_settings["max_entries"],
+    threshold=_settings["threshold"],
+    default_ttl=_settings["ttl"]
+)
+cache_size.set_function(lambda: len(similarity_cache._entries), cache="similarity_cache", unit="entries")
+cache_size.set_function(lambda: similarity_cache._total_bytes, cache="similarity_cache", unit="bytes")
+add_settings_listener(lambda previous, settings: similarity_cache.configure(
+    settings.similarity_cache_max_entries, settings.similarity_cache_threshold, settings.similarity_cache_ttl
+))
@@ -0,0 +1,367 @@
+"""
+대용량 스토리 분할 편집 모듈
+
+긴 스토리를 턴 경계에서 토큰 예산 단위로 나누고, 각 조각에 공통 컨텍스트
+(캐릭터/상점 목록, 직전 턴의 가치)를 붙여 병렬로 편집한 뒤 순서대로 합칩니다.
+합칠 때 턴 수, 턴 번호, 상점 구성, 가치 연속성을 검사합니다.
+
+전체 스타일 변경 같은 전역 편집은 턴마다 한 번씩 병렬 호출(fan-out)하고,
+턴 내용 + 정규화된 요청 단위로 결과를 캐시하여 같은 턴을 공유하는 스토리에서 재사용합니다.
+"""
+import re
+import copy
+import json
+import hashlib
+import asyncio
+import functools
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from source.utils.config import get_settings, add_settings_listener
+from source.utils.token_budget import estimate_tokens, story_exceeds_budget
+from source.utils.performance import ResultCache
+from source.utils.keyword_engine import keyword_engine, KeywordScan
+from source.utils.metrics import cache_events_total, cache_size
+
+logger = logging.getLogger(__name__)
+
+
+def get_chunk_settings() -> Dict[str, int]:
+    """
+    분할 편집 설정값을 반환합니다.
+
+    Returns:
+        dict: 분할 편집 설정값
+    """
+    settings = get_settings()
+    return {
+        # 스토리 추정 토큰이 이 값을 넘으면 분할 편집 사용
+        "threshold_tokens": settings.chunk_threshold_tokens,
+        "max_chunk_tokens": settings.chunk_max_tokens,
+        "max_concurrent": settings.chunk_concurrency,
+        "fanout_concurrent": settings.fanout_concurrency
+    }
+
+
+def _compact(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def should_chunk(story_data: List[Dict]) -> bool:
+    """
+    스토리가 분할 편집 대상인지 확인합니다.
+    임계값을 넘거나, 예산 정책이 downgrade이고 단일 프롬프트 예산을 넘는 스토리면 분할합니다.
+    """
+    if not isinstance(story_data, list) or len(story_data) < 2:
+        return False
+    story_tokens = estimate_tokens(_compact(story_data))
+    return story_tokens > get_chunk_settings()["threshold_tokens"] or story_exceeds_budget(story_tokens)
+
+
+def split_story_into_chunks(story_data: List[Dict], max_chunk_tokens: int) -> List[Tuple[int, List[Dict]]]:
+    """
+    턴 경계에서 스토리를 나눕니다. 한 턴이 예산보다 커도 턴을 쪼개지는 않습니다.
+
+    Returns:
+        list: [(시작 인덱스, 턴 리스트), ...]
+    """
+    chunks = []
+    current: List[Dict] = []
+    current_tokens = 0
+    start_index = 0
+
+    for index, turn in enumerate(story_data):
+        turn_tokens = estimate_tokens(_compact(turn))
+        if current and current_tokens + turn_tokens > max_chunk_tokens:
+            chunks.append((start_index, current))
+            current, current_tokens, start_index = [], 0, index
+        current.append(turn)
+        current_tokens += turn_tokens
+
+    if current:
+        chunks.append((start_index, current))
+    return chunks
+
+
+def build_context_header(story_data: List[Dict], start_index: int) -> str:
+    """
+    모든 조각이 공유하는 압축 컨텍스트를 생성합니다.
+    (등장 상점/캐릭터, 전체 턴 수, 조각 직전 턴의 상점 가치)
+    """
+    characters = []
+    first_turn = story_data[0] if story_data else {}
+    for stock in first_turn.get('stocks', []):
+        characters.append(
+            f"- {stock.get('name', '')} ({stock.get('risk_level', '')}): {stock.get('description', '')}"
+        )
+
+    lines = [
+        f"전체 턴 수: {len(story_data)}",
+        "등장 상점/캐릭터:",
+        *characters
+    ]
+
+    if start_index > 0:
+        previous_turn = story_data[start_index - 1]
+        values = ", ".join(
+            f"{stock.get('name', '')}={stock.get('current_value', '')}"
+            for stock in previous_turn.get('stocks', [])
+        )
+        lines.append(f"직전 {start_index}턴 종료 시 상점 가치: {values}")
+        lines.append(f"직전 턴 상황 요약: {str(previous_turn.get('result', ''))[:200]}")
+
+    return "\n".join(lines)
+
+
+def build_chunk_prompt(context_header: str, chunk_turns: List[Dict], start_index: int,
+                       user_request: str, instruction: str) -> str:
+    """조각 하나를 편집하기 위한 프롬프트"""
+    end_turn = start_index + len(chunk_turns)
+    return f"""
+다음은 전체 스토리 중 {start_index + 1}~{end_turn}턴 부분입니다.
+
+[공통 컨텍스트]
+{context_header}
+
+[수정할 턴 데이터]
+{_compact(chunk_turns)}
+
+사용자 요청: {user_request}
+
+수정 지침: {instruction}
+
+수정 사항:
+1. 위 {len(chunk_turns)}개 턴만 수정하여 같은 개수의 턴을 반환하세요
+2. turn_number는 {start_index + 1}부터 {end_turn}까지 그대로 유지하세요
+3. 상점/캐릭터 구성과 이름 규칙은 공통 컨텍스트와 일관되게 유지하세요
+4. 첫 턴의 before_value는 직전 턴 종료 시 상점 가치와 일치해야 합니다
+5. 10세 이하 아동이 이해하기 쉬운 언어로 작성하세요
+
+수정된 턴들을 JSON 배열 형식으로만 반환하세요:
+"""
+
+
+def merge_chunks(original_story: List[Dict], edited_chunks: List[Tuple[int, List[Dict]]]) -> Tuple[List[Dict], List[str]]:
+    """
+    편집된 조각을 순서대로 합치고 연속성을 검사/보정합니다.
+    보정은 깊은 복사본에 적용하므로 입력 스토리와 조각은 바뀌지 않습니다.
+
+    Returns:
+        tuple: (합쳐진 스토리, 발견된 문제 목록)
+    """
+    issues = []
+    merged: List[Dict] = []
+
+    for start_index, turns in sorted(edited_chunks, key=lambda item: item[0]):
+        if start_index != len(merged):
+            issues.append(f"{start_index + 1}턴 조각의 위치가 맞지 않습니다.")
+        # 편집하지 않은 조각은 원본 턴 그대로이므로 보정 전에 복사
+        merged.extend(copy.deepcopy(turns))
+
+    if len(merged) != len(original_story):
+        issues.append(f"턴 수가 원본({len(original_story)})과 다릅니다: {len(merged)}")
+
+    # 턴 번호는 항상 1부터 순서대로 재부여
+    for index, turn in enumerate(merged):
+        if turn.get('turn_number') != index + 1:
+            issues.append(f"{index + 1}턴의 turn_number({turn.get('turn_number')})를 보정했습니다.")
+            turn['turn_number'] = index + 1
+
+    # 상점 구성 일관성 확인
+    if merged:
+        expected_names = {stock.get('name') for stock in merged[0].get('stocks', [])}
+        for index, turn in enumerate(merged[1:], start=2):
+            names = {stock.get('name') for stock in turn.get('stocks', [])}
+            if names != expected_names:
+                issues.append(f"{index}턴의 상점 구성이 1턴과 다릅니다.")
+
+    # 가치 연속성 보정 (before_value = 직전 턴 current_value)
+    for index in range(1, len(merged)):
+        previous_values = {
+            stock.get('name'): stock.get('current_value')
+            for stock in merged[index - 1].get('stocks', [])
+        }
+        for stock in merged[index].get('stocks', []):
+            name = stock.get('name')
+            if name in previous_values and 'before_value' in stock \
+                    and stock['before_value'] != previous_values[name]:
+                issues.append(f"{index + 1}턴 '{name}'의 before_value를 직전 턴 가치로 보정했습니다.")
+                stock['before_value'] = previous_values[name]
+
+    return merged, issues
+
+
+async def edit_story_in_chunks(llm, prompt_template, story_data: List[Dict], user_request: str,
+                               instruction: str, target_turn: Optional[int] = None,
+                               max_output_tokens: Optional[int] = None,
+                               endpoint: str = "default", chapter_id: Optional[str] = None,
+                               on_turns: Optional[Callable[[int, List[Dict]], Awaitable]] = None) -> Tuple[Optional[str], List[str]]:
+    """
+    스토리를 조각으로 나누어 병렬 편집한 뒤 합칩니다.
+    target_turn이 지정되면 해당 턴이 포함된 조각만 편집합니다.
+    on_turns가 있으면 조각이 끝날 때마다 (시작 인덱스, 턴 목록)으로 호출합니다 (완료 순서).
+
+    Returns:
+        tuple: (합쳐진 스토리 JSON 문자열 또는 None, 문제 목록)
+    """
+    from source.models.llm_handler import generate_game_data_async
+
+    settings = get_chunk_settings()
+    chunks = split_story_into_chunks(story_data, settings["max_chunk_tokens"])
+    semaphore = asyncio.Semaphore(settings["max_concurrent"])
+    logger.info(f"분할 편집 시작: {len(story_data)}턴 -> {len(chunks)}개 조각")
+
+    async def edit_chunk(start_index: int, turns: List[Dict]) -> Tuple[int, List[Dict]]:
+        start_index, edited = await _edit_chunk(start_index, turns)
+        if on_turns:
+            await on_turns(start_index, edited)
+        return start_index, edited
+
+    async def _edit_chunk(start_index: int, turns: List[Dict]) -> Tuple[int, List[Dict]]:
+        if target_turn and not (start_index < target_turn <= start_index + len(turns)):
+            return start_index, turns
+
+        prompt = build_chunk_prompt(
+            build_context_header(story_data, start_index), turns, start_index, user_request, instruction
+        )
+        chunk_output_cap = None
+        if max_output_tokens:
+            chunk_output_cap = max(1024, int(max_output_tokens * len(turns) / max(len(story_data), 1)))
+
+        async with semaphore:
+            result = await generate_game_data_async(
+                llm, prompt_template, prompt,
+                max_output_tokens=chunk_output_cap, endpoint=endpoint, chapter_id=chapter_id
+            )
+        if not result:
+            raise ValueError(f"{start_index + 1}턴부터 시작하는 조각 편집에 실패했습니다.")
+
+        edited = json.loads(result)
+        if isinstance(edited, dict):
+            edited = [edited]
+        if not isinstance(edited, list) or len(edited) != len(turns):
+            raise ValueError(
+                f"{start_index + 1}턴부터 시작하는 조각의 턴 수가 맞지 않습니다 "
+                f"(요청 {len(turns)}, 응답 {len(edited) if isinstance(edited, list) else 0})."
+            )
+        return start_index, edited
+
+    try:
+        edited_chunks = await asyncio.gather(*[edit_chunk(start, turns) for start, turns in chunks])
+    except Exception as e:
+        logger.error(f"분할 편집 실패: {e}")
+        return None, [str(e)]
+
+    merged, issues = merge_chunks(story_data, list(edited_chunks))
+    if issues:
+        logger.info(f"분할 편집 병합 보정: {issues}")
+    return _compact(merged), issues
+
+
+# 턴 단위 편집 결과 캐시 (프로세스 전역)
+turn_cache = ResultCache(
+    max_entries=get_settings().turn_cache_max_entries, max_bytes=16 * 1024 * 1024, default_ttl=3600
+)
+add_settings_listener(lambda previous, settings: turn_cache.resize(settings.turn_cache_max_entries))
+
+for _event in ("hits", "misses", "evictions", "expirations"):
+    cache_events_total.set_function(
+        functools.partial(getattr, turn_cache, _event), cache="turn_cache", event=_event
+    )
+cache_size.set_function(lambda: len(turn_cache._entries), cache="turn_cache", unit="entries")
+cache_size.set_function(lambda: turn_cache._total_bytes, cache="turn_cache", unit="bytes")
+
+def normalize_request(user_request: str) -> str:
+    """캐시 키용 요청 정규화 (공백/문장부호/대소문자 차이 제거)"""
+    normalized = re.sub(r'\s+', ' ', user_request.strip().lower())
+    return re.sub(r'[\s.!?~…]+$', '', normalized)
+
+
+def is_global_edit(user_request: str, scan: Optional[KeywordScan] = None) -> bool:
+    """스토리 전체에 같은 변경을 적용하는 요청인지 확인합니다. (scan: 이미 스캔한 결과)"""
+    scan = scan or keyword_engine.scan(user_request)
+    return scan.has("intent.global")
+
+
+def _turn_cache_key(turn: Dict, request_key: str) -> str:
+    turn_hash = hashlib.sha256(_compact(turn).encode('utf-8')).hexdigest()
+    return f"turn:{turn_hash}:{request_key}"
+
+
+def build_style_brief(story_data: List[Dict], user_request: str, index: int) -> str:
+    """모든 턴 호출이 공유하는 스타일/컨텍스트 안내"""
+    return "\n".join([
+        build_context_header(story_data, index),
+        f"모든 턴에 같은 요청이 따로 적용됩니다. 다른 턴과 말투, 호칭, 이름이 일관되도록 '{user_request}' 요청을 그대로 반영하세요.",
+        "상점 가치(before_value, current_value)와 턴 구조는 바꾸지 마세요."
+    ])
+
+
+async def edit_story_per_turn(llm, prompt_template, story_data: List[Dict], user_request: str,
+                              instruction: str, max_output_tokens: Optional[int] = None,
+                              endpoint: str = "default", chapter_id: Optional[str] = None,
+                              on_turns: Optional[Callable[[int, List[Dict]], Awaitable]] = None) -> Tuple[Optional[str], List[str], Dict[str, int]]:
+    """
+    턴마다 한 번씩 병렬로 LLM을 호출하여 전역 편집을 수행하고 순서대로 합칩니다.
+    (턴 내용, 정규화된 요청)이 같은 결과는 캐시에서 재사용합니다.
+    on_turns가 있으면 턴이 끝날 때마다 (인덱스, [턴])으로 호출합니다 (완료 순서).
+
+    Returns:
+        tuple: (합쳐진 스토리 JSON 문자열 또는 None, 문제 목록, 캐시 통계)
+    """
+    from source.models.llm_handler import generate_game_data_async
+
+    settings = get_chunk_settings()
+    semaphore = asyncio.Semaphore(settings["fanout_concurrent"])
+    request_key = hashlib.sha256(normalize_request(user_request).encode('utf-8')).hexdigest()[:32]
+    stats = {"turns": len(story_data), "cache_hits": 0, "llm_calls": 0}
+    per_turn_cap = None
+    if max_output_tokens:
+        per_turn_cap = max(1024, int(max_output_tokens / max(len(story_data), 1)))
+
+    async def edit_turn(index: int, turn: Dict) -> Tuple[int, List[Dict]]:
+        index, edited = await _edit_turn(index, turn)
+        if on_turns:
+            await on_turns(index, edited)
+        return index, edited
+
+    async def _edit_turn(index: int, turn: Dict) -> Tuple[int, List[Dict]]:
+        cache_key = _turn_cache_key(turn, request_key)
+        hit, cached_turn = turn_cache.get(cache_key)
+        if hit:
+            stats["cache_hits"] += 1
+            return index, [json.loads(cached_turn)]
+
+        prompt = build_chunk_prompt(
+            build_style_brief(story_data, user_request, index), [turn], index, user_request, instruction
+        )
+        async with semaphore:
+            stats["llm_calls"] += 1
+            result = await generate_game_data_async(
+                llm, prompt_template, prompt,
+                max_output_tokens=per_turn_cap, endpoint=endpoint, chapter_id=chapter_id
+            )
+        if not result:
+            raise ValueError(f"{index + 1}턴 편집에 실패했습니다.")
+
+        edited = json.loads(result)
+        if isinstance(edited, list):
+            if len(edited) != 1:
+                raise ValueError(f"{index + 1}턴 응답의 턴 수가 1이 아닙니다: {len(edited)}")
+            edited = edited[0]
+        if not isinstance(edited, dict):
+            raise ValueError(f"{index + 1}턴 응답 형식이 올바르지 않습니다.")
+
+        turn_cache.set(cache_key, _compact(edited))
+        return index, [edited]
+
+    logger.info(f"턴 단위 병렬 편집 시작: {len(story_data)}턴")
+    try:
+        edited_turns = await asyncio.gather(*[edit_turn(i, turn) for i, turn in enumerate(story_data)])
+    except Exception as e:
+        logger.error(f"턴 단위 병렬 편집 실패: {e}")
+        return None, [str(e)], stats
+
+    merged, issues = merge_chunks(story_data, list(edited_turns))
+    logger.info(f"턴 단위 병렬 편집 완료: {stats}")
+    return _compact(merged), issues, stats
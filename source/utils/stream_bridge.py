@@ -0,0 +1,190 @@
+"""
+스트리밍 브리지 모듈
+
+백그라운드 이벤트 루프에서 받은 토큰을 큐로 넘기고, 화면 쪽(Streamlit 스크립트 스레드)은
+큐를 기다리며(폴링 없음) 토큰을 일정 시간/개수 단위의 프레임으로 묶어 받습니다.
+닫힌 턴은 파싱된 객체로 한 번만 넘기고, 진행 중인 턴은 그 턴의 텍스트만 넘기므로
+화면 갱신 비용이 전체 누적 텍스트 길이에 비례하지 않습니다.
+"""
+import json
+import time
+import queue
+from typing import Any, Dict, Iterator, List, Optional
+
+from source.utils.config import get_settings
+from source.utils.metrics import metrics_registry
+from source.utils.stream_guard import JsonTurnScanner
+
+stream_frames_total = metrics_registry.counter(
+    "stream_frames_total", "화면으로 보낸 스트리밍 프레임 수"
+)
+stream_tokens_per_frame = metrics_registry.histogram(
+    "stream_tokens_per_frame", "프레임당 묶인 토큰 청크 수", min_value=1, octaves=8
+)
+
+# 큐 제어 항목
+_CLOSE = object()
+
+
+class _Reset:
+    __slots__ = ("notice",)
+
+    def __init__(self, notice: str):
+        self.notice = notice
+
+
+class _Turns:
+    __slots__ = ("turns",)
+
+    def __init__(self, turns: List[Any]):
+        self.turns = turns
+
+
+def get_stream_bridge_settings() -> Dict[str, Any]:
+    """
+    스트리밍 브리지 설정값을 반환합니다.
+
+    Returns:
+        dict: 스트리밍 브리지 설정값
+    """
+    settings = get_settings()
+    return {
+        # 프레임 간격(ms)과 프레임당 최대 청크 수 (먼저 도달하는 쪽에서 프레임 전송)
+        "frame_interval_ms": settings.stream_frame_interval_ms,
+        "frame_max_chunks": settings.stream_frame_max_chunks,
+        # 이 시간(초) 동안 토큰이 없으면 생성 측이 멈춘 것으로 보고 대기 중단
+        "idle_timeout": settings.stream_idle_timeout
+    }
+
+
+class StreamFrame:
+    """화면에 한 번에 반영할 스트리밍 변경분"""
+
+    __slots__ = ("new_turns", "partial", "preamble", "notice", "reset", "done", "chunks")
+
+    def __init__(self, new_turns: List[Any], partial: str, preamble: str = "", notice: str = "",
+                 reset: bool = False, done: bool = False, chunks: int = 0):
+        self.new_turns = new_turns
+        self.partial = partial
+        self.preamble = preamble
+        self.notice = notice
+        self.reset = reset
+        self.done = done
+        self.chunks = chunks
+
+
+class StreamBridge:
+    """생성 측(이벤트 루프)에서 화면 측(스크립트 스레드)으로 토큰을 넘기는 큐"""
+
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue()
+        self._scanner = JsonTurnScanner()
+        self._preamble: List[str] = []
+        self.turn_count = 0
+        self.chunk_count = 0
+        self.frame_count = 0
+        self.char_count = 0
+
+    # 생성 측 (이벤트 루프 스레드)
+    async def push(self, token: str):
+        """generate_game_data_stream의 callback으로 사용"""
+        self._queue.put_nowait(token)
+
+    async def reset(self, violation=None):
+        """검사 실패로 다시 생성할 때 (generate_game_data_stream의 on_retry로 사용)"""
+        self._queue.put_nowait(_Reset("🔄 문제가 발견되어 다시 생성합니다..."))
+
+    async def push_turns(self, start_index: int, turns: List[Any]):
+        """이미 완성된 턴을 넘김 (edit_story_in_chunks/edit_story_per_turn의 on_turns로 사용)"""
+        self._queue.put_nowait(_Turns(list(turns)))
+
+    def close(self):
+        """생성 종료 (성공/실패와 무관하게 반드시 호출)"""
+        self._queue.put_nowait(_CLOSE)
+
+    # 화면 측 (스크립트 스레드)
+    def frames(self, frame_interval_ms: Optional[int] = None,
+               frame_max_chunks: Optional[int] = None) -> Iterator[StreamFrame]:
+        """
+        토큰을 프레임 단위로 묶어 반환합니다. close()가 호출되면 마지막 프레임(done=True) 후 종료합니다.
+
+        Raises:
+            TimeoutError: idle_timeout 동안 아무 토큰도 오지 않은 경우
+        """
+        settings = get_stream_bridge_settings()
+        interval = (frame_interval_ms if frame_interval_ms is not None else settings["frame_interval_ms"]) / 1000
+        max_chunks = frame_max_chunks or settings["frame_max_chunks"]
+
+        pending: List[str] = []
+        deadline = 0.0
+        while True:
+            wait = max(deadline - time.monotonic(), 0) if pending else settings["idle_timeout"]
+            try:
+                item = self._queue.get(timeout=wait)
+            except queue.Empty:
+                if not pending:
+                    raise TimeoutError(f"{settings['idle_timeout']}초 동안 스트리밍 토큰을 받지 못했습니다.")
+                yield self._make_frame(pending)
+                pending = []
+                continue
+
+            if item is _CLOSE:
+                frame = self._make_frame(pending)
+                frame.done = True
+                yield frame
+                return
+            if isinstance(item, _Reset):
+                if pending:
+                    yield self._make_frame(pending)
+                    pending = []
+                self._scanner = JsonTurnScanner()
+                self._preamble = []
+                self.turn_count = 0
+                yield StreamFrame([], "", notice=item.notice, reset=True)
+                continue
+            if isinstance(item, _Turns):
+                if pending:
+                    yield self._make_frame(pending)
+                    pending = []
+                self.turn_count += len(item.turns)
+                self.frame_count += 1
+                stream_frames_total.inc()
+                yield StreamFrame(item.turns, "")
+                continue
+
+            if not pending:
+                deadline = time.monotonic() + interval
+            pending.append(item)
+            if len(pending) >= max_chunks or time.monotonic() >= deadline:
+                yield self._make_frame(pending)
+                pending = []
+
+    def _make_frame(self, chunks: List[str]) -> StreamFrame:
+        new_turns = []
+        for chunk in chunks:
+            self.char_count += len(chunk)
+            if not self._scanner.started:
+                self._preamble.append(chunk)
+            for turn_text in self._scanner.feed(chunk):
+                try:
+                    new_turns.append(json.loads(turn_text))
+                except json.JSONDecodeError:
+                    # 구조 검사는 검사기가 담당하므로 미리보기는 텍스트로 표시
+                    new_turns.append(turn_text)
+        self.turn_count += len(new_turns)
+        self.chunk_count += len(chunks)
+        self.frame_count += 1
+        stream_frames_total.inc()
+        if chunks:
+            stream_tokens_per_frame.observe(len(chunks))
+        preamble = "".join(self._preamble) if not self._scanner.started else ""
+        return StreamFrame(new_turns, self._scanner.partial_turn(), preamble=preamble, chunks=len(chunks))
+
+    def get_stats(self) -> Dict[str, int]:
+        """메타데이터용 통계"""
+        return {
+            "chunks": self.chunk_count,
+            "frames": self.frame_count,
+            "turns": self.turn_count,
+            "chars": self.char_count
+        }
@@ -0,0 +1,292 @@
+"""
+스트리밍 출력 검사 모듈
+
+LLM 스트리밍 응답을 청크 단위로 검사하여, 문제가 발견되면 전체 생성을 기다리지 않고
+즉시 중단합니다. 중단 사유와 재생성용 추가 지침을 StreamViolation으로 전달합니다.
+"""
+import json
+import re
+from typing import Any, Callable, Iterable, List, Optional
+
+from source.utils.config import get_settings
+from source.utils.keyword_engine import keyword_engine
+from source.utils.metrics import metrics_registry
+
+stream_aborts_total = metrics_registry.counter(
+    "stream_aborts_total", "스트리밍 생성 조기 중단 횟수", ("kind",)
+)
+
+
+def get_stream_guard_settings() -> dict:
+    """
+    스트리밍 검사 설정값을 반환합니다.
+
+    Returns:
+        dict: 스트리밍 검사 설정값
+    """
+    settings = get_settings()
+    return {
+        "enabled": settings.stream_guard_enabled,
+        # 중단 후 추가 지침을 붙여 다시 생성할 횟수
+        "max_retries": settings.stream_guard_retries,
+        # 출력 길이가 (원본 길이 x 배수 + 여유분)을 넘으면 폭주로 판단
+        "max_length_factor": settings.stream_max_length_factor,
+        "length_margin_chars": settings.stream_length_margin_chars,
+        # JSON 배열 시작('[') 전에 허용하는 글자 수 (코드 블록 표시 등)
+        "preamble_limit_chars": settings.stream_preamble_limit_chars
+    }
+
+
+class StreamViolation(Exception):
+    """스트리밍 중 검사에 실패하여 생성을 중단한 경우"""
+
+    def __init__(self, kind: str, message: str, retry_hint: str = ""):
+        self.kind = kind
+        self.retry_hint = retry_hint
+        super().__init__(message)
+
+
+class StreamGuard:
+    """스트리밍 검사기 기본 클래스"""
+
+    kind = "guard"
+
+    def feed(self, chunk: str, full_text: str):
+        """새 청크 검사 (문제가 있으면 StreamViolation 발생)"""
+
+    def finish(self, full_text: str):
+        """스트림 종료 후 최종 검사"""
+
+
+class SafetyGuard(StreamGuard):
+    """
+    아동 부적절 표현 검사기
+
+    직전 청크의 끝부분(가장 긴 키워드 길이 - 1자)을 다음 청크 앞에 붙여 검사하므로
+    청크 경계에 걸친 표현도 놓치지 않습니다. 원본 스토리에 이미 있던 표현은 허용합니다.
+    """
+
+    kind = "unsafe_content"
+
+    def __init__(self, category: str = "output.blocked", allowed: Optional[Iterable[str]] = None):
+        self.category = category
+        self.allowed = frozenset(allowed or ())
+        self._overlap = max(keyword_engine.max_keyword_length(category) - 1, 0)
+        self._tail = ""
+
+    def feed(self, chunk: str, full_text: str):
+        window = self._tail + chunk
+        hits = [
+            keyword for keyword in keyword_engine.scan(window, memoize=False).get(self.category)
+            if keyword not in self.allowed
+        ]
+        if hits:
+            raise StreamViolation(
+                self.kind,
+                f"생성 중 부적절한 표현이 감지되어 중단했습니다: {', '.join(hits)}",
+                retry_hint=f"다음 표현은 절대 사용하지 말고 아동에게 적절한 표현으로 바꾸세요: {', '.join(hits)}"
+            )
+        self._tail = window[-self._overlap:] if self._overlap else ""
+
+
+# JSON 구조 추적에 필요한 문자만 찾음 (문자열 경계, 이스케이프, 괄호)
+_STRUCTURAL_PATTERN = re.compile(r'[\\"{}\[\]]')
+
+
+class JsonTurnScanner:
+    """
+    스트리밍 JSON 배열에서 최상위 턴 객체가 닫히는 시점을 찾는 증분 스캐너
+
+    청크의 구조 문자만 따라가며, 진행 중인 턴의 텍스트 조각만 보관합니다.
+    전체 출력을 다시 훑거나 이어 붙이지 않으므로 청크당 비용은 청크 길이에 비례합니다.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.closed = False
+        self._depth = 0
+        self._in_string = False
+        self._offset = 0
+        self._skip_until = 0
+        self._turn_parts: Optional[List[str]] = None
+
+    def feed(self, chunk: str) -> List[str]:
+        """새 청크를 처리하고 이번 청크에서 닫힌 턴 객체 텍스트 목록을 반환합니다."""
+        completed: List[str] = []
+        offset = self._offset
+        self._offset += len(chunk)
+        if self.closed:
+            return completed
+
+        collect_from = 0
+        for match in _STRUCTURAL_PATTERN.finditer(chunk):
+            index = offset + match.start()
+            if index < self._skip_until:
+                continue
+            char = match.group()
+
+            if self._in_string:
+                if char == "\\":
+                    self._skip_until = index + 2
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if not self.started:
+                if char == "[":
+                    self.started = True
+                    self._depth = 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 1 and char == "{":
+                    self._turn_parts = []
+                    collect_from = match.start()
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 1 and char == "}" and self._turn_parts is not None:
+                    self._turn_parts.append(chunk[collect_from:match.start() + 1])
+                    completed.append("".join(self._turn_parts))
+                    self._turn_parts = None
+                elif self._depth == 0:
+                    self.closed = True
+                    return completed
+
+        if self._turn_parts is not None:
+            self._turn_parts.append(chunk[collect_from:])
+        return completed
+
+    def partial_turn(self) -> str:
+        """아직 닫히지 않은 턴의 텍스트 (진행 중인 턴이 없으면 빈 문자열)"""
+        return "".join(self._turn_parts) if self._turn_parts else ""
+
+
+class StructureGuard(StreamGuard):
+    """
+    스토리 JSON 구조 검사기
+
+    JsonTurnScanner로 최상위 배열의 턴 객체가 닫힐 때마다 파싱하여
+    필수 키, turn_number 증가, 턴 수 초과를 검사하고, 출력 길이 폭주를 감지합니다.
+    """
+
+    kind = "malformed_structure"
+    REQUIRED_KEYS = ("turn_number", "result", "news", "news_tag", "stocks")
+
+    def __init__(self, expected_turns: Optional[int] = None, max_chars: Optional[int] = None,
+                 first_turn: int = 1, preamble_limit: int = 200):
+        self.expected_turns = expected_turns
+        self.max_chars = max_chars
+        self.next_turn = first_turn
+        self.preamble_limit = preamble_limit
+        self.turns = 0
+        self._scanner = JsonTurnScanner()
+
+    def feed(self, chunk: str, full_text: str):
+        if self.max_chars and len(full_text) > self.max_chars:
+            raise StreamViolation(
+                "runaway_output",
+                f"출력이 예상 크기({self.max_chars:,}자)를 크게 넘어 중단했습니다.",
+                "원본과 같은 턴 수와 비슷한 분량으로 간결하게 작성하세요."
+            )
+        if self._scanner.closed:
+            return
+
+        for turn_text in self._scanner.feed(chunk):
+            self._check_turn(turn_text)
+
+        if not self._scanner.started and len(full_text) > self.preamble_limit:
+            raise StreamViolation(
+                "not_json",
+                "응답이 JSON 배열로 시작하지 않아 중단했습니다.",
+                "설명 없이 JSON 배열만 반환하세요."
+            )
+
+    def _check_turn(self, turn_text: str):
+        try:
+            turn = json.loads(turn_text)
+        except json.JSONDecodeError:
+            raise StreamViolation(
+                "malformed_turn",
+                f"{self.turns + 1}번째 턴이 올바른 JSON이 아닙니다.",
+                "각 턴을 올바른 JSON 객체로 작성하세요."
+            )
+
+        missing = [key for key in self.REQUIRED_KEYS if key not in turn]
+        if missing:
+            raise StreamViolation(
+                "missing_keys",
+                f"{self.turns + 1}번째 턴에 필수 키가 없습니다: {', '.join(missing)}",
+                f"모든 턴에 {', '.join(self.REQUIRED_KEYS)} 키를 포함하세요."
+            )
+
+        turn_number = turn.get("turn_number")
+        if turn_number != self.next_turn:
+            raise StreamViolation(
+                "turn_order",
+                f"turn_number가 순서에 맞지 않습니다: {turn_number} (기대값 {self.next_turn})",
+                "turn_number는 원본과 같이 1씩 증가하도록 유지하세요."
+            )
+
+        self.turns += 1
+        self.next_turn += 1
+        if self.expected_turns and self.turns > self.expected_turns:
+            raise StreamViolation(
+                "turn_count",
+                f"턴 수가 원본({self.expected_turns})보다 많아 중단했습니다.",
+                f"정확히 {self.expected_turns}개 턴만 반환하세요."
+            )
+
+    def finish(self, full_text: str):
+        if not self._scanner.started:
+            raise StreamViolation(
+                "not_json", "응답에서 JSON 배열을 찾을 수 없습니다.", "설명 없이 JSON 배열만 반환하세요."
+            )
+        if not self._scanner.closed:
+            raise StreamViolation(
+                "truncated", "응답이 중간에 끊겼습니다.", "원본과 비슷한 분량으로 간결하게 작성하세요."
+            )
+        if self.expected_turns and self.turns != self.expected_turns:
+            raise StreamViolation(
+                "turn_count",
+                f"턴 수가 원본과 다릅니다: {self.turns} (기대값 {self.expected_turns})",
+                f"정확히 {self.expected_turns}개 턴만 반환하세요."
+            )
+
+
+def make_guard_factory(original_story: Any = None, expected_turns: Optional[int] = None,
+                       first_turn: int = 1) -> Optional[Callable[[], List[StreamGuard]]]:
+    """
+    재시도마다 새 검사기 목록을 만드는 함수를 반환합니다. (비활성화 시 None)
+
+    Args:
+        original_story: 편집 대상 원본 스토리 (허용 표현, 턴 수, 예상 길이 계산용)
+        expected_turns: 기대 턴 수 (기본값: 원본 스토리의 턴 수)
+        first_turn: 첫 턴의 turn_number (일부 턴만 편집하는 경우)
+    """
+    settings = get_stream_guard_settings()
+    if not settings["enabled"]:
+        return None
+
+    allowed: List[str] = []
+    max_chars = None
+    if original_story is not None:
+        story_text = original_story if isinstance(original_story, str) \
+            else json.dumps(original_story, ensure_ascii=False, indent=2)
+        allowed = keyword_engine.scan(story_text, memoize=False).get("output.blocked")
+        max_chars = int(len(story_text) * settings["max_length_factor"]) + settings["length_margin_chars"]
+        if expected_turns is None and isinstance(original_story, list):
+            expected_turns = len(original_story)
+
+    def factory() -> List[StreamGuard]:
+        guards: List[StreamGuard] = [SafetyGuard(allowed=allowed)]
+        if original_story is not None:
+            guards.append(StructureGuard(
+                expected_turns=expected_turns, max_chars=max_chars,
+                first_turn=first_turn, preamble_limit=settings["preamble_limit_chars"]
+            ))
+        return guards
+
+    return factory
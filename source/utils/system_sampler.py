@@ -0,0 +1,220 @@
+"""
+백그라운드 시스템 샘플러 모듈
+
+일정 간격으로 CPU, 메모리(RSS), 열린 파일 디스크립터, 스레드 수, 이벤트 루프 지연,
+작업 수를 측정하여 고정 크기 링 버퍼에 보관합니다.
+/performance 같은 조회 경로는 측정을 기다리지 않고 버퍼의 값만 읽습니다.
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from source.utils.config import get_settings, add_settings_listener
+from source.utils.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+event_loop_lag_seconds = metrics_registry.gauge(
+    "event_loop_lag_seconds", "샘플러가 측정한 이벤트 루프 지연"
+)
+system_cpu_percent = metrics_registry.gauge(
+    "system_cpu_percent", "시스템/프로세스 CPU 사용률", ("scope",)
+)
+process_resident_memory_bytes = metrics_registry.gauge(
+    "process_resident_memory_bytes", "프로세스 RSS"
+)
+
+# 평균/최댓값을 계산하는 수치 필드
+NUMERIC_FIELDS = (
+    "cpu_percent", "process_cpu_percent", "memory_percent", "rss_bytes",
+    "open_fds", "thread_count", "loop_lag_ms", "asyncio_tasks", "active_tasks"
+)
+
+
+def get_sampler_settings() -> Dict[str, Any]:
+    """
+    시스템 샘플러 설정값을 반환합니다.
+
+    Returns:
+        dict: 시스템 샘플러 설정값
+    """
+    settings = get_settings()
+    return {
+        "interval": settings.sampler_interval,
+        # 링 버퍼 크기 (기본값: 1초 간격 10분)
+        "history_size": settings.sampler_history
+    }
+
+
+def _read_rss_bytes() -> Optional[int]:
+    """psutil이 없을 때 /proc에서 RSS 읽기"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _count_open_fds() -> Optional[int]:
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+
+class SystemSampler:
+    """이벤트 루프에서 동작하는 주기적 시스템 측정기"""
+
+    def __init__(self, interval: float = 1.0, history_size: int = 600):
+        self.interval = interval
+        self.samples: deque = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._task_count_fn: Optional[Callable[[], int]] = None
+        self._process = psutil.Process(os.getpid()) if psutil else None
+        self._last_cpu_times: Optional[tuple] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, task_count_fn: Optional[Callable[[], int]] = None):
+        """현재 이벤트 루프에서 샘플링 시작 (이미 실행 중이면 무시)"""
+        if self.running:
+            return
+        self._task_count_fn = task_count_fn
+        if psutil:
+            # 첫 호출은 기준점만 기록 (이후 호출은 직전 호출 이후 사용률을 즉시 반환)
+            psutil.cpu_percent(interval=None)
+            self._process.cpu_percent(interval=None)
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="system-sampler")
+        event_loop_lag_seconds.set_function(lambda: (self.latest() or {}).get("loop_lag_ms", 0) / 1000)
+        system_cpu_percent.set_function(lambda: (self.latest() or {}).get("cpu_percent") or 0, scope="system")
+        system_cpu_percent.set_function(
+            lambda: (self.latest() or {}).get("process_cpu_percent") or 0, scope="process"
+        )
+        process_resident_memory_bytes.set_function(lambda: (self.latest() or {}).get("rss_bytes") or 0)
+        logger.info(f"시스템 샘플러 시작 (간격 {self.interval}초, 최대 {self.samples.maxlen}개)")
+
+    async def stop(self):
+        """샘플링 중지"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            # 예정 시각보다 늦게 깨어난 만큼이 이벤트 루프 지연
+            lag = max(loop.time() - expected, 0.0)
+            try:
+                self.record(self.collect(lag))
+            except Exception as e:
+                logger.warning(f"시스템 샘플 수집 실패: {e}")
+
+    def collect(self, loop_lag: float = 0.0) -> Dict[str, Any]:
+        """샘플 하나를 측정합니다. (모든 호출이 즉시 반환)"""
+        sample: Dict[str, Any] = {
+            "timestamp": time.time(),
+            "loop_lag_ms": round(loop_lag * 1000, 2),
+            "thread_count": threading.active_count(),
+            "asyncio_tasks": len(asyncio.all_tasks()),
+            "active_tasks": self._task_count_fn() if self._task_count_fn else 0
+        }
+        if self._process is not None:
+            memory = psutil.virtual_memory()
+            process_memory = self._process.memory_info()
+            sample.update({
+                "cpu_percent": psutil.cpu_percent(interval=None),
+                "process_cpu_percent": self._process.cpu_percent(interval=None),
+                "memory_total": memory.total,
+                "memory_available": memory.available,
+                "memory_percent": memory.percent,
+                "rss_bytes": process_memory.rss,
+                "vms_bytes": process_memory.vms,
+                "open_fds": self._process.num_fds() if hasattr(self._process, "num_fds") else None
+            })
+        else:
+            # psutil 없이 측정 가능한 값만 (프로세스 CPU는 직전 샘플 대비 CPU 시간 비율)
+            now = (time.monotonic(), time.process_time())
+            process_cpu = None
+            if self._last_cpu_times:
+                wall = now[0] - self._last_cpu_times[0]
+                process_cpu = round((now[1] - self._last_cpu_times[1]) / wall * 100, 1) if wall > 0 else None
+            self._last_cpu_times = now
+            sample.update({
+                "cpu_percent": None,
+                "process_cpu_percent": process_cpu,
+                "memory_percent": None,
+                "rss_bytes": _read_rss_bytes(),
+                "open_fds": _count_open_fds()
+            })
+        return sample
+
+    def configure(self, interval: float, history_size: int):
+        """간격/버퍼 크기 변경 (설정 재로드용, 다음 측정부터 적용, 최근 샘플은 유지)"""
+        with self._lock:
+            self.interval = interval
+            if history_size != self.samples.maxlen:
+                self.samples = deque(self.samples, maxlen=history_size)
+
+    def record(self, sample: Dict[str, Any]):
+        with self._lock:
+            self.samples.append(sample)
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        """가장 최근 샘플"""
+        with self._lock:
+            return dict(self.samples[-1]) if self.samples else None
+
+    def series(self, points: int = 60, fields=("cpu_percent", "rss_bytes", "loop_lag_ms")) -> Dict[str, List]:
+        """최근 points개 샘플의 필드별 시계열"""
+        with self._lock:
+            recent = list(self.samples)[-points:] if points > 0 else []
+        result = {"timestamp": [round(sample["timestamp"], 3) for sample in recent]}
+        for field in fields:
+            result[field] = [sample.get(field) for sample in recent]
+        return result
+
+    def aggregate(self, window_seconds: float) -> Dict[str, Dict[str, float]]:
+        """최근 window_seconds 동안의 필드별 평균/최댓값"""
+        cutoff = time.time() - window_seconds
+        with self._lock:
+            recent = [sample for sample in self.samples if sample["timestamp"] >= cutoff]
+        result: Dict[str, Any] = {"samples": len(recent)}
+        for field in NUMERIC_FIELDS:
+            values = [sample[field] for sample in recent if sample.get(field) is not None]
+            if values:
+                result[field] = {
+                    "mean": round(sum(values) / len(values), 2),
+                    "max": max(values)
+                }
+        return result
+
+
+_settings = get_sampler_settings()
+
+# 전역 샘플러 (API 서버 시작 시 start 호출)
+system_sampler = SystemSampler(interval=_settings["interval"], history_size=_settings["history_size"])
+add_settings_listener(lambda previous, settings: system_sampler.configure(
+    settings.sampler_interval, settings.sampler_history
+))
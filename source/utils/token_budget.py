@@ -0,0 +1,253 @@
+"""
+토큰 사용량/비용 집계 및 프롬프트 예산 관리 모듈
+
+LLM 응답 메타데이터에서 입력/출력/사고(thinking) 토큰 수를 읽어 집계하고,
+메타데이터가 없으면 로컬 추정치를 사용합니다.
+Gemini 호출 전에 프롬프트 크기를 추정하여 예산을 넘는 요청을 거부하거나 축소합니다.
+"""
+import re
+import json
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from source.utils.config import get_settings
+from source.utils.metrics import metrics_registry
+
+_HANGUL_CJK_PATTERN = re.compile(r'[\u1100-\u11ff\u3040-\u30ff\u3130-\u318f\u4e00-\u9fff\uac00-\ud7af]')
+
+llm_tokens_total = metrics_registry.counter(
+    "llm_tokens_total", "LLM 토큰 사용량", ("endpoint", "chapter_id", "kind")
+)
+llm_cost_usd_total = metrics_registry.counter(
+    "llm_cost_usd_total", "LLM 추정 비용 (USD)", ("endpoint", "chapter_id")
+)
+llm_output_tokens_per_second = metrics_registry.histogram(
+    "llm_output_tokens_per_second", "LLM 호출별 출력 토큰 처리 속도", ("endpoint",), min_value=1.0
+)
+prompt_budget_decisions_total = metrics_registry.counter(
+    "prompt_budget_decisions_total", "프롬프트 예산 검사 결과", ("action",)
+)
+
+# 스토리 외 프롬프트(수정 지침, 사용자 요청, 대화 요약)에 남겨두는 여유 토큰
+PROMPT_OVERHEAD_TOKENS = 1024
+
+
+class PromptBudgetExceeded(ValueError):
+    """프롬프트가 허용된 토큰 예산을 초과한 경우"""
+
+    def __init__(self, estimated_tokens: int, budget: int):
+        self.estimated_tokens = estimated_tokens
+        self.budget = budget
+        super().__init__(
+            f"요청이 너무 큽니다. 예상 프롬프트 토큰 {estimated_tokens:,}개가 허용량 {budget:,}개를 초과합니다."
+        )
+
+
+def get_budget_settings() -> Dict[str, Any]:
+    """
+    토큰 예산 및 단가 설정값을 반환합니다.
+
+    Returns:
+        dict: 예산/단가 설정값
+    """
+    settings = get_settings()
+    return {
+        "prompt_token_budget": settings.prompt_token_budget,
+        "policy": settings.prompt_budget_policy,  # reject | downgrade
+        "output_token_ratio": settings.output_token_ratio,
+        "output_token_margin": settings.output_token_margin,
+        "input_price_per_million": settings.input_price_per_million,
+        "output_price_per_million": settings.output_price_per_million,
+        "thinking_price_per_million": settings.thinking_price_per_million
+    }
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    토크나이저 없이 토큰 수를 빠르게 추정합니다.
+    한글/한자는 약 1.5자당 1토큰, 그 외 문자는 공백을 포함해 약 4자당 1토큰으로 계산합니다.
+    (들여쓰기 공백도 실제로 토큰을 차지하므로 압축 직렬화하면 추정치도 줄어듦)
+    """
+    if not text:
+        return 0
+    cjk_count = len(_HANGUL_CJK_PATTERN.findall(text))
+    other_count = len(text) - cjk_count
+    return int(cjk_count / 1.5 + other_count / 4) + 1
+
+
+def extract_usage(response: Any, prompt: str = "", content: str = "") -> Dict[str, Any]:
+    """
+    LLM 응답에서 토큰 사용량을 추출합니다. 메타데이터가 없으면 추정치를 사용합니다.
+
+    Returns:
+        dict: input_tokens, output_tokens, thinking_tokens, estimated
+    """
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage:
+        details = usage.get("output_token_details") or {}
+        thinking_tokens = details.get("reasoning", 0) or 0
+        return {
+            "input_tokens": usage.get("input_tokens", 0) or 0,
+            "output_tokens": max((usage.get("output_tokens", 0) or 0) - thinking_tokens, 0),
+            "thinking_tokens": thinking_tokens,
+            "estimated": False
+        }
+
+    metadata = (getattr(response, "response_metadata", None) or {}).get("usage_metadata") or {}
+    if metadata:
+        return {
+            "input_tokens": metadata.get("prompt_token_count", 0) or 0,
+            "output_tokens": metadata.get("candidates_token_count", 0) or 0,
+            "thinking_tokens": metadata.get("thoughts_token_count", 0) or 0,
+            "estimated": False
+        }
+
+    return {
+        "input_tokens": estimate_tokens(prompt),
+        "output_tokens": estimate_tokens(content),
+        "thinking_tokens": 0,
+        "estimated": True
+    }
+
+
+class TokenAccountant:
+    """엔드포인트/chapterId별 토큰 사용량 및 비용 집계"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    def record(self, usage: Dict[str, Any], duration: float, endpoint: str = "default",
+               chapter_id: Optional[str] = None) -> float:
+        """
+        호출 한 건의 사용량을 기록하고 추정 비용(USD)을 반환합니다.
+        """
+        settings = get_budget_settings()
+        chapter = chapter_id or "unknown"
+        cost = (
+            usage["input_tokens"] * settings["input_price_per_million"]
+            + usage["output_tokens"] * settings["output_price_per_million"]
+            + usage["thinking_tokens"] * settings["thinking_price_per_million"]
+        ) / 1_000_000
+
+        for kind in ("input", "output", "thinking"):
+            llm_tokens_total.inc(usage[f"{kind}_tokens"], endpoint=endpoint, chapter_id=chapter, kind=kind)
+        llm_cost_usd_total.inc(cost, endpoint=endpoint, chapter_id=chapter)
+        generated = usage["output_tokens"] + usage["thinking_tokens"]
+        if duration > 0 and generated:
+            llm_output_tokens_per_second.observe(generated / duration, endpoint=endpoint)
+
+        with self._lock:
+            totals = self._totals.setdefault((endpoint, chapter), {
+                "calls": 0, "input_tokens": 0, "output_tokens": 0, "thinking_tokens": 0,
+                "estimated_calls": 0, "cost_usd": 0.0, "duration": 0.0
+            })
+            totals["calls"] += 1
+            totals["input_tokens"] += usage["input_tokens"]
+            totals["output_tokens"] += usage["output_tokens"]
+            totals["thinking_tokens"] += usage["thinking_tokens"]
+            totals["estimated_calls"] += 1 if usage.get("estimated") else 0
+            totals["cost_usd"] += cost
+            totals["duration"] += duration
+        return cost
+
+    def get_summary(self) -> Dict[str, Dict[str, float]]:
+        """집계 요약 ("endpoint/chapterId" 키)"""
+        with self._lock:
+            items = [(key, dict(value)) for key, value in self._totals.items()]
+        summary = {}
+        for (endpoint, chapter), totals in items:
+            generated = totals["output_tokens"] + totals["thinking_tokens"]
+            totals["tokens_per_second"] = round(generated / totals["duration"], 1) if totals["duration"] else 0.0
+            totals["cost_usd"] = round(totals["cost_usd"], 6)
+            totals["duration"] = round(totals["duration"], 3)
+            summary[f"{endpoint}/{chapter}"] = totals
+        return summary
+
+
+def story_exceeds_budget(story_tokens: int) -> bool:
+    """
+    downgrade 정책에서 스토리가 단일 프롬프트 예산에 들어가지 않아 분할 편집으로 넘겨야 하는지 확인합니다.
+    (압축 직렬화 기준 토큰 수를 넘겨야 함, reject 정책이면 항상 False)
+    """
+    settings = get_budget_settings()
+    return settings["policy"] == "downgrade" \
+        and story_tokens + PROMPT_OVERHEAD_TOKENS > settings["prompt_token_budget"]
+
+
+def check_prompt_budget(prompt: str, story_text: Optional[str] = None,
+                        max_output_tokens: int = 65000, record: bool = True) -> Dict[str, Any]:
+    """
+    Gemini 호출 전에 프롬프트 토큰 수를 추정하여 예산을 검사합니다.
+
+    Args:
+        prompt: 전송할 전체 프롬프트
+        story_text: 프롬프트에 포함된 스토리 (출력 상한 계산용)
+        max_output_tokens: 모델 설정의 최대 출력 토큰
+        record: 검사 결과를 prompt_budget_decisions_total에 기록할지 (재검사 시 False)
+
+    Returns:
+        dict: allowed, estimated_prompt_tokens, budget, max_output_tokens
+    """
+    settings = get_budget_settings()
+    estimated = estimate_tokens(prompt)
+    story_tokens = estimate_tokens(story_text) if story_text else estimated
+    # 편집 결과는 원본 스토리 크기 정도이므로 입력 크기에 비례한 출력 상한 적용
+    output_cap = min(
+        max_output_tokens,
+        int(story_tokens * settings["output_token_ratio"]) + settings["output_token_margin"]
+    )
+    allowed = estimated <= settings["prompt_token_budget"]
+    if record:
+        prompt_budget_decisions_total.inc(action="allow" if allowed else "over_budget")
+    return {
+        "allowed": allowed,
+        "estimated_prompt_tokens": estimated,
+        "budget": settings["prompt_token_budget"],
+        "policy": settings["policy"],
+        "max_output_tokens": output_cap
+    }
+
+
+def fit_prompt_to_budget(build_prompt: Callable[[str], str], story_text: str,
+                         story_data: Any = None, max_output_tokens: int = 65000) -> Tuple[str, Dict[str, Any]]:
+    """
+    프롬프트를 생성하고 예산을 검사합니다.
+    예산 초과 시 policy가 downgrade이면 스토리를 공백 없는 JSON으로 다시 직렬화해 재시도하고,
+    그래도 초과하거나 policy가 reject이면 PromptBudgetExceeded를 발생시킵니다.
+
+    압축 재직렬화는 들여쓰기된 문자열 입력에만 효과가 있습니다. 이미 압축된 여러 턴 스토리
+    (배열 입력, 세션, WebSocket)는 호출 전에 should_chunk(story_exceeds_budget)가 분할 편집으로
+    보내므로 여기까지 오지 않습니다.
+
+    Args:
+        build_prompt: 스토리 문자열을 받아 전체 프롬프트를 만드는 함수
+        story_text: 프롬프트에 넣을 스토리 문자열
+        story_data: 파싱된 스토리 데이터 (축소 직렬화용)
+        max_output_tokens: 모델 설정의 최대 출력 토큰
+
+    Returns:
+        tuple: (프롬프트, 예산 검사 결과)
+    """
+    prompt = build_prompt(story_text)
+    decision = check_prompt_budget(prompt, story_text, max_output_tokens)
+    decision["downgraded"] = False
+    if decision["allowed"]:
+        return prompt, decision
+
+    if decision["policy"] == "downgrade" and story_data is not None:
+        compact_story = json.dumps(story_data, ensure_ascii=False, separators=(',', ':'))
+        if compact_story != story_text:
+            prompt = build_prompt(compact_story)
+            decision = check_prompt_budget(prompt, compact_story, max_output_tokens, record=False)
+            decision["downgraded"] = True
+            if decision["allowed"]:
+                prompt_budget_decisions_total.inc(action="downgrade")
+                return prompt, decision
+
+    prompt_budget_decisions_total.inc(action="reject")
+    raise PromptBudgetExceeded(decision["estimated_prompt_tokens"], decision["budget"])
+
+
+# 전역 집계기
+token_accountant = TokenAccountant()
@@ -0,0 +1,230 @@
+"""
+요청 단위 단계 추적 모듈
+
+요청마다 request id와 단계별(span) 소요 시간을 기록하여
+Server-Timing 헤더, 구조화 로그, OTLP 호환 JSON 파일로 내보냅니다.
+"""
+import os
+import json
+import time
+import uuid
+import random
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from source.utils.config import get_settings
+from source.utils.metrics import stage_duration
+
+logger = logging.getLogger("story.trace")
+
+SERVICE_NAME = "story-edit-api"
+
+_current_trace: ContextVar[Optional["RequestTrace"]] = ContextVar("current_trace", default=None)
+# 현재 실행 흐름의 부모 단계 (asyncio.gather로 나뉜 작업마다 독립적으로 유지)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+_export_lock = threading.Lock()
+
+
+class Span:
+    """단일 처리 단계"""
+
+    __slots__ = ("span_id", "parent_id", "name", "start_ns", "end_ns", "attributes")
+
+    def __init__(self, name: str, parent_id: Optional[str] = None):
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes: Dict[str, Any] = {}
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns or time.time_ns()
+        return (end_ns - self.start_ns) / 1_000_000
+
+
+class RequestTrace:
+    """요청 하나의 추적 정보"""
+
+    def __init__(self, name: str, request_id: Optional[str] = None, sampled: Optional[bool] = None):
+        self.trace_id = uuid.uuid4().hex
+        self.request_id = request_id or self.trace_id[:16]
+        self.root = Span(name)
+        self.spans: List[Span] = []
+        self.sampled = (random.random() < get_settings().trace_sample_rate) if sampled is None else sampled
+
+    def start_span(self, name: str, parent: Optional[Span] = None) -> Span:
+        """단계 시작 (parent가 없으면 요청 루트 아래에 기록)"""
+        span = Span(name, parent_id=(parent or self.root).span_id)
+        self.spans.append(span)
+        return span
+
+    def end_span(self, span: Span):
+        span.end_ns = time.time_ns()
+        stage_duration.observe(span.duration_ms / 1000, stage=span.name)
+
+    def finish(self, **attributes):
+        self.root.end_ns = time.time_ns()
+        self.root.attributes.update(attributes)
+
+    def stage_durations(self) -> Dict[str, float]:
+        """
+        단계명별 소요 시간 (ms)
+
+        병렬로 실행된 같은 이름의 단계는 겹치는 구간을 한 번만 세므로 전체 시간을 넘지 않습니다.
+        """
+        intervals: Dict[str, List[List[int]]] = {}
+        now_ns = time.time_ns()
+        for span in self.spans:
+            intervals.setdefault(span.name, []).append([span.start_ns, span.end_ns or now_ns])
+
+        durations: Dict[str, float] = {}
+        for name, ranges in intervals.items():
+            ranges.sort()
+            total_ns = 0
+            start_ns, end_ns = ranges[0]
+            for range_start, range_end in ranges[1:]:
+                if range_start > end_ns:
+                    total_ns += end_ns - start_ns
+                    start_ns, end_ns = range_start, range_end
+                else:
+                    end_ns = max(end_ns, range_end)
+            total_ns += end_ns - start_ns
+            durations[name] = total_ns / 1_000_000
+        return durations
+
+    def server_timing_header(self) -> str:
+        """Server-Timing 헤더 값"""
+        entries = [
+            f"{name};dur={duration:.1f}" for name, duration in self.stage_durations().items()
+        ]
+        entries.append(f"total;dur={self.root.duration_ms:.1f}")
+        return ", ".join(entries)
+
+    def to_log_record(self) -> Dict[str, Any]:
+        """구조화 로그 한 줄에 담을 내용"""
+        return {
+            "request_id": self.request_id,
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "total_ms": round(self.root.duration_ms, 1),
+            "stages_ms": {name: round(value, 1) for name, value in self.stage_durations().items()},
+            **self.root.attributes
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """OTLP/JSON (ExportTraceServiceRequest) 형식으로 변환"""
+        def attributes(values: Dict[str, Any]) -> List[Dict[str, Any]]:
+            converted = []
+            for key, value in values.items():
+                if isinstance(value, bool):
+                    converted.append({"key": key, "value": {"boolValue": value}})
+                elif isinstance(value, int):
+                    converted.append({"key": key, "value": {"intValue": str(value)}})
+                elif isinstance(value, float):
+                    converted.append({"key": key, "value": {"doubleValue": value}})
+                else:
+                    converted.append({"key": key, "value": {"stringValue": str(value)}})
+            return converted
+
+        def convert(span: Span) -> Dict[str, Any]:
+            data = {
+                "traceId": self.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 2 if span is self.root else 1,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns or time.time_ns()),
+                "attributes": attributes(span.attributes)
+            }
+            if span.parent_id:
+                data["parentSpanId"] = span.parent_id
+            return data
+
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": attributes({"service.name": SERVICE_NAME})},
+                "scopeSpans": [{
+                    "scope": {"name": "source.utils.tracing"},
+                    "spans": [convert(self.root)] + [convert(span) for span in self.spans]
+                }]
+            }]
+        }
+
+
+def start_trace(name: str, request_id: Optional[str] = None) -> RequestTrace:
+    """새 요청 추적을 시작하고 현재 컨텍스트에 등록합니다."""
+    trace = RequestTrace(name, request_id=request_id)
+    _current_trace.set(trace)
+    _current_span.set(None)
+    return trace
+
+
+def get_current_trace() -> Optional[RequestTrace]:
+    """현재 컨텍스트의 요청 추적"""
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    현재 요청 추적에 단계를 기록합니다.
+    추적 중이 아니면 단계별 히스토그램에만 기록합니다.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        start_time = time.perf_counter()
+        try:
+            yield None
+        finally:
+            stage_duration.observe(time.perf_counter() - start_time, stage=name)
+        return
+
+    current = trace.start_span(name, parent=_current_span.get())
+    current.attributes.update(attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        trace.end_span(current)
+
+
+def _export_trace(trace: RequestTrace):
+    """OTLP JSON 한 줄을 파일에 추가 (블로킹 파일 I/O)"""
+    try:
+        export_path = get_settings().trace_export_path
+        export_dir = os.path.dirname(export_path)
+        if export_dir:
+            os.makedirs(export_dir, exist_ok=True)
+        line = json.dumps(trace.to_otlp(), ensure_ascii=False)
+        with _export_lock:
+            with open(export_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+    except Exception as e:
+        logger.warning(f"추적 내보내기 실패: {e}")
+
+
+def finish_trace(trace: RequestTrace, **attributes):
+    """
+    요청 추적 종료: 구조화 로그 출력 및 샘플링 시 파일로 내보내기
+    이벤트 루프에서 호출되면 파일 쓰기는 기본 실행기 스레드에서 수행합니다.
+    """
+    trace.finish(**attributes)
+    logger.info(json.dumps(trace.to_log_record(), ensure_ascii=False))
+
+    if trace.sampled:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            _export_trace(trace)
+        else:
+            loop.run_in_executor(None, _export_trace, trace)
@@ -0,0 +1,222 @@
+"""
+업스트림(Gemini) 워밍업/카나리 모듈
+
+서버 시작 시 최소 호출로 연결(TLS 핸드셰이크 포함)을 미리 열어 두고,
+워밍업이 끝나기 전에는 준비(readiness) 상태를 보고하지 않습니다.
+이후 일정 간격으로 저비용 카나리 호출을 보내 유휴 연결이 끊기지 않게 하면서
+업스트림 지연을 측정하고, 최근 결과를 /health에 보고합니다.
+카나리 지연으로 늘린 추천 타임아웃은 LLM 비동기 호출 타임아웃으로 적용됩니다. (llm_handler.set_timeout_policy)
+"""
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+from source.models.llm_handler import probe_llm, set_timeout_policy
+from source.utils.config import get_settings, add_settings_listener
+from source.utils.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+upstream_probe_duration = metrics_registry.histogram(
+    "upstream_probe_duration_seconds", "워밍업/카나리 호출 왕복 시간", ("kind",)
+)
+upstream_probes_total = metrics_registry.counter(
+    "upstream_probes_total", "워밍업/카나리 호출 결과", ("kind", "outcome")
+)
+upstream_ready = metrics_registry.gauge(
+    "upstream_ready", "업스트림 준비 상태 (1: 준비됨)"
+)
+
+
+def get_probe_settings() -> Dict[str, Any]:
+    """
+    워밍업/카나리 설정값을 반환합니다.
+
+    Returns:
+        dict: 워밍업/카나리 설정값
+    """
+    settings = get_settings()
+    return {
+        "warmup_enabled": settings.upstream_warmup_enabled,
+        "warmup_timeout": settings.upstream_warmup_timeout,
+        # 0이면 카나리 끔 (유휴 연결 유지를 위해 keep-alive 만료 시간보다 짧게 설정)
+        "canary_interval": settings.upstream_canary_interval,
+        "canary_timeout": settings.upstream_canary_timeout,
+        "history_size": settings.upstream_canary_history,
+        # 연속 실패가 이 횟수에 도달하면 준비 상태 해제
+        "unhealthy_after": settings.upstream_unhealthy_after,
+        # 추천 타임아웃이 기본 타임아웃의 몇 배까지 늘어날 수 있는지
+        "max_timeout_factor": settings.upstream_max_timeout_factor,
+        # 비우면 모델 기본값 (설치된 클라이언트가 thinking_config를 지원할 때만 전송)
+        "thinking_budget": settings.upstream_probe_thinking_budget
+    }
+
+
+def _percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class UpstreamProbe:
+    """워밍업, 주기적 카나리, 준비 상태 판단"""
+
+    def __init__(self, history_size: int = 60):
+        self.latencies: deque = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.warmed_up = False
+        # pending / done / failed / skipped
+        self.warmup_state = "pending"
+        self.warmup_latency: Optional[float] = None
+        self.consecutive_failures = 0
+        self.last_success_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        upstream_ready.set_function(lambda: 1 if self.is_ready() else 0)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def _probe(self, llm, kind: str, timeout: float) -> Optional[float]:
+        """최소 호출 1회 (실패해도 예외를 올리지 않고 None 반환)"""
+        settings = get_probe_settings()
+        try:
+            duration = await probe_llm(llm, timeout, endpoint=kind, thinking_budget=settings["thinking_budget"])
+        except Exception as e:
+            error = "timeout" if isinstance(e, asyncio.TimeoutError) else str(e)
+            upstream_probes_total.inc(kind=kind, outcome="error")
+            with self._lock:
+                self.consecutive_failures += 1
+                self.last_error = error
+            logger.warning(f"업스트림 {kind} 호출 실패 ({self.consecutive_failures}회 연속): {error}")
+            return None
+
+        upstream_probe_duration.observe(duration, kind=kind)
+        upstream_probes_total.inc(kind=kind, outcome="success")
+        with self._lock:
+            self.latencies.append((time.time(), duration))
+            self.consecutive_failures = 0
+            self.last_success_at = time.time()
+            self.last_error = None
+        if not self.warmed_up and self.warmup_state == "failed":
+            self.warmed_up = True
+            logger.info(f"워밍업 실패 후 업스트림 {kind} 호출 성공, 준비 상태로 전환")
+        return duration
+
+    async def warm_up(self, llm) -> Optional[float]:
+        """
+        업스트림 연결을 미리 엽니다. 성공할 때까지 준비 상태가 되지 않습니다.
+        실패해도 서버는 계속 시작하며, 이후 카나리가 성공하면 준비 상태가 됩니다.
+        """
+        settings = get_probe_settings()
+        if llm is None:
+            # 클라이언트가 없으면 준비 상태가 아님 (카나리도 호출할 대상이 없음)
+            self.warmup_state = "failed"
+            self.last_error = "LLM 클라이언트가 없습니다."
+            logger.error("업스트림 워밍업 실패: LLM 클라이언트가 초기화되지 않았습니다.")
+            return None
+        if not settings["warmup_enabled"]:
+            self.warmup_state = "skipped"
+            self.warmed_up = True
+            return None
+        duration = await self._probe(llm, "warmup", settings["warmup_timeout"])
+        self.warmup_latency = duration
+        if duration is None:
+            self.warmup_state = "failed"
+            logger.error(
+                f"업스트림 워밍업 실패: {self.last_error} "
+                f"(카나리 호출이 성공할 때까지 준비 상태가 아님)"
+            )
+            return None
+        self.warmup_state = "done"
+        self.warmed_up = True
+        logger.info(f"업스트림 워밍업 완료 ({duration * 1000:.0f}ms)")
+        return duration
+
+    def start(self, llm_getter: Callable[[], Any]):
+        """
+        카나리 시작 (현재 이벤트 루프, 이미 실행 중이면 무시)
+
+        Args:
+            llm_getter: 호출 시점의 LLM 클라이언트를 반환하는 함수 (설정 재로드로 교체될 수 있음)
+        """
+        if self.running or get_probe_settings()["canary_interval"] <= 0:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run(llm_getter), name="upstream-canary")
+
+    async def stop(self):
+        """카나리 중지"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self, llm_getter: Callable[[], Any]):
+        while True:
+            settings = get_probe_settings()
+            await asyncio.sleep(settings["canary_interval"])
+            llm = llm_getter()
+            if llm is not None:
+                await self._probe(llm, "canary", settings["canary_timeout"])
+
+    def configure(self, history_size: int):
+        """지연 기록 크기 변경 (설정 재로드용, 나머지 설정은 호출 시점에 읽음)"""
+        with self._lock:
+            if history_size != self.latencies.maxlen:
+                self.latencies = deque(self.latencies, maxlen=history_size)
+
+    def is_ready(self) -> bool:
+        """워밍업이 끝났고 카나리가 연속으로 실패하고 있지 않은지"""
+        return self.warmed_up and self.consecutive_failures < get_probe_settings()["unhealthy_after"]
+
+    def recommended_timeout(self, base_timeout: Optional[float]) -> Optional[float]:
+        """
+        최근 카나리 지연이 평소(최솟값)보다 느려진 만큼 늘린 LLM 타임아웃을 제안합니다.
+        (최대 max_timeout_factor배, 측정값이 없으면 기본 타임아웃)
+        """
+        if not base_timeout:
+            return base_timeout
+        with self._lock:
+            values = [duration for _, duration in self.latencies]
+        if len(values) < 2 or min(values) <= 0:
+            return base_timeout
+        factor = _percentile(values[-10:], 0.95) / min(values)
+        factor = min(max(factor, 1.0), get_probe_settings()["max_timeout_factor"])
+        return round(base_timeout * factor, 1)
+
+    def status(self, base_timeout: Optional[float] = None) -> Dict[str, Any]:
+        """/health 응답용 요약"""
+        with self._lock:
+            values = [duration for _, duration in self.latencies]
+            last = self.latencies[-1] if self.latencies else None
+            failures = self.consecutive_failures
+            last_error = self.last_error
+            last_success_at = self.last_success_at
+        return {
+            "ready": self.is_ready(),
+            "warmed_up": self.warmed_up,
+            "warmup_state": self.warmup_state,
+            "warmup_latency_ms": round(self.warmup_latency * 1000, 1) if self.warmup_latency else None,
+            "canary_running": self.running,
+            "last_latency_ms": round(last[1] * 1000, 1) if last else None,
+            "p50_latency_ms": round(_percentile(values, 0.5) * 1000, 1) if values else None,
+            "p95_latency_ms": round(_percentile(values, 0.95) * 1000, 1) if values else None,
+            "samples": len(values),
+            "consecutive_failures": failures,
+            "last_success_age_seconds": round(time.time() - last_success_at, 1) if last_success_at else None,
+            "last_error": last_error,
+            "recommended_timeout": self.recommended_timeout(base_timeout)
+        }
+
+
+# 전역 업스트림 프로브 (API 서버 시작 시 warm_up/start 호출)
+upstream_probe = UpstreamProbe(history_size=get_probe_settings()["history_size"])
+add_settings_listener(lambda previous, settings: upstream_probe.configure(settings.upstream_canary_history))
+set_timeout_policy(upstream_probe.recommended_timeout)
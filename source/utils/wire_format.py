@@ -0,0 +1,354 @@
+"""
+API 본문 전송 형식 모듈 (압축/MessagePack 협상)
+
+요청 본문은 Content-Encoding(gzip, zstd)과 Content-Type(application/msgpack)에 따라
+JSON으로 풀어서 엔드포인트에 넘기고, 응답 본문은 Accept/Accept-Encoding에 따라
+MessagePack 변환과 압축을 적용합니다. 엔드포인트는 항상 JSON만 다룹니다.
+zstd와 MessagePack은 해당 패키지(zstandard, msgpack)가 설치된 경우에만 협상합니다.
+"""
+import io
+import gzip
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from source.utils.config import get_settings
+from source.utils.metrics import metrics_registry
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+wire_body_bytes = metrics_registry.histogram(
+    "wire_body_bytes", "전송된 본문 크기 (압축/변환 후)", ("direction", "format"),
+    min_value=64, octaves=20
+)
+wire_codec_seconds = metrics_registry.histogram(
+    "wire_codec_seconds", "본문 압축 해제/변환/압축 시간", ("operation",),
+    min_value=0.00001, octaves=20
+)
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+
+class WireFormatError(Exception):
+    """요청 본문을 풀 수 없는 경우 (status_code: 응답 상태 코드)"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def get_wire_format_settings() -> Dict[str, Any]:
+    """
+    전송 형식 설정값을 반환합니다.
+
+    Returns:
+        dict: 전송 형식 설정값
+    """
+    settings = get_settings()
+    return {
+        "enabled": settings.wire_format_enabled,
+        # 이보다 작은 응답은 압축하지 않음
+        "compress_min_bytes": settings.wire_compress_min_bytes,
+        "gzip_level": settings.wire_gzip_level,
+        "zstd_level": settings.wire_zstd_level,
+        # 압축 해제 후 요청 본문 크기 상한 (압축 폭탄 방지)
+        "max_body_megabytes": settings.wire_max_body_megabytes
+    }
+
+
+def available_encodings() -> List[str]:
+    """서버가 지원하는 압축 방식 (선호 순서)"""
+    return (["zstd"] if zstandard else []) + ["gzip"]
+
+
+def _accepted_tokens(header: str) -> Dict[str, float]:
+    """Accept/Accept-Encoding 헤더의 항목별 q값"""
+    tokens = {}
+    for part in header.split(","):
+        fields = part.strip().split(";")
+        token = fields[0].strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        for field in fields[1:]:
+            name, _, value = field.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        tokens[token] = quality
+    return tokens
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """응답 압축 방식 선택 (클라이언트가 받는 것 중 q값이 가장 높은 것, 같으면 서버 선호 순서)"""
+    accepted = _accepted_tokens(accept_encoding)
+    candidates = [
+        (accepted.get(encoding, accepted.get("*", 0.0)), -order, encoding)
+        for order, encoding in enumerate(available_encodings())
+    ]
+    quality, _, encoding = max(candidates)
+    return encoding if quality > 0 else None
+
+
+def wants_msgpack(accept: str) -> bool:
+    """응답을 MessagePack으로 보낼지 (명시적으로 요청하고 JSON보다 q값이 낮지 않은 경우)"""
+    if msgpack is None or not accept:
+        return False
+    accepted = _accepted_tokens(accept)
+    quality = max(accepted.get(content_type, 0.0) for content_type in MSGPACK_TYPES)
+    return quality > 0 and quality >= accepted.get("application/json", 0.0)
+
+
+def is_msgpack(content_type: str) -> bool:
+    return content_type.split(";")[0].strip().lower() in MSGPACK_TYPES
+
+
+def decompress(body: bytes, encoding: str, max_bytes: int) -> bytes:
+    """요청 본문 압축 해제 (max_bytes를 넘으면 413)"""
+    if encoding == "zstd" and zstandard is None:
+        raise WireFormatError("zstd 압축 요청은 지원하지 않습니다. (zstandard 미설치)", 415)
+    if encoding not in ("gzip", "zstd"):
+        raise WireFormatError(f"지원하지 않는 Content-Encoding입니다: {encoding}", 415)
+    
+    start_time = time.perf_counter()
+    try:
+        # 상한까지만 풀어서 크기 확인
+        if encoding == "gzip":
+            with gzip.GzipFile(fileobj=io.BytesIO(body)) as stream:
+                data = stream.read(max_bytes + 1)
+        else:
+            with zstandard.ZstdDecompressor().stream_reader(body) as stream:
+                data = stream.read(max_bytes + 1)
+    except Exception as e:
+        raise WireFormatError(f"요청 본문 압축을 풀 수 없습니다: {e}")
+    if len(data) > max_bytes:
+        raise WireFormatError("압축을 푼 요청 본문이 너무 큽니다.", 413)
+    wire_codec_seconds.observe(time.perf_counter() - start_time, operation=f"decompress_{encoding}")
+    return data
+
+
+def compress(body: bytes, encoding: str, settings: Optional[Dict[str, Any]] = None) -> bytes:
+    """응답 본문 압축"""
+    settings = settings or get_wire_format_settings()
+    start_time = time.perf_counter()
+    if encoding == "zstd":
+        data = zstandard.ZstdCompressor(level=settings["zstd_level"]).compress(body)
+    else:
+        data = gzip.compress(body, compresslevel=settings["gzip_level"])
+    wire_codec_seconds.observe(time.perf_counter() - start_time, operation=f"compress_{encoding}")
+    return data
+
+
+def msgpack_to_json(body: bytes) -> bytes:
+    """MessagePack 요청 본문을 JSON 바이트로 변환"""
+    start_time = time.perf_counter()
+    try:
+        payload = msgpack.unpackb(body, raw=False)
+    except Exception as e:
+        raise WireFormatError(f"요청 본문이 유효한 MessagePack 형식이 아닙니다: {e}")
+    try:
+        data = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode("utf-8")
+    except (TypeError, ValueError) as e:
+        # bin 값, 문자열이 아닌 맵 키, NaN 등 JSON으로 표현할 수 없는 값
+        raise WireFormatError(f"MessagePack 요청 본문을 JSON으로 변환할 수 없습니다: {e}")
+    wire_codec_seconds.observe(time.perf_counter() - start_time, operation="msgpack_decode")
+    return data
+
+
+def json_to_msgpack(body: bytes) -> bytes:
+    """JSON 응답 본문을 MessagePack으로 변환"""
+    start_time = time.perf_counter()
+    data = msgpack.packb(json.loads(body), use_bin_type=True)
+    wire_codec_seconds.observe(time.perf_counter() - start_time, operation="msgpack_encode")
+    return data
+
+
+def _header_value(headers: List[Tuple[bytes, bytes]], name: bytes) -> str:
+    for key, value in headers:
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return ""
+
+
+def _vary_value(headers: List[Tuple[bytes, bytes]]) -> bytes:
+    """기존 Vary 값(CORS의 Origin 등)에 Accept, Accept-Encoding을 더한 값"""
+    fields = [field.strip() for field in _header_value(headers, b"vary").split(",") if field.strip()]
+    existing = {field.lower() for field in fields}
+    fields.extend(field for field in ("Accept", "Accept-Encoding") if field.lower() not in existing)
+    return ", ".join(fields).encode("latin-1")
+
+
+def _replace_headers(headers: List[Tuple[bytes, bytes]], updates: Dict[bytes, Optional[bytes]]) -> List[Tuple[bytes, bytes]]:
+    """헤더 교체 (값이 None이면 제거)"""
+    result = [(key, value) for key, value in headers if key.lower() not in updates]
+    result.extend((key, value) for key, value in updates.items() if value is not None)
+    return result
+
+
+class WireFormatMiddleware:
+    """
+    요청/응답 본문 전송 형식 협상 ASGI 미들웨어
+
+    JSON 응답만 변환/압축하며, 그 외 응답(메트릭 텍스트 등)과 WebSocket은 그대로 통과합니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        settings = get_wire_format_settings()
+        if scope["type"] != "http" or not settings["enabled"]:
+            await self.app(scope, receive, send)
+            return
+
+        headers = scope.get("headers", [])
+        content_encoding = _header_value(headers, b"content-encoding").strip().lower()
+        request_msgpack = is_msgpack(_header_value(headers, b"content-type"))
+        if request_msgpack and msgpack is None:
+            await self._send_error(send, WireFormatError("MessagePack 요청은 지원하지 않습니다. (msgpack 미설치)", 415))
+            return
+
+        if content_encoding not in ("", "identity") or request_msgpack:
+            body = await self._read_body(receive)
+            request_format = "+".join(filter(None, ["msgpack" if request_msgpack else "json",
+                                                    content_encoding if content_encoding != "identity" else ""]))
+            wire_body_bytes.observe(len(body), direction="request", format=request_format)
+            try:
+                if content_encoding not in ("", "identity"):
+                    body = decompress(body, content_encoding, int(settings["max_body_megabytes"] * 1024 * 1024))
+                if request_msgpack:
+                    body = msgpack_to_json(body)
+            except WireFormatError as e:
+                await self._send_error(send, e)
+                return
+            # 엔드포인트에는 압축하지 않은 JSON 요청으로 전달
+            scope = dict(scope)
+            scope["headers"] = _replace_headers(headers, {
+                b"content-encoding": None,
+                b"content-type": b"application/json",
+                b"content-length": str(len(body)).encode("latin-1")
+            })
+            receive = self._replay(body, receive)
+        else:
+            # 그대로 전달하는 JSON 요청도 크기를 기록 (길이를 모르는 청크 전송은 읽히는 대로 합산)
+            content_length = _header_value(headers, b"content-length").strip()
+            if content_length.isdigit():
+                wire_body_bytes.observe(int(content_length), direction="request", format="json")
+            elif _header_value(headers, b"transfer-encoding"):
+                receive = self._counting(receive)
+            else:
+                wire_body_bytes.observe(0, direction="request", format="json")
+
+        # 변환/압축하지 않는 경우에도 JSON 응답에는 Vary를 붙여야 하므로 항상 감쌈
+        response_msgpack = wants_msgpack(_header_value(headers, b"accept"))
+        response_encoding = negotiate_encoding(_header_value(headers, b"accept-encoding"))
+        await self.app(scope, receive, self._encoding_send(send, settings, response_msgpack, response_encoding))
+
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        parts = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            parts.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        return b"".join(parts)
+
+    @staticmethod
+    def _replay(body: bytes, receive):
+        delivered = False
+
+        async def replay():
+            nonlocal delivered
+            if not delivered:
+                delivered = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # 이후 호출은 연결 종료 감지용
+            return await receive()
+        return replay
+
+    @staticmethod
+    def _counting(receive):
+        size = 0
+        recorded = False
+
+        async def counting():
+            nonlocal size, recorded
+            message = await receive()
+            if not recorded and message["type"] == "http.request":
+                size += len(message.get("body", b""))
+                if not message.get("more_body"):
+                    recorded = True
+                    wire_body_bytes.observe(size, direction="request", format="json")
+            return message
+        return counting
+
+    @staticmethod
+    async def _send_error(send, error: WireFormatError):
+        body = json.dumps({"detail": str(error)}, ensure_ascii=False).encode("utf-8")
+        await send({
+            "type": "http.response.start", "status": error.status_code,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode("latin-1"))]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    def _encoding_send(send, settings: Dict[str, Any], response_msgpack: bool, response_encoding: Optional[str]):
+        start_message = None
+        parts: List[bytes] = []
+
+        async def encoding_send(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                headers = message.get("headers", [])
+                content_type = _header_value(headers, b"content-type").split(";")[0].strip().lower()
+                if content_type != "application/json" or _header_value(headers, b"content-encoding"):
+                    # JSON이 아니거나 이미 인코딩된 응답은 그대로 전달
+                    start_message = False
+                    await send(message)
+                elif not response_msgpack and response_encoding is None:
+                    # 협상 결과 그대로 보내는 JSON 응답은 모으지 않고 Vary만 추가
+                    start_message = False
+                    await send(dict(message, headers=_replace_headers(headers, {b"vary": _vary_value(headers)})))
+                else:
+                    start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is False:
+                await send(message)
+                return
+
+            # JSON 응답은 모아서 한 번에 변환 (엔드포인트 응답은 모두 크지 않은 단일 본문)
+            parts.append(message.get("body", b""))
+            if message.get("more_body"):
+                return
+            body = b"".join(parts)
+            updates: Dict[bytes, Optional[bytes]] = {}
+            response_format = "json"
+            if response_msgpack:
+                body = json_to_msgpack(body)
+                updates[b"content-type"] = MSGPACK_TYPES[0].encode("latin-1")
+                response_format = "msgpack"
+            if response_encoding and len(body) >= settings["compress_min_bytes"]:
+                body = compress(body, response_encoding, settings)
+                updates[b"content-encoding"] = response_encoding.encode("latin-1")
+                response_format += f"+{response_encoding}"
+            updates[b"content-length"] = str(len(body)).encode("latin-1")
+            # 협상 결과에 따라 본문이 달라지므로 캐시가 구분하도록 표시
+            updates[b"vary"] = _vary_value(start_message.get("headers", []))
+            wire_body_bytes.observe(len(body), direction="response", format=response_format)
+            await send(dict(start_message, headers=_replace_headers(start_message.get("headers", []), updates)))
+            await send({"type": "http.response.body", "body": body})
+
+        return encoding_send
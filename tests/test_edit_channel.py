@@ -0,0 +1,37 @@
+"""대화형 편집 채널 테스트"""
+
+import asyncio
+import json
+
+from source.utils.edit_channel import EditChannel
+
+
+def test_one_shot_result_is_sent_as_turn_messages():
+    # 분할 편집이나 캐시 적중처럼 완성된 결과를 on_token으로 한 번에 넘기는 편집 함수
+    edited = [{"turn_number": 1, "result": "첫 턴"}, {"turn_number": 2, "result": "둘째 턴 {\"괄호\"}"}]
+
+    async def edit_fn(story, story_data, chapter_id, edit_request, latency_tier, on_token, on_retry):
+        result = json.dumps(edited, ensure_ascii=False)
+        await on_token(result)
+        return result
+
+    async def run():
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        channel = EditChannel(send, edit_fn)
+        channel.start()
+        await channel.load("1111", [{"turn_number": 1}, {"turn_number": 2}])
+        await channel.submit("전체 수정")
+        while not any(message["type"] in ("result", "error") for message in messages):
+            await asyncio.sleep(0.01)
+        await channel.close()
+        return messages
+
+    messages = asyncio.run(run())
+
+    turns = [message for message in messages if message["type"] == "turn"]
+    assert [message["index"] for message in turns] == [0, 1]
+    assert [message["turn"] for message in turns] == edited
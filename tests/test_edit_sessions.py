@@ -0,0 +1,29 @@
+"""편집 세션 저장소 테스트"""
+
+import json
+import sys
+
+from source.utils.edit_sessions import EditSessionStore, estimate_story_bytes
+
+
+def make_story(turn_count):
+    story_data = [{"turn_number": index + 1, "result": "결과 " * 40} for index in range(turn_count)]
+    return json.dumps(story_data, ensure_ascii=False, separators=(",", ":")), story_data
+
+
+def test_size_counts_parsed_story_data():
+    story, story_data = make_story(10)
+
+    assert estimate_story_bytes(story, story_data) > estimate_story_bytes(story, []) + sys.getsizeof(story) // 2
+
+
+def test_store_evicts_by_story_and_story_data_size():
+    story, story_data = make_story(10)
+    size = estimate_story_bytes(story, story_data)
+    # 직렬화 문자열만 세면 두 세션이 들어가는 상한
+    store = EditSessionStore(max_bytes=size + len(story.encode("utf-8")))
+
+    first = store.create("1111", story, story_data)
+    store.create("1111", story, json.loads(story))
+
+    assert store.get(first.session_id) is None
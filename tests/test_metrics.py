@@ -0,0 +1,66 @@
+"""메트릭 히스토그램 버킷 계산 테스트"""
+
+import math
+
+from source.utils.metrics import Histogram
+
+
+def test_bucket_bounds_are_log_linear():
+    histogram = Histogram("h", "테스트", min_value=1, octaves=3, sub_buckets=4)
+
+    assert len(histogram.bounds) == 3 * 4 + 1
+    assert histogram.bounds[0] == 1
+    assert math.isclose(histogram.bounds[4], 2)
+    assert math.isclose(histogram.bounds[12], 8)
+    ratios = [upper / lower for lower, upper in zip(histogram.bounds, histogram.bounds[1:])]
+    assert all(math.isclose(ratio, 2 ** 0.25) for ratio in ratios)
+
+
+def test_bucket_index_uses_upper_bounds():
+    histogram = Histogram("h", "테스트", min_value=1, octaves=3, sub_buckets=4)
+
+    assert histogram._bucket_index(0) == 0
+    assert histogram._bucket_index(1) == 0
+    # 경계값은 그 경계를 상한으로 하는 버킷, 조금이라도 크면 다음 버킷
+    for index, bound in enumerate(histogram.bounds):
+        assert histogram._bucket_index(bound) == index
+    assert histogram._bucket_index(2.0001) == 5
+    # 마지막 경계를 넘는 값은 넘침 버킷
+    assert histogram._bucket_index(100) == len(histogram.bounds)
+
+
+def test_quantile_relative_error_is_bounded():
+    histogram = Histogram("h", "테스트", min_value=0.001, octaves=20, sub_buckets=4)
+    values = [0.003, 0.05, 0.7, 1.3, 9.0]
+    for value in values:
+        histogram.observe(value)
+
+    for q, expected in zip((0.2, 0.4, 0.6, 0.8), values):
+        estimate = histogram.quantile(q)
+        assert expected <= estimate < expected * 2 ** 0.25
+    # 가장 큰 값은 실제 최댓값으로 제한
+    assert histogram.quantile(1.0) == 9.0
+
+
+def test_overflow_value_is_reported_as_max():
+    histogram = Histogram("h", "테스트", min_value=1, octaves=2, sub_buckets=4)
+    histogram.observe(1000)
+
+    assert histogram.quantile(0.5) == 1000
+    assert histogram.snapshot()["all"]["max"] == 1000
+
+
+def test_exported_buckets_are_cumulative_at_octave_bounds():
+    histogram = Histogram("h", "테스트", ("stage",), min_value=1, octaves=2, sub_buckets=4)
+    for value in (1, 1.5, 3, 100):
+        histogram.observe(value, stage="edit")
+
+    lines = histogram.collect()
+
+    assert lines[:4] == [
+        'h_bucket{stage="edit",le="1"} 1',
+        'h_bucket{stage="edit",le="2"} 2',
+        'h_bucket{stage="edit",le="4"} 3',
+        'h_bucket{stage="edit",le="+Inf"} 4',
+    ]
+    assert lines[4:] == ['h_sum{stage="edit"} 105.5', 'h_count{stage="edit"} 4']
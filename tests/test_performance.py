@@ -0,0 +1,75 @@
+"""결과 캐시 데코레이터 테스트"""
+
+import asyncio
+
+import pytest
+
+from source.utils.performance import ResultCache, cache_result, make_cache_key
+
+
+def test_cache_key_is_content_based():
+    def func():
+        pass
+
+    assert make_cache_key(func, ([1, 2], {"a": 1}), {}) == make_cache_key(func, ([1, 2], {"a": 1}), {})
+    assert make_cache_key(func, ([1, 2],), {}) != make_cache_key(func, ((1, 2),), {})
+
+
+def test_cache_key_rejects_unknown_objects():
+    with pytest.raises(TypeError):
+        make_cache_key(test_cache_key_rejects_unknown_objects, (object(),), {})
+
+
+def test_sync_function_is_cached():
+    cache = ResultCache()
+    calls = []
+
+    @cache_result(60, cache=cache)
+    def double(value):
+        calls.append(value)
+        return value * 2
+
+    assert double(3) == 6
+    assert double(3) == 6
+    assert calls == [3]
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_uncacheable_arguments_are_not_cached():
+    cache = ResultCache()
+    calls = []
+
+    @cache_result(60, cache=cache)
+    def identity(value):
+        calls.append(value)
+        return value
+
+    marker = object()
+    identity(marker)
+    identity(marker)
+    assert len(calls) == 2
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_async_function_is_cached():
+    cache = ResultCache()
+    calls = []
+
+    @cache_result(60, cache=cache)
+    async def fetch(key):
+        calls.append(key)
+        return {"key": key}
+
+    assert asyncio.run(fetch("a")) == {"key": "a"}
+    assert asyncio.run(fetch("a")) == {"key": "a"}
+    assert calls == ["a"]
+
+
+def test_cache_evicts_by_entry_count():
+    cache = ResultCache(max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+
+    assert cache.get("a") == (False, None)
+    assert cache.get("c") == (True, "c")
+    assert cache.get_stats()["evictions"] == 1
@@ -0,0 +1,23 @@
+"""스토리 수정 프롬프트 생성 테스트"""
+
+from source.utils.prompts import get_story_modification_prompt
+
+
+STORY = '{"title": "테스트 스토리"}'
+
+
+def test_conversation_summary_included_in_prompt():
+    summary = "이전 요청: 주인공 이름을 민수로 변경"
+    prompt = get_story_modification_prompt(STORY, "배경을 겨울로 바꿔줘", "setting", summary)
+
+    assert "대화 맥락:" in prompt
+    assert summary in prompt
+    # 요약은 스토리 데이터 뒤, 사용자 요청 앞에 위치
+    assert prompt.index(STORY) < prompt.index(summary) < prompt.index("사용자 요청:")
+
+
+def test_conversation_summary_omitted_when_empty():
+    prompt = get_story_modification_prompt(STORY, "배경을 겨울로 바꿔줘", "setting")
+
+    assert "대화 맥락:" not in prompt
+    assert "사용자 요청: 배경을 겨울로 바꿔줘" in prompt
@@ -0,0 +1,47 @@
+"""유사 요청 캐시 테스트"""
+
+from source.utils.similarity_cache import SimilarityCache, normalize_request_text
+
+STORY = [{"turn_number": 1, "result": "레몬가게 개업"}, {"turn_number": 2, "result": "비 오는 날"}]
+
+
+def test_normalization_drops_polite_endings_and_punctuation():
+    assert normalize_request_text("주인공을 여성 캐릭터로 바꿔주세요!") == normalize_request_text("주인공을 여자로 바꿔줘")
+
+
+def test_exact_hit_for_rephrased_request():
+    cache = SimilarityCache()
+    cache.set(STORY, "주인공 이름을 민수로 바꾸고 성격을 밝게 해줘", "edited")
+
+    assert cache.get(STORY, "주인공 이름을 민수로 바꾸고 성격을 밝게 해주세요!") == ("exact", "edited")
+
+
+def test_similar_hit_for_near_duplicate_request():
+    cache = SimilarityCache()
+    cache.set(STORY, "주인공 이름을 민수로 바꾸고 성격을 밝게 해줘", "edited")
+
+    assert cache.get(STORY, "주인공 이름을 민수로 바꾸고 성격은 더 밝게 해줘") == ("similar", "edited")
+    assert cache.get(STORY, "배경을 바다로 바꿔줘") == (None, None)
+
+
+def test_different_numbers_or_story_miss():
+    cache = SimilarityCache()
+    cache.set(STORY, "3턴 뉴스를 밝게 바꿔줘", "turn3")
+
+    assert cache.get(STORY, "4턴 뉴스를 밝게 바꿔줘") == (None, None)
+    assert cache.get(STORY, "3턴 뉴스를 밝게 바꿔주세요") == ("exact", "turn3")
+    assert cache.get(STORY[:1], "3턴 뉴스를 밝게 바꿔줘") == (None, None)
+    assert cache.get(STORY, "3턴 뉴스를 밝게 바꿔줘", edit_type="dialogue_modification") == (None, None)
+
+
+def test_expired_and_evicted_entries_miss():
+    cache = SimilarityCache(max_entries=1)
+    cache.set(STORY, "배경을 바다로 바꿔줘", "sea", ttl=-1)
+    assert cache.get(STORY, "배경을 바다로 바꿔줘") == (None, None)
+
+    cache.set(STORY, "배경을 숲으로 바꿔줘", "forest")
+    cache.set(STORY, "배경을 사막으로 바꿔줘", "desert")
+    assert cache.get(STORY, "배경을 숲으로 바꿔줘") == (None, None)
+    stats = cache.get_stats()
+    assert stats["entries"] == 1
+    assert stats["evictions"] == 2
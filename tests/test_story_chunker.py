@@ -0,0 +1,136 @@
+"""스토리 분할 편집 테스트"""
+
+import asyncio
+import copy
+import json
+import sys
+import types
+
+from source.utils import token_budget
+from source.utils.stream_bridge import StreamBridge
+from source.utils.keyword_engine import keyword_engine
+from source.utils.story_chunker import (
+    edit_story_in_chunks, is_global_edit, merge_chunks, should_chunk, split_story_into_chunks
+)
+
+
+def make_story(turn_count):
+    story = []
+    for index in range(turn_count):
+        story.append({
+            "turn_number": index + 1,
+            "result": f"{index + 1}턴 결과",
+            "stocks": [
+                {"name": "레몬가게", "before_value": 100 + index, "current_value": 101 + index}
+            ]
+        })
+    return story
+
+
+def test_split_keeps_turn_boundaries():
+    story = make_story(5)
+    chunks = split_story_into_chunks(story, max_chunk_tokens=1)
+
+    assert [start for start, _ in chunks] == [0, 1, 2, 3, 4]
+    assert [turn for _, turns in chunks for turn in turns] == story
+
+
+def test_global_edit_comes_from_keyword_scan():
+    assert is_global_edit("처음부터 끝까지 말투를 밝게 바꿔줘")
+    assert is_global_edit("모든 턴의 뉴스를 바꿔줘", keyword_engine.scan("모든 턴의 뉴스를 바꿔줘"))
+    assert not is_global_edit("3턴 뉴스만 바꿔줘")
+
+
+def test_downgrade_policy_routes_over_budget_story_to_chunks(monkeypatch):
+    story = make_story(40)
+    monkeypatch.setattr(
+        "source.utils.story_chunker.get_chunk_settings",
+        lambda: {"threshold_tokens": 10 ** 6, "max_chunk_tokens": 500, "max_concurrent": 2, "fanout_concurrent": 2}
+    )
+    settings = {"prompt_token_budget": 1200, "policy": "downgrade"}
+    monkeypatch.setattr(token_budget, "get_budget_settings", lambda: settings)
+    assert should_chunk(story)
+
+    settings["policy"] = "reject"
+    assert not should_chunk(story)
+
+
+def test_merge_fixes_turn_numbers_and_value_continuity():
+    story = make_story(3)
+    edited = copy.deepcopy(story)
+    edited[1]["turn_number"] = 7
+    edited[2]["stocks"][0]["before_value"] = 999
+
+    merged, issues = merge_chunks(story, [(0, edited[:2]), (2, edited[2:])])
+
+    assert [turn["turn_number"] for turn in merged] == [1, 2, 3]
+    assert merged[2]["stocks"][0]["before_value"] == merged[1]["stocks"][0]["current_value"]
+    assert len(issues) == 2
+
+
+def test_merge_reports_missing_turns():
+    story = make_story(3)
+    merged, issues = merge_chunks(story, [(0, story[:2])])
+
+    assert len(merged) == 2
+    assert any("턴 수" in issue for issue in issues)
+
+
+def test_merge_does_not_mutate_inputs():
+    story = make_story(4)
+    story[3]["stocks"][0]["before_value"] = 999
+    chunks = [(0, story[:2]), (2, story[2:])]
+    before = copy.deepcopy(story)
+
+    merged, _ = merge_chunks(story, chunks)
+
+    assert story == before
+    assert merged[3]["stocks"][0]["before_value"] == merged[2]["stocks"][0]["current_value"]
+
+
+def install_echo_llm(monkeypatch):
+    async def generate_game_data_async(llm, prompt_template, prompt, **kwargs):
+        # 수정할 턴 데이터를 그대로 돌려주는 LLM 대역
+        turns_json = prompt.split("[수정할 턴 데이터]\n", 1)[1].split("\n\n", 1)[0]
+        return turns_json
+
+    fake_handler = types.ModuleType("source.models.llm_handler")
+    fake_handler.generate_game_data_async = generate_game_data_async
+    monkeypatch.setitem(sys.modules, "source.models.llm_handler", fake_handler)
+    monkeypatch.setattr(
+        "source.utils.story_chunker.get_chunk_settings",
+        lambda: {"threshold_tokens": 0, "max_chunk_tokens": 1, "max_concurrent": 2, "fanout_concurrent": 2}
+    )
+
+
+def test_targeted_chunk_edit_leaves_input_story_unchanged(monkeypatch):
+    story = make_story(4)
+    story[3]["stocks"][0]["before_value"] = 999
+    before = copy.deepcopy(story)
+    install_echo_llm(monkeypatch)
+
+    result, _ = asyncio.run(edit_story_in_chunks(None, None, story, "3턴 수정", "지침", target_turn=3))
+
+    assert story == before
+    assert json.loads(result)[3]["stocks"][0]["before_value"] == story[2]["stocks"][0]["current_value"]
+
+
+def test_chunk_edit_pushes_each_finished_chunk_to_bridge(monkeypatch):
+    story = make_story(3)
+    install_echo_llm(monkeypatch)
+    bridge = StreamBridge()
+
+    async def run():
+        try:
+            return await edit_story_in_chunks(None, None, story, "전체 수정", "지침", on_turns=bridge.push_turns)
+        finally:
+            bridge.close()
+
+    result, _ = asyncio.run(run())
+    frames = list(bridge.frames())
+
+    assert frames[-1].done
+    pushed = [turn["turn_number"] for frame in frames for turn in frame.new_turns]
+    assert sorted(pushed) == [1, 2, 3]
+    assert bridge.get_stats()["turns"] == 3
+    assert len(json.loads(result)) == 3
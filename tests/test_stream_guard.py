@@ -0,0 +1,61 @@
+"""스트리밍 턴 스캐너 테스트"""
+
+import json
+
+from source.utils.stream_guard import JsonTurnScanner
+
+TURNS = [
+    {"turn_number": 1, "result": "중괄호 } 와 대괄호 ] 가 든 문장", "stocks": [{"name": "레몬가게", "tags": ["a", "b"]}]},
+    {"turn_number": 2, "result": "따옴표 \" 와 역슬래시 \\ 로 끝나는 값\\", "news": {"text": "{\"중첩\": [1, 2]}"}},
+    {"turn_number": 3, "result": "", "stocks": []}
+]
+STREAM = "```json\n" + json.dumps(TURNS, ensure_ascii=False, indent=2) + "\n```\n추가 설명 { ]"
+
+
+def scan(chunks):
+    scanner = JsonTurnScanner()
+    turns = []
+    for chunk in chunks:
+        turns.extend(json.loads(text) for text in scanner.feed(chunk))
+    return scanner, turns
+
+
+def test_single_chunk_yields_top_level_turns_only():
+    scanner, turns = scan([STREAM])
+
+    assert turns == TURNS
+    assert scanner.closed
+
+
+def test_every_split_point_gives_same_turns():
+    # 이스케이프 문자, 따옴표, 괄호 바로 앞뒤에서 청크가 나뉘어도 결과가 같아야 함
+    for split in range(1, len(STREAM)):
+        _, turns = scan([STREAM[:split], STREAM[split:]])
+        assert turns == TURNS, split
+
+
+def test_one_character_chunks():
+    scanner, turns = scan(list(STREAM))
+
+    assert turns == TURNS
+    assert scanner.closed
+
+
+def test_partial_turn_and_depth_tracking():
+    scanner = JsonTurnScanner()
+    assert scanner.feed('설명 [{"turn_number": 1, "stocks": [{"name": "{"}') == []
+    assert scanner.partial_turn() == '{"turn_number": 1, "stocks": [{"name": "{"}'
+
+    completed = scanner.feed(']}, {"turn_number": 2')
+    assert [json.loads(text) for text in completed] == [{"turn_number": 1, "stocks": [{"name": "{"}]}]
+    assert scanner.partial_turn() == '{"turn_number": 2'
+    assert not scanner.closed
+
+
+def test_text_after_closing_bracket_is_ignored():
+    scanner = JsonTurnScanner()
+    scanner.feed('[{"turn_number": 1}]')
+
+    assert scanner.closed
+    assert scanner.feed('{"turn_number": 2}') == []
+    assert scanner.partial_turn() == ""
@@ -0,0 +1,58 @@
+"""프롬프트 예산 테스트"""
+
+import json
+
+import pytest
+
+from source.utils import token_budget
+from source.utils.token_budget import (
+    PromptBudgetExceeded, estimate_tokens, fit_prompt_to_budget, story_exceeds_budget
+)
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    settings = {
+        "prompt_token_budget": 2000, "policy": "downgrade",
+        "output_token_ratio": 1.5, "output_token_margin": 512
+    }
+    monkeypatch.setattr(token_budget, "get_budget_settings", lambda: settings)
+    return settings
+
+
+def over_budget_count():
+    return token_budget.prompt_budget_decisions_total.get(action="over_budget")
+
+
+def test_estimate_counts_whitespace():
+    story = [{"turn_number": 1, "result": "abc"}]
+    indented = json.dumps(story, indent=2)
+    compact = json.dumps(story, separators=(',', ':'))
+    assert estimate_tokens(indented) > estimate_tokens(compact)
+
+
+def test_story_exceeds_budget_only_for_downgrade(budget):
+    assert story_exceeds_budget(1500)
+    assert not story_exceeds_budget(500)
+    budget["policy"] = "reject"
+    assert not story_exceeds_budget(1500)
+
+
+def test_downgrade_uses_compact_story(budget):
+    story = [{"turn_number": index, "result": "x" * 10} for index in range(150)]
+    indented = json.dumps(story, indent=8)
+    budget["prompt_token_budget"] = estimate_tokens(json.dumps(story, separators=(',', ':'))) + 10
+    before = over_budget_count()
+
+    prompt, decision = fit_prompt_to_budget(lambda text: text, indented, story)
+
+    assert decision["downgraded"] and decision["allowed"]
+    assert "\n" not in prompt
+    # 재검사는 기록하지 않으므로 초과 판정은 한 번만 집계
+    assert over_budget_count() - before == 1
+
+
+def test_compact_story_over_budget_is_rejected(budget):
+    story = [{"result": "x" * 10000}]
+    with pytest.raises(PromptBudgetExceeded):
+        fit_prompt_to_budget(lambda text: text, json.dumps(story, separators=(',', ':')), story)